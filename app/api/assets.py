@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from app.core.assets import IMMUTABLE, REVALIDATE, Asset, AssetStore, choose_encoding, etag_matches
+
+router = APIRouter()
+store = AssetStore("static")
+
+
+def asset_response(request: Request, asset: Asset, cache_control: str) -> Response:
+    encoding = choose_encoding(asset, request.headers.get("accept-encoding"))
+    etag = asset.etag(encoding)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if len(asset.variants) > 1:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    body = asset.variants[encoding]
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(body))
+        body = b""
+    return Response(body, media_type=asset.media_type, headers=headers)
+
+
+@router.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+async def index(request: Request):
+    """返回主页面（静态资源引用已改写为指纹 URL）"""
+    asset = store.index()
+    if asset is None:
+        return Response("index.html not found", status_code=404)
+    return asset_response(request, asset, REVALIDATE)
+
+
+@router.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(request: Request, path: str):
+    found = store.lookup(path)
+    if found is None:
+        return Response("Not Found", status_code=404)
+    asset, fingerprinted = found
+    return asset_response(request, asset, IMMUTABLE if fingerprinted else REVALIDATE)
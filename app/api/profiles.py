@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.profiler import profiler
+
+router = APIRouter()
+
+
+def _check(token: Optional[str]):
+    # 未开启剖析时不暴露接口
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.authorized(token):
+        raise HTTPException(status_code=401, detail="Invalid profile token")
+
+
+def _record(record_id: int, token: Optional[str]):
+    _check(token)
+    record = profiler.get(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found (evicted from ring buffer?)")
+    return record
+
+
+@router.get("/api/debug/profiles")
+def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """最近的剖析记录（新的在前）：耗时、C 分析器各阶段耗时、最耗时的函数"""
+    _check(x_profile_token)
+    return {"sample_rate": profiler.sample_rate, "profiles": profiler.records()}
+
+
+@router.get("/api/debug/profiles/{record_id}.pstats")
+def download_pstats(record_id: int, x_profile_token: Optional[str] = Header(None)):
+    record = _record(record_id, x_profile_token)
+    return Response(
+        profiler.pstats_bytes(record),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{record_id}.pstats"'},
+    )
+
+
+@router.get("/api/debug/profiles/{record_id}.folded")
+def download_collapsed(record_id: int, x_profile_token: Optional[str] = Header(None)):
+    """折叠栈，可直接交给 flamegraph.pl 或 speedscope"""
+    record = _record(record_id, x_profile_token)
+    return PlainTextResponse(profiler.collapsed(record))
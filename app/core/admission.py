@@ -0,0 +1,184 @@
+# 准入控制：按生成模式分快/慢两条通道，各自限制并发与排队长度，可选按客户端令牌桶限流
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+# 生成模式 -> 通道：auto/algorithm 走纯算法，毫秒级完成；llm/hybrid 要等 LLM，耗时以秒计
+MODE_LANES = {"algorithm": "fast", "auto": "fast", "llm": "slow", "hybrid": "slow"}
+
+
+class Rejected(Exception):
+    """请求被拒绝：status 为 429（客户端超速）或 503（通道饱和），retry_after 为建议重试秒数"""
+
+    def __init__(self, message: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """取一个令牌：成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float):
+        """
+        :param concurrency: 同时执行的请求上限
+        :param max_queue: 排队等待的请求上限，超出直接 503
+        :param queue_timeout: 排队超过该秒数仍未轮到则 503
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._sem: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits: deque = deque(maxlen=1000)  # 最近的排队耗时（秒）
+        self.service: deque = deque(maxlen=100)  # 最近的执行耗时（秒），用于估算 Retry-After
+
+    def _retry_after(self) -> int:
+        avg = sum(self.service) / len(self.service) if self.service else 1.0
+        return max(1, math.ceil(avg * (self.waiting + 1) / self.concurrency))
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        # 按计数判断而不是 _sem.locked()：同一轮事件循环中到达的一批请求都还没真正 acquire，
+        # locked() 仍为 False，排队上限会被整批绕过
+        if self.active + self.waiting >= self.concurrency + self.max_queue:
+            self.rejected += 1
+            raise Rejected(f"{self.name} 通道繁忙，请稍后重试", 503, self._retry_after())
+        t0 = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Rejected(f"{self.name} 通道排队超时，请稍后重试", 503, self._retry_after())
+        finally:
+            self.waiting -= 1
+        started = time.monotonic()
+        self.waits.append(started - t0)
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.service.append(time.monotonic() - started)
+            self._sem.release()
+
+    def _wait_percentile(self, p: float) -> float:
+        if not self.waits:
+            return 0.0
+        ordered = sorted(self.waits)
+        return round(ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] * 1000, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_p50_ms": self._wait_percentile(50),
+            "wait_p99_ms": self._wait_percentile(99),
+        }
+
+
+class AdmissionController:
+    def __init__(self, lanes: Dict[str, Lane], client_rate: float = 0, client_burst: int = 10, max_clients: int = 10000):
+        """
+        :param client_rate: 每个客户端在每条通道上的令牌补充速率（次/秒），0 表示不限流
+        """
+        self.lanes = lanes
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.enabled = True
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.rate_limited = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        lanes = {
+            "fast": Lane(
+                "fast",
+                concurrency=int(os.getenv("ADMIT_FAST_CONCURRENCY", "64")),
+                max_queue=int(os.getenv("ADMIT_FAST_QUEUE", "256")),
+                queue_timeout=float(os.getenv("ADMIT_FAST_QUEUE_TIMEOUT", "2")),
+            ),
+            "slow": Lane(
+                "slow",
+                concurrency=int(os.getenv("ADMIT_SLOW_CONCURRENCY", "8")),
+                max_queue=int(os.getenv("ADMIT_SLOW_QUEUE", "32")),
+                queue_timeout=float(os.getenv("ADMIT_SLOW_QUEUE_TIMEOUT", "30")),
+            ),
+        }
+        controller = cls(
+            lanes,
+            client_rate=float(os.getenv("ADMIT_CLIENT_RATE", "0")),
+            client_burst=int(os.getenv("ADMIT_CLIENT_BURST", "10")),
+        )
+        controller.enabled = os.getenv("ADMIT_ENABLED", "1") != "0"
+        return controller
+
+    def lane_for(self, mode: str) -> Lane:
+        return self.lanes[MODE_LANES.get(mode.strip().lower(), "fast")]
+
+    def check_rate(self, lane: Lane, client: Optional[str]):
+        """按 (客户端, 通道) 令牌桶限流，超速抛出 429"""
+        if not self.enabled or self.client_rate <= 0 or not client:
+            return
+        key = (client, lane.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        wait = bucket.take()
+        if wait > 0:
+            self.rate_limited += 1
+            raise Rejected("请求过于频繁，请稍后重试", 429, max(1, math.ceil(wait)))
+
+    @asynccontextmanager
+    async def slot(self, lane: Lane):
+        """占用通道的一个执行名额（未启用时直接放行）"""
+        if not self.enabled:
+            yield
+            return
+        async with lane.slot():
+            yield
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate_limited": self.rate_limited,
+            "lanes": {name: lane.snapshot() for name, lane in self.lanes.items()},
+        }
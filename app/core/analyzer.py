@@ -3,14 +3,89 @@ import ctypes
 import json
 import os
 import platform
+import re
 import sys
-from typing import Dict, Any
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.profiler import note_native, profiler
+from app.core.py_analyzer import PROJECT_ROOT, PyAnalyzer, compile_overlay, parse_normalization
+
+# 要求的动态库导出接口版本（与 c_modules/include/analyzer_common.h 的 ANALYZER_ABI_VERSION 一致）
+ABI_VERSION = 1
+
+# 单次分析的预算：超出时 C 端提前结束并在结果中标记 truncated（<= 0 表示不限）
+# 词频表的哈希桶数固定，不同词过多时查找退化，20 万个不同词约 0.6 秒
+MAX_REQUEST_BYTES = int(float(os.getenv("ANALYZER_MAX_REQUEST_MB", "128")) * 1024 * 1024)
+MAX_UNIQUE_TOKENS = int(os.getenv("ANALYZER_MAX_UNIQUE_TOKENS", "200000"))
+
+# 分词前的文本规范化（抓取文本常见的全角字母数字、繁体字、零宽字符、特殊空白、非 ASCII 大写字母）：
+# 逗号分隔的 width / t2s / invisible / case，或 all；默认关闭。输出的字节区间始终是原文中的位置
+NORMALIZE = parse_normalization(os.getenv("ANALYZER_NORMALIZE", ""))
+
+# top_words 的排序方式（与 C 端 RankMode 一致）
+RANK_MODES = {"freq": 0, "tfidf": 1}
+# 生成提示词用的分析结果按 TF-IDF 排序：生成器只取前 10~15 个词，常见词不应挤掉有区分度的词
+KEYWORD_RANK = os.getenv("ANALYZER_KEYWORD_RANK", "tfidf")
+
+# 自定义词表（叠加词典）：按名称缓存，首次使用时从 <目录>/<名称>.txt 加载，也可通过 add_lexicon 注册
+LEXICON_DIR = os.getenv("ANALYZER_LEXICON_DIR", os.path.join(PROJECT_ROOT, "dict", "overlays"))
+MAX_LEXICONS_PER_REQUEST = 8  # 与 C 端 MAX_OVERLAYS 一致
+_LEXICON_NAME_RE = re.compile(r"[\w-]{1,64}")
+
+
+class AnalyzerMemoryStats(ctypes.Structure):
+    """与 memstat.h 中的 AnalyzerMemoryStats 一致"""
+
+    _fields_ = [
+        (name, ctypes.c_longlong)
+        for name in (
+            "dict_bytes",
+            "dict_peak_bytes",
+            "live_contexts",
+            "total_contexts",
+            "context_peak_bytes",
+            "last_context_peak_bytes",
+            "truncated_contexts",
+            "limit_bytes",
+            "limit_unique_tokens",
+        )
+    ]
+
+
+class _Lexicon:
+    """已编译的自定义词表；refs 为正在使用它的分析数，被删除或替换后由最后一个使用者释放"""
+
+    __slots__ = ("handle", "count", "refs", "retired")
+
+    def __init__(self, handle, count: int):
+        self.handle = handle  # C 端词表 ID，或纯 Python 实现编译的词表
+        self.count = count
+        self.refs = 0
+        self.retired = False
+
+    def retire(self) -> bool:
+        """从注册表移除（调用方持有锁），返回是否可以立即释放"""
+        self.retired = True
+        return self.refs == 0
 
 
 class TextAnalyzer:
     def __init__(self):
         self.lib = None
-        self._load_library()
+        self.fallback = None
+        self._lexicons: Dict[str, _Lexicon] = {}
+        self._lexicon_lock = threading.Lock()
+        # ANALYZER_ENGINE=python 强制使用纯 Python 实现（排查问题或没有编译环境时）
+        if os.getenv("ANALYZER_ENGINE", "c").lower() != "python":
+            self._load_library()
+        if not self.lib:
+            self.fallback = PyAnalyzer(max_unique_tokens=MAX_UNIQUE_TOKENS, normalize=NORMALIZE)
+            print("[Analyzer] Using pure-Python analyzer")
+
+    @property
+    def engine(self) -> str:
+        return "c" if self.lib else "python"
 
     def _load_library(self):
         system = platform.system()
@@ -53,48 +128,233 @@ class TextAnalyzer:
             if self.lib:
                 break
 
+        if self.lib and not self._check_abi():
+            self.lib = None
+            return
         if self.lib:
-            self.lib.analyze_text.argtypes = [
-                ctypes.c_char_p,
+            self.lib.analyze_text_free.argtypes = [ctypes.c_void_p]
+            self.lib.analyze_text_free.restype = None
+            self.lib.analyze_text_ranked.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
+            self.lib.analyze_text_ranked.restype = ctypes.c_void_p
+            # 原生内存统计与单请求预算
+            self.lib.Analyzer_GetMemoryStats.argtypes = [ctypes.POINTER(AnalyzerMemoryStats)]
+            self.lib.Analyzer_GetMemoryStats.restype = None
+            self.lib.Analyzer_SetLimits.argtypes = [ctypes.c_longlong, ctypes.c_int]
+            self.lib.Analyzer_SetLimits.restype = None
+            self.lib.Analyzer_SetLimits(MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS)
+            # 自定义词表叠加
+            self.lib.analyze_text_overlay.argtypes = [
                 ctypes.c_char_p,
                 ctypes.c_int,
+                ctypes.c_int,
+                ctypes.POINTER(ctypes.c_int),
+                ctypes.c_int,
             ]
-            self.lib.analyze_text.restype = ctypes.c_int
+            self.lib.analyze_text_overlay.restype = ctypes.c_void_p
+            self.lib.Analyzer_CompileOverlay.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
+            self.lib.Analyzer_CompileOverlay.restype = ctypes.c_int
+            self.lib.Analyzer_ReleaseOverlay.argtypes = [ctypes.c_int]
+            self.lib.Analyzer_ReleaseOverlay.restype = ctypes.c_int
+            # 剖析模式开启时结果附带各阶段耗时（"profile"），由 analyze_bytes 取出交给剖析记录
+            self.lib.Analyzer_SetProfiling.argtypes = [ctypes.c_int]
+            self.lib.Analyzer_SetProfiling.restype = None
+            self.lib.Analyzer_SetProfiling(1 if profiler.enabled else 0)
+            self.lib.Analyzer_SetNormalization.argtypes = [ctypes.c_int]
+            self.lib.Analyzer_SetNormalization.restype = None
+            self.lib.Analyzer_SetNormalization(NORMALIZE)
         else:
             print(
                 f"[Analyzer] ❌ Error: Could not find any of {lib_names} in search paths."
             )
             print(f"Searched: {search_dirs}")
 
+    def _check_abi(self) -> bool:
+        """动态库的导出接口版本必须与 ABI_VERSION 一致，否则（旧版本或未重新编译）改用纯 Python 实现"""
+        get_version = getattr(self.lib, "Analyzer_AbiVersion", None)
+        version = None
+        if get_version is not None:
+            get_version.argtypes = []
+            get_version.restype = ctypes.c_int
+            version = get_version()
+        if version != ABI_VERSION:
+            print(f"[Analyzer] ⚠️ C library ABI version {version}, expected {ABI_VERSION}; please rebuild c_modules")
+            return False
+        return True
+
     def is_loaded(self) -> bool:
         return self.lib is not None
 
-    def analyze(self, text: str) -> Dict[str, Any]:
-        """调用 C 核心进行分析"""
+    def memory_stats(self) -> Optional[Dict[str, int]]:
+        """C 端的内存统计；纯 Python 模式返回 None"""
+        if not self.lib:
+            return None
+        stats = AnalyzerMemoryStats()
+        self.lib.Analyzer_GetMemoryStats(ctypes.byref(stats))
+        return {name: getattr(stats, name) for name, _ in AnalyzerMemoryStats._fields_}
+
+    # ---------- 自定义词表 ----------
+
+    def add_lexicon(self, name: str, words: str) -> int:
+        """
+        编译并注册自定义词表（每行 "词 [词频]"，格式同分词词典），同名时替换，返回词条数。
+        分析时与全局分词词典一起做最长匹配，不修改也不锁定全局词典；只有以非 ASCII 字符开头的词会被匹配
+        """
+        if not _LEXICON_NAME_RE.fullmatch(name):
+            raise ValueError(f"invalid lexicon name: {name}")
+        entry = self._compile_lexicon(words)
+        self._install_lexicon(name, entry)
+        print(f"[Analyzer] Lexicon '{name}' loaded: {entry.count} words")
+        return entry.count
+
+    def remove_lexicon(self, name: str) -> bool:
+        """删除词表；正在进行的分析不受影响，结束后再释放"""
+        with self._lexicon_lock:
+            old = self._lexicons.pop(name, None)
+            drop = old is not None and old.retire()
+        if drop:
+            self._release(old)
+        return old is not None
+
+    def lexicons(self) -> Dict[str, int]:
+        """已加载的词表：名称 -> 词条数"""
+        with self._lexicon_lock:
+            return {name: entry.count for name, entry in self._lexicons.items()}
+
+    def _compile_lexicon(self, words: str) -> "_Lexicon":
+        if not self.lib:
+            handle, count = compile_overlay(words)
+            return _Lexicon(handle, count)
+        count = ctypes.c_int(0)
+        handle = self.lib.Analyzer_CompileOverlay(words.encode("utf-8"), ctypes.byref(count))
+        if handle < 0:
+            raise MemoryError("failed to compile lexicon")
+        return _Lexicon(handle, count.value)
+
+    def _install_lexicon(self, name: str, entry: "_Lexicon", acquire: bool = False):
+        """注册（替换同名词表）；acquire 时同时为调用方持有一个引用"""
+        with self._lexicon_lock:
+            old = self._lexicons.get(name)
+            self._lexicons[name] = entry
+            if acquire:
+                entry.refs += 1
+            drop = old is not None and old.retire()
+        if drop:
+            self._release(old)
+
+    def _release(self, entry: "_Lexicon"):
+        if self.lib:
+            self.lib.Analyzer_ReleaseOverlay(entry.handle)
+
+    def _acquire_lexicons(self, names: Sequence[str]) -> List["_Lexicon"]:
+        """
+        名称 -> 已编译的词表，每个持有一个引用直到 _put_lexicons，期间被删除或替换也不会释放；
+        未注册时尝试从 LEXICON_DIR 加载，不存在则 ValueError
+        """
+        names = list(dict.fromkeys(names))
+        if len(names) > MAX_LEXICONS_PER_REQUEST:
+            raise ValueError(f"at most {MAX_LEXICONS_PER_REQUEST} lexicons per request")
+        acquired: List[_Lexicon] = []
+        try:
+            for name in names:
+                with self._lexicon_lock:
+                    entry = self._lexicons.get(name)
+                    if entry is not None:
+                        entry.refs += 1
+                if entry is None:
+                    path = os.path.join(LEXICON_DIR, f"{name}.txt")
+                    if not _LEXICON_NAME_RE.fullmatch(name) or not os.path.isfile(path):
+                        raise ValueError(f"unknown lexicon: {name}")
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        entry = self._compile_lexicon(f.read())
+                    self._install_lexicon(name, entry, acquire=True)
+                    print(f"[Analyzer] Lexicon '{name}' loaded: {entry.count} words")
+                acquired.append(entry)
+        except BaseException:
+            self._put_lexicons(acquired)
+            raise
+        return acquired
+
+    def _put_lexicons(self, entries: Sequence["_Lexicon"]):
+        with self._lexicon_lock:
+            for entry in entries:
+                entry.refs -= 1
+            drop = [e for e in entries if e.retired and e.refs == 0]
+        for entry in drop:
+            self._release(entry)
+
+    # ---------- 分析 ----------
+
+    def analyze(
+        self, text: str, top_n: int = 10, rank: str = "freq", lexicons: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        调用 C 核心进行分析
+        :param top_n: 返回的高频词数量，<= 0 表示返回全部词频（不排序）
+        :param rank: "freq" 按词频排序；"tfidf" 按 词频 × IDF 排序（分词词典词频作背景语料），词条附带 score
+        :param lexicons: 叠加的自定义词表名称
+        """
         if not self.lib:
-            # 降级模式（如果C库没加载成功，返回一个模拟数据，防止崩坏）
-            return {
-                "total_chars": len(text),
-                "richness": 0.5,
-                "top_words": [{"word": x, "freq": 1} for x in text[:10]],
-                "error": "C library not loaded",
-            }
+            # 降级模式：纯 Python 实现，输出与 C 模块一致（速度较慢）
+            entries = self._acquire_lexicons(lexicons) if lexicons else []
+            try:
+                return self.fallback.analyze(text, top_n, rank, [e.handle for e in entries])
+            finally:
+                self._put_lexicons(entries)
 
-        # 准备缓冲区
-        buf_size = 1024 * 1024  # 1MB buffer
-        result_buffer = ctypes.create_string_buffer(buf_size)
+        return self.analyze_bytes(text.encode("utf-8"), top_n, rank, lexicons)
 
-        # 编码文本
-        text_bytes = text.encode("utf-8")
+    def analyze_bytes(
+        self, data, top_n: int = 10, rank: str = "freq", lexicons: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        直接分析 UTF-8 字节，省去 str 与 bytes 之间的往返编解码
+        :param data: bytes，或以 \\0 结尾的可写缓冲区（如 ACCESS_COPY 的 mmap），C 端不会复制
+        """
+        if rank not in RANK_MODES:
+            raise ValueError(f"unknown rank mode: {rank}")
+        entries = self._acquire_lexicons(lexicons) if lexicons else []
+        try:
+            overlays = [e.handle for e in entries]
+            if not self.lib:
+                text = bytes(data).decode("utf-8", errors="replace")
+                return self.fallback.analyze(text, top_n, rank, overlays)
 
-        # 调用 C 函数
-        ret = self.lib.analyze_text(text_bytes, result_buffer, buf_size)
+            # 缓冲区对象（mmap）取地址后按 C 字符串传入
+            view = None
+            if isinstance(data, bytes):
+                content = data
+            else:
+                view = ctypes.c_char.from_buffer(data)
+                content = ctypes.cast(ctypes.addressof(view), ctypes.c_char_p)
 
-        if ret == 0:
             try:
-                json_str = result_buffer.value.decode("utf-8")
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                return {"error": "JSON decode failed"}
-        else:
+                raw = self._call(content, top_n, RANK_MODES[rank], overlays)
+            finally:
+                # 释放对 mmap 的引用，否则 mmap 无法关闭
+                del content, view
+        finally:
+            self._put_lexicons(entries)
+
+        if raw is None:
             return {"error": "Analysis failed in C module"}
+        try:
+            result = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return {"error": "JSON decode failed"}
+        if "profile" in result:
+            note_native(result.pop("profile"))
+        return result
+
+    def _call(self, content, top_n: int, rank: int = 0, overlays: Sequence[int] = ()) -> Optional[bytes]:
+        """调用 C 函数，返回结果 JSON 字节串，失败返回 None"""
+        if overlays:
+            ids = (ctypes.c_int * len(overlays))(*overlays)
+            ptr = self.lib.analyze_text_overlay(content, top_n, rank, ids, len(overlays))
+        else:
+            ptr = self.lib.analyze_text_ranked(content, top_n, rank)
+        if not ptr:
+            return None
+        try:
+            return ctypes.string_at(ptr)
+        finally:
+            self.lib.analyze_text_free(ptr)
@@ -0,0 +1,199 @@
+# 静态资源：启动时读入内存并计算内容哈希，预压缩 gzip / brotli 版本，
+# 按 Accept-Encoding 协商返回；带指纹的 URL（name.<hash>.ext）可长期缓存，index.html 中的引用会被改写为指纹 URL
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli  # 可选依赖：未安装时只提供 gzip
+except ImportError:
+    brotli = None
+
+HASH_LEN = 10
+MIN_COMPRESS_SIZE = 512
+IMMUTABLE = "public, max-age=31536000, immutable"
+# 未带指纹的 URL 每次都用 ETag 校验
+REVALIDATE = "no-cache"
+COMPRESSIBLE = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+)
+# 按优先级排列，q 值相同时优先 br
+ENCODINGS = ("br", "gzip")
+BROTLI_QUALITY = int(os.getenv("ASSET_BROTLI_QUALITY", "9"))
+# 检查文件是否变化的最小间隔（秒），0 表示只在启动时加载
+CHECK_INTERVAL = float(os.getenv("ASSET_CHECK_INTERVAL", "2"))
+
+_REF_RE = re.compile(r'((?:href|src)=")/static/([^"?#]+)(")')
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+mimetypes.add_type("application/javascript", ".js")
+
+
+class Asset:
+    """一个静态文件的全部变体：原文 + 预压缩版本"""
+
+    def __init__(self, rel: str, body: bytes, mtime: float):
+        self.rel = rel
+        self.mtime = mtime
+        self.digest = hashlib.sha256(body).hexdigest()[:HASH_LEN]
+        self.media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type.endswith(("javascript", "json")):
+            self.media_type += "; charset=utf-8"
+        base, ext = os.path.splitext(rel)
+        self.fingerprinted = f"{base}.{self.digest}{ext}"
+        # 编码 -> 内容；identity 总是存在
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE and self.media_type.startswith(COMPRESSIBLE):
+            self._compress(body)
+
+    def _compress(self, body: bytes):
+        # mtime=0 保证同一内容每次压缩结果相同
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            self.variants["gzip"] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(br) < len(body):
+                self.variants["br"] = br
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding -> {编码: q}；未出现的编码视为不接受（identity 除外）"""
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(asset: Asset, header: Optional[str]) -> str:
+    accepted = parse_accept_encoding(header)
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding not in asset.variants:
+            continue
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 使用弱比较"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class AssetStore:
+    """
+    static/ 目录的内存镜像。lookup 同时接受原文件名和指纹文件名；
+    文件变化（mtime 改变、新增、删除）时在下一次请求前重新加载
+    """
+
+    def __init__(self, root: str = "static", check_interval: float = CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._assets: Dict[str, Asset] = {}
+        # 请求路径（原名或指纹名）-> (资源, 是否带指纹)
+        self._routes: Dict[str, Tuple[Asset, bool]] = {}
+        self._index: Optional[Asset] = None
+        self._checked = 0.0
+        self.reload()
+
+    def _scan(self) -> Dict[str, float]:
+        found = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                try:
+                    found[rel] = os.stat(path).st_mtime
+                except OSError:
+                    continue
+        return found
+
+    def reload(self) -> List[str]:
+        """重新加载有变化的文件，返回变化的文件列表"""
+        with self._lock:
+            self._checked = time.monotonic()
+            found = self._scan()
+            changed = [rel for rel, mtime in found.items() if rel not in self._assets or self._assets[rel].mtime != mtime]
+            removed = [rel for rel in self._assets if rel not in found]
+            if not changed and not removed and self._index is not None:
+                return []
+            assets = {rel: a for rel, a in self._assets.items() if rel in found}
+            for rel in changed:
+                try:
+                    with open(os.path.join(self.root, rel), "rb") as f:
+                        assets[rel] = Asset(rel, f.read(), found[rel])
+                except OSError as e:
+                    print(f"[Assets] Failed to load {rel}: {e}")
+            routes = {}
+            for rel, asset in assets.items():
+                routes[rel] = (asset, False)
+                routes[asset.fingerprinted] = (asset, True)
+            self._assets, self._routes = assets, routes
+            self._index = self._build_index()
+            size = sum(len(a.variants["identity"]) for a in assets.values())
+            print(f"[Assets] Loaded {len(changed)} changed / {len(assets)} files ({size / 1024:.0f} KB)")
+            return changed + removed
+
+    def _build_index(self) -> Optional[Asset]:
+        """把 index.html 中的 /static/xxx 引用改写为指纹 URL"""
+        asset = self._assets.get("index.html")
+        if asset is None:
+            return None
+
+        def fingerprint(m: re.Match) -> str:
+            target = self._assets.get(m.group(2))
+            if target is None:
+                return m.group(0)
+            return f"{m.group(1)}/static/{target.fingerprinted}{m.group(3)}"
+
+        html = _REF_RE.sub(fingerprint, asset.variants["identity"].decode("utf-8"))
+        return Asset("index.html", html.encode("utf-8"), asset.mtime)
+
+    def _maybe_reload(self):
+        if self.check_interval > 0 and time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+
+    def lookup(self, path: str) -> Optional[Tuple[Asset, bool]]:
+        self._maybe_reload()
+        return self._routes.get(path)
+
+    def index(self) -> Optional[Asset]:
+        self._maybe_reload()
+        return self._index
+
+    def snapshot(self) -> Dict[str, str]:
+        """原文件名 -> 指纹文件名"""
+        return {rel: a.fingerprinted for rel, a in self._assets.items()}
@@ -0,0 +1,259 @@
+# 离线批量生成：多进程分析 + 有界并发 LLM 调用，JSONL 流式输入/输出，支持断点续跑
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TextIO
+
+from app.core.payload import dumps, parse_fields, select_fields
+
+TEXT_EXTENSIONS = (".txt", ".md")
+LLM_MODES = ("llm", "hybrid")
+
+# 每个工作进程各自持有一份分析器/生成器（词典只在进程启动时加载一次）
+_worker: Dict[str, Any] = {}
+
+
+def iter_jobs(sources: Iterable[str], cwd: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """
+    把输入展开为任务 {"id", "path"} 或 {"id", "text"}：
+    - 目录：递归收集 .txt/.md 文件，id 为相对路径
+    - .jsonl 文件或 "-"（标准输入）：每行 {"id": ..., "text": ...} 或 {"id": ..., "path": ...}，缺少 id 时用行号；
+      相对 path 以 .jsonl 所在目录（标准输入为 cwd）为基准
+    - 其他文件：单个任务，id 为文件路径
+    任务中的 path 一律转为绝对路径，工作进程的当前目录不影响读取
+    """
+    cwd = cwd or os.getcwd()
+    for source in sources:
+        if source == "-" or source.endswith(".jsonl"):
+            stream = sys.stdin if source == "-" else open(os.path.join(cwd, source), encoding="utf-8")
+            base = cwd if source == "-" else os.path.dirname(os.path.join(cwd, source))
+            try:
+                for lineno, line in enumerate(stream, 1):
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    job = {"id": str(record.get("id", f"{source}:{lineno}"))}
+                    if "text" in record:
+                        job["text"] = record["text"]
+                    else:
+                        job["path"] = os.path.join(base, record["path"])
+                    yield job
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+        elif os.path.isdir(os.path.join(cwd, source)):
+            root = os.path.join(cwd, source)
+            paths = glob.glob(os.path.join(root, "**", "*"), recursive=True)
+            for path in sorted(p for p in paths if p.lower().endswith(TEXT_EXTENSIONS)):
+                yield {"id": os.path.relpath(path, root).replace(os.sep, "/"), "path": path}
+        else:
+            yield {"id": source, "path": os.path.join(cwd, source)}
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    读取已有输出中成功完成的 id（输出文件本身就是检查点）；
+    进程中途被杀留下的半行会被截掉，续跑时从完整行之后继续追加
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get("success"):
+            done.add(record["id"])
+    return done
+
+
+def _init_worker():
+    from app.core.analyzer import KEYWORD_RANK, TextAnalyzer
+    from app.core.generators import PromptGenerator
+
+    _worker["rank"] = KEYWORD_RANK
+    _worker["analyzer"] = TextAnalyzer()
+    _worker["generator"] = PromptGenerator(_worker["analyzer"])
+
+
+def _read_text(job: Dict[str, str]) -> str:
+    if "text" in job:
+        return job["text"]
+    with open(job["path"], encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def process_job(job: Dict[str, str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    工作进程中执行：读取 + 分析；算法模式直接生成提示词，
+    LLM 模式把原文和分析结果交回主进程，由主进程按并发上限调用 LLM
+    """
+    if not _worker:
+        _init_worker()
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {"id": job["id"]}
+    try:
+        text = _read_text(job)
+        analysis = _worker["analyzer"].analyze(text, rank=_worker["rank"])
+        if "error" in analysis:
+            raise RuntimeError(analysis["error"])
+        record["bytes"] = len(text.encode("utf-8"))
+        record["analysis"] = analysis
+        if options["mode"] in LLM_MODES:
+            record["text"] = text
+        else:
+            result = _worker["generator"].generate(text, analysis, **options)
+            record.update(prompt=result["prompt"], panels=result["panels"], success=True)
+    except Exception as e:
+        record.update(success=False, error=str(e))
+    record["analyze_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return record
+
+
+class Progress:
+    """定期在 stderr 打印进度与吞吐"""
+
+    def __init__(self, interval: float = 2.0, stream: TextIO = sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.done = self.failed = self.skipped = self.bytes = 0
+
+    def update(self, record: Dict[str, Any], force: bool = False):
+        if record:
+            self.done += 1
+            self.failed += 0 if record.get("success") else 1
+            self.bytes += record.get("bytes", 0)
+        now = time.perf_counter()
+        if force or now - self.last >= self.interval:
+            self.last = now
+            elapsed = max(now - self.start, 1e-9)
+            print(
+                f"[Batch] done={self.done} failed={self.failed} skipped={self.skipped} "
+                f"{self.done / elapsed:.1f} docs/s {self.bytes / elapsed / 1e6:.2f} MB/s elapsed={elapsed:.1f}s",
+                file=self.stream,
+                flush=True,
+            )
+
+
+class BatchRunner:
+    """
+    :param workers: 分析进程数，0 表示在当前进程内执行（调试/小批量）
+    :param llm_concurrency: 同时在途的 LLM 调用上限（llm/hybrid 模式）
+    :param options: 传给 PromptGenerator.generate 的参数（mode/panels/style/...）
+    :param analysis_fields: with_analysis 时输出哪些分析字段（语法同接口的 analysis_fields，默认全部）
+    """
+
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        llm_concurrency: int = 8,
+        options: Optional[Dict[str, Any]] = None,
+        with_analysis: bool = False,
+        analysis_fields: Optional[str] = None,
+        progress: Optional[Progress] = None,
+    ):
+        self.workers = workers
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.options = {"mode": "algorithm", **(options or {})}
+        self.with_analysis = with_analysis
+        parse_fields(analysis_fields)
+        self.analysis_fields = analysis_fields
+        self.progress = progress or Progress()
+        # 提交给进程池的任务上限：输入可以是无限长的流，不能一次性全部提交
+        self.max_pending = max(1, workers) * 4
+
+    def run(self, jobs: Iterable[Dict[str, str]], output_path: str, resume: bool = False) -> Progress:
+        done_ids = load_checkpoint(output_path) if resume else set()
+        is_llm = self.options["mode"] in LLM_MODES
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker) if self.workers > 0 else None
+        llm_pool = ThreadPoolExecutor(self.llm_concurrency, thread_name_prefix="batch-llm") if is_llm else None
+        llm_generator = None
+        if is_llm:
+            from app.core.generators import PromptGenerator
+
+            llm_generator = PromptGenerator()
+
+        analyzing: Set[Future] = set()
+        generating: Set[Future] = set()
+        job_iter = iter(jobs)
+        exhausted = False
+
+        with open(output_path, "ab" if resume else "wb") as out:
+
+            def emit(record: Dict[str, Any]):
+                if not self.with_analysis:
+                    record.pop("analysis", None)
+                elif "analysis" in record:
+                    record["analysis"] = select_fields(record["analysis"], self.analysis_fields)
+                out.write(dumps(record) + b"\n")
+                out.flush()
+                self.progress.update(record)
+
+            try:
+                while True:
+                    # LLM 阶段积压时暂停读取新任务，避免原文在内存中堆积
+                    while (
+                        not exhausted
+                        and len(analyzing) < self.max_pending
+                        and len(generating) < self.llm_concurrency * 2
+                    ):
+                        job = next(job_iter, None)
+                        if job is None:
+                            exhausted = True
+                            break
+                        if job["id"] in done_ids:
+                            self.progress.skipped += 1
+                            continue
+                        if pool is None:
+                            future: Future = Future()
+                            future.set_result(process_job(job, self.options))
+                        else:
+                            future = pool.submit(process_job, job, self.options)
+                        analyzing.add(future)
+                    if not analyzing and not generating:
+                        break
+                    finished, _ = wait(analyzing | generating, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        if future in analyzing:
+                            analyzing.discard(future)
+                            if "text" in record and "error" not in record:
+                                generating.add(llm_pool.submit(self._generate, llm_generator, record))
+                                continue
+                        else:
+                            generating.discard(future)
+                        emit(record)
+            finally:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+                if llm_pool is not None:
+                    llm_pool.shutdown(cancel_futures=True)
+        self.progress.update({}, force=True)
+        return self.progress
+
+    def _generate(self, generator, record: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        text = record.pop("text")
+        try:
+            result = generator.generate(text, record["analysis"], **self.options)
+            record.update(prompt=result["prompt"], panels=result["panels"])
+            # LLM 失败时生成器会降级为算法结果：保留降级结果，但记为失败，续跑时重试
+            if result["degraded"]:
+                record.update(success=False, error=f"LLM Error: {result['llm_error']}")
+            else:
+                record["success"] = True
+        except Exception as e:
+            record.update(success=False, error=str(e))
+        record["llm_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return record
@@ -0,0 +1,122 @@
+# 抽取式压缩：按分析结果（章节占比 + 高频词）给句子打分，在 token 预算内挑选原句
+import re
+from typing import Any, Dict, List
+
+from .text_split import _HEADER_RE, _SENTENCE_RE
+
+_CJK_RE = re.compile(r"[一-鿿]")
+_WORD_RE = re.compile(r"[A-Za-z]+")
+
+
+def _token_cost(text: str) -> float:
+    """未取整的 token 估计：可以逐句累加，累加结果取整后不超过整段的估计值"""
+    cjk = len(_CJK_RE.findall(text))
+    words = _WORD_RE.findall(text)
+    other = len(text) - cjk - sum(len(w) for w in words)
+    return cjk + len(words) * 1.3 + other / 4
+
+
+_NEWLINE_COST = _token_cost("\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计 token 数：汉字约 1 个 token，英文单词约 1.3 个，其余字符约 4 个一组"""
+    return int(_token_cost(text))
+
+
+class _Sentence:
+    __slots__ = ("index", "text", "section", "tokens", "score", "is_header")
+
+    def __init__(self, index: int, text: str, section: int, tokens: float, score: float, is_header: bool):
+        self.index = index
+        self.text = text
+        self.section = section
+        self.tokens = tokens
+        self.score = score
+        self.is_header = is_header
+
+
+def condense(text: str, analysis: Dict[str, Any], token_budget: int) -> str:
+    """
+    在 token_budget 内抽取最能代表原文的句子，保持原有顺序，不调用 LLM：
+    - 预算按章节 ratio 分配给各章节，保证长文各部分都有代表句
+    - 章节内按高频词命中加权打分，章节首句（导语）额外加分
+    - 标题行优先保留（预算不够时先舍弃低占比章节的标题），便于后续按章节切分分镜
+    文本本身未超预算时原样返回
+    """
+    if token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return text
+
+    top = analysis.get("top_words") or []
+    max_freq = max((w["freq"] for w in top), default=1) or 1
+    weights = {w["word"]: w["freq"] / max_freq for w in top}
+    ratios = [s.get("ratio", 0.0) for s in analysis.get("sections") or []]
+
+    # 1. 单遍扫描：切句、归属章节、估算 token、打分
+    sentences: List[_Sentence] = []
+    section = 0
+    first_in_section = True
+    for m in _SENTENCE_RE.finditer(text):
+        piece = m.group()
+        if not piece.strip():
+            continue
+        is_header = bool(_HEADER_RE.match(piece))
+        if is_header:
+            section += 1
+            first_in_section = True
+        lowered = piece.lower()
+        score = sum(wt * lowered.count(word) for word, wt in weights.items())
+        if first_in_section and not is_header:
+            score += 1.0
+            first_in_section = False
+        sentences.append(_Sentence(len(sentences), piece, section, _token_cost(piece), score, is_header))
+
+    # 2. 章节数与分析结果对不上（如超过 C 模块的章节上限）时平均分配
+    n_sections = section + 1
+    if len(ratios) != n_sections or not any(ratios):
+        ratios = [1.0 / n_sections] * n_sections
+
+    # 标题行也计入预算（连同输出时可能补上的换行），按章节 ratio 从高到低保留，放不下的低占比章节不再保留标题
+    selected = set()
+    used = 0.0
+    headers = [s for s in sentences if s.is_header]
+    for s in sorted(headers, key=lambda s: (-ratios[s.section], s.index)):
+        cost = s.tokens + _NEWLINE_COST
+        if used + cost <= token_budget:
+            selected.add(s.index)
+            used += cost
+    remaining = max(0.0, token_budget - used)
+
+    # 3. 先按章节配额挑选，剩余预算再全局按得分补充
+    by_section: Dict[int, List[_Sentence]] = {}
+    for s in sentences:
+        if not s.is_header:
+            by_section.setdefault(s.section, []).append(s)
+    for sec, items in by_section.items():
+        quota = remaining * ratios[sec]
+        spent = 0
+        for s in sorted(items, key=_rank):
+            if spent + s.tokens <= quota:
+                selected.add(s.index)
+                spent += s.tokens
+        used += spent
+    for s in sorted((s for s in sentences if s.index not in selected), key=_rank):
+        if used + s.tokens <= token_budget:
+            selected.add(s.index)
+            used += s.tokens
+
+    out: List[str] = []
+    for s in sentences:
+        if s.index not in selected:
+            continue
+        # 被跳过的句子可能带走了换行，标题必须仍在行首
+        if s.is_header and out and not out[-1].endswith("\n"):
+            out.append("\n")
+        out.append(s.text)
+    return "".join(out)
+
+
+def _rank(s: _Sentence):
+    # 得分密度优先（同样的 token 覆盖更多关键词），其次保持原文顺序
+    return (-s.score / (s.tokens or 1), s.index)
+
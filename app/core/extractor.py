@@ -0,0 +1,100 @@
+# 网页正文抽取：lxml 只解析一次，标题/正文/降级选择器共用同一棵树
+from typing import Iterable, List
+
+import lxml.html
+from lxml import etree
+from readability import Document
+from readability.htmls import shorten_title
+from readability.readability import REGEXES
+
+# 抽取结果最大长度
+MAX_TEXT_CHARS = 20000
+
+# 降级时针对常见论坛正文区的候选选择器（按优先级）
+FALLBACK_XPATHS = [
+    # cc98新版正文区
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' topic-content ')]",
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]",
+    "//div[@id='main-content']",
+    "//article",
+]
+NOISE_TAGS = ("script", "style", "nav", "footer", "header", "form")
+
+# 与 readability 一致：统一转成 UTF-8 字节后用 C 解析器解析，规避编码声明冲突
+_utf8_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _collect(pieces: Iterable[str], limit: int) -> List[str]:
+    """收集非空文本片段，累计达到 limit 字符即停止（不再遍历剩余节点）"""
+    out: List[str] = []
+    total = 0
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        out.append(piece)
+        total += len(piece) + 1
+        if total >= limit:
+            break
+    return out
+
+
+def _node_text(node, limit: int = MAX_TEXT_CHARS) -> str:
+    """等价于 get_text(separator='\\n', strip=True)，但可提前终止"""
+    return "\n".join(_collect(node.itertext(), limit))[:limit]
+
+
+def _drop_hidden(tree) -> None:
+    """删除 hidden / display:none 元素（与 readability 的预处理规则相同）"""
+    for elem in tree.xpath("//*[@hidden]"):
+        elem.drop_tree()
+    for elem in tree.xpath("//*[@style]"):
+        if REGEXES["displayNoneRe"].search(elem.get("style")):
+            elem.drop_tree()
+
+
+def _readability_text(tree, title: str) -> str:
+    # Document 接收已解析的树时不会再次解析原始 HTML：它先在这棵树上原地删除隐藏元素（已由
+    # _drop_hidden 做过，这里不再有改动），再由 clean_html 复制一份清理，之后只修改副本
+    content_html = Document(tree).summary(html_partial=True)
+    summary = lxml.html.fragment_fromstring(content_html, create_parent="div")
+    paragraphs = _collect(
+        (p.text_content() for p in summary.iter("p", "li")), MAX_TEXT_CHARS
+    )
+    return title + "\n" + "\n".join(paragraphs)
+
+
+def _fallback_text(tree) -> str:
+    # 降级为针对性提取：优先尝试常见论坛正文区
+    etree.strip_elements(tree, *NOISE_TAGS, with_tail=False)
+    text = ""
+    for xpath in FALLBACK_XPATHS:
+        found = tree.xpath(xpath)
+        if found:
+            text = _node_text(found[0])
+            if text and len(text) > 20:
+                break
+    if not text or len(text) < 10:
+        # 兜底：全页面去标签纯文本
+        text = _node_text(tree)
+    return text
+
+
+def extract_text(html: str) -> str:
+    """从 HTML 中抽取正文：优先 readability，失败时按常见正文区降级"""
+    if not html.strip():
+        return ""
+    tree = lxml.html.document_fromstring(
+        html.encode("utf-8", "replace"), parser=_utf8_parser
+    )
+    # 隐藏元素先删掉：readability 反正会原地删除它们（标题也是在删除之后取的），
+    # 降级路径据此拿到的是同一棵确定的树，同样不抽取页面上看不到的文字
+    _drop_hidden(tree)
+    title = shorten_title(tree) or ""
+    try:
+        text = _readability_text(tree, title)
+        if not text.strip():
+            raise ValueError("正文抽取为空")
+    except Exception:
+        text = _fallback_text(tree)
+    return text[:MAX_TEXT_CHARS]  # 限制最大输出
@@ -0,0 +1,215 @@
+# URL 抓取：共享连接池 + 流式限长下载 + 正文缓存
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .extractor import extract_text
+
+USER_AGENT = "Mozilla/5.0 (compatible; PromptUI/1.0)"
+
+
+class FetchError(Exception):
+    """抓取失败（状态码异常、协议不支持、网络错误等）"""
+
+
+class CacheEntry:
+    __slots__ = ("text", "etag", "last_modified", "expires_at")
+
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class TextCache:
+    """按 URL 缓存抽取后的正文，LRU 淘汰 + TTL 过期（过期后可用 ETag/Last-Modified 再验证）"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        entry = self._data.get(url)
+        if entry is not None:
+            self._data.move_to_end(url)
+        return entry
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]):
+        self._data[url] = CacheEntry(text, etag, last_modified, time.monotonic() + self.ttl)
+        self._data.move_to_end(url)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def touch(self, url: str):
+        """再验证成功（304）后续期"""
+        entry = self._data.get(url)
+        if entry is not None:
+            entry.expires_at = time.monotonic() + self.ttl
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _HostSlot:
+    """某个 host 的并发槽位；users 为持有或等待槽位的请求数"""
+
+    __slots__ = ("sem", "users")
+
+    def __init__(self, limit: int):
+        self.sem = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+def _decode_html(html_bytes: bytes, header_encoding: Optional[str]) -> str:
+    """自动检测并修正编码，优先支持中文网站"""
+    # 1. 优先用 meta 标签检测编码
+    meta = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', html_bytes[:4096], re.I)
+    enc = meta.group(1).decode(errors="ignore").lower() if meta else header_encoding
+    if enc:
+        try:
+            return html_bytes.decode(enc, errors="ignore")
+        except LookupError:
+            pass
+    # 2. 无声明时先严格按 UTF-8 解码，失败再按 GB18030（兼容 GBK/GB2312）
+    try:
+        return html_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        return html_bytes.decode("gb18030", errors="ignore")
+
+
+class UrlFetcher:
+    """异步网页抓取器：进程内共享一个连接池客户端"""
+
+    def __init__(
+        self,
+        timeout: float = 8,
+        max_bytes: int = 1_500_000,
+        per_host_limit: int = 4,
+        cache: Optional[TextCache] = None,
+    ):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self.cache = cache if cache is not None else TextCache()
+        self._client: Optional[httpx.AsyncClient] = None
+        # 只保留正在使用的 host：最后一个请求离开时删除，字典不会随抓取过的 host 数增长，
+        # 信号量也不会跨事件循环复用
+        self._host_slots: Dict[str, _HostSlot] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # 延迟创建，保证客户端绑定在运行中的事件循环上
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = _HostSlot(self.per_host_limit)
+        slot.users += 1
+        try:
+            async with slot.sem:
+                yield
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._host_slots[host]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _download(self, url: str, headers: Dict[str, str]) -> Tuple[int, httpx.Headers, bytes, Optional[str]]:
+        """流式下载，累计超过 max_bytes 即中断；返回 (状态码, 响应头, 正文字节, 声明编码)"""
+        client = self._get_client()
+        async with client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code != 200:
+                return resp.status_code, resp.headers, b"", None
+            chunks: List[bytes] = []
+            size = 0
+            async for chunk in resp.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break  # 限制最大长度，防止大页面拖垮
+            body = b"".join(chunks)[: self.max_bytes]
+            return resp.status_code, resp.headers, body, resp.charset_encoding
+
+    async def fetch(self, url: str) -> str:
+        """抓取并抽取正文，命中缓存时直接返回"""
+        if not (url.startswith("http://") or url.startswith("https://")):
+            raise FetchError("仅支持 http/https 协议")
+
+        entry = self.cache.get(url)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry.text
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        async with self._host_slot(url):
+            try:
+                status, resp_headers, body, encoding = await self._download(url, headers)
+            except httpx.HTTPError as e:
+                raise FetchError(f"请求失败: {e}") from e
+
+        if status == 304 and entry is not None:
+            self.cache.touch(url)
+            return entry.text
+        if status != 200:
+            raise FetchError(f"请求失败，状态码: {status}")
+
+        html = _decode_html(body, encoding)
+        # 正文抽取是 CPU 密集型，放到线程池避免阻塞事件循环
+        text = await asyncio.to_thread(extract_text, html)
+        self.cache.put(url, text, resp_headers.get("etag"), resp_headers.get("last-modified"))
+        return text
+
+    async def fetch_many(self, urls: List[str], concurrency: int = 16) -> List[Dict[str, Any]]:
+        """并发抓取多个 URL（每个 host 另受 per_host_limit 限制），结果按输入顺序返回"""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(u: str) -> Dict[str, Any]:
+            async with sem:
+                try:
+                    return {"url": u, "success": True, "text": await self.fetch(u)}
+                except Exception as e:
+                    return {"url": u, "success": False, "error": str(e)}
+
+        return await asyncio.gather(*(one(u) for u in urls))
+
+
+# 进程级共享实例
+fetcher = UrlFetcher(
+    timeout=float(os.getenv("FETCH_TIMEOUT", "8")),
+    max_bytes=int(os.getenv("FETCH_MAX_BYTES", "1500000")),
+    per_host_limit=int(os.getenv("FETCH_PER_HOST_LIMIT", "4")),
+    cache=TextCache(
+        max_entries=int(os.getenv("FETCH_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("FETCH_CACHE_TTL", "600")),
+    ),
+)
@@ -1,14 +1,65 @@
 import os
 import json
+import asyncio
 import urllib.request
 import urllib.error
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 from .visual_mapper import VisualMapper
+from .text_split import section_keywords, split_panels, strip_spans
+from .llm_router import LLMRouter
+from .condense import condense
+from .profiler import profiler
 
 # 加载环境变量
 load_dotenv()
 
+# LLM System Prompt：教 AI 做 Stable Diffusion 的 Prompt Engineer
+# 所有模式共用同一 system prompt 与任务说明，可变内容（风格/布局/原文）一律放在最后，
+# 保证不同请求的前缀逐字节一致，便于后端复用 prefix/KV 缓存（修改时注意不要插入可变内容）
+LLM_SYSTEM_PROMPT = (
+    "You are an expert AI Art Prompt Generator. "
+    "Your task is to convert the user's narrative text into a specific format for Stable Diffusion/Anime models.\n"
+    "Rules:\n"
+    "1. Output ONLY the English tags, separated by commas.\n"
+    "2. No explanations, no markdown, no intro/outro.\n"
+    "3. Structure: Style, Camera/Layout, Subject, Action, Environment, Quality.\n"
+    "4. Include visual details (lighting, colors, expression).\n"
+    "5. If Key Entities are listed, every one of them must be represented visually.\n"
+)
+LLM_TASK_PREAMBLE = (
+    "Task: Extract characters, emotions, objects, and scenes from the input text and convert them to tags. "
+    "Add lighting and atmosphere details.\n"
+)
+
+
+def build_user_prompt(
+    text: str,
+    style: str,
+    style_tags: str,
+    layout: str,
+    keywords: Optional[List[str]] = None,
+    panel: Optional[str] = None,
+) -> str:
+    """固定任务说明在前，逐请求变化的参数与原文在后"""
+    lines = [LLM_TASK_PREAMBLE, f"Art Style: {style} (Tags: {style_tags})", f"Layout: {layout}"]
+    if keywords is not None:
+        lines.append(f"Key Entities: [{', '.join(keywords)}]")
+    if panel:
+        lines.append(f"Panel: {panel}")
+    lines.append(f'Input Text: "{text}"\n\nOutput Tags:')
+    return "\n".join(lines)
+
+
+def _result(prompt: str, panels: int, llm_error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    生成结果：panels 为实际的分镜数（分镜并行模式下文本过短时少于请求的 panels）；
+    degraded 表示 LLM 调用失败，提示词（全部或部分分镜）已降级为算法结果，llm_error 为失败原因
+    """
+    return {"prompt": prompt, "panels": panels, "degraded": llm_error is not None, "llm_error": llm_error}
+
 
 class PromptGenerator:
     def __init__(self, analyzer=None):
@@ -20,7 +71,17 @@ class PromptGenerator:
             "api_key": os.getenv("LLM_API_KEY", "ollama"),
             "model": os.getenv("LLM_MODEL", "llama3"),
             "timeout": int(os.getenv("LLM_TIMEOUT", "30")),
+            # 分镜并行模式下同时在途的 LLM 请求上限
+            "panel_concurrency": int(os.getenv("LLM_PANEL_CONCURRENCY", "4")),
+            # LLM 输入文本的 token 预算，超出时先做抽取式压缩；默认 0 不压缩，LLM 收到完整原文（按需开启，如 3000）
+            "token_budget": int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "0")),
         }
+        # 默认配置下的请求走后端池（LLM_BACKENDS），带对冲与熔断
+        self.router = LLMRouter.from_env(self.default_config)
+        # 阻塞的 LLM 调用使用独立线程池，不占用事件循环默认线程池（单核机器上只有 5 个线程）
+        self._llm_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LLM_WORKER_THREADS", "32")), thread_name_prefix="llm-gen"
+        )
 
     def generate(
         self,
@@ -32,31 +93,120 @@ class PromptGenerator:
         sensitive_filter: bool = True,
         llm_config: Optional[Dict[str, str]] = None,
         language: Optional[str] = None,
-    ) -> str:
+        per_panel: bool = False,
+        strip_redundant: bool = False,
+        token_budget: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
+        返回 {"prompt", "panels", "degraded", "llm_error"}（见 _result）
         :param llm_config: 前端传来的临时配置 {api_base, api_key, model}
+        :param per_panel: llm/hybrid 模式下每个分镜单独请求 LLM（并发执行）
+        :param strip_redundant: llm/hybrid 模式下先删除重复的句子/片段再构造 LLM 输入
+        :param token_budget: LLM 输入的 token 预算，None 使用默认配置，<= 0 不压缩
         """
-        # 合并配置：前端传来的 > 环境变量默认的
-        current_config = self.default_config.copy()
-        if llm_config:
-            # 过滤掉空值，只更新有值的字段
-            clean_config = {k: v for k, v in llm_config.items() if v}
-            current_config.update(clean_config)
+        current_config = self._merge_config(llm_config)
+        text = self._prepare_llm_text(text, analysis, mode, strip_redundant, token_budget)
 
         # 语言集成：在 prompt 前加 Target language: ...
         lang_prefix = f"Target language: {language}\n" if language else ""
-        if mode == "llm":
-            return lang_prefix + self._generate_by_llm(
-                text, style, panels, current_config
-            )
+        if per_panel and panels > 1 and mode in ("llm", "hybrid"):
+            # 同步接口可能在没有事件循环的工作进程中调用，也可能在事件循环所在线程中调用：
+            # 分镜请求直接提交到线程池，不经过 asyncio
+            result = self._generate_per_panel_sync(text, analysis, mode, style, panels, current_config)
+        elif mode == "llm":
+            result = self._generate_by_llm(text, style, panels, current_config)
         elif mode == "hybrid":
-            return lang_prefix + self._generate_hybrid(
-                text, analysis, style, panels, current_config
-            )
+            result = self._generate_hybrid(text, analysis, style, panels, current_config)
         else:
-            return lang_prefix + self._generate_by_algorithm(
-                text, analysis, style, panels, sensitive_filter
+            result = _result(self._generate_by_algorithm(text, analysis, style, panels, sensitive_filter), panels)
+        result["prompt"] = lang_prefix + result["prompt"]
+        return result
+
+    async def agenerate(
+        self,
+        text: str,
+        analysis: Dict[str, Any],
+        mode: str = "auto",
+        panels: int = 2,
+        style: str = "清新简洁",
+        sensitive_filter: bool = True,
+        llm_config: Optional[Dict[str, str]] = None,
+        language: Optional[str] = None,
+        per_panel: bool = False,
+        strip_redundant: bool = False,
+        token_budget: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """generate 的异步版本：阻塞的 LLM 调用放到线程池，分镜并行模式直接在当前事件循环中扇出"""
+        text = profiler.call(self._prepare_llm_text, text, analysis, mode, strip_redundant, token_budget)
+        if per_panel and panels > 1 and mode in ("llm", "hybrid"):
+            current_config = self._merge_config(llm_config)
+            lang_prefix = f"Target language: {language}\n" if language else ""
+            result = await self._generate_per_panel(text, analysis, mode, style, panels, current_config)
+            result["prompt"] = lang_prefix + result["prompt"]
+            return result
+        if mode not in ("llm", "hybrid"):
+            # 算法模式只需几毫秒，直接执行，不与 LLM 请求争抢线程池
+            return profiler.call(
+                self.generate,
+                text,
+                analysis,
+                mode,
+                panels,
+                style,
+                sensitive_filter,
+                llm_config,
+                language,
+                token_budget=0,
             )
+        return await self._run_blocking(
+            self.generate,
+            text,
+            analysis,
+            mode,
+            panels,
+            style,
+            sensitive_filter,
+            llm_config,
+            language,
+            token_budget=0,  # 文本已在上面精简过
+        )
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._llm_pool, partial(profiler.bind(fn), *args, **kwargs))
+
+    def _prepare_llm_text(
+        self,
+        text: str,
+        analysis: Dict[str, Any],
+        mode: str,
+        strip_redundant: bool,
+        token_budget: Optional[int],
+    ) -> str:
+        """
+        精简 LLM 输入（算法模式不读原文，无需处理）：
+        1. 按 C 模块检测出的冗余区间删除重复内容
+        2. 超出 token 预算时做抽取式压缩
+        """
+        if mode not in ("llm", "hybrid"):
+            return text
+        if strip_redundant:
+            text = strip_spans(text, analysis.get("redundant_spans"))
+        budget = self.default_config["token_budget"] if token_budget is None else token_budget
+        return condense(text, analysis, budget)
+
+    def _merge_config(self, llm_config: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        # 合并配置：前端传来的 > 环境变量默认的
+        current_config = self.default_config.copy()
+        clean_config = {}
+        if llm_config:
+            # 过滤掉空值，只更新有值的字段
+            clean_config = {k: v for k, v in llm_config.items() if v}
+            current_config.update(clean_config)
+        # 前端未指定 API 地址时走后端池；指定了模型则各后端统一使用该模型
+        current_config["use_router"] = "api_base" not in clean_config
+        current_config["model_pinned"] = "model" in clean_config
+        return current_config
 
     def _generate_by_algorithm(
         self,
@@ -86,8 +236,8 @@ class PromptGenerator:
         # C. 质量修饰
         prompt_parts.append("highres, best quality, 8k")
 
-        # D. 敏感词处理
-        if sensitive_filter and analysis.get("sensitive_words"):
+        # D. 敏感词处理（sensitive_hits 包含被分词合并进更长的词、或跨越词边界的敏感词）
+        if sensitive_filter and (analysis.get("sensitive_words") or analysis.get("sensitive_hits")):
             prompt_parts.append("safe for work")
 
         # 组装
@@ -97,74 +247,131 @@ class PromptGenerator:
 
         return final_prompt
 
-    def _generate_by_llm(self, text: str, style: str, panels: int, config: Dict) -> str:
+    def _generate_by_llm(self, text: str, style: str, panels: int, config: Dict) -> Dict[str, Any]:
         """LLM 模式：完全由大模型理解并生成"""
 
-        # 构造 System Prompt：教 AI 做 Stable Diffusion 的 Prompt Engineer
-        system_prompt = (
-            "You are an expert AI Art Prompt Generator. "
-            "Your task is to convert the user's narrative text into a specific format for Stable Diffusion/Anime models.\n"
-            "Rules:\n"
-            "1. Output ONLY the English tags, separated by commas.\n"
-            "2. No explanations, no markdown, no intro/outro.\n"
-            "3. Structure: Style, Camera/Layout, Subject, Action, Environment, Quality.\n"
-            "4. Include visual details (lighting, colors, expression).\n"
-        )
-
-        # 构造 User Prompt
         style_tags = self.mapper.get_style_tags(style)
-        panel_tags = self._get_panel_tags(panels)
-
-        user_prompt = (
-            f'Input Text: "{text}"\n\n'
-            f"Requirements:\n"
-            f"- Art Style: {style} (Tags: {style_tags})\n"
-            f"- Layout: {panels} Panels Comic (Tags: {panel_tags})\n"
-            f"- Task: Extract characters, emotions, objects, and scenes from text and convert to tags.\n"
-            f"\nOutput Tags:"
-        )
+        layout = f"{panels} Panels Comic (Tags: {self._get_panel_tags(panels)})"
+        user_prompt = build_user_prompt(text, style, style_tags, layout)
 
         try:
-            raw = self._call_llm_api(system_prompt, user_prompt, config)
-            return self._extract_prompt(raw)
+            raw = self._call_llm_api(LLM_SYSTEM_PROMPT, user_prompt, config)
+            return _result(self._extract_prompt(raw), panels)
         except Exception as e:
             # 降级处理
-            return (
-                f"LLM Error: {str(e)} (Switched to Algorithm)\n"
-                + self._generate_by_algorithm(text, {}, style, panels, True)
+            prompt = f"LLM Error: {str(e)} (Switched to Algorithm)\n" + self._generate_by_algorithm(
+                text, {}, style, panels, True
             )
+            return _result(prompt, panels, str(e))
 
     def _generate_hybrid(
         self, text: str, analysis: Dict[str, Any], style: str, panels: int, config: Dict
-    ) -> str:
+    ) -> Dict[str, Any]:
         """混合模式：算法提取关键词 + LLM 润色组织"""
 
         # 1. 先用算法提取关键词，作为“硬约束”喂给 LLM
         # 这样可以避免 LLM 遗漏文本中的关键实体
         top_words = [w["word"] for w in analysis.get("top_words", [])[:10]]
-        keywords_str = ", ".join(top_words)
 
         style_tags = self.mapper.get_style_tags(style)
-        panel_tags = self._get_panel_tags(panels)
-
-        system_prompt = "You are a helper optimizing AI art prompts. Keep the key entities provided."
-
-        user_prompt = (
-            f'Source Text: "{text}"\n'
-            f"Key Entities Detected: [{keywords_str}]\n"
-            f"Target Style: {style_tags}\n"
-            f"Layout: {panel_tags}\n\n"
-            f"Task: Create a high-quality, comma-separated prompt string. "
-            f"Ensure all Key Entities are represented visually. Add lighting and atmosphere details."
-        )
+        layout = f"{panels} Panels Comic (Tags: {self._get_panel_tags(panels)})"
+        user_prompt = build_user_prompt(text, style, style_tags, layout, keywords=top_words)
 
         try:
-            raw = self._call_llm_api(system_prompt, user_prompt, config)
-            return self._extract_prompt(raw)
+            raw = self._call_llm_api(LLM_SYSTEM_PROMPT, user_prompt, config)
+            return _result(self._extract_prompt(raw), panels)
         except Exception as e:
-            return f"Hybrid Error: {str(e)} (Fallback)\n" + self._generate_by_algorithm(
+            prompt = f"Hybrid Error: {str(e)} (Fallback)\n" + self._generate_by_algorithm(
                 text, analysis, style, panels, True
             )
+            return _result(prompt, panels, str(e))
+
+    def _panel_jobs(
+        self, text: str, analysis: Dict[str, Any], mode: str, style: str, panels: int
+    ) -> List[Tuple[str, str]]:
+        """分镜并行模式：每个分镜一段文本、一个子请求，返回 [(分镜文本, user prompt), ...]"""
+        parts = split_panels(text, analysis, panels)
+        chunks = [chunk for chunk, _ in parts]
+        style_tags = self.mapper.get_style_tags(style)
+        top_words = [w["word"] for w in analysis.get("top_words", [])]
+        jobs = []
+        for idx, chunk in enumerate(chunks):
+            keywords = None
+            if mode == "hybrid":
+                # 优先用分析时按章节统计的高频词；按句子切分时只保留在本段中出现的全局关键词，
+                # 全都不出现时退回全局前几名
+                keywords = (
+                    section_keywords(parts[idx][1])
+                    or [w for w in top_words if w in chunk][:10]
+                    or top_words[:5]
+                )
+            layout = f"single panel of a {len(chunks)} panels comic"
+            user_prompt = build_user_prompt(
+                chunk, style, style_tags, layout, keywords=keywords, panel=f"{idx + 1} of {len(chunks)}"
+            )
+            jobs.append((chunk, user_prompt))
+        return jobs
+
+    def _assemble_panels(self, chunks: List[str], results: List[Any], style: str) -> Dict[str, Any]:
+        """按顺序组装各分镜结果；失败的分镜（异常）单独降级为算法模式"""
+        lines = [self._get_panel_tags(len(chunks))]
+        errors: List[str] = []
+        for i, (chunk, res) in enumerate(zip(chunks, results), 1):
+            if isinstance(res, Exception):
+                errors.append(f"panel {i}: {res}")
+                res = self._generate_by_algorithm(chunk, {}, style, 1, True)
+            lines.append(f"Panel {i}: {res}")
+        llm_error = "; ".join(errors) if errors else None
+        if llm_error:
+            lines.insert(0, f"LLM Error: {llm_error} (Switched to Algorithm)")
+        return _result("\n".join(lines), len(chunks), llm_error)
+
+    async def _generate_per_panel(
+        self,
+        text: str,
+        analysis: Dict[str, Any],
+        mode: str,
+        style: str,
+        panels: int,
+        config: Dict,
+    ) -> Dict[str, Any]:
+        """分镜并行模式（事件循环中扇出）"""
+        jobs = self._panel_jobs(text, analysis, mode, style, panels)
+        sem = asyncio.Semaphore(max(1, int(config.get("panel_concurrency", 4))))
+
+        async def one(user_prompt: str) -> str:
+            async with sem:
+                raw = await self._run_blocking(self._call_llm_api, LLM_SYSTEM_PROMPT, user_prompt, config)
+            return self._extract_prompt(raw)
+
+        results = await asyncio.gather(*(one(p) for _, p in jobs), return_exceptions=True)
+        return self._assemble_panels([c for c, _ in jobs], results, style)
+
+    def _generate_per_panel_sync(
+        self,
+        text: str,
+        analysis: Dict[str, Any],
+        mode: str,
+        style: str,
+        panels: int,
+        config: Dict,
+    ) -> Dict[str, Any]:
+        """分镜并行模式（同步调用）：各分镜请求在独立线程池中并发"""
+        jobs = self._panel_jobs(text, analysis, mode, style, panels)
+        call = profiler.bind(self._call_llm_api)
+
+        def one(user_prompt: str) -> str:
+            return self._extract_prompt(call(LLM_SYSTEM_PROMPT, user_prompt, config))
+
+        workers = min(len(jobs), max(1, int(config.get("panel_concurrency", 4))))
+        results: List[Any] = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-panel") as pool:
+            for future in [pool.submit(one, p) for _, p in jobs]:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return self._assemble_panels([c for c, _ in jobs], results, style)
 
     def _extract_prompt(self, raw: str) -> str:
         """
@@ -189,7 +396,18 @@ class PromptGenerator:
     def _call_llm_api(
         self, system_content: str, user_content: str, config: Dict
     ) -> str:
-        """使用传入的 config 发送请求"""
+        """使用传入的 config 发送请求；默认配置经后端池路由，前端自定义地址则直连"""
+        if config.get("use_router") and self.router.backends:
+            return self.router.call(
+                lambda backend: self._post_chat(system_content, user_content, backend.apply(config)),
+                timeout=config["timeout"],
+            )
+        return self._post_chat(system_content, user_content, config)
+
+    def _post_chat(
+        self, system_content: str, user_content: str, config: Dict
+    ) -> str:
+        """向单个 OpenAI 兼容后端发送 chat/completions 请求"""
         url = f"{config['api_base'].rstrip('/')}/chat/completions"
         headers = {
             "Content-Type": "application/json",
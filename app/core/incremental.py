@@ -0,0 +1,214 @@
+# 增量分析：按段落缓存分析结果，编辑后只重新分析变化的段落再合并
+import hashlib
+import math
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.py_analyzer import SECTION_TOP_N, djb2_bucket
+
+# 可直接累加的统计字段
+# 注意：重复检测只在段落内部进行，跨段落的重复句子只有整篇分析才能发现，
+# 因此合并结果的 redundancy_count / redundant_bytes 可能小于整篇结果，也不输出 redundant_spans；
+# sensitive_hits 是相对各段落的字节偏移，合并结果同样不输出
+_SUM_FIELDS = (
+    "total_chars", "en_words", "cn_chars", "sensitive_count", "redundancy_count", "punct_count", "redundant_bytes"
+)
+# 与整篇分析结果可能不一致的字段（对比一致性时忽略）
+# 预算按单次分析计算，逐段分析时每段单独计数，因此 truncated 也可能不同
+NON_MERGEABLE_FIELDS = (
+    "redundancy_count", "redundant_bytes", "redundant_spans", "redundant_spans_truncated",
+    "sensitive_hits", "sensitive_hits_truncated",
+    "truncated", "truncated_reason",
+)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    按空行切分段落，分隔用的换行/空行保留在前一段末尾，拼接后与原文完全一致。
+    每段都从行首开始、以换行结束，因此逐段分析再合并与整篇分析结果相同。
+    （static/script.js 中的 splitParagraphs 必须与此保持一致）
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    prev_blank = False
+    for line in text.split("\n"):
+        is_blank = not line.strip()
+        if current and prev_blank and not is_blank:
+            chunks.append("\n".join(current) + "\n")
+            current = []
+        current.append(line)
+        prev_blank = is_blank
+    if current:
+        tail = "\n".join(current)
+        if tail:
+            chunks.append(tail)
+    return chunks
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha1(paragraph.encode("utf-8")).hexdigest()
+
+
+def _empty_section(sec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "section_id": 0,
+        "title": sec.get("title", ""),
+        "level": sec.get("level", 0),
+        "length": 0,
+        "ratio": 0.0,
+        "word_count": 0,
+        "sensitive_count": 0,
+        "top_words": {},
+        "sensitive_words": {},
+    }
+
+
+def _merge_section(target: Dict[str, Any], sec: Dict[str, Any]) -> Dict[str, Any]:
+    """把段落中的一节累加到合并结果的章节上（top_words / sensitive_words 暂存为有序 dict）"""
+    for k in ("length", "word_count", "sensitive_count"):
+        target[k] += sec.get(k, 0)
+    for item in sec.get("top_words", []):
+        target["top_words"][item["word"]] = target["top_words"].get(item["word"], 0) + item["freq"]
+    for w in sec.get("sensitive_words", []):
+        target["sensitive_words"].setdefault(w, None)
+    return target
+
+
+def merge_results(results: List[Dict[str, Any]], top_n: int = 10) -> Dict[str, Any]:
+    """把按顺序排列的段落分析结果（需包含全量 top_words）合并为整篇结果"""
+    merged: Dict[str, Any] = {k: 0 for k in _SUM_FIELDS}
+    freq: Dict[str, int] = {}
+    sensitive: List[str] = []
+    seen_sensitive = set()
+    sections: List[Dict[str, Any]] = []
+    truncated_reason = None
+
+    for res in results:
+        # 任一段落被截断，合并结果也视为截断
+        truncated_reason = truncated_reason or res.get("truncated_reason")
+        for k in _SUM_FIELDS:
+            merged[k] += res.get(k, 0)
+        for item in res.get("top_words", []):
+            freq[item["word"]] = freq.get(item["word"], 0) + item["freq"]
+        for w in res.get("sensitive_words", []):
+            if w not in seen_sensitive:
+                seen_sensitive.add(w)
+                sensitive.append(w)
+        # 段落的第 0 节是段首到第一个标题之间的内容，属于文档当前所在章节
+        para_sections = res.get("sections") or []
+        for i, sec in enumerate(para_sections):
+            if i == 0 and sections:
+                _merge_section(sections[-1], sec)
+            else:
+                sections.append(_merge_section(_empty_section(sec), sec))
+
+    if not sections:
+        sections = [_empty_section({"title": "Introduction", "level": 0})]
+    total_len = sum(s["length"] for s in sections)
+    for i, s in enumerate(sections):
+        s["section_id"] = i
+        s["ratio"] = round(s["length"] / total_len, 4) if total_len else 0.0
+        # 段落结果是全量列表（按首次出现顺序），合并后再按整篇分析的规则截取
+        words = sorted(s["top_words"].items(), key=lambda kv: -kv[1]) if top_n > 0 else list(s["top_words"].items())
+        limit = SECTION_TOP_N if top_n > 0 else None
+        s["top_words"] = [{"word": w, "freq": c} for w, c in words[:limit]]
+        s["sensitive_words"] = list(s["sensitive_words"])[:limit]
+
+    total = sum(freq.values())
+    ordered = sorted(freq.items(), key=lambda kv: (-kv[1], djb2_bucket(kv[0])))
+    if top_n > 0:
+        ordered = ordered[:top_n]
+
+    merged.update(
+        {
+            "words": merged["en_words"] + merged["cn_chars"],
+            "section_count": len(sections),
+            "richness": round(len(freq) / math.sqrt(2.0 * total), 2) if total else 0.0,
+            "sections": sections,
+            "top_words": [{"word": w, "freq": c} for w, c in ordered],
+            "sensitive_words": sensitive,
+            "truncated": truncated_reason is not None,
+            "truncated_reason": truncated_reason,
+        }
+    )
+    return merged
+
+
+class IncrementalSession:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.results: Dict[str, Dict[str, Any]] = {}  # 段落哈希 -> 全量词频分析结果
+        self.touched = time.monotonic()
+
+
+class IncrementalAnalyzer:
+    """管理增量分析会话：LRU + 空闲超时淘汰"""
+
+    def __init__(self, analyzer, max_sessions: int = 256, idle_ttl: float = 1800):
+        self.analyzer = analyzer
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, IncrementalSession]" = OrderedDict()
+
+    def _get_session(self, session_id: Optional[str]) -> IncrementalSession:
+        now = time.monotonic()
+        # 清理空闲会话
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.touched <= self.idle_ttl and len(self._sessions) < self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            session = IncrementalSession(session_id or uuid.uuid4().hex)
+            self._sessions[session.session_id] = session
+        session.touched = now
+        self._sessions.move_to_end(session.session_id)
+        return session
+
+    def update(
+        self,
+        session_id: Optional[str],
+        paragraphs: List[Dict[str, str]],
+        top_n: int = 10,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        :param paragraphs: 按顺序排列的段落，每项为 {"text": 段落原文} 或 {"ref": 已知段落哈希}
+        :return: (合并后的分析结果, 元信息 {session_id, hashes, analyzed, reused})
+        :raises KeyError: 引用了会话中不存在的段落哈希（会话过期），客户端应全量重发
+        """
+        session = self._get_session(session_id)
+        hashes: List[str] = []
+        analyzed = 0
+        for para in paragraphs:
+            if "ref" in para:
+                h = para["ref"]
+                if h not in session.results:
+                    raise KeyError(h)
+            else:
+                text = para.get("text", "")
+                h = paragraph_hash(text)
+                if h not in session.results:
+                    session.results[h] = self.analyzer.analyze(text, top_n=0)
+                    analyzed += 1
+            hashes.append(h)
+
+        # 只保留当前文档中仍存在的段落，防止会话无限增长
+        current = set(hashes)
+        for h in [h for h in session.results if h not in current]:
+            del session.results[h]
+
+        result = merge_results([session.results[h] for h in hashes], top_n=top_n)
+        meta = {
+            "session_id": session.session_id,
+            "hashes": hashes,
+            "analyzed": analyzed,
+            "reused": len(hashes) - analyzed,
+        }
+        return result, meta
+
+    def update_text(self, session_id: Optional[str], text: str, top_n: int = 10):
+        """整篇文本入口：服务端切分段落"""
+        return self.update(session_id, [{"text": p} for p in split_paragraphs(text)], top_n=top_n)
@@ -0,0 +1,204 @@
+# 多后端 LLM 路由：最少在途请求选路 + 对冲请求（hedging）+ 熔断
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+class NoBackendAvailable(Exception):
+    """所有后端都处于熔断状态"""
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后熔断 cooldown 秒；冷却结束放行一个探测请求（半开）"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "half_open" if time.monotonic() >= self.open_until else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+
+class Backend:
+    def __init__(self, api_base: str, api_key: str, model: str, breaker: CircuitBreaker):
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model = model
+        self.breaker = breaker
+        self.outstanding = 0
+        self.latencies: deque = deque(maxlen=200)  # 最近成功请求耗时（秒）
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.latencies) < 10:
+            return None  # 样本太少，不足以估计分位数
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+    def apply(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """把本后端的地址/密钥/模型合并到请求配置（前端显式指定的模型优先）"""
+        merged = dict(config)
+        merged["api_base"] = self.api_base
+        merged["api_key"] = self.api_key
+        if not config.get("model_pinned"):
+            merged["model"] = self.model
+        return merged
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        return {
+            "api_base": self.api_base,
+            "model": self.model,
+            "state": self.breaker.state,
+            "outstanding": self.outstanding,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        }
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        backends: List[Backend],
+        hedge_percentile: float = 95,
+        hedge_min_delay: float = 0.2,
+        hedge_default_delay: float = 2.0,
+        max_workers: int = 32,
+    ):
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self.hedged = 0  # 发出对冲请求的次数
+
+    @classmethod
+    def from_env(cls, default_config: Dict[str, Any]) -> "LLMRouter":
+        """
+        LLM_BACKENDS: JSON 数组，如 [{"api_base": "...", "api_key": "...", "model": "..."}]
+        未配置时只有一个默认后端（LLM_API_BASE 等），仍享有熔断保护
+        """
+        raw = os.getenv("LLM_BACKENDS", "").strip()
+        entries = json.loads(raw) if raw else [{}]
+        threshold = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+        cooldown = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+        backends = [
+            Backend(
+                api_base=e.get("api_base", default_config["api_base"]),
+                api_key=e.get("api_key", default_config["api_key"]),
+                model=e.get("model", default_config["model"]),
+                breaker=CircuitBreaker(threshold, cooldown),
+            )
+            for e in entries
+        ]
+        return cls(
+            backends,
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.2")),
+        )
+
+    def _pick(self, exclude: List[Backend]) -> Optional[Backend]:
+        """在未熔断的后端中选在途请求最少的（相同则选 p50 更低的）"""
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude and b.breaker.state != "open"]
+            candidates.sort(key=lambda b: (b.outstanding, b.percentile(50) or 0.0))
+            for b in candidates:
+                if b.breaker.allow():
+                    b.outstanding += 1
+                    return b
+        return None
+
+    def _run(self, backend: Backend, send: Callable[[Backend], str]) -> str:
+        t0 = time.monotonic()
+        try:
+            result = send(backend)
+        except Exception:
+            with self._lock:
+                backend.breaker.record_failure()
+            raise
+        else:
+            with self._lock:
+                backend.breaker.record_success()
+                backend.latencies.append(time.monotonic() - t0)
+            return result
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+
+    def _hedge_delay(self, backend: Backend) -> float:
+        p = backend.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, p if p is not None else self.hedge_default_delay)
+
+    def call(self, send: Callable[[Backend], str], timeout: float) -> str:
+        """
+        发送请求并返回第一个成功结果：
+        - 主请求超过该后端延迟分位数仍未返回时，向另一个后端发对冲请求
+        - 主请求快速失败时立即转投其他后端
+        - 没有可用后端时立刻抛出 NoBackendAvailable，由调用方走算法降级
+        """
+        primary = self._pick([])
+        if primary is None:
+            raise NoBackendAvailable("所有 LLM 后端均已熔断")
+        tried = [primary]
+        futures: Dict[Future, Backend] = {self._pool.submit(self._run, primary, send): primary}
+        deadline = time.monotonic() + timeout
+        hedge_at = time.monotonic() + self._hedge_delay(primary)
+        second_sent = False
+        last_error: Optional[Exception] = None
+
+        while futures:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = deadline if second_sent else min(hedge_at, deadline)
+            done, _ = wait(list(futures), timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+            for f in done:
+                futures.pop(f)
+                try:
+                    return f.result()
+                except Exception as e:
+                    last_error = e
+            # 到达对冲时间，或在途请求全部失败（快速转投）：再试一个后端，最多一次
+            if not second_sent and (not done or not futures):
+                second_sent = True
+                backend = self._pick(tried)
+                if backend is not None:
+                    tried.append(backend)
+                    if not done:
+                        self.hedged += 1
+                    futures[self._pool.submit(self._run, backend, send)] = backend
+        if last_error is not None and not futures:
+            raise last_error
+        raise TimeoutError(f"LLM 请求超时（{timeout}s）")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.snapshot() for b in self.backends]
@@ -0,0 +1,148 @@
+# 响应体瘦身：分析结果按需裁剪字段，JSON 用 orjson 编码（未安装时回退标准库），
+# 超过阈值的响应按 Accept-Encoding 协商 gzip / brotli 压缩
+import gzip
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from starlette.responses import Response
+
+from app.core.assets import ENCODINGS, parse_accept_encoding
+
+try:
+    import orjson  # 可选依赖：大响应的编码耗时约为标准库的几分之一
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # 可选依赖：未安装时只提供 gzip
+except ImportError:
+    brotli = None
+
+# 小于该字节数的响应不压缩（压缩收益抵不过 CPU 与首部开销）
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+# 动态响应每次都要现压：gzip 1 级的压缩率只比 5 级差几个百分点，耗时约为三分之一（静态资源是预压缩的，用最高级别）
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "1"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+# 字段预设：ui 为前端分析面板实际展示的内容
+FIELD_PRESETS = {
+    "ui": "total_chars,en_words,cn_chars,section_count,richness,top_words:5,sensitive_words",
+}
+# 分析结果的全部字段（C 模块与 PyAnalyzer 输出一致），字段选择中出现其他名称时报错
+ANALYSIS_FIELDS = frozenset(
+    (
+        "total_chars", "en_words", "cn_chars", "punct_count", "words", "richness",
+        "top_words", "sensitive_count", "sensitive_words", "sensitive_hits", "sensitive_hits_truncated",
+        "section_count", "sections", "redundancy_count", "redundant_bytes", "redundant_spans",
+        "redundant_spans_truncated", "truncated", "truncated_reason",
+    )
+)
+# 裁剪后也始终保留的字段：调用方需要据此判断结果是否完整可用
+ALWAYS_KEPT = ("error", "truncated", "truncated_reason")
+
+_FIELD_RE = re.compile(r"^([a-z_]+)(?::(\d+))?$")
+
+FieldSpec = Optional[Tuple[Tuple[str, Optional[int]], ...]]
+
+
+@lru_cache(maxsize=64)
+def parse_fields(spec: Optional[str]) -> FieldSpec:
+    """
+    字段选择 -> ((字段名, 列表最多保留的条数), ...)；None 表示返回全部字段，空元组表示不返回分析结果。
+    语法：逗号分隔的字段名，列表字段可写 name:N 只保留前 N 条；all / none / 预设名（如 ui）可与字段混用。
+    语法错误或字段名不在 ANALYSIS_FIELDS 中时抛出 ValueError
+    """
+    if spec is None or not spec.strip() or spec.strip() == "all":
+        return None
+    if spec.strip() == "none":
+        return ()
+    selected: List[Tuple[str, Optional[int]]] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item in FIELD_PRESETS:
+            selected.extend(parse_fields(FIELD_PRESETS[item]) or ())
+            continue
+        m = _FIELD_RE.match(item)
+        if not m:
+            raise ValueError(f"无效的字段选择: {item}")
+        if m.group(1) not in ANALYSIS_FIELDS:
+            raise ValueError(f"未知的分析字段: {m.group(1)}")
+        selected.append((m.group(1), int(m.group(2)) if m.group(2) else None))
+    return tuple(selected)
+
+
+def select_fields(analysis: Optional[Dict[str, Any]], spec: Optional[str]) -> Optional[Dict[str, Any]]:
+    """按字段选择裁剪分析结果；返回新字典，不修改传入的（可能是缓存中的）结果"""
+    fields = parse_fields(spec)
+    if fields is None or analysis is None:
+        return analysis
+    if not fields and "error" not in analysis:
+        return None
+    picked: Dict[str, Any] = {}
+    for name, limit in fields:
+        if name in analysis:
+            value = analysis[name]
+            picked[name] = value[:limit] if limit is not None and isinstance(value, list) else value
+    for name in ALWAYS_KEPT:
+        if name in analysis:
+            picked[name] = analysis[name]
+    return picked
+
+
+def dumps(content: Any) -> bytes:
+    """紧凑、不转义非 ASCII 的 JSON（UTF-8 字节）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            # 超出 64 位的整数、非字符串键等 orjson 不支持的值交给标准库
+            pass
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(header: Optional[str]) -> str:
+    accepted = parse_accept_encoding(header)
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def json_response(
+    content: Any,
+    request_headers: Optional[Mapping[str, str]] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    直接构造 JSON 响应（不经过 response_model 的校验与 jsonable_encoder 遍历）；
+    响应体达到 COMPRESS_MIN_BYTES 时按请求的 Accept-Encoding 压缩
+    """
+    body = dumps(content)
+    headers = dict(headers or {})
+    if len(body) >= COMPRESS_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request_headers.get("accept-encoding") if request_headers else None)
+        if encoding != "identity":
+            compressed = compress(body, encoding)
+            if len(compressed) < len(body):
+                body = compressed
+                headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,230 @@
+# 按需性能剖析：抽样或带令牌头的请求记录 Python 调用剖析（cProfile）与 C 分析器的阶段耗时，
+# 结果存入固定容量的环形缓冲区，可下载为 pstats 或折叠栈（flamegraph.pl / speedscope 输入）。
+# 未配置 PROFILE_TOKEN 时完全关闭：请求不做任何额外工作，调试接口返回 404
+import contextvars
+import cProfile
+import hmac
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+PROFILE_HEADER = "x-profile-token"
+COLLAPSED_MAX_DEPTH = 64
+COLLAPSED_MIN_US = 1  # 折叠栈中小于 1 微秒的分支不展开
+
+_current: contextvars.ContextVar[Optional["ProfileRecord"]] = contextvars.ContextVar("profile_record", default=None)
+_NULL = nullcontext()
+
+
+class ProfileRecord:
+    def __init__(self, record_id: int, endpoint: str, flagged: bool):
+        self.id = record_id
+        self.endpoint = endpoint
+        self.flagged = flagged  # True：请求带了令牌头；False：抽样
+        self.started = time.time()
+        self.wall_ms = 0.0
+        self.profiles: List[cProfile.Profile] = []
+        self.skipped = 0  # 其他请求正在剖析（同一时间只能有一个 cProfile）而未剖析的调用数
+        self.native: List[Dict[str, Any]] = []  # 每次 C 分析的阶段耗时
+        self._lock = threading.Lock()
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = list(self.profiles)
+        return pstats.Stats(*profiles) if profiles else None
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        hot = []
+        st = self.stats()
+        if st:
+            items = sorted(st.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:top]
+            hot = [
+                {
+                    "function": _label(f),
+                    "calls": v[1],
+                    "self_ms": round(v[2] * 1000, 3),
+                    "cum_ms": round(v[3] * 1000, 3),
+                }
+                for f, v in items
+            ]
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "flagged": self.flagged,
+            "started": self.started,
+            "wall_ms": round(self.wall_ms, 3),
+            "python_calls": len(self.profiles),
+            "skipped_calls": self.skipped,
+            "native": self.native,
+            "hot_functions": hot,
+        }
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # 内置函数
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def note_native(timings: Dict[str, Any]):
+    """记录一次 C 分析的阶段耗时（当前请求没有被剖析时忽略）"""
+    record = _current.get()
+    if record is not None:
+        record.native.append(timings)
+
+
+class RequestProfiler:
+    def __init__(self, token: str = "", sample_rate: float = 0.0, capacity: int = 20):
+        """
+        :param token: 调试令牌，为空时关闭剖析；请求头 X-Profile-Token 与之相同时必定剖析，调试接口也用它鉴权
+        :param sample_rate: 未带令牌的请求被抽样剖析的比例
+        :param capacity: 保留最近多少条剖析记录
+        """
+        self.token = token
+        self.sample_rate = sample_rate
+        self._records: Deque[ProfileRecord] = deque(maxlen=max(1, capacity))
+        self._ids = itertools.count(1)
+        # cProfile 同一时间只能有一个在运行（Python 3.12 起是全进程共享的），其余调用照常执行但不剖析
+        self._cprofile_lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            token=os.getenv("PROFILE_TOKEN", ""),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            capacity=int(os.getenv("PROFILE_BUFFER_SIZE", "20")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def authorized(self, header: Optional[str]) -> bool:
+        return self.enabled and header is not None and hmac.compare_digest(header, self.token)
+
+    def request(self, endpoint: str, headers):
+        """包住一次请求：带令牌头或被抽中时记录，否则什么也不做"""
+        if not self.enabled:
+            return _NULL
+        flagged = self.authorized(headers.get(PROFILE_HEADER))
+        if not flagged and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return _NULL
+        return self._recording(endpoint, flagged)
+
+    @contextmanager
+    def _recording(self, endpoint: str, flagged: bool):
+        record = ProfileRecord(next(self._ids), endpoint, flagged)
+        token = _current.set(record)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_ms = (time.perf_counter() - t0) * 1000
+            _current.reset(token)
+            self._records.append(record)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """执行 fn；当前请求正在被剖析时用 cProfile 记录这次调用"""
+        record = _current.get() if self.enabled else None
+        if record is None or getattr(self._local, "active", False):
+            return fn(*args, **kwargs)
+        if not self._cprofile_lock.acquire(blocking=False):
+            record.skipped += 1
+            return fn(*args, **kwargs)
+        prof = cProfile.Profile()
+        self._local.active = True
+        try:
+            prof.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+        finally:
+            self._local.active = False
+            self._cprofile_lock.release()
+            with record._lock:
+                record.profiles.append(prof)
+
+    def bind(self, fn: Callable) -> Callable:
+        """把当前的剖析记录带到线程池中执行的 fn（run_in_executor 不会复制 contextvars）"""
+        record = _current.get() if self.enabled else None
+        if record is None:
+            return fn
+
+        def run(*args, **kwargs):
+            token = _current.set(record)
+            try:
+                return self.call(fn, *args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        return run
+
+    # ---------- 导出 ----------
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [r.summary() for r in reversed(self._records)]
+
+    def get(self, record_id: int) -> Optional[ProfileRecord]:
+        for r in self._records:
+            if r.id == record_id:
+                return r
+        return None
+
+    @staticmethod
+    def pstats_bytes(record: ProfileRecord) -> bytes:
+        """与 Stats.dump_stats 相同的格式，可用 pstats.Stats(path) / snakeviz 打开"""
+        st = record.stats()
+        return marshal.dumps(st.stats if st else {})
+
+    @staticmethod
+    def collapsed(record: ProfileRecord) -> str:
+        """
+        折叠栈（每行 "帧;帧;帧 微秒数"）。cProfile 只记录调用方 -> 被调用方的边，
+        多条路径共享的函数按各条边的累计耗时比例分摊
+        """
+        st = record.stats()
+        if not st:
+            return ""
+        stats = st.stats
+        children: Dict[tuple, Dict[tuple, float]] = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                children.setdefault(caller, {})[func] = edge[3]
+        totals: Dict[str, int] = {}
+
+        def walk(func: tuple, path: List[str], on_path: set, share: float):
+            _, _, tt, ct, _ = stats[func]
+            frames = path + [_label(func).replace(";", ",")]
+            self_us = int(tt * share * 1e6)
+            if self_us >= COLLAPSED_MIN_US:
+                key = ";".join(frames)
+                totals[key] = totals.get(key, 0) + self_us
+            if len(frames) >= COLLAPSED_MAX_DEPTH:
+                return
+            on_path.add(func)
+            for child, edge_ct in children.get(func, {}).items():
+                child_ct = stats[child][3]
+                if child in on_path or child_ct <= 0:
+                    continue
+                child_share = share * min(1.0, edge_ct / child_ct)
+                if child_ct * child_share * 1e6 >= COLLAPSED_MIN_US:
+                    walk(child, frames, on_path, child_share)
+            on_path.discard(func)
+
+        for func, value in stats.items():
+            if not value[4]:  # 没有调用方：剖析开始时所在的函数
+                walk(func, [f"{record.endpoint}#{record.id}"], set(), 1.0)
+        return "".join(f"{k} {v}\n" for k, v in totals.items())
+
+
+profiler = RequestProfiler.from_env()
@@ -0,0 +1,827 @@
+# 纯 Python 分析引擎：C 动态库不可用时的后备实现，输出与 analyze_text / analyze_text_ex 一致
+# 逐条复刻 c_modules/src/analyzer.c 的 Analyzer_Process 语义（FMM 分词、计数规则、章节、重复检测、
+# 哈希桶顺序），字符分类交给正则（C 实现的批量扫描），只有中文匹配需要逐字处理。
+# 标题超过 127 字节时两端都按整字截断，剩余部分按正文处理；
+# 单请求内存预算只在 C 端生效（不同词数上限两端一致）
+import json
+import math
+import os
+import re
+import string
+import struct
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DICT_DIR = os.path.join(PROJECT_ROOT, "dict")
+
+# 与 C 模块一致的常量
+MAX_WORD_BYTES = 63  # MAX_WORD_LEN - 1
+SECTION_TOP_N = 10  # 每个章节输出的高频词/敏感词数量（top_n <= 0 时输出全部）
+MAX_TITLE_BYTES = 127
+HASH_TABLE_SIZE = 8192
+REDUNDANT_SPANS_JSON_SIZE = 256 * 1024
+SENSITIVE_JSON_SIZE = 1024
+SENSITIVE_HITS_MAX = 4096  # 输出的敏感词出现位置上限
+MAX_PATTERN_BYTES = 255  # AHO_MAX_PATTERN
+REDUNDANT_NGRAM = 8
+REDUNDANT_MIN_TOKENS = 3
+REDUNDANT_MIN_BYTES = 12
+
+# 分词词典（与 load_main_dicts_once 的加载顺序一致，后加载的词频覆盖先加载的）
+SEGMENT_DICTS = (
+    "Chinese/dict.txt",
+    "Chinese/IT.txt",
+    "Chinese/idiom.txt",
+    "Chinese/sensitive_words_cn.txt",
+    "Chinese/stop_words_cn.txt",
+)
+
+# 文本规范化（与 normalize.h 的 NORM_* 一致）
+NORM_WIDTH = 0x01
+NORM_T2S = 0x02
+NORM_INVISIBLE = 0x04
+NORM_CASE = 0x08
+NORM_ALL = 0x0F
+NORM_NAMES = {"width": NORM_WIDTH, "t2s": NORM_T2S, "invisible": NORM_INVISIBLE, "case": NORM_CASE}
+T2S_DICT = "Chinese/t2s.txt"
+_INVISIBLE_DELETE = (
+    (0x00AD, 0x00AD), (0x034F, 0x034F), (0x061C, 0x061C), (0x115F, 0x1160), (0x17B4, 0x17B5),
+    (0x180E, 0x180E), (0x200B, 0x200F), (0x202A, 0x202E), (0x2060, 0x2064), (0x2066, 0x2069),
+    (0x3164, 0x3164), (0xFE00, 0xFE0F), (0xFEFF, 0xFEFF), (0xFFA0, 0xFFA0),
+)
+_INVISIBLE_SPACE = ((0x00A0, 0x00A0), (0x1680, 0x1680), (0x2000, 0x200A), (0x2028, 0x2029), (0x202F, 0x202F), (0x205F, 0x205F))
+_T2S_LINE_RE = re.compile(rb"([\xe0-\xef][\x80-\xbf]{2})[ \t]+([\xe0-\xef][\x80-\xbf]{2})[ \t\r\n]*")
+
+_MASK64 = (1 << 64) - 1
+_ROLL_BASE = 1099511628211
+_SENTENCE_SEED = 0x9E3779B97F4A7C15
+_BASE_POW_N = pow(_ROLL_BASE, REDUNDANT_NGRAM, 1 << 64)
+
+_HEADER_RE = re.compile(r"(#{1,6}) ([^\r\n]*)")
+_NEWLINES_RE = re.compile(r"[\r\n]*")
+_LETTERS_RE = re.compile(r"[A-Za-z]+")
+# ASCII 中除字母、换行外的字符（数字/空白/标点），整段一次处理
+_ASCII_OTHER_RE = re.compile(r"[\x00-\x09\x0b-\x40\x5b-\x60\x7b-\x7f]+")
+_ASCII_SENT_END_RE = re.compile(r"[.!?]")
+_CN_CHAR_RE = re.compile("[䀀-鿿]")  # C: 3 字节 UTF-8 且首字节 E4~E9
+_DROP_PUNCT = str.maketrans("", "", string.punctuation)  # C locale 下 ispunct 的字符集
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_C_SPACE_RE = re.compile(rb"[ \t\n\v\f\r]+")
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+_INT_RE = re.compile(rb"[+-]?\d+")
+_CN_SENT_END = frozenset("。！？")
+
+
+def djb2_bucket(word: str) -> int:
+    """C 模块 dict.c 的 DJB2 哈希桶序号（按有符号 char 累加）：同频词按桶顺序输出"""
+    h = 5381
+    for b in word.encode("utf-8"):
+        h = (h * 33 + (b - 256 if b >= 128 else b)) & _MASK64
+    return h % HASH_TABLE_SIZE
+
+
+def _fnv1a(data: bytes) -> int:
+    h = 14695981039346656037
+    for b in data:
+        h = ((h ^ b) * 1099511628211) & _MASK64
+    return h
+
+
+def _mix(h: int) -> int:
+    h ^= h >> 33
+    h = (h * 0xFF51AFD7ED558CCD) & _MASK64
+    h ^= h >> 33
+    return h or 1
+
+
+def _float32(x: float) -> float:
+    """C 端权重以 float 存储"""
+    return struct.unpack("f", struct.pack("f", x))[0]
+
+
+def _utf8_len(ch: str) -> int:
+    o = ord(ch)
+    return 1 if o < 0x80 else 2 if o < 0x800 else 3 if o < 0x10000 else 4
+
+
+def _truncate_bytes(s: str, limit: int) -> str:
+    data = s.encode("utf-8")
+    if len(data) <= limit:
+        return s
+    return data[:limit].decode("utf-8", errors="ignore")
+
+
+def parse_normalization(spec: Optional[str]) -> int:
+    """"width,t2s,invisible,case" 中任意几项 / "all" / "1" -> NORM_* 位掩码；空值或 "0" 表示关闭"""
+    flags = 0
+    for name in (spec or "").lower().replace(" ", "").split(","):
+        if name in ("", "0"):
+            continue
+        if name in ("all", "1"):
+            flags |= NORM_ALL
+        elif name in NORM_NAMES:
+            flags |= NORM_NAMES[name]
+        else:
+            raise ValueError(f"unknown normalization: {name}")
+    return flags
+
+
+def _read_lines(path: str) -> List[bytes]:
+    """按 fgets 的方式只在 \\n 处分行"""
+    try:
+        with open(path, "rb") as f:
+            return f.read().split(b"\n")
+    except OSError:
+        return []
+
+
+def _parse_segment_lines(lines: Iterable[bytes], words: Dict[str, int]) -> int:
+    """复刻 trie_insert_line：取第一个词条，第二列能解析为整数时作为词频，否则为 1"""
+    count = 0
+    for line in lines:
+        parts = _C_SPACE_RE.split(line.strip(b" \t\n\v\f\r"), 2)
+        if not parts or not parts[0]:
+            continue
+        word = parts[0][:255].decode("utf-8", errors="ignore")
+        freq = 1
+        if len(parts) > 1:
+            m = _INT_RE.match(parts[1])
+            if m:
+                freq = int(m.group())
+        if word:
+            words[word] = freq
+            count += 1
+    return count
+
+
+# 扁平化 Trie：每个词及其所有前缀 -> 词频（前缀不是词时为 0），以及最长词的字符数
+Lexicon = Tuple[Dict[str, int], int]
+
+
+def _build_trie(words: Dict[str, int]) -> Lexicon:
+    trie: Dict[str, int] = {}
+    for w in words:
+        for k in range(1, len(w)):
+            trie.setdefault(w[:k], 0)
+    for w, freq in words.items():
+        trie[w] = freq
+    return trie, max((len(w) for w in words), default=0)
+
+
+def _sensitive_hits(
+    text: str, limit: int, trie: Dict[str, int], first_re, max_len: int, source: Optional["_SourceOffsets"] = None
+) -> Tuple[List[List[int]], bool]:
+    """
+    复刻 C 端敏感词自动机的输出：text[:limit] 中每次出现的敏感词（ASCII 不区分大小写，可重叠），
+    按结束位置排列、同一位置由长到短；词首/词尾是字母的词必须在词边界上。返回 ([[起始字节, 结束字节], ...], 是否截断)。
+    text 是规范化后的文本时由 source 换算为原文的字节偏移
+    """
+    folded = text.translate(_ASCII_LOWER)
+    n = len(text)
+    found: List[Tuple[int, int]] = []
+    for m in first_re.finditer(folded, 0, limit):
+        i = m.start()
+        if folded[i] in _ASCII_LETTERS and i > 0 and folded[i - 1] in _ASCII_LETTERS:
+            continue
+        end = min(limit, i + max_len)
+        k = i + 1
+        while k <= end:
+            flag = trie.get(folded[i:k])
+            if flag is None:
+                break
+            if flag and not (folded[k - 1] in _ASCII_LETTERS and k < n and folded[k] in _ASCII_LETTERS):
+                found.append((k, i))
+            k += 1
+    found.sort()  # (结束, 起始)：同一结束位置长的在前
+    truncated = len(found) > SENSITIVE_HITS_MAX
+    found = found[:SENSITIVE_HITS_MAX]
+    if source is not None:
+        return source.char_spans(found), truncated
+    # 字符下标换算为 UTF-8 字节偏移
+    offsets: Dict[int, int] = {}
+    b = pos = 0
+    for c in sorted({c for h in found for c in h}):
+        b += len(text[pos:c].encode("utf-8"))
+        pos = c
+        offsets[c] = b
+    return [[offsets[i], offsets[k]] for k, i in found], truncated
+
+
+def _build_norm_table(flags: int, t2s_lines: Iterable[bytes]) -> Dict[int, str]:
+    """复刻 normalize.c 的查表：码位 -> 替换后的字符（空串表示删除），同一码位只取第一次设置"""
+    table: Dict[int, str] = {}
+    if flags & NORM_WIDTH:
+        for cp in range(0xFF01, 0xFF5F):
+            table[cp] = chr(cp - 0xFEE0)
+        table[0x3000] = " "
+    if flags & NORM_INVISIBLE:
+        for ranges, to in ((_INVISIBLE_DELETE, ""), (_INVISIBLE_SPACE, " ")):
+            for first, last in ranges:
+                for cp in range(first, last + 1):
+                    table[cp] = to
+    if flags & NORM_CASE:
+        for first, last, delta in ((0x00C0, 0x00DE, 0x20), (0x0391, 0x03A9, 0x20), (0x0400, 0x040F, 0x50), (0x0410, 0x042F, 0x20)):
+            for cp in range(first, last + 1):
+                if cp not in (0x00D7, 0x03A2):
+                    table[cp] = chr(cp + delta)
+    if flags & NORM_T2S:
+        for line in t2s_lines:
+            m = _T2S_LINE_RE.fullmatch(line)
+            if not m:
+                continue
+            try:
+                src, dst = m.group(1).decode("utf-8"), m.group(2).decode("utf-8")
+            except UnicodeDecodeError:  # 超长编码、代理码位
+                continue
+            if src != dst:
+                table.setdefault(ord(src), dst)
+    return table
+
+
+class _SourceOffsets:
+    """规范化后文本的位置 -> 原文的 UTF-8 字节偏移：词的起点为首字符在原文中的起点，终点为末字符在原文中的终点"""
+
+    def __init__(self, source: str, table: Dict[int, str]):
+        self.source = source
+        self.table = table
+        # 顺序查询的游标：原文字符下标、原文字节偏移、规范化后的字节偏移、上一个保留字符在原文中的终点
+        self._k = self._sb = self._nb = self._last_end = 0
+
+    def _advance(self, nb: int):
+        src, table = self.source, self.table
+        k, sb, b, last = self._k, self._sb, self._nb, self._last_end
+        while b < nb:
+            ch = src[k]
+            k += 1
+            sb += _utf8_len(ch)
+            mapped = table.get(ord(ch), ch)
+            if mapped:
+                b += _utf8_len(mapped)
+                last = sb
+        self._k, self._sb, self._nb, self._last_end = k, sb, b, last
+
+    def start(self, nb: int) -> int:
+        """规范化后字节偏移 nb 处的字符在原文中的起点（偏移须按递增顺序查询）"""
+        self._advance(nb)
+        src, table = self.source, self.table
+        k, sb = self._k, self._sb
+        while k < len(src) and not table.get(ord(src[k]), src[k]):  # 跳过被删除的字符
+            sb += _utf8_len(src[k])
+            k += 1
+        self._k, self._sb = k, sb
+        return sb
+
+    def end(self, nb: int) -> int:
+        """在规范化后字节偏移 nb 处结束的字符在原文中的终点"""
+        self._advance(nb)
+        return self._last_end
+
+    def char_spans(self, found: List[Tuple[int, int]]) -> List[List[int]]:
+        """规范化后的字符区间 [(结束, 起始), ...] -> 原文字节区间 [[起始, 结束], ...]"""
+        need_start = {i for _, i in found}
+        need_end = {k for k, _ in found}
+        top = max(need_start | need_end, default=-1)
+        starts: Dict[int, int] = {}
+        ends: Dict[int, int] = {}
+        j = sb = 0
+        for ch in self.source:
+            if j > top:
+                break
+            u = _utf8_len(ch)
+            if self.table.get(ord(ch), ch):
+                if j in need_start:
+                    starts[j] = sb
+                j += 1
+                if j in need_end:
+                    ends[j] = sb + u
+            sb += u
+        return [[starts[i], ends[k]] for k, i in found]
+
+
+class _SourceSpans:
+    """规范化模式的重复检测：收到规范化后的字节偏移（按递增顺序），按原文偏移记录区间，与 C 端一致"""
+
+    def __init__(self, tracker: "_RedundancyTracker", offsets: _SourceOffsets):
+        self.tracker = tracker
+        self.offsets = offsets
+
+    def token(self, th: int, start: int, end: int):
+        self.tracker.token(th, self.offsets.start(start), self.offsets.end(end))
+
+    def sentence_end(self, end: int):
+        self.tracker.sentence_end(self.offsets.end(end))
+
+    @property
+    def spans(self) -> List[List[int]]:
+        return self.tracker.spans
+
+    @property
+    def redundant_bytes(self) -> int:
+        return self.tracker.redundant_bytes
+
+
+def compile_overlay(text: str) -> Tuple[Lexicon, int]:
+    """复刻 Analyzer_CompileOverlay：编译自定义词表（每行 "词 [词频]"），返回 (词表, 词条数)"""
+    words: Dict[str, int] = {}
+    count = _parse_segment_lines(text.encode("utf-8").split(b"\n"), words)
+    return _build_trie(words), count
+
+
+def _new_section(title: str, level: int, word_start: int = 0, sensitive_start: int = 0) -> Dict[str, Any]:
+    # word_count / sensitive_count 先记录开始时的累计值，结算时换成本节的增量
+    return {
+        "title": title,
+        "level": level,
+        "length": 0,
+        "word_count": word_start,
+        "sensitive_count": sensitive_start,
+        "words": {},
+        "sensitive": {},
+    }
+
+
+class _RedundancyTracker:
+    """redundancy.c 的逐行移植：句子哈希 + N-gram 滚动哈希，结果为合并后的字节区间"""
+
+    def __init__(self):
+        self.seen = set()
+        self.ring_hash = [0] * REDUNDANT_NGRAM
+        self.ring_start = [0] * REDUNDANT_NGRAM
+        self.ring_count = 0
+        self.ring_pos = 0
+        self.window_hash = 0
+        self.sent_hash = 0
+        self.sent_start = -1
+        self.sent_tokens = 0
+        self.spans: List[List[int]] = []
+        self.redundant_bytes = 0
+
+    def _check_insert(self, h: int) -> bool:
+        h = _mix(h)
+        if h in self.seen:
+            return True
+        self.seen.add(h)
+        return False
+
+    def _add_span(self, start: int, end: int):
+        spans = self.spans
+        while spans and start <= spans[-1][1]:
+            last = spans.pop()
+            start = min(start, last[0])
+            end = max(end, last[1])
+            self.redundant_bytes -= last[1] - last[0]
+        spans.append([start, end])
+        self.redundant_bytes += end - start
+
+    def token(self, th: int, start: int, end: int):
+        if self.sent_tokens == 0:
+            self.sent_start = start
+        self.sent_hash = (self.sent_hash * _ROLL_BASE + th) & _MASK64
+        self.sent_tokens += 1
+
+        pos = self.ring_pos
+        if self.ring_count == REDUNDANT_NGRAM:
+            old = self.ring_hash[pos]
+            self.window_hash = (self.window_hash * _ROLL_BASE + th - old * _BASE_POW_N) & _MASK64
+        else:
+            self.window_hash = (self.window_hash * _ROLL_BASE + th) & _MASK64
+            self.ring_count += 1
+        self.ring_hash[pos] = th
+        self.ring_start[pos] = start
+        self.ring_pos = (pos + 1) % REDUNDANT_NGRAM
+
+        if self.ring_count == REDUNDANT_NGRAM and self._check_insert(self.window_hash):
+            self._add_span(self.ring_start[self.ring_pos], end)
+
+    def sentence_end(self, end: int):
+        if self.sent_tokens >= REDUNDANT_MIN_TOKENS and end - self.sent_start >= REDUNDANT_MIN_BYTES:
+            if self._check_insert(self.sent_hash ^ _SENTENCE_SEED):
+                self._add_span(self.sent_start, end)
+        self.sent_hash = 0
+        self.sent_tokens = 0
+        self.sent_start = -1
+
+
+class PyAnalyzer:
+    """
+    与 libanalyzer 输出格式一致的纯 Python 分析器。
+    词典在第一次分析时从 dict/ 加载（与 C 模块相同的文件），之后在所有请求间共享
+    """
+
+    def __init__(
+        self, dict_dir: str = DICT_DIR, detect_redundancy: bool = True, max_unique_tokens: int = 0, normalize: int = 0
+    ):
+        self.dict_dir = dict_dir
+        self.detect_redundancy = detect_redundancy
+        self.max_unique_tokens = max_unique_tokens  # 不同词数上限，<= 0 表示不限
+        self.normalize = normalize & NORM_ALL  # NORM_* 位掩码，0 表示不规范化
+        self._norm_table: Dict[int, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 扁平化 Trie：每个词及其所有前缀 -> 词频（前缀不是词时为 0）
+        self._trie: Dict[str, int] = {}
+        self._max_word_len = 0
+        # 分词词典中每个词的 IDF 权重（TF-IDF 排序用），未登录词取词频中位数对应的权重
+        self._weights: Dict[str, float] = {}
+        self._idf_unknown = 1.0
+        self._stop: set = set()
+        # 敏感词（去掉词尾空白、ASCII 转小写）及其扁平化 Trie、首字符正则，复刻 C 端的敏感词自动机
+        self._sensitive: set = set()
+        self._sensitive_trie: Dict[str, int] = {}
+        self._sensitive_first = re.compile("(?!)")
+        self._sensitive_max_len = 0
+        # 词 -> (哈希, UTF-8 字节长度, 中文字数)，避免重复计算
+        self._token_info: Dict[str, Tuple[int, int, int]] = {}
+
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    # ---------- 词典加载 ----------
+
+    def _path(self, rel: str) -> str:
+        return os.path.join(self.dict_dir, *rel.split("/"))
+
+    def _load_segment_dict(self, rel: str, words: Dict[str, int]) -> int:
+        return _parse_segment_lines(_read_lines(self._path(rel)), words)
+
+    def _load_word_set(self, rel: str, lower: bool = False) -> set:
+        """复刻 list.c 的 load_word_file：去掉行首空白和行尾换行，保留其他字符"""
+        result = set()
+        for line in _read_lines(self._path(rel)):
+            word = line.lstrip(b" \t").rstrip(b"\r").decode("utf-8", errors="ignore")
+            if not word:
+                continue
+            if lower:
+                word = word.translate(_ASCII_LOWER)
+            # C 端超过 63 字节的条目存储时被截断、哈希却按全文计算，永远不会命中
+            if len(word.encode("utf-8")) <= MAX_WORD_BYTES:
+                result.add(word)
+        return result
+
+    def _load_sensitive(self, *rels: str):
+        """复刻 aho_build：词表行去掉词尾 ASCII 空白，大小写不敏感，跳过空词和超过 255 字节的词"""
+        words: Dict[str, int] = {}
+        for rel in rels:
+            for line in _read_lines(self._path(rel)):
+                data = line.lstrip(b" \t").rstrip(b" \t\n\v\f\r")
+                if data and len(data) <= MAX_PATTERN_BYTES:
+                    word = data.decode("utf-8", errors="ignore").translate(_ASCII_LOWER)
+                    if word:
+                        words[word] = 1
+        self._sensitive = set(words)
+        self._sensitive_trie, self._sensitive_max_len = _build_trie(words)
+        if words:
+            self._sensitive_first = re.compile("[" + "".join(sorted({re.escape(w[0]) for w in words})) + "]")
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            words: Dict[str, int] = {}
+            counts = {rel: self._load_segment_dict(rel, words) for rel in SEGMENT_DICTS}
+            self._trie, self._max_word_len = _build_trie(words)
+            self._compute_weights(words)
+            self._stop = self._load_word_set("Chinese/stop_words_cn.txt") | self._load_word_set(
+                "English/stop_words_en.txt", lower=True
+            )
+            self._load_sensitive("Chinese/sensitive_words_cn.txt", "English/sensitive_words_en.txt")
+            if self.normalize:
+                self._norm_table = _build_norm_table(self.normalize, _read_lines(self._path(T2S_DICT)))
+            self._loaded = True
+            print(
+                f"[PyAnalyzer] Loaded {len(words)} words "
+                + ", ".join(f"{os.path.basename(k)}={v}" for k, v in counts.items())
+            )
+
+    def _compute_weights(self, words: Dict[str, int]):
+        """复刻 trie_compute_weights：log(总词频 / 词频)，未登录词取词频中位数对应的权重"""
+        terminals = {w: f for w, f in words.items() if f > 0}
+        if not terminals:
+            return
+        total = sum(terminals.values())
+        self._weights = {w: _float32(math.log(total / f)) for w, f in terminals.items()}
+        freqs = sorted(terminals.values())
+        self._idf_unknown = _float32(math.log(total / freqs[len(freqs) // 2]))
+
+    # ---------- 分析 ----------
+
+    def _info(self, word: str) -> Tuple[int, int, int]:
+        info = self._token_info.get(word)
+        if info is None:
+            data = word.encode("utf-8")
+            info = (_fnv1a(data), len(data), len(_CN_CHAR_RE.findall(word)))
+            self._token_info[word] = info
+        return info
+
+    @staticmethod
+    def _match(text: str, i: int, n: int, lexicons: Sequence[Lexicon]) -> int:
+        """正向最大匹配：返回各词表中最长匹配的字符数，0 表示没有词"""
+        best = 0
+        for trie, max_len in lexicons:
+            end = min(n, i + max_len)
+            k = i + 1
+            while k <= end:
+                freq = trie.get(text[i:k])
+                if freq is None:
+                    break
+                if freq > 0 and k - i > best:
+                    best = k - i
+                k += 1
+        return best
+
+    def analyze(
+        self, text: str, top_n: int = 10, rank: str = "freq", overlays: Sequence[Lexicon] = ()
+    ) -> Dict[str, Any]:
+        """
+        :param top_n: 返回的高频词数量，<= 0 表示返回全部词频（不排序）
+        :param rank: "freq" 按词频排序；"tfidf" 按 词频 × IDF 排序并输出 score
+        :param overlays: compile_overlay 编译的自定义词表，与分词词典一起做最长匹配
+        """
+        self._ensure_loaded()
+        nul = text.find("\0")
+        if nul >= 0:
+            text = text[:nul]  # C 字符串在 \0 处结束
+        # 规范化：在规范化后的文本上分析，输出的字节区间换算回原文
+        source: Optional[_SourceOffsets] = None
+        if self._norm_table:
+            normalized = text.translate(self._norm_table)
+            if normalized != text:
+                source = _SourceOffsets(text, self._norm_table)
+                text = normalized
+
+        stop, sensitive = self._stop, self._sensitive
+        max_unique = self.max_unique_tokens
+        truncated_reason: Optional[str] = None
+        freq: Dict[str, int] = {}
+        sensitive_hit: Dict[str, int] = {}
+        tracker = _RedundancyTracker() if self.detect_redundancy else None
+        if tracker and source:
+            tracker = _SourceSpans(tracker, source)
+        info = self._info
+        lexicons = [(self._trie, self._max_word_len), *overlays]
+
+        total_chars = en_words = cn_chars = sensitive_count = punct_count = 0
+        sections: List[Dict[str, Any]] = [_new_section("Introduction", 0)]
+        # 本节的词频与命中的敏感词（dict 保持首次出现顺序）
+        sec_freq: Dict[str, int] = sections[0]["words"]
+        sec_sensitive: Dict[str, int] = sections[0]["sensitive"]
+        section_chars = 0
+
+        def count_word(word: str, is_sensitive: bool):
+            nonlocal sensitive_count
+            if is_sensitive:
+                sensitive_count += 1
+                sensitive_hit[word] = sensitive_hit.get(word, 0) + 1
+                sec_sensitive[word] = sec_sensitive.get(word, 0) + 1
+            elif word not in stop:
+                freq[word] = freq.get(word, 0) + 1
+                sec_freq[word] = sec_freq.get(word, 0) + 1
+
+        def close_section():
+            sec = sections[-1]
+            sec["length"] = section_chars
+            sec["word_count"] = en_words + cn_chars - sec["word_count"]
+            sec["sensitive_count"] = sensitive_count - sec["sensitive_count"]
+
+        n = len(text)
+        i = 0  # 字符下标
+        b = 0  # 对应的 UTF-8 字节偏移（重复检测区间使用）
+        line_start = True
+        while i < n:
+            # 与 C 端一致：每个词/标题/空白段之前检查不同词数上限
+            if max_unique > 0 and len(freq) >= max_unique:
+                truncated_reason = "unique_tokens"
+                break
+            ch = text[i]
+
+            # 1. Markdown 标题（行首的 1~6 个 # 加空格）
+            if line_start and ch == "#":
+                m = _HEADER_RE.match(text, i)
+                if m:
+                    close_section()
+                    title = _truncate_bytes(m.group(2), MAX_TITLE_BYTES)
+                    section = _new_section(title, len(m.group(1)), en_words + cn_chars, sensitive_count)
+                    sections.append(section)
+                    sec_freq, sec_sensitive = section["words"], section["sensitive"]
+                    section_chars = 0
+                    j = m.start(2) + len(title)
+                    b += len(text[i:j].encode("utf-8"))
+                    skip = _NEWLINES_RE.match(text, j).end()
+                    b += skip - j
+                    i = skip
+                    if tracker:
+                        tracker.sentence_end(b)
+                    line_start = True
+                    continue
+
+            o = ord(ch)
+            if o < 0x80:
+                m = _LETTERS_RE.match(text, i)
+                if m:
+                    # 英文词：C 端逐字母写入缓冲区，遇到非字母时结算
+                    j = m.end()
+                    run = j - i
+                    total_chars += run
+                    section_chars += run
+                    en_words += 1
+                    lower = m.group().translate(_ASCII_LOWER)
+                    word = lower[:MAX_WORD_BYTES]
+                    # 只有后接 ASCII 非字母时才检查敏感词；后接多字节字符或文本结束时直接计数
+                    nxt_ascii = j < n and ord(text[j]) < 0x80
+                    count_word(word, nxt_ascii and lower in sensitive)
+                    if tracker:
+                        tracker.token(info(word)[0], b, b + run)
+                    b += run
+                    i = j
+                    line_start = False
+                    if j < n and not nxt_ascii:
+                        # 缓冲区刚结算的多字节字符不走词典匹配
+                        i, b = self._single_char(text, i, b, count_word, tracker)
+                        c_cn = _CN_CHAR_RE.match(text[j])
+                        if c_cn:
+                            cn_chars += 1
+                        else:
+                            punct_count += 1
+                        total_chars += 1
+                        section_chars += 1
+                    continue
+                if ch == "\n":
+                    total_chars += 1
+                    section_chars += 1
+                    if tracker:
+                        tracker.sentence_end(b + 1)
+                    i += 1
+                    b += 1
+                    line_start = True
+                    continue
+                m = _ASCII_OTHER_RE.match(text, i)
+                run_text = m.group()
+                run = len(run_text)
+                total_chars += run
+                section_chars += run
+                punct_count += run - len(run_text.translate(_DROP_PUNCT))
+                if tracker:
+                    # 连续的句末标点中只有第一个有效（之后句子已为空）
+                    e = _ASCII_SENT_END_RE.search(run_text)
+                    if e:
+                        tracker.sentence_end(b + e.start() + 1)
+                i += run
+                b += run
+                line_start = False
+                continue
+
+            # 2. 多字节字符：先做词典最长匹配
+            total_chars += 1
+            section_chars += 1
+            k = self._match(text, i, n, lexicons)
+            if k:
+                word = text[i : i + k]
+                th, nbytes, ncn = info(word)
+                cn_chars += ncn
+                # 敏感词按整个词（ASCII 不区分大小写）判断，计数时与 C 端一样按 63 字节截断
+                count_word(_truncate_bytes(word, MAX_WORD_BYTES), word.translate(_ASCII_LOWER) in sensitive)
+                if tracker:
+                    tracker.token(th, b, b + nbytes)
+                i += k
+                b += nbytes
+            else:
+                if _CN_CHAR_RE.match(ch):
+                    cn_chars += 1
+                else:
+                    punct_count += 1
+                i, b = self._single_char(text, i, b, count_word, tracker)
+            line_start = False
+
+        if tracker and not truncated_reason:
+            tracker.sentence_end(b)
+        close_section()
+        hits = _sensitive_hits(
+            text, i, self._sensitive_trie, self._sensitive_first, self._sensitive_max_len, source
+        )
+
+        return self._build_result(
+            top_n,
+            freq,
+            sensitive_hit,
+            hits,
+            sections,
+            tracker,
+            truncated_reason,
+            rank == "tfidf",
+            total_chars=total_chars,
+            en_words=en_words,
+            cn_chars=cn_chars,
+            sensitive_count=sensitive_count,
+            punct_count=punct_count,
+        )
+
+    def _single_char(self, text: str, i: int, b: int, count_word, tracker) -> Tuple[int, int]:
+        """单个多字节字符（不计入 total_chars/cn_chars/punct_count，由调用方处理）"""
+        ch = text[i]
+        u = _utf8_len(ch)
+        if _CN_CHAR_RE.match(ch):
+            count_word(ch, ch in self._sensitive)
+            if tracker:
+                tracker.token(self._info(ch)[0], b, b + u)
+        elif tracker and ch in _CN_SENT_END:
+            tracker.sentence_end(b + u)
+        return i + 1, b + u
+
+    def _build_result(
+        self, top_n, freq, sensitive_hit, hits, sections, tracker, truncated_reason, tfidf, **stats
+    ) -> Dict[str, Any]:
+        # 哈希表遍历顺序：桶序号升序，同一桶内后插入的在前
+        def table_order(table: Dict[str, int]) -> List[str]:
+            keyed = [(djb2_bucket(w), -idx, w) for idx, w in enumerate(table)]
+            keyed.sort()
+            return [w for _, _, w in keyed]
+
+        weights, unknown = self._weights, self._idf_unknown
+
+        def score(word: str, count: int) -> float:
+            return count * weights.get(word, unknown) if tfidf else count
+
+        def word_item(word: str, count: int) -> Dict[str, Any]:
+            if tfidf:
+                return {"word": word, "freq": count, "score": float(f"{score(word, count):.4f}")}
+            return {"word": word, "freq": count}
+
+        ordered = table_order(freq)
+        if top_n > 0:
+            # dict_get_top：稳定地按 词频（或 词频 × 权重）降序插入
+            ordered = sorted(ordered, key=lambda w: -score(w, freq[w]))[:top_n]
+        top_words = [word_item(w, freq[w]) for w in ordered]
+
+        # 敏感词 JSON 按转义后的长度累计，超过 1024 - 50 字节后停止输出
+        sensitive_words: List[str] = []
+        offset = 1
+        for w in table_order(sensitive_hit):
+            if offset >= SENSITIVE_JSON_SIZE - 50:
+                break
+            offset += (1 if sensitive_words else 0) + len(json.dumps(w, ensure_ascii=False).encode("utf-8"))
+            sensitive_words.append(w)
+
+        total_len = sum(s["length"] for s in sections)
+        # top_n <= 0 时输出全部（按首次出现顺序），否则按节内次数稳定排序取前 SECTION_TOP_N 个
+        section_limit = SECTION_TOP_N if top_n > 0 else None
+        section_list = []
+        for idx, s in enumerate(sections):
+            ratio = s["length"] / total_len if total_len > 0 else 0.0
+            words = list(s["words"].items())
+            if top_n > 0:
+                words.sort(key=lambda kv: -score(kv[0], kv[1]))
+            section_list.append(
+                {
+                    "section_id": idx,
+                    "title": s["title"],
+                    "level": s["level"],
+                    "length": s["length"],
+                    "ratio": float(f"{ratio:.4f}"),
+                    "word_count": s["word_count"],
+                    "sensitive_count": s["sensitive_count"],
+                    "top_words": [word_item(w, c) for w, c in words[:section_limit]],
+                    "sensitive_words": list(s["sensitive"])[:section_limit],
+                }
+            )
+
+        spans: List[List[int]] = []
+        truncated = False
+        span_count = redundant_bytes = 0
+        if tracker:
+            span_count = len(tracker.spans)
+            redundant_bytes = tracker.redundant_bytes
+            limit = REDUNDANT_SPANS_JSON_SIZE
+            offset = 1
+            for s, e in tracker.spans:
+                if offset + 32 >= limit:
+                    truncated = True
+                    break
+                offset += (1 if spans else 0) + len(f"[{s},{e}]")
+                spans.append([s, e])
+
+        total = sum(freq.values())
+        richness = len(freq) / math.sqrt(2.0 * total) if total > 0 else 0.0
+        return {
+            "total_chars": stats["total_chars"],
+            "en_words": stats["en_words"],
+            "cn_chars": stats["cn_chars"],
+            "words": stats["en_words"] + stats["cn_chars"],
+            "sensitive_count": stats["sensitive_count"],
+            "redundancy_count": span_count,
+            "punct_count": stats["punct_count"],
+            "section_count": len(sections),
+            "richness": float(f"{richness:.2f}"),
+            "sections": section_list,
+            "top_words": top_words,
+            "sensitive_words": sensitive_words,
+            "sensitive_hits": hits[0],
+            "sensitive_hits_truncated": hits[1],
+            "redundant_bytes": redundant_bytes,
+            "redundant_spans": spans,
+            "redundant_spans_truncated": truncated,
+            "truncated": truncated_reason is not None,
+            "truncated_reason": truncated_reason,
+        }
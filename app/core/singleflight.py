@@ -0,0 +1,41 @@
+# 请求合并（single-flight）：相同 key 的并发请求只执行一次，其余等待同一结果
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        :param timeout: 共享任务的整体超时（秒），超时后所有等待者都收到 asyncio.TimeoutError
+        """
+        self.timeout = timeout
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0  # 实际执行次数
+        self.coalesced = 0  # 被合并（未实际执行）的请求数
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(self._run(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        else:
+            self.coalesced += 1
+        # shield：某个等待者被取消（如客户端断开）不会取消其他人共享的任务
+        return await asyncio.shield(task)
+
+    async def _run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.timeout:
+            return await asyncio.wait_for(fn(), self.timeout)
+        return await fn()
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已离开时也要取走异常，避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
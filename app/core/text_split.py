@@ -0,0 +1,100 @@
+# 文本切分：按 Markdown 章节或均匀长度把文本分配到各分镜
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 与 C 模块 Analyzer_Process 的章节规则一致：行首 1~6 个 # 后跟空格
+_HEADER_RE = re.compile(r"^#{1,6} ", re.M)
+_SENTENCE_RE = re.compile(r"[^。！？!?\n]*[。！？!?\n]+|[^。！？!?\n]+$")
+
+
+def split_sections(text: str) -> List[str]:
+    """按 Markdown 标题切分，返回各章节文本（含标题行，首个标题前的内容为第 0 节）"""
+    starts = [m.start() for m in _HEADER_RE.finditer(text)]
+    bounds = [0] + starts + [len(text)]
+    return [text[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_RE.findall(text) if s.strip()]
+
+
+def _pack_groups(units: List[str], n: int) -> List[List[int]]:
+    """按顺序把 units 贪心分为 n 组（返回下标），每组长度尽量接近 总长/n"""
+    total = sum(len(u) for u in units)
+    target = total / n if n else total
+    groups: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for i, u in enumerate(units):
+        current.append(i)
+        size += len(u)
+        remaining_units = len(units) - i - 1
+        remaining_chunks = n - len(groups) - 1
+        if remaining_chunks > 0 and (size >= target or remaining_units <= remaining_chunks):
+            groups.append(current)
+            current, size = [], 0
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _pack(units: List[str], n: int) -> List[str]:
+    return ["".join(units[i] for i in g) for g in _pack_groups(units, n)]
+
+
+def split_panels(text: str, analysis: Dict[str, Any], panels: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    为每个分镜分配一段文本，同时返回这段文本包含的章节分析结果（按句子切分时为空列表）：
+    - 分析结果中有不少于 panels 个非空章节时，按章节顺序合并到 panels 段
+    - 否则按句子均匀切分
+    返回的段数可能少于 panels（文本过短时）
+    """
+    if panels <= 1:
+        return [(text, [])]
+    sections = analysis.get("sections") or []
+    non_empty = sum(1 for s in sections if s.get("length", 0) > 0)
+    if non_empty >= panels:
+        all_parts = split_sections(text)
+        indexed = [(i, p) for i, p in enumerate(all_parts) if p.strip()]
+        if len(indexed) >= panels:
+            # 只有切分结果与分析结果的章节一一对应时才附带章节统计
+            aligned = len(all_parts) == len(sections)
+            groups = _pack_groups([p for _, p in indexed], panels)
+            return [
+                (
+                    "".join(indexed[k][1] for k in g),
+                    [sections[indexed[k][0]] for k in g] if aligned else [],
+                )
+                for g in groups
+            ]
+    sentences = split_sentences(text)
+    if not sentences:
+        return [(text, [])]
+    return [(chunk, []) for chunk in _pack(sentences, min(panels, len(sentences)))]
+
+
+def section_keywords(sections: List[Dict[str, Any]], limit: int = 10) -> List[str]:
+    """合并若干章节的节内高频词（分析结果 sections[].top_words），按合计词频（TF-IDF 结果按合计 score）降序"""
+    freq: Dict[str, float] = {}
+    for sec in sections:
+        for item in sec.get("top_words") or []:
+            freq[item["word"]] = freq.get(item["word"], 0) + item.get("score", item["freq"])
+    return [w for w, _ in sorted(freq.items(), key=lambda kv: -kv[1])[:limit]]
+
+
+def strip_spans(text: str, spans: Optional[Sequence[Sequence[int]]]) -> str:
+    """
+    删除分析结果中的冗余片段（redundant_spans：UTF-8 字节区间 [start, end)，有序且不重叠）
+    区间必须来自对同一份 text 的分析
+    """
+    if not spans:
+        return text
+    data = text.encode("utf-8")
+    parts = []
+    pos = 0
+    for start, end in spans:
+        if start > pos:
+            parts.append(data[pos:start])
+        pos = max(pos, end)
+    parts.append(data[pos:])
+    return b"".join(parts).decode("utf-8", "ignore")
@@ -0,0 +1,129 @@
+# 上传文件处理：识别编码，只在需要时流式转码为 UTF-8，再以 mmap 形式直接交给 C 分析器
+import codecs
+import mmap
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+CHUNK_SIZE = 1 << 20
+# 无 BOM 且不是合法 UTF-8 时按 GB18030（GBK 的超集）处理
+FALLBACK_ENCODING = "gb18030"
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _chunks(f: BinaryIO, start: int = 0):
+    f.seek(start)
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def detect_encoding(f: BinaryIO) -> str:
+    """BOM 优先；否则流式校验 UTF-8，失败则视为 GB18030"""
+    f.seek(0)
+    head = f.read(4)
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in _chunks(f):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def detect_bytes_encoding(data: bytes) -> str:
+    """小文件：与 detect_encoding 规则相同"""
+    for bom, name in _BOMS:
+        if data.startswith(bom):
+            return name
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def decode_bytes(data: bytes) -> str:
+    return data.decode(detect_bytes_encoding(data), errors="replace")
+
+
+class UploadedText:
+    """
+    把上传文件整理成以 \\0 结尾的 UTF-8 内容，供 TextAnalyzer.analyze_bytes 直接读取：
+    - 小文件（不超过 CHUNK_SIZE）：读入内存
+    - UTF-8 文件：在原临时文件末尾追加 \\0 后直接 mmap，不复制、不解码
+    - 其他编码：流式转码到新的临时文件再 mmap
+    用法：with UploadedText(upload.file) as u: analyzer.analyze_bytes(u.buffer)
+    """
+
+    def __init__(self, f: BinaryIO):
+        self.encoding = "utf-8"
+        self.size = 0  # UTF-8 内容字节数（不含结尾 \0）
+        self._data: Optional[bytes] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._tmp: Optional[BinaryIO] = None
+
+        f.seek(0, os.SEEK_END)
+        raw_size = f.tell()
+        if raw_size <= CHUNK_SIZE:
+            f.seek(0)
+            raw = f.read()
+            self.encoding = detect_bytes_encoding(raw)
+            if self.encoding != "utf-8":
+                raw = raw.decode(self.encoding, errors="replace").encode("utf-8")
+            self._data = raw
+            self.size = len(self._data)
+            return
+
+        self.encoding = detect_encoding(f)
+        if self.encoding == "utf-8":
+            target = f
+            self.size = raw_size
+        else:
+            target = self._tmp = tempfile.TemporaryFile()
+            decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+            for chunk in _chunks(f):
+                target.write(decoder.decode(chunk).encode("utf-8"))
+            target.write(decoder.decode(b"", final=True).encode("utf-8"))
+            self.size = target.tell()
+        # SpooledTemporaryFile.fileno() 会先落盘；写入结尾 \0，C 端按 C 字符串读取
+        target.seek(self.size)
+        target.write(b"\0")
+        target.flush()
+        # ACCESS_COPY：私有映射，可写（ctypes 需要可写缓冲区取地址），不会改动文件
+        self._mmap = mmap.mmap(target.fileno(), self.size + 1, access=mmap.ACCESS_COPY)
+
+    @property
+    def buffer(self):
+        """bytes 或以 \\0 结尾的 mmap"""
+        return self._data if self._data is not None else self._mmap
+
+    def text(self) -> str:
+        """LLM 模式需要原文时才解码"""
+        if self._data is not None:
+            return self._data.decode("utf-8")
+        return self._mmap[: self.size].decode("utf-8", errors="replace")
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._tmp is not None:
+            self._tmp.close()
+            self._tmp = None
+
+    def __enter__(self) -> "UploadedText":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
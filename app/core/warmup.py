@@ -0,0 +1,129 @@
+# 模型预热与保活：启动时把模型加载进显存，Ollama 类后端定期续期 keep_alive，避免空闲后被卸载
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+
+def _native_root(api_base: str) -> str:
+    """OpenAI 兼容地址 http://host:11434/v1 -> Ollama 原生地址 http://host:11434"""
+    root = api_base.rstrip("/")
+    return root[:-3] if root.endswith("/v1") else root
+
+
+def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", **headers},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8") or "{}")
+
+
+class ModelWarmer:
+    def __init__(
+        self,
+        backends: List[Any],
+        system_prompt: str,
+        keep_alive: str = "30m",
+        interval: float = 240,
+        timeout: float = 120,
+    ):
+        """
+        :param backends: LLMRouter 中的 Backend 列表（api_base / api_key / model）
+        :param system_prompt: 所有请求共用的固定前缀，预热时一并发送，让支持前缀缓存的后端提前缓存
+        :param keep_alive: 传给 Ollama 的模型保留时长
+        :param interval: 保活请求间隔（秒），<= 0 表示只在启动时预热一次
+        """
+        self.backends = backends
+        self.system_prompt = system_prompt
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.timeout = timeout
+        self._ollama: Dict[str, bool] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_warm: Dict[str, float] = {}  # api_base -> 最近一次预热耗时（秒）
+
+    @classmethod
+    def from_env(cls, backends: List[Any], system_prompt: str) -> "ModelWarmer":
+        return cls(
+            backends,
+            system_prompt,
+            keep_alive=os.getenv("LLM_KEEP_ALIVE", "30m"),
+            interval=float(os.getenv("LLM_KEEPALIVE_INTERVAL", "240")),
+            timeout=float(os.getenv("LLM_WARMUP_TIMEOUT", "120")),
+        )
+
+    def is_ollama(self, backend) -> bool:
+        """探测 Ollama 原生接口 /api/tags（结果按地址缓存）"""
+        root = _native_root(backend.api_base)
+        if root not in self._ollama:
+            try:
+                with urllib.request.urlopen(f"{root}/api/tags", timeout=3) as response:
+                    self._ollama[root] = "models" in json.loads(response.read().decode("utf-8"))
+            except (urllib.error.URLError, OSError, ValueError):
+                return False  # 暂时连不上，下次再探测
+        return self._ollama[root]
+
+    def warm(self, backend, verbose: bool = True) -> bool:
+        """
+        加载模型：
+        - Ollama：/api/chat 带 keep_alive，加载模型并把固定前缀算进 KV 缓存
+        - 其他 OpenAI 兼容后端：发一个只生成 1 个 token 的请求
+        """
+        t0 = time.monotonic()
+        messages = [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": "ping"}]
+        try:
+            if self.is_ollama(backend):
+                _post_json(
+                    f"{_native_root(backend.api_base)}/api/chat",
+                    {
+                        "model": backend.model,
+                        "messages": messages,
+                        "stream": False,
+                        "keep_alive": self.keep_alive,
+                        "options": {"num_predict": 1},
+                    },
+                    {},
+                    self.timeout,
+                )
+            else:
+                _post_json(
+                    f"{backend.api_base.rstrip('/')}/chat/completions",
+                    {"model": backend.model, "messages": messages, "max_tokens": 1, "stream": False},
+                    {"Authorization": f"Bearer {backend.api_key}"},
+                    self.timeout,
+                )
+        except Exception as e:
+            print(f"[Warmup] ⚠️ {backend.api_base} ({backend.model}) 预热失败：{e}")
+            return False
+        elapsed = time.monotonic() - t0
+        self.last_warm[backend.api_base] = elapsed
+        if verbose:
+            print(f"[Warmup] ✅ {backend.api_base} ({backend.model}) 预热完成，用时 {elapsed:.2f}s")
+        return True
+
+    def _loop(self):
+        for backend in self.backends:
+            self.warm(backend)
+        if self.interval <= 0:
+            return
+        # 只有 Ollama 会按 keep_alive 卸载空闲模型，其他后端不重复发送
+        while not self._stop.wait(self.interval):
+            for backend in self.backends:
+                if self.is_ollama(backend):
+                    self.warm(backend, verbose=False)
+
+    def start(self):
+        """后台线程预热，不阻塞服务启动"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="llm-warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -1,35 +1,75 @@
 # FastAPI主应用
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, File, UploadFile, Form, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, HttpUrl
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import json
+import os
 import uvicorn
 import webbrowser
-from threading import Thread
+from threading import Lock, Thread
 import time
 
-from app.core.analyzer import TextAnalyzer
-from app.core.generators import PromptGenerator
+from app.core.analyzer import KEYWORD_RANK, TextAnalyzer
+from app.core.generators import LLM_SYSTEM_PROMPT, PromptGenerator
 from app.api import styles as api_styles
 from app.api import fetch_url as api_fetch_url
+from app.api import assets as api_assets
+from app.api import profiles as api_profiles
+from app.core.fetcher import fetcher
+from app.core.singleflight import SingleFlight
+from app.core.incremental import IncrementalAnalyzer
+from app.core.warmup import ModelWarmer
+from app.core.admission import AdmissionController, Rejected
+from app.core.upload import UploadedText, decode_bytes
+from app.core.profiler import profiler
+from app.core.payload import dumps, json_response, parse_fields, select_fields
 
 
 app = FastAPI(title="漫画提示词生成器")
 app.include_router(api_styles.router)
 app.include_router(api_fetch_url.router)
-
-# 挂载静态文件
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# 主页与 /static：内存中的预压缩静态资源
+app.include_router(api_assets.router)
+# 按需性能剖析（PROFILE_TOKEN 未配置时关闭）
+app.include_router(api_profiles.router)
 
 # 初始化核心组件
 analyzer = TextAnalyzer()
 generator = PromptGenerator(analyzer)
+# 相同参数的并发生成请求只做一次分析 + LLM 调用
+generate_flight = SingleFlight(timeout=float(os.getenv("GENERATE_TIMEOUT", "120")))
+# 编辑器实时分析：按段落缓存，只重新分析改动过的段落
+incremental = IncrementalAnalyzer(analyzer)
+# 自定义词表的修改接口（PUT/DELETE /api/lexicons）需要与之一致的 X-Lexicon-Token 请求头，未配置时关闭
+LEXICON_TOKEN = os.getenv("LEXICON_TOKEN", "")
+# 准入控制：算法模式与 LLM 模式分通道排队，LLM 突发流量不会拖慢算法模式
+admission = AdmissionController.from_env()
+# 启动时预热 LLM 模型，Ollama 定期保活
+warmer = ModelWarmer.from_env(generator.router.backends, LLM_SYSTEM_PROMPT)
+
+
+@app.on_event("startup")
+async def warm_llm_models():
+    """后台预热，首个请求不再承担模型加载耗时（LLM_WARMUP=0 关闭）"""
+    if os.getenv("LLM_WARMUP", "1") != "0":
+        warmer.start()
+
+
+@app.on_event("shutdown")
+async def close_shared_clients():
+    """关闭共享的 HTTP 连接池"""
+    warmer.stop()
+    await fetcher.aclose()
 
 
 # 请求/响应模型
-class GenerateRequest(BaseModel):
-    text: str
+class GenerateOptions(BaseModel):
     mode: str = "auto"
     panels: int = 2
     style: str = "清新简洁"
@@ -39,80 +79,362 @@ class GenerateRequest(BaseModel):
     llm_api_key: Optional[str] = None
     llm_model: Optional[str] = None
     language: Optional[str] = None  # 新增语言字段
+    per_panel: bool = False  # 分镜并行：每个分镜单独请求 LLM
+    strip_redundant: bool = False  # 去除重复的句子/片段后再交给 LLM
+    token_budget: Optional[int] = None  # LLM 输入 token 预算（不传使用 LLM_INPUT_TOKEN_BUDGET，0 表示不压缩）
+    # 响应中返回哪些分析字段：不传为全部，none 不返回，ui 为前端展示用的摘要，也可逗号分隔列出字段（top_words:5）
+    analysis_fields: Optional[str] = None
+
+
+class GenerateRequest(GenerateOptions):
+    text: str
+
+
+class PipelineRequest(GenerateOptions):
+    url: HttpUrl
+    include_text: bool = True  # 在进度事件中返回抓取到的正文（供前端展示）
+
+
+class IncrementalAnalyzeRequest(BaseModel):
+    session_id: Optional[str] = None
+    # 二选一：整篇文本（服务端切分），或按顺序的段落列表 [{"text": ...} | {"ref": 段落哈希}]
+    text: Optional[str] = None
+    paragraphs: Optional[List[Dict[str, str]]] = None
+    analysis_fields: Optional[str] = None  # 同 GenerateOptions.analysis_fields
 
 
 class GenerateResponse(BaseModel):
     success: bool
     prompt: Optional[str] = None
+    panels: Optional[int] = None  # 实际的分镜数（分镜并行模式下文本过短时少于请求的 panels）
+    degraded: Optional[bool] = None  # LLM 调用失败，提示词已（部分）降级为算法结果
     analysis: Optional[dict] = None
     error: Optional[str] = None
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """返回主页面"""
-    with open("static/index.html", "r", encoding="utf-8") as f:
-        return f.read()
+def _generate_key(request: GenerateRequest) -> str:
+    """归一化请求参数作为合并键（API Key 只参与哈希，不明文保存；只影响响应内容的字段选择不参与）"""
+    fields = request.model_dump(exclude={"analysis_fields"})
+    fields["text"] = request.text.replace("\r\n", "\n").strip()
+    fields["mode"] = request.mode.strip().lower()
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# 分析结果缓存：流水线与生成接口共用，同一文本只分析一次
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "128"))
+_analysis_cache: "OrderedDict[str, dict]" = OrderedDict()
+_analysis_cache_lock = Lock()
+
+
+def cached_analyze(text: str) -> dict:
+    """带 LRU 缓存的分析；会在线程池中并发调用，锁只保护缓存，不包住分析本身"""
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    with _analysis_cache_lock:
+        result = _analysis_cache.get(key)
+        if result is not None:
+            _analysis_cache.move_to_end(key)
+            return result
+    result = analyzer.analyze(text, rank=KEYWORD_RANK)
+    if "error" in result:
+        return result
+    with _analysis_cache_lock:
+        _analysis_cache[key] = result
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return result
+
+
+async def run_generate(request: GenerateRequest) -> Tuple[dict, dict]:
+    """分析 + 生成；按模式进入准入通道，相同参数的并发请求合并执行"""
+    lane = admission.lane_for(request.mode)
+
+    async def work():
+        # 只有实际执行的请求占用通道名额，被合并的重复请求不占
+        async with admission.slot(lane):
+            # 1. 文本分析（放到线程池，长文本的分析不阻塞事件循环上的其它请求）
+            analysis = await run_in_threadpool(profiler.bind(cached_analyze), request.text)
+
+            # 2. 构造配置对象
+            llm_config = {
+                "api_base": request.llm_api_base,
+                "api_key": request.llm_api_key,
+                "model": request.llm_model,
+            }
+
+            # 3. 生成提示词 (传入 llm_config)
+            result = await generator.agenerate(
+                text=request.text,
+                analysis=analysis,
+                mode=request.mode,
+                panels=request.panels,
+                style=request.style,
+                sensitive_filter=request.sensitive_filter,
+                llm_config=llm_config,
+                language=request.language,
+                per_panel=request.per_panel,
+                strip_redundant=request.strip_redundant,
+                token_budget=request.token_budget,
+            )
+            return result, analysis
+
+    return await generate_flight.do(_generate_key(request), work)
+
+
+def _client_host(http_request: Request) -> Optional[str]:
+    return http_request.client.host if http_request.client else None
+
+
+def _rejected_response(e: Rejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=e.status,
+        content=GenerateResponse(success=False, error=str(e)).model_dump(),
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
 @app.post("/api/generate", response_model=GenerateResponse)
-async def generate_prompt(request: GenerateRequest):
+async def generate_prompt(request: GenerateRequest, http_request: Request):
+    try:
+        parse_fields(request.analysis_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     try:
-        # 1. 文本分析
-        analysis = analyzer.analyze(request.text)
-
-        # 2. 构造配置对象
-        llm_config = {
-            "api_base": request.llm_api_base,
-            "api_key": request.llm_api_key,
-            "model": request.llm_model,
+        admission.check_rate(admission.lane_for(request.mode), _client_host(http_request))
+        with profiler.request("generate", http_request.headers):
+            result, analysis = await run_generate(request)
+        # 分析结果可能很大：直接编码返回，不再经过 response_model 逐层校验
+        content = {
+            "success": True,
+            "prompt": result["prompt"],
+            "panels": result["panels"],
+            "degraded": result["degraded"],
+            "analysis": select_fields(analysis, request.analysis_fields),
         }
-
-        # 3. 生成提示词 (传入 llm_config)
-        prompt = generator.generate(
-            text=request.text,
-            analysis=analysis,
-            mode=request.mode,
-            panels=request.panels,
-            style=request.style,
-            sensitive_filter=request.sensitive_filter,
-            llm_config=llm_config,
-            language=request.language,
-        )
-
-        return GenerateResponse(success=True, prompt=prompt, analysis=analysis)
+        return json_response(content, http_request.headers)
+    except Rejected as e:
+        return _rejected_response(e)
+    except asyncio.TimeoutError:
+        return GenerateResponse(success=False, error="生成超时")
     except Exception as e:
         return GenerateResponse(success=False, error=str(e))
 
 
+@app.post("/api/pipeline")
+async def run_pipeline(request: PipelineRequest, http_request: Request):
+    """
+    URL -> 抓取 -> 正文抽取 -> 分析 -> 生成，全部在服务端完成，
+    以 NDJSON 流逐行返回进度事件：{"stage": "fetch" | "analyze" | "generate" | "done" | "error", ...}
+    抓取正文、分析结果、生成结果分别由抓取缓存、分析缓存、请求合并复用
+    """
+    try:
+        parse_fields(request.analysis_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        admission.check_rate(admission.lane_for(request.mode), _client_host(http_request))
+    except Rejected as e:
+        return _rejected_response(e)
+
+    async def events():
+        t0 = time.perf_counter()
+
+        def event(stage: str, **data) -> bytes:
+            data = {"stage": stage, "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1), **data}
+            return dumps(data) + b"\n"
+
+        yield event("fetch", status="start")
+        try:
+            text = await fetcher.fetch(str(request.url))
+        except Exception as e:
+            yield event("error", error=f"网页内容获取失败: {e}")
+            return
+        if not text.strip():
+            yield event("error", error="网页中未提取到正文")
+            return
+        yield event("fetch", status="done", chars=len(text), text=text if request.include_text else None)
+
+        # 抓取的正文可达数万字，分析放到线程池，不阻塞其它请求与流
+        analysis = await run_in_threadpool(profiler.bind(cached_analyze), text)
+        yield event("analyze", status="done", analysis=select_fields(analysis, request.analysis_fields))
+
+        yield event("generate", status="start")
+        options = request.model_dump(exclude={"url", "include_text"})
+        try:
+            result, _ = await run_generate(GenerateRequest(text=text, **options))
+        except Rejected as e:
+            yield event("error", error=str(e), status_code=e.status, retry_after=e.retry_after)
+            return
+        except asyncio.TimeoutError:
+            yield event("error", error="生成超时")
+            return
+        except Exception as e:
+            yield event("error", error=str(e))
+            return
+        yield event("done", prompt=result["prompt"], panels=result["panels"], degraded=result["degraded"])
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @app.post("/api/analyze")
-async def analyze_text(text: str = Form(...)):
-    """仅分析文本API"""
+async def analyze_text(
+    http_request: Request,
+    text: str = Form(...),
+    rank: str = Form("freq"),
+    lexicons: str = Form(""),
+    fields: Optional[str] = Form(None),
+):
+    """仅分析文本API（rank: freq | tfidf；lexicons: 逗号分隔的自定义词表名称；fields: 同 analysis_fields）"""
+    try:
+        parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     try:
-        result = analyzer.analyze(text)
-        return JSONResponse(content=result)
+        names = [n.strip() for n in lexicons.split(",") if n.strip()]
+        with profiler.request("analyze", http_request.headers):
+            result = profiler.call(analyzer.analyze, text, rank=rank, lexicons=names)
+        return json_response(select_fields(result, fields) or {}, http_request.headers)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/lexicons")
+async def list_lexicons():
+    """已加载的自定义词表（名称 -> 词条数）"""
+    return {"lexicons": analyzer.lexicons()}
+
+
+def _check_lexicon_token(token: Optional[str]):
+    # 未配置 LEXICON_TOKEN 时不开放词表的修改接口
+    if not LEXICON_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token, LEXICON_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid lexicon token")
+
+
+@app.put("/api/lexicons/{name}")
+async def put_lexicon(name: str, words: str = Form(...), x_lexicon_token: Optional[str] = Header(None)):
+    """注册/替换自定义词表（每行 "词 [词频]"），需要 X-Lexicon-Token 请求头"""
+    _check_lexicon_token(x_lexicon_token)
+    try:
+        count = await run_in_threadpool(analyzer.add_lexicon, name, words)
+    except (ValueError, MemoryError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"name": name, "words": count}
+
+
+@app.delete("/api/lexicons/{name}")
+async def delete_lexicon(name: str, x_lexicon_token: Optional[str] = Header(None)):
+    _check_lexicon_token(x_lexicon_token)
+    if not analyzer.remove_lexicon(name):
+        raise HTTPException(status_code=404, detail="Lexicon not found")
+    return {"name": name, "deleted": True}
+
+
+@app.post("/api/analyze/incremental")
+async def analyze_incremental(request: IncrementalAnalyzeRequest, http_request: Request):
+    """增量分析API：未变化的段落直接复用上次结果"""
+    try:
+        parse_fields(request.analysis_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        if request.paragraphs is not None:
+            result, meta = incremental.update(request.session_id, request.paragraphs)
+        else:
+            result, meta = incremental.update_text(request.session_id, request.text or "")
+    except KeyError:
+        # 会话已过期或段落未知，客户端需要重新发送全文
+        return JSONResponse(status_code=409, content={"error": "resync"})
+    return json_response({**meta, "analysis": select_fields(result, request.analysis_fields)}, http_request.headers)
+
+
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """上传文件API"""
     try:
         content = await file.read()
-        text = content.decode("utf-8")
+        text = decode_bytes(content)
         return {"filename": file.filename, "content": text}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"文件读取失败: {e}")
 
 
+@app.post("/api/upload/analyze")
+async def upload_and_analyze(
+    http_request: Request,
+    file: UploadFile = File(...),
+    options: Optional[str] = Form(None),
+    analysis_fields: Optional[str] = Form(None),
+):
+    """
+    上传即分析：文件内容不回传浏览器，按需转码后以 mmap 直接交给 C 分析器
+    :param options: GenerateOptions 的 JSON，提供时同时生成提示词
+    :param analysis_fields: 返回哪些分析字段（未传时取 options 中的 analysis_fields）
+    """
+    try:
+        gen = GenerateOptions.model_validate_json(options) if options else None
+        if analysis_fields is None and gen:
+            analysis_fields = gen.analysis_fields
+        parse_fields(analysis_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    lane = admission.lane_for(gen.mode if gen else "algorithm")
+    try:
+        admission.check_rate(lane, _client_host(http_request))
+        async with admission.slot(lane):
+
+            def work():
+                with UploadedText(file.file) as upload:
+                    analysis = analyzer.analyze_bytes(upload.buffer, rank=KEYWORD_RANK)
+                    # 只有 LLM 相关模式需要原文
+                    text = upload.text() if gen and gen.mode in ("llm", "hybrid") else ""
+                    return upload, analysis, text
+
+            upload, analysis, text = await run_in_threadpool(work)
+            if "error" in analysis:
+                return GenerateResponse(success=False, analysis=analysis, error=analysis["error"])
+            result = {"prompt": None, "panels": None, "degraded": None}
+            if gen:
+                fields = gen.model_dump(exclude={"analysis_fields"})
+                llm_config = {
+                    "api_base": fields.pop("llm_api_base"),
+                    "api_key": fields.pop("llm_api_key"),
+                    "model": fields.pop("llm_model"),
+                }
+                result = await generator.agenerate(text=text, analysis=analysis, llm_config=llm_config, **fields)
+    except Rejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        return GenerateResponse(success=False, error=str(e))
+    content = {
+        "success": True,
+        "filename": file.filename,
+        "encoding": upload.encoding,
+        "bytes": upload.size,
+        "prompt": result["prompt"],
+        "panels": result["panels"],
+        "degraded": result["degraded"],
+        "analysis": select_fields(analysis, analysis_fields),
+    }
+    return json_response(content, http_request.headers)
+
+
 @app.get("/api/stats")
 async def get_stats():
     """获取系统状态"""
     return {
         "analyzer_loaded": analyzer.is_loaded(),
+        "analyzer_engine": analyzer.engine,
+        "analyzer_memory": analyzer.memory_stats(),
         "modes": ["auto", "algorithm", "llm", "hybrid"],
         "version": "1.0.0",
+        "generate_inflight": generate_flight.inflight(),
+        "generate_coalesced": generate_flight.coalesced,
+        "llm_backends": generator.router.snapshot(),
+        "llm_hedged": generator.router.hedged,
+        "llm_warmup_seconds": warmer.last_warm,
+        "admission": admission.snapshot(),
     }
 
 
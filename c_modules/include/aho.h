@@ -0,0 +1,54 @@
+#ifndef AHO_H
+#define AHO_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+#define AHO_MAX_PATTERN 255      // 单个词的最大字节数（与词表行缓冲区一致）
+#define AHO_BOUND_START 0x01     // 词首是 ASCII 字母：前一个字节不能是字母
+#define AHO_BOUND_END   0x02     // 词尾是 ASCII 字母：后一个字节不能是字母
+
+// 多模式匹配（Aho-Corasick）：把词表编译成按字节转移的确定自动机，一遍扫描即可找出所有出现位置（含重叠）。
+// ASCII 字母不区分大小写；没有出现在任何词中的字节归为等价类 0，转移表只按等价类存储。
+// 扫描时的状态用编码值表示：(状态号 × class_count) << 1 | 该状态有输出，每读一个字节只需一次查表，初始状态为 0
+typedef struct AhoAutomaton {
+    int state_count;
+    int class_count;
+    unsigned char byte_class[256];
+    uint32_t* next;           // 完整转移表：next[状态号 * class_count + class] 为目标状态的编码值
+    int32_t* out;             // 在该状态结束的最长词所在的终止状态（含后缀），-1 表示没有
+    int32_t* out_next;        // 终止状态的输出链：同一位置结束的下一个更短的词，-1 结束
+    uint16_t* out_len;        // 终止状态的词长（字节）
+    unsigned char* out_flags; // 终止状态的 AHO_BOUND_*
+    int pattern_count;        // 去重后的词数
+    size_t bytes;             // 占用的内存（记入全局词典账户）
+    int refs;                 // 正在使用它的分析数（由持有方加锁维护）
+} AhoAutomaton;
+
+static inline uint32_t aho_step(const AhoAutomaton* ac, uint32_t v, unsigned char c) {
+    return ac->next[(v >> 1) + ac->byte_class[c]];
+}
+
+static inline int aho_has_output(uint32_t v) {
+    return (int)(v & 1);
+}
+
+// 编码值对应的状态号（out / out_next / out_len / out_flags 的下标）
+static inline int aho_state(const AhoAutomaton* ac, uint32_t v) {
+    return (int)((v >> 1) / (uint32_t)ac->class_count);
+}
+
+// 刚读入的字节处是否恰好结束一个长度为 len 的词（不检查词边界）
+static inline int aho_ends_with(const AhoAutomaton* ac, uint32_t v, int len) {
+    if (!aho_has_output(v)) return 0;
+    for (int t = ac->out[aho_state(ac, v)]; t >= 0 && ac->out_len[t] >= len; t = ac->out_next[t]) {
+        if (ac->out_len[t] == len) return 1;
+    }
+    return 0;
+}
+
+// 编译词表：去掉词尾的 ASCII 空白，跳过空词和超长的词；没有可用的词或内存不足时返回 NULL
+AhoAutomaton* aho_build(char*** lists, const int* counts, int n_lists);
+void aho_free(AhoAutomaton* ac);
+
+#endif
@@ -10,11 +10,18 @@ extern "C" {
 #include <stddef.h>
 #include "dict.h"
 #include "trie.h"
+#include "redundancy.h"
+#include "memstat.h"
+#include "overlay.h"
+#include "aho.h"
+#include "normalize.h"
 
 // 宏定义
 #define MAX_WORD_LEN 64       // 单个词最大长度
-#define MAX_SECTIONS 100      // 最大章节数
+#define SECTION_TOP_N 10      // 每个章节输出的高频词/敏感词数量（top_n <= 0 时输出全部）
 #define HASH_TABLE_SIZE 8192  // 哈希桶大小，适合万字级别文本
+#define SENSITIVE_HITS_MAX 4096 // 结果中输出的敏感词出现位置上限，超出时标记 sensitive_hits_truncated
+#define AC_RING_SIZE 256      // 规范化模式下自动机最近读入的字节（2 的幂，> AHO_MAX_PATTERN）
 
 // 导出宏
 #ifdef _WIN32
@@ -46,9 +53,27 @@ typedef struct SectionInfo {
     int level;
     int length;
     double ratio;
-    int word_count;
+    int word_count;           // 本节词数（en_words + cn_chars）
+    int sensitive_count;      // 本节命中敏感词的次数
+    int words_offset;         // 本节高频词在 AnalyzerContext.section_words 中的区间
+    int words_count;
+    int sensitive_offset;     // 本节命中的敏感词（去重，按首次出现顺序），同上
+    int sensitive_words_count;
 } SectionInfo;
 
+// 章节内的词及其在本节的出现次数（node 属于上下文的词频/敏感词表）
+typedef struct SectionWord {
+    Node* node;
+    int count;
+} SectionWord;
+
+// 当前章节出现过的词（去重，按首次出现顺序）
+typedef struct NodeList {
+    Node** items;
+    int len;
+    int cap;
+} NodeList;
+
 typedef struct Stats {
     int total_chars;
     int en_words;
@@ -60,6 +85,31 @@ typedef struct Stats {
     double richness;
 } Stats;
 
+// top_words 的排序方式
+typedef enum {
+    RANK_FREQ = 0,   // 按词频
+    RANK_TFIDF       // 按 词频 × IDF（分词词典的词频作为背景语料，未登录词取中位数权重）
+} RankMode;
+
+// 提前结束分析的原因
+typedef enum {
+    TRUNC_NONE = 0,
+    TRUNC_MEMORY,         // 上下文内存超出预算
+    TRUNC_UNIQUE_TOKENS   // 不同词的数量达到上限
+} TruncReason;
+
+// 调试用的阶段耗时（Analyzer_SetProfiling 开启时才记录）
+typedef struct ProfileTimings {
+    long long setup_ns;      // 创建上下文、注入停用词、取得敏感词自动机与叠加词表
+    long long segment_ns;    // Analyzer_Process：扫描、分词、计数、章节、重复检测（含词典查找）
+    long long probe_ns;      // 其中词典最长匹配的耗时（按 1/PROFILE_PROBE_SAMPLE 抽样计时后估算）
+    long long probes;        // 词典查找次数
+    long long topk_ns;       // 全文高频词排序/导出
+    long long serialize_ns;  // 生成结果 JSON
+} ProfileTimings;
+
+#define PROFILE_PROBE_SAMPLE 16  // 每 16 次词典查找计时一次，避免计时本身主导结果
+
 typedef struct AnalyzerContext {
     Dict* dict_freq;          // 有效词频
     Dict* dict_sensitive_hit; // 命中的敏感词
@@ -67,18 +117,60 @@ typedef struct AnalyzerContext {
     Dict* set_sensitive;
     Dict* set_redundant;
     TrieNode* cn_dict;        // 指向全局Trie，不负责释放
-    SectionInfo sections[MAX_SECTIONS];
+    SectionInfo* sections;    // 按需增长，没有数量上限
+    int section_cap;
     int section_idx;
     int current_section_char_count;
+    int section_top_n;        // 每节保留的词数，<= 0 表示全部（按首次出现顺序，供增量分析合并）
+    int section_words_start;  // 本节开始时的 en_words + cn_chars
+    int section_sensitive_start;
+    NodeList cur_words;       // 本节计入词频的词
+    NodeList cur_sensitive;   // 本节命中的敏感词
+    SectionWord* section_words; // 所有章节的高频词/敏感词，按章节顺序排列
+    int section_words_len;
+    int section_words_cap;
     Stats stats;
+    int detect_redundancy;    // 是否做句子/N-gram 级重复检测
+    RedundancyTracker redundancy;
+    MemAccount mem;           // 本上下文的内存记账与预算（词表、章节、重复检测）
+    int max_unique_tokens;    // 词频表不同词的上限，<= 0 表示不限
+    TruncReason truncated;
+    RankMode rank_mode;       // RANK_TFIDF 时新词入表即记下 IDF 权重，排序时按 词频 × 权重
+    float idf_unknown;        // 未登录词的 IDF 权重
+    Overlay* overlays[MAX_OVERLAYS]; // 本次分析叠加的自定义词表（已持有引用），与 cn_dict 一起做最长匹配
+    int overlay_count;
+    int profile;              // 是否记录阶段耗时，结果 JSON 附带 "profile"
+    ProfileTimings prof;
+    // 全局敏感词自动机（已持有引用）：与分词同一遍扫描原文，为 NULL 时退回逐词查 set_sensitive
+    AhoAutomaton* sensitive_ac;
+    uint32_t ac_state;        // 自动机读到原文 ac_pos 处的状态（编码值）
+    int ac_pos;
+    Span* sensitive_hits;     // 敏感词的每次出现（原文字节区间，按结束位置排列，可重叠）
+    int sensitive_hit_count;
+    int sensitive_hit_cap;
+    int sensitive_hits_truncated;
+    // 文本规范化（NORM_* 位掩码，0 表示关闭）：分词与自动机读取规范化后的字符，输出的位置仍是原文偏移
+    int normalize;
+    const NormTable* norm;
+    const unsigned char* text_end;   // 正在分析的原文结尾
+    int ac_norm_pos;                 // 自动机已读入的规范化字节数
+    int ac_ring_start[AC_RING_SIZE]; // 最近读入的每个字节所在字符在原文中的起点（按 ac_norm_pos 取模）
+    unsigned char ac_ring_byte[AC_RING_SIZE];
 } AnalyzerContext;
 
 
 // --- 接口声明 ---
 
+// 导出接口的版本：增删导出函数、改变参数或结果 JSON 结构时递增，并同步修改 app/core/analyzer.py 的 ABI_VERSION
+#define ANALYZER_ABI_VERSION 1
+EXPORT int Analyzer_AbiVersion(void);
+
 // 词表/词典加载与热更新接口（list.c实现）
 EXPORT int load_all_sensitive_and_stop_words(void);
 EXPORT int load_all_dicts(const char** paths, int count);
+// 敏感词自动机（由 load_all_sensitive_and_stop_words 编译）：取得时增加引用计数，没有时返回 NULL；用完后调用 put
+AhoAutomaton* sensitive_automaton_acquire(void);
+void sensitive_automaton_put(AhoAutomaton* ac);
 
 // Analyzer主流程相关声明
 EXPORT AnalyzerContext* Analyzer_Create(void);
@@ -87,17 +179,46 @@ EXPORT void Analyzer_AddStopWord(AnalyzerContext* ctx, const char* word);
 EXPORT void Analyzer_AddSensitiveWord(AnalyzerContext* ctx, const char* word);
 EXPORT void Analyzer_AddRedundantWord(AnalyzerContext* ctx, const char* word);
 EXPORT void Analyzer_Process(AnalyzerContext* ctx, const char* text);
+// 冗余片段（重复句子/重复 N-gram，输入文本的字节区间），返回片段总数
+EXPORT int Analyzer_GetRedundantSpans(AnalyzerContext* ctx, Span* out_arr, int n);
+// 全局开关：新建的 AnalyzerContext 是否做重复检测（默认开启）
+EXPORT void Analyzer_SetRedundancyDetection(int enabled);
+// 全局开关：新建的上下文是否用敏感词自动机扫描原文（默认开启）；关闭时逐词查敏感词表，结果不含 sensitive_hits 中的位置
+EXPORT void Analyzer_SetSensitiveScan(int enabled);
+// 全局设置：每个请求的内存预算（字节）与不同词数上限，<= 0 表示不限；超出时提前结束并在结果中标记 truncated
+EXPORT void Analyzer_SetLimits(long long max_bytes, int max_unique_tokens);
+// 全局设置：新建的上下文按 NORM_* 规范化文本（全角转半角、繁转简、删除不可见字符、大小写折叠），0 关闭（默认）；
+// 第一次开启时构建查表并载入 dict/Chinese/t2s.txt
+EXPORT void Analyzer_SetNormalization(int flags);
+// 全局开关：新建的上下文是否记录阶段耗时并在结果 JSON 中输出 "profile"（默认关闭，关闭时没有计时开销）
+EXPORT void Analyzer_SetProfiling(int enabled);
+// 原生内存统计：全局词典、存活上下文、单请求峰值
+EXPORT void Analyzer_GetMemoryStats(AnalyzerMemoryStats* out);
 EXPORT Stats Analyzer_GetStats(AnalyzerContext* ctx);
 EXPORT void Analyzer_GetTopWords(AnalyzerContext* ctx, WordFreq* out_arr, int n);
 EXPORT void Analyzer_GetSensitiveWords(AnalyzerContext* ctx, WordFreq* out_arr, int n);
 EXPORT void Analyzer_GetSections(AnalyzerContext* ctx, SectionInfo* out_arr, int n);
 
 // 核心分析接口：输入内容，输出JSON
+// 返回 0 成功，-1 失败；缓冲区不足时返回所需的字节数（含结尾 \0），调用方可按此重试
 EXPORT int analyze_text(const char* content, char* result_json, int buf_size);
+// 同上，可指定返回的高频词数量（top_n <= 0 返回全部词频）
+EXPORT int analyze_text_ex(const char* content, char* result_json, int buf_size, int top_n);
+// 同上，结果按实际大小分配，失败返回 NULL；用完后必须调用 analyze_text_free 释放
+EXPORT char* analyze_text_json(const char* content, int top_n);
+// 同上，rank 为 RankMode；TF-IDF 时 top_words 及各章节高频词按 词频 × IDF 排序并输出 score
+EXPORT char* analyze_text_ranked(const char* content, int top_n, int rank);
+// 同上，叠加 overlay_ids 指定的自定义词表（最多 MAX_OVERLAYS 个），任一 ID 不存在时返回 NULL
+EXPORT char* analyze_text_overlay(const char* content, int top_n, int rank, const int* overlay_ids, int n_overlays);
+EXPORT void analyze_text_free(char* json);
 
 // 分词词典加载/热更新接口
 EXPORT int Analyzer_LoadCNDict(AnalyzerContext* ctx, const char* dict_path);
 EXPORT int Analyzer_RefreshCNDict(const char* dict_path);
+// 自定义词表：words 为多行 "词 [词频]"，编译后返回 ID（> 0），失败返回 -1；out_count 可为 NULL
+// 分析时只读、不加锁，不影响全局分词词典；删除后正在进行的分析仍可使用，结束后释放
+EXPORT int Analyzer_CompileOverlay(const char* words, int* out_count);
+EXPORT int Analyzer_ReleaseOverlay(int id);
 
 // 枚举类型
 typedef enum {
@@ -2,6 +2,7 @@
 #define DICT_H
 
 #include <stddef.h>
+#include "memstat.h"
 
 #define MAX_WORD_LEN 64
 #define HASH_TABLE_SIZE 8192
@@ -9,6 +10,9 @@
 typedef struct Node {
     char word[MAX_WORD_LEN];
     int count;
+    int section_mark;   // 分析器的按章节统计：最近出现的章节序号 + 1
+    int section_count;  // 在该章节中出现的次数
+    float weight;       // TF-IDF 排序时的 IDF 权重（其他情况不使用）
     struct Node* next;
 } Node;
 
@@ -16,12 +20,14 @@ typedef struct {
     Node* buckets[HASH_TABLE_SIZE];
     int unique_count;
     int total_count;
+    MemAccount* mem;  // 节点内存记入的账户，NULL 表示不记账
 } Dict;
 
 
 typedef struct {
     char word[MAX_WORD_LEN];
     int count;
+    double score;  // 排序依据：词频，或 TF-IDF 时的 词频 × 权重
 } WordFreq;
 
 // 词典遍历器声明
@@ -40,9 +46,18 @@ dict_iter_t dict_iter(Dict* d);
 int dict_next(dict_iter_t* it);
 unsigned long hash(const char* str);
 Dict* dict_create(void);
+// 同上，表本身和之后新增的节点都记入 mem（超出上限时 dict_add 不再插入新词）
+Dict* dict_create_in(MemAccount* mem);
 void dict_free(Dict* d);
 int dict_add(Dict* d, const char* word);
 int dict_get(Dict* d, const char* word);
+// 同上，h 为调用方已算好的桶序号 hash(word)（同一个词连续查多张表时只算一次）
+int dict_add_h(Dict* d, const char* word, unsigned long h);
+// 同 dict_add_h，返回词条节点（节点在 dict_free 之前地址不变）
+Node* dict_add_node_h(Dict* d, const char* word, unsigned long h);
+int dict_get_h(Dict* d, const char* word, unsigned long h);
 void dict_get_top(Dict* d, WordFreq* out_arr, int n);
+// 同上，by_weight 时按 词频 × 节点权重 排序（同一遍扫描内完成）
+void dict_get_top_by(Dict* d, WordFreq* out_arr, int n, int by_weight);
 
 #endif
\ No newline at end of file
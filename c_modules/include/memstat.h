@@ -0,0 +1,45 @@
+#ifndef MEMSTAT_H
+#define MEMSTAT_H
+
+#include <stddef.h>
+
+// 内存记账：调用方传入分配大小（释放时同样需要），不额外占用头部空间
+typedef struct MemAccount {
+    size_t bytes;   // 当前占用
+    size_t peak;    // 峰值
+    size_t limit;   // 上限，0 表示不限；超出时分配失败并置 exceeded
+    int exceeded;
+    int shared;     // 多线程共享的账户（全局词典），更新时加锁
+} MemAccount;
+
+// 导出给 Python 的统计（字段全部为 long long，便于 ctypes 映射）
+typedef struct AnalyzerMemoryStats {
+    long long dict_bytes;             // 全局分词词典（Trie）与停用词/敏感词表
+    long long dict_peak_bytes;
+    long long live_contexts;          // 正在分析的请求数
+    long long total_contexts;
+    long long context_peak_bytes;     // 所有请求中单个上下文的最大峰值
+    long long last_context_peak_bytes;
+    long long truncated_contexts;     // 因超出预算提前结束的请求数
+    long long limit_bytes;            // 当前的单请求预算，0 表示不限
+    long long limit_unique_tokens;
+} AnalyzerMemoryStats;
+
+// a 为 NULL 时不记账，等同于 malloc/calloc/realloc/free
+void* mem_alloc(MemAccount* a, size_t n);
+void* mem_calloc(MemAccount* a, size_t count, size_t size);
+void* mem_realloc(MemAccount* a, void* p, size_t old_n, size_t new_n);
+void mem_free(MemAccount* a, void* p, size_t n);
+// 记入不经过上面几个函数分配的内存（如 strdup），delta 可为负
+void mem_charge(MemAccount* a, ptrdiff_t delta);
+
+// 全局词典账户
+MemAccount* mem_dict_account(void);
+
+// 上下文登记：创建时调用 opened，释放时调用 closed
+void mem_context_opened(void);
+void mem_context_closed(const MemAccount* a, int truncated);
+// 汇总统计（limit_* 字段由调用方填写）
+void mem_get_stats(AnalyzerMemoryStats* out);
+
+#endif
@@ -0,0 +1,97 @@
+#ifndef NORMALIZE_H
+#define NORMALIZE_H
+
+#include <stddef.h>
+
+// 文本规范化的类别（Analyzer_SetNormalization 的位掩码）
+#define NORM_WIDTH     0x01  // 全角 ASCII（U+FF01~FF5E）转半角，全角空格 U+3000 转空格
+#define NORM_T2S       0x02  // 繁体转简体（dict/Chinese/t2s.txt，逐字一对一）
+#define NORM_INVISIBLE 0x04  // 删除零宽字符、软连字符、BOM、双向控制符；不换行空格等特殊空白转空格
+#define NORM_CASE      0x08  // 拉丁补充、希腊、西里尔大写字母转小写（ASCII 由分词与敏感词自动机自行折叠）
+#define NORM_ALL       0x0F
+
+#define NORM_LOOKAHEAD 256   // 词典最长匹配的前瞻字节数：词典与敏感词表的词都不超过 255 字节
+
+// 逐码位查表：只有 BMP 中的 2/3 字节字符可能被替换，每 256 个码位一页，没有任何替换的页为 NULL。
+// info = 类别 << 4 | 替换后的字节数（0 表示删除）；info 为 0 表示不替换
+typedef struct NormEntry {
+    unsigned char info;
+    unsigned char bytes[3];
+} NormEntry;
+
+typedef struct NormTable {
+    NormEntry* pages[256];
+    unsigned char byte_len[256];  // UTF-8 首字节 -> 字符字节数（同 utf8_len）
+    int t2s_count;                // 载入的繁简字对数
+    size_t bytes;                 // 占用的内存（记入全局词典账户）
+} NormTable;
+
+// 取得规范化表（第一次调用时构建，之后只读）；内存不足时返回 NULL
+const NormTable* norm_table(void);
+
+// 读取 q 处的一个字符（不越过 end）：*src_len 为它在原文中的字节数，*out 指向规范化后的字节，
+// 返回规范化后的字节数，0 表示该字符被删除。没有替换时 *out 就是 q
+static inline int norm_char(const NormTable* nt, int flags, const unsigned char* q, const unsigned char* end,
+                            const unsigned char** out, int* src_len) {
+    unsigned char c = *q;
+    int n = nt->byte_len[c];
+    if (n > end - q) n = (int)(end - q);  // 截断的 UTF-8 序列不越过文本结尾
+    *src_len = n;
+    *out = q;
+    if (n == 2 || n == 3) {
+        unsigned cp;
+        if (n == 2) {
+            if ((q[1] & 0xC0) != 0x80) return n;
+            cp = (unsigned)(c & 0x1F) << 6 | (q[1] & 0x3F);
+        } else {
+            if ((q[1] & 0xC0) != 0x80 || (q[2] & 0xC0) != 0x80) return n;
+            cp = (unsigned)(c & 0x0F) << 12 | (unsigned)(q[1] & 0x3F) << 6 | (q[2] & 0x3F);
+            if (cp < 0x800) return n;  // 超长编码不是合法字符，原样保留
+        }
+        const NormEntry* page = nt->pages[cp >> 8];
+        if (page) {
+            const NormEntry* e = &page[cp & 0xFF];
+            if ((e->info >> 4) & flags) {
+                *out = e->bytes;
+                return e->info & 0x0F;
+            }
+        }
+    }
+    return n;
+}
+
+// 最长匹配用的前瞻缓冲：从 src 起按需规范化，词典 Trie 与叠加词表共用，不复制整段原文
+typedef struct NormLookahead {
+    const NormTable* nt;
+    int flags;
+    const unsigned char* start;  // 前瞻起点（原文）
+    const unsigned char* src;    // 下一个待读取的原文字符
+    const unsigned char* end;
+    int len;                     // 已填充的规范化字节数，buf[len] 为 0
+    unsigned char buf[NORM_LOOKAHEAD + 4];
+    int src_end[NORM_LOOKAHEAD + 4];  // 每个字节所在字符在原文中的结束位置（相对 start）
+} NormLookahead;
+
+static inline void norm_la_init(NormLookahead* la, const NormTable* nt, int flags,
+                                const unsigned char* p, const unsigned char* end) {
+    la->nt = nt;
+    la->flags = flags;
+    la->start = la->src = p;
+    la->end = end;
+    la->len = 0;
+    la->buf[0] = 0;
+}
+
+// 填充到至少 i + 1 个字节（或原文结束、缓冲区满）
+void norm_la_fill(NormLookahead* la, int i);
+
+// 规范化文本中第 i 个字节，超出原文时返回 0
+static inline unsigned char norm_la_byte(NormLookahead* la, int i) {
+    if (i >= la->len) {
+        norm_la_fill(la, i);
+        if (i >= la->len) return 0;
+    }
+    return la->buf[i];
+}
+
+#endif
@@ -0,0 +1,57 @@
+#ifndef OVERLAY_H
+#define OVERLAY_H
+
+#include <stdint.h>
+#include "trie.h"
+
+#define MAX_OVERLAYS 8  // 单次分析最多叠加的自定义词表数
+#define OVERLAY_FILTER_BITS 16  // 前缀过滤位图 2^16 位（8KB），几千个词时误判率为个位数百分比
+
+// 自定义词表（叠加词典）：编译一次后按 ID 缓存，分析时与全局分词词典一起做最长匹配
+typedef struct Overlay {
+    int id;
+    TrieNode* trie;
+    int word_count;
+    int refs;           // 正在使用它的分析数
+    int released;       // 已被删除，最后一个使用者结束时释放
+    int unfiltered;     // 有前两个字符不完整的词（截断的 UTF-8），不能用过滤位图排除
+    struct Overlay* next;
+    // 词的第一个字符、前两个字符的哈希位图：文本当前位置两者都不在位图中时不可能匹配，省去逐字节查 Trie
+    uint64_t filter[(1u << OVERLAY_FILTER_BITS) / 64];
+} Overlay;
+
+// 前两个字符（UTF-8）的哈希：返回完整字符数（0~2），h1 为第一个字符的哈希，h2 为前两个字符的哈希
+static inline int overlay_prefix_hash(const unsigned char* p, uint32_t* h1, uint32_t* h2) {
+    uint32_t h = 2166136261u;
+    int chars = 0;
+    while (chars < 2) {
+        int n = (*p < 0x80) ? 1 : (*p < 0xE0) ? 2 : (*p < 0xF0) ? 3 : 4;
+        for (int i = 0; i < n; i++) {
+            if (!p[i]) return chars;
+            h = (h ^ p[i]) * 16777619u;
+        }
+        p += n;
+        if (++chars == 1) *h1 = h >> (32 - OVERLAY_FILTER_BITS);
+        else *h2 = h >> (32 - OVERLAY_FILTER_BITS);
+    }
+    return chars;
+}
+
+// 文本当前位置是否可能匹配词表中的词（没有误报以外的漏判）
+static inline int overlay_may_match(const Overlay* ov, const char* text) {
+    if (ov->unfiltered) return 1;
+    uint32_t h1 = 0, h2 = 0;
+    int chars = overlay_prefix_hash((const unsigned char*)text, &h1, &h2);
+    if (chars >= 1 && (ov->filter[h1 >> 6] >> (h1 & 63) & 1)) return 1;
+    return chars == 2 && (ov->filter[h2 >> 6] >> (h2 & 63) & 1);
+}
+
+// 编译词表（每行 "词 [词频]"，格式同分词词典），返回 ID（> 0），失败返回 -1
+int overlay_compile(const char* words, int* out_count);
+// 删除词表：之后不能再被取得，正在进行的分析结束后释放；不存在返回 -1
+int overlay_release(int id);
+// 按 ID 取得词表并增加引用计数，不存在返回 NULL；用完后调用 overlay_put
+Overlay* overlay_acquire(int id);
+void overlay_put(Overlay* ov);
+
+#endif
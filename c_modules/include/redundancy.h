@@ -0,0 +1,53 @@
+#ifndef REDUNDANCY_H
+#define REDUNDANCY_H
+
+#include <stdint.h>
+#include <stddef.h>
+#include "memstat.h"
+
+#define REDUNDANT_NGRAM 8          // 滚动哈希窗口：连续 N 个词重复即视为冗余
+#define REDUNDANT_MIN_TOKENS 3     // 句子至少包含的词数
+#define REDUNDANT_MIN_BYTES 12     // 句子最短字节数（约 4 个汉字），过短的重复句不处理
+#define REDUNDANT_SPANS_JSON_SIZE (256 * 1024) // analyze_text 输出的冗余区间 JSON 上限
+#define REDUNDANT_FNV_OFFSET 14695981039346656037ULL  // 词哈希：FNV-1a
+#define REDUNDANT_FNV_PRIME 1099511628211ULL
+
+// 冗余片段：输入文本中的字节区间 [start, end)
+typedef struct {
+    int start;
+    int end;
+} Span;
+
+typedef struct RedundancyTracker {
+    // 已出现过的句子/N-gram 哈希（开放寻址，0 表示空槽）
+    uint64_t* seen;
+    size_t seen_cap;
+    size_t seen_count;
+    // N-gram 滚动窗口
+    uint64_t ring_hash[REDUNDANT_NGRAM];
+    int ring_start[REDUNDANT_NGRAM];
+    int ring_count;
+    int ring_pos;
+    uint64_t window_hash;
+    // 当前句子
+    uint64_t sent_hash;
+    int sent_start;
+    int sent_tokens;
+    // 结果（按结束位置有序，且互不重叠）
+    Span* spans;
+    int span_count;
+    int span_cap;
+    int redundant_bytes;
+    MemAccount* mem;  // 哈希表/区间数组记入的账户
+} RedundancyTracker;
+
+void redundancy_init(RedundancyTracker* rt, MemAccount* mem);
+void redundancy_free(RedundancyTracker* rt);
+// 每识别出一个词调用一次：tok/len 为词内容（英文已小写），[start, end) 为其在原文中的字节区间
+void redundancy_token(RedundancyTracker* rt, const char* tok, int len, int start, int end);
+// 同上，th 为调用方边扫描边算好的 FNV-1a 词哈希
+void redundancy_token_hash(RedundancyTracker* rt, uint64_t th, int start, int end);
+// 遇到句末标点/换行/文本结束时调用，end 为句末（含标点）的字节位置
+void redundancy_sentence_end(RedundancyTracker* rt, int end);
+
+#endif
@@ -2,6 +2,7 @@
 #define TRIE_H
 
 #include <stddef.h>
+#include "normalize.h"
 
 // Trie 节点结构 (对外部隐藏具体实现，如果需要也可以公开)
 typedef struct TrieNode TrieNode;
@@ -12,6 +13,8 @@ void trie_free(TrieNode* root);
 
 // 插入词语 (word: UTF-8字符串, freq: 词频)
 void trie_insert(TrieNode* root, const char* word, int freq);
+// 解析词典中的一行（"词 [词频]"，词频缺省为 1）并插入，返回插入的词数（0 或 1）
+int trie_insert_line(TrieNode* root, const char* line);
 
 // 正向最大匹配查找
 // text: 当前文本指针
@@ -19,5 +22,13 @@ void trie_insert(TrieNode* root, const char* word, int freq);
 // matched_freq: 输出匹配到的词的词频
 // 返回: 是否匹配成功 (1=是, 0=否)
 int trie_search_longest(TrieNode* root, const char* text, int* matched_len, int* matched_freq);
+// 同上，逐字节读取规范化后的文本（前瞻缓冲按需填充），matched_len 为规范化后的字节数
+int trie_search_longest_norm(TrieNode* root, NormLookahead* la, int* matched_len, int* matched_freq);
+
+// 按词频为每个词尾计算 IDF 权重 log(总词频 / 词频)（词典加载后调用）
+// 返回未登录词的默认权重：词频中位数对应的权重
+float trie_compute_weights(TrieNode* root);
+// 词的 IDF 权重（完整匹配），不是词典中的词时返回 unknown
+float trie_weight(TrieNode* root, const char* word, float unknown);
 
 #endif
\ No newline at end of file
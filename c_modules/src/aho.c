@@ -0,0 +1,148 @@
+#include "aho.h"
+#include <stdlib.h>
+#include <string.h>
+#include "memstat.h"
+
+static inline int is_ascii_alpha(unsigned char c) {
+    return (c >= 'A' && c <= 'Z') || (c >= 'a' && c <= 'z');
+}
+
+static inline int is_ascii_space(unsigned char c) {
+    return c == ' ' || c == '\t' || c == '\n' || c == '\v' || c == '\f' || c == '\r';
+}
+
+// 去掉词尾空白后的长度，不可用的词返回 0
+static size_t pattern_len(const char* w) {
+    if (!w) return 0;
+    size_t len = strlen(w);
+    while (len > 0 && is_ascii_space((unsigned char)w[len - 1])) len--;
+    return (len <= AHO_MAX_PATTERN) ? len : 0;
+}
+
+// 按实际状态数复制到记账的内存中
+static void* copy_out(MemAccount* a, const void* src, size_t n) {
+    void* dst = mem_alloc(a, n);
+    if (dst) memcpy(dst, src, n);
+    return dst;
+}
+
+void aho_free(AhoAutomaton* ac) {
+    if (!ac) return;
+    MemAccount* a = mem_dict_account();
+    size_t n = (size_t)ac->state_count;
+    mem_free(a, ac->next, n * ac->class_count * sizeof(uint32_t));
+    mem_free(a, ac->out, n * sizeof(int32_t));
+    mem_free(a, ac->out_next, n * sizeof(int32_t));
+    mem_free(a, ac->out_len, n * sizeof(uint16_t));
+    mem_free(a, ac->out_flags, n);
+    mem_free(a, ac, sizeof(AhoAutomaton));
+}
+
+AhoAutomaton* aho_build(char*** lists, const int* counts, int n_lists) {
+    MemAccount* a = mem_dict_account();
+    // 1. 字节等价类：大写字母与对应的小写字母同类
+    unsigned char used[256] = {0};
+    size_t total = 0;
+    for (int l = 0; l < n_lists; l++) {
+        for (int i = 0; i < counts[l]; i++) {
+            const char* w = lists[l][i];
+            size_t len = pattern_len(w);
+            for (size_t k = 0; k < len; k++) {
+                unsigned char c = (unsigned char)w[k];
+                used[(c >= 'A' && c <= 'Z') ? c + 32 : c] = 1;
+            }
+            total += len;
+        }
+    }
+    if (total == 0) return NULL;
+
+    // 2. 按词建 Trie（转移为 0 表示没有子节点：根不会是任何节点的子节点）；状态数未知，先按上限在临时内存中构建
+    unsigned char byte_class[256] = {0};
+    int classes = 1;
+    for (int c = 0; c < 256; c++) if (used[c]) byte_class[c] = (unsigned char)classes++;
+    for (int c = 'A'; c <= 'Z'; c++) byte_class[c] = byte_class[c + 32];
+    size_t max_states = total + 1;
+    int32_t* next = (int32_t*)calloc(max_states * classes, sizeof(int32_t));
+    uint16_t* out_len = (uint16_t*)calloc(max_states, sizeof(uint16_t));
+    unsigned char* out_flags = (unsigned char*)calloc(max_states, 1);
+    int32_t* out = (int32_t*)malloc(max_states * sizeof(int32_t));
+    int32_t* out_next = (int32_t*)malloc(max_states * sizeof(int32_t));
+    int32_t* fail = (int32_t*)malloc(max_states * sizeof(int32_t));
+    int32_t* queue = (int32_t*)malloc(max_states * sizeof(int32_t));
+    AhoAutomaton* ac = NULL;
+    if (!next || !out_len || !out_flags || !out || !out_next || !fail || !queue) goto done;
+
+    int states = 1, patterns = 0;
+    for (int l = 0; l < n_lists; l++) {
+        for (int i = 0; i < counts[l]; i++) {
+            const unsigned char* w = (const unsigned char*)lists[l][i];
+            size_t len = pattern_len((const char*)w);
+            if (len == 0) continue;
+            int s = 0;
+            for (size_t k = 0; k < len; k++) {
+                int32_t* slot = &next[(size_t)s * classes + byte_class[w[k]]];
+                if (!*slot) *slot = states++;
+                s = *slot;
+            }
+            if (!out_len[s]) patterns++;
+            out_len[s] = (uint16_t)len;
+            out_flags[s] = (is_ascii_alpha(w[0]) ? AHO_BOUND_START : 0)
+                         | (is_ascii_alpha(w[len - 1]) ? AHO_BOUND_END : 0);
+        }
+    }
+
+    // 3. 按层遍历求失败链接，同时补全转移表（缺失的转移沿失败链接取得）和输出链
+    int head = 0, tail = 0;
+    queue[tail++] = 0;
+    fail[0] = 0;
+    out[0] = -1;
+    out_next[0] = -1;
+    while (head < tail) {
+        int s = queue[head++];
+        if (s) {
+            int f = out[fail[s]];
+            out[s] = out_len[s] ? s : f;
+            out_next[s] = out_len[s] ? f : -1;
+        }
+        int32_t* row = &next[(size_t)s * classes];
+        const int32_t* fail_row = &next[(size_t)fail[s] * classes];
+        for (int c = 1; c < classes; c++) {
+            if (row[c]) {
+                fail[row[c]] = s ? fail_row[c] : 0;
+                queue[tail++] = row[c];
+            } else if (s) {
+                row[c] = fail_row[c];
+            }
+        }
+    }
+
+    // 4. 转移表换成编码值（行偏移 << 1 | 有输出）
+    if ((size_t)states * classes > (UINT32_MAX >> 1)) goto done;
+    for (size_t i = 0; i < (size_t)states * classes; i++) {
+        int32_t t = next[i];
+        next[i] = (int32_t)((((uint32_t)t * (uint32_t)classes) << 1) | (out[t] >= 0 ? 1u : 0u));
+    }
+
+    // 5. 按实际状态数复制，记入全局词典账户
+    ac = (AhoAutomaton*)mem_calloc(a, 1, sizeof(AhoAutomaton));
+    if (!ac) goto done;
+    size_t n = (size_t)states;
+    memcpy(ac->byte_class, byte_class, sizeof(byte_class));
+    ac->class_count = classes;
+    ac->state_count = states;
+    ac->pattern_count = patterns;
+    ac->next = (uint32_t*)copy_out(a, next, n * classes * sizeof(uint32_t));
+    ac->out = (int32_t*)copy_out(a, out, n * sizeof(int32_t));
+    ac->out_next = (int32_t*)copy_out(a, out_next, n * sizeof(int32_t));
+    ac->out_len = (uint16_t*)copy_out(a, out_len, n * sizeof(uint16_t));
+    ac->out_flags = (unsigned char*)copy_out(a, out_flags, n);
+    ac->bytes = sizeof(AhoAutomaton) + n * (classes * sizeof(uint32_t) + 2 * sizeof(int32_t) + sizeof(uint16_t) + 1);
+    if (!ac->next || !ac->out || !ac->out_next || !ac->out_len || !ac->out_flags) {
+        aho_free(ac);
+        ac = NULL;
+    }
+
+done:
+    free(next); free(out_len); free(out_flags); free(out); free(out_next); free(fail); free(queue);
+    return ac;
+}
@@ -6,18 +6,39 @@
 #include <math.h>
 #include <stddef.h>
 #include <pthread.h>
+#include <time.h>
 
 #include "analyzer_common.h"
 #include "dict.h"
 #include "utils.h"
 #include "trie.h"
+#include "normalize.h"
 
 // 全局静态Trie树指针及互斥锁
 static TrieNode* g_cn_dict = NULL;
 static int g_cn_dict_loaded = 0;
+static float g_idf_unknown = 1.0f;  // 未登录词的 IDF 权重，随词典加载更新
 static pthread_mutex_t g_cn_dict_mutex = PTHREAD_MUTEX_INITIALIZER;
 // 全局只加载一次敏感词/停用词
 static pthread_once_t g_words_once = PTHREAD_ONCE_INIT;
+// 重复检测开关（基准测试对比开销用）
+static int g_detect_redundancy = 1;
+// 敏感词自动机开关（关闭时退回逐词查表，基准测试对比用）
+static int g_sensitive_scan = 1;
+static int g_profile = 0;
+// 文本规范化（NORM_* 位掩码，默认关闭）
+static int g_normalize = 0;
+static long long g_clock_overhead_ns = 0;  // 连续两次 now_ns 的耗时，抽样计时时扣除
+// 单请求预算（0 表示不限）
+static size_t g_limit_bytes = 0;
+static int g_limit_unique_tokens = 0;
+
+static inline long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
 static void ensure_sensitive_and_stop_words_loaded_once() {
     load_all_sensitive_and_stop_words();
 }
@@ -42,27 +63,9 @@ static int load_dict_file_to_trie(TrieNode* trie, const char* dict_path) {
         return 0;
     }
     char line[512];
-    char word[256];
-    int freq;
     int count = 0;
     while (fgets(line, sizeof(line), fp)) {
-        char* p = line;
-        while (*p == ' ' || *p == '\t') p++;
-        if (*p == 0 || *p == '\n' || *p == '\r') continue;
-        
-        // 尝试 "词 频" 格式
-        if (sscanf(p, "%255s %d", word, &freq) >= 2) {
-            trie_insert(trie, word, freq);
-            count++;
-            continue;
-        }
-        // 尝试 "词\t频" 或仅 "词"
-        if (sscanf(p, "%255s", word) == 1) {
-            // 如果后面有数字则读取，否则默认为1
-            // 这里简单处理，若无频次默认1
-            trie_insert(trie, word, 1); 
-            count++;
-        }
+        count += trie_insert_line(trie, line);
     }
     fclose(fp);
     return count;
@@ -79,6 +82,7 @@ EXPORT int Analyzer_LoadCNDict(AnalyzerContext* ctx, const char* dict_path) {
     if (dict_path) {
         // 加载指定文件
         total += load_dict_file_to_trie(g_cn_dict, dict_path);
+        g_idf_unknown = trie_compute_weights(g_cn_dict);
     } 
     
     g_cn_dict_loaded = 1;
@@ -99,6 +103,7 @@ EXPORT int Analyzer_RefreshCNDict(const char* dict_path) {
     TrieNode* new_trie = trie_create();
     load_dict_file_to_trie(new_trie, dict_path); // 复用加载逻辑
     fclose(fp);
+    g_idf_unknown = trie_compute_weights(new_trie);
     
     // 切换
     if (g_cn_dict) trie_free(g_cn_dict);
@@ -109,113 +114,311 @@ EXPORT int Analyzer_RefreshCNDict(const char* dict_path) {
     return 0;
 }
 
-// 简单JSON转义
+// JSON 字符串转义：" \\ 与控制字符（\b \f \n \r \t 用短写，其余为 \u00XX），与 Python json.dumps 一致。
+// dst 放不下时在完整的字符/转义序列处截止（调用方按 json_escaped_len 分配，正常不会发生）
 static void json_escape(const char* src, char* dst, size_t dst_size) {
     size_t j = 0;
-    for (size_t i = 0; src[i] && j + 2 < dst_size; ++i) {
+    for (size_t i = 0; src[i]; ++i) {
         unsigned char c = (unsigned char)src[i];
-        if (c == '\\') { dst[j++] = '\\'; dst[j++] = '\\'; }
-        else if (c == '"') { dst[j++] = '\\'; dst[j++] = '"'; }
-        else if (c == '\n') { dst[j++] = '\\'; dst[j++] = 'n'; }
-        else if (c == '\r') { dst[j++] = '\\'; dst[j++] = 'r'; }
-        else if (c == '\t') { dst[j++] = '\\'; dst[j++] = 't'; }
-        else if (c < 0x20) { /* 忽略其他控制字符或转义 */ }
-        else { dst[j++] = c; }
+        char esc[8];
+        int n;
+        switch (c) {
+            case '\\': n = snprintf(esc, sizeof(esc), "\\\\"); break;
+            case '"': n = snprintf(esc, sizeof(esc), "\\\""); break;
+            case '\b': n = snprintf(esc, sizeof(esc), "\\b"); break;
+            case '\f': n = snprintf(esc, sizeof(esc), "\\f"); break;
+            case '\n': n = snprintf(esc, sizeof(esc), "\\n"); break;
+            case '\r': n = snprintf(esc, sizeof(esc), "\\r"); break;
+            case '\t': n = snprintf(esc, sizeof(esc), "\\t"); break;
+            default:
+                if (c < 0x20) n = snprintf(esc, sizeof(esc), "\\u%04x", c);
+                else { esc[0] = (char)c; n = 1; }
+        }
+        if (j + n >= dst_size) break;
+        memcpy(dst + j, esc, n);
+        j += n;
     }
     dst[j] = '\0';
 }
 
+// 转义后的长度（不含引号和结尾的 \0），用于按实际大小分配 JSON 缓冲区
+static size_t json_escaped_len(const char* src) {
+    size_t n = 0;
+    for (; *src; ++src) {
+        unsigned char c = (unsigned char)*src;
+        if (c == '\\' || c == '"' || c == '\b' || c == '\f' || c == '\n' || c == '\r' || c == '\t') n += 2;
+        else if (c < 0x20) n += 6;
+        else n += 1;
+    }
+    return n;
+}
+
+EXPORT int Analyzer_AbiVersion(void) { return ANALYZER_ABI_VERSION; }
+
 EXPORT int analyze_text(const char* content, char* result_json, int buf_size) {
+    return analyze_text_ex(content, result_json, buf_size, 10);
+}
+
+// top_n > 0: 按词频取前 top_n 个；top_n <= 0: 输出全部词频（不排序，供增量分析合并）
+EXPORT int analyze_text_ex(const char* content, char* result_json, int buf_size, int top_n) {
+    if (!content || !result_json || buf_size < 256) return -1;
+    char* json = analyze_text_json(content, top_n);
+    if (!json) return -1;
+    size_t n = strlen(json);
+    int ret = 0;
+    if (n < (size_t)buf_size) memcpy(result_json, json, n + 1);
+    else ret = (int)n + 1; // 缓冲区不足：返回所需大小
+    analyze_text_free(json);
+    return ret;
+}
+
+EXPORT void analyze_text_free(char* json) {
+    free(json);
+}
+
+// 结果 JSON 按实际大小分配（章节多、词多时不受调用方缓冲区限制）
+EXPORT char* analyze_text_json(const char* content, int top_n) {
+    return analyze_text_ranked(content, top_n, RANK_FREQ);
+}
+
+// 敏感词列表 JSON 的输出上限（字节）
+#define SENSITIVE_JSON_SIZE 1024
+// 词条 JSON 中除词本身外的最大长度（逗号、键名、词频与 score）
+#define JSON_WORD_EXTRA 64
+
+// 词条 JSON：TF-IDF 时附带 score；自定义词表的词可能含 " 或 \，必须转义
+static int format_word(char* dst, size_t size, int first, const char* word, int count, double score, int with_score) {
+    char esc[MAX_WORD_LEN * 6];
+    json_escape(word, esc, sizeof(esc));
+    if (with_score)
+        return snprintf(dst, size, "%s{\"word\":\"%s\",\"freq\":%d,\"score\":%.4f}", first ? "" : ",", esc, count, score);
+    return snprintf(dst, size, "%s{\"word\":\"%s\",\"freq\":%d}", first ? "" : ",", esc, count);
+}
+
+EXPORT char* analyze_text_ranked(const char* content, int top_n, int rank) {
+    return analyze_text_overlay(content, top_n, rank, NULL, 0);
+}
+
+EXPORT int Analyzer_CompileOverlay(const char* words, int* out_count) {
+    return overlay_compile(words, out_count);
+}
+
+EXPORT int Analyzer_ReleaseOverlay(int id) {
+    return overlay_release(id);
+}
+
+static void put_overlays(AnalyzerContext* ctx) {
+    for (int i = 0; i < ctx->overlay_count; i++) overlay_put(ctx->overlays[i]);
+    ctx->overlay_count = 0;
+}
+
+EXPORT char* analyze_text_overlay(const char* content, int top_n, int rank, const int* overlay_ids, int n_overlays) {
     // ...existing code...
     pthread_once(&g_words_once, ensure_sensitive_and_stop_words_loaded_once);
     // 自动加载分词主词典（只加载一次），必须在AnalyzerContext创建前
     static pthread_once_t g_dict_once = PTHREAD_ONCE_INIT;
     pthread_once(&g_dict_once, load_main_dicts_once);
-    if (!content || !result_json || buf_size < 256) return -1;
+    if (!content) return NULL;
+    if (n_overlays < 0 || n_overlays > MAX_OVERLAYS || (n_overlays && !overlay_ids)) return NULL;
+    int profile = g_profile;
+    long long t_start = profile ? now_ns() : 0;
     AnalyzerContext* ctx = Analyzer_Create();
-    if (!ctx) return -1;
+    if (!ctx) return NULL;
+    ctx->profile = profile;
+    for (int i = 0; i < n_overlays; i++) {
+        Overlay* ov = overlay_acquire(overlay_ids[i]);
+        if (!ov) { Analyzer_Free(ctx); return NULL; }
+        ctx->overlays[ctx->overlay_count++] = ov;
+    }
     // ...existing code...
     
+    ctx->section_top_n = (top_n > 0) ? SECTION_TOP_N : 0;
+    ctx->rank_mode = (rank == RANK_TFIDF) ? RANK_TFIDF : RANK_FREQ;
+    int with_score = (ctx->rank_mode == RANK_TFIDF);
+    long long t_segment = ctx->profile ? now_ns() : 0;
+    if (ctx->profile) ctx->prof.setup_ns = t_segment - t_start;
     Analyzer_Process(ctx, content);
+    long long t_output = ctx->profile ? now_ns() : 0;
+    if (ctx->profile) ctx->prof.segment_ns = t_output - t_segment;
     Stats stats = Analyzer_GetStats(ctx);
 
-    // 1. Sections JSON
-    char* sections_json = (char*)malloc(buf_size / 2); // 临时分配以防栈溢出
-    if(!sections_json) { Analyzer_Free(ctx); return -1; }
+    // 1. Sections JSON（按实际章节数和每节词数分配）
+    size_t sec_size = 16;
+    for (int i = 0; i < stats.section_count; ++i) {
+        SectionInfo* sec = &ctx->sections[i];
+        sec_size += 512 + json_escaped_len(sec->title);
+        for (int k = 0; k < sec->words_count; ++k)
+            sec_size += json_escaped_len(ctx->section_words[sec->words_offset + k].node->word) + JSON_WORD_EXTRA;
+        for (int k = 0; k < sec->sensitive_words_count; ++k)
+            sec_size += json_escaped_len(ctx->section_words[sec->sensitive_offset + k].node->word) + 4;
+    }
+    char* sections_json = (char*)malloc(sec_size);
+    if(!sections_json) { Analyzer_Free(ctx); return NULL; }
     
-    int offset = 0;
-    offset += snprintf(sections_json + offset, buf_size/2 - offset, "[");
-    for (int i = 0; i < stats.section_count && offset < buf_size/2 - 100; ++i) {
-        char esc_title[256];
-        json_escape(ctx->sections[i].title, esc_title, sizeof(esc_title));
-        int n = snprintf(sections_json + offset, buf_size/2 - offset,
-            "%s{\"section_id\":%d,\"title\":\"%s\",\"level\":%d,\"length\":%d,\"ratio\":%.4f}",
-            (i > 0) ? "," : "", i, esc_title, ctx->sections[i].level, ctx->sections[i].length, ctx->sections[i].ratio);
-        if (n < 0 || n >= (int)(buf_size/2 - offset)) break;
-        offset += n;
+    size_t offset = snprintf(sections_json, sec_size, "[");
+    for (int i = 0; i < stats.section_count; ++i) {
+        SectionInfo* sec = &ctx->sections[i];
+        char esc_title[sizeof(sec->title) * 6];
+        json_escape(sec->title, esc_title, sizeof(esc_title));
+        offset += snprintf(sections_json + offset, sec_size - offset,
+            "%s{\"section_id\":%d,\"title\":\"%s\",\"level\":%d,\"length\":%d,\"ratio\":%.4f,\"word_count\":%d,\"sensitive_count\":%d,\"top_words\":[",
+            (i > 0) ? "," : "", i, esc_title, sec->level, sec->length, sec->ratio, sec->word_count, sec->sensitive_count);
+        for (int k = 0; k < sec->words_count; ++k) {
+            SectionWord* sw = &ctx->section_words[sec->words_offset + k];
+            offset += format_word(sections_json + offset, sec_size - offset, k == 0,
+                sw->node->word, sw->count, (double)sw->count * sw->node->weight, with_score);
+        }
+        offset += snprintf(sections_json + offset, sec_size - offset, "],\"sensitive_words\":[");
+        for (int k = 0; k < sec->sensitive_words_count; ++k) {
+            char esc[MAX_WORD_LEN * 6];
+            json_escape(ctx->section_words[sec->sensitive_offset + k].node->word, esc, sizeof(esc));
+            offset += snprintf(sections_json + offset, sec_size - offset, "%s\"%s\"", (k > 0) ? "," : "", esc);
+        }
+        offset += snprintf(sections_json + offset, sec_size - offset, "]}");
     }
     strcat(sections_json, "]");
 
     // 2. Top Words JSON
-    WordFreq top_words[10];
-    Analyzer_GetTopWords(ctx, top_words, 10);
-    char top_words_json[1024];
-    int tw_off = snprintf(top_words_json, sizeof(top_words_json), "[");
-    for (int i = 0; i < 10; ++i) {
-        if (!top_words[i].word || !*top_words[i].word) break;
-        tw_off += snprintf(top_words_json + tw_off, sizeof(top_words_json) - tw_off,
-            "%s{\"word\":\"%s\",\"freq\":%d}",
-            (i > 0) ? "," : "", top_words[i].word, top_words[i].count);
+    int n_words = (top_n > 0) ? top_n : ctx->dict_freq->unique_count;
+    WordFreq* top_words = (WordFreq*)calloc(n_words > 0 ? n_words : 1, sizeof(WordFreq));
+    if (!top_words) { free(sections_json); Analyzer_Free(ctx); return NULL; }
+    long long t_topk = ctx->profile ? now_ns() : 0;
+    if (top_n > 0) {
+        Analyzer_GetTopWords(ctx, top_words, n_words);
+    } else {
+        // 全量导出无需排序，直接遍历哈希表
+        dict_iter_t wit = dict_iter(ctx->dict_freq);
+        int k = 0;
+        while (dict_next(&wit) && k < n_words) {
+            strcpy(top_words[k].word, wit.key);
+            top_words[k].count = wit.value;
+            top_words[k].score = (double)wit.value * wit.node->weight;
+            k++;
+        }
+    }
+    if (ctx->profile) ctx->prof.topk_ns = now_ns() - t_topk;
+    size_t tw_size = 16;
+    for (int i = 0; i < n_words && *top_words[i].word; ++i) tw_size += json_escaped_len(top_words[i].word) + JSON_WORD_EXTRA;
+    char* top_words_json = (char*)malloc(tw_size);
+    if (!top_words_json) { free(top_words); free(sections_json); Analyzer_Free(ctx); return NULL; }
+    size_t tw_off = snprintf(top_words_json, tw_size, "[");
+    for (int i = 0; i < n_words; ++i) {
+        if (!*top_words[i].word) break;
+        tw_off += format_word(top_words_json + tw_off, tw_size - tw_off, i == 0,
+            top_words[i].word, top_words[i].count, top_words[i].score, with_score);
     }
     strcat(top_words_json, "]");
+    free(top_words);
 
-    // 3. Sensitive Words JSON
-    char sensitive_json[1024];
+    // 3. Sensitive Words JSON（输出到 SENSITIVE_JSON_SIZE - 50 字节为止；缓冲区多留一个最长词条的余量，最后一个词条不会被截断）
+    char sensitive_json[SENSITIVE_JSON_SIZE + MAX_WORD_LEN * 6 + 8];
     int s_off = snprintf(sensitive_json, sizeof(sensitive_json), "[");
     dict_iter_t it = dict_iter(ctx->dict_sensitive_hit);
     int sens_cnt = 0;
-    while (dict_next(&it) && s_off < sizeof(sensitive_json) - 50) {
-        if (sens_cnt > 0) s_off += snprintf(sensitive_json + s_off, sizeof(sensitive_json) - s_off, ",");
-        s_off += snprintf(sensitive_json + s_off, sizeof(sensitive_json) - s_off, "\"%s\"", it.key);
+    while (dict_next(&it) && s_off < SENSITIVE_JSON_SIZE - 50) {
+        char esc[MAX_WORD_LEN * 6];
+        json_escape(it.key, esc, sizeof(esc));
+        s_off += snprintf(sensitive_json + s_off, sizeof(sensitive_json) - s_off, "%s\"%s\"", (sens_cnt > 0) ? "," : "", esc);
         sens_cnt++;
     }
     strcat(sensitive_json, "]");
 
-    // Final Assemble
-    int n = snprintf(result_json, buf_size,
-        "{\"total_chars\":%d,\"en_words\":%d,\"cn_chars\":%d,\"words\":%d,\"sensitive_count\":%d,\"redundancy_count\":%d,\"punct_count\":%d,\"section_count\":%d,\"richness\":%.2f,\"sections\":%s,\"top_words\":%s,\"sensitive_words\":%s}",
-        stats.total_chars, stats.en_words, stats.cn_chars, stats.en_words + stats.cn_chars, 
-        stats.sensitive_count, stats.redundancy_count, stats.punct_count, stats.section_count, 
-        stats.richness, sections_json, top_words_json, sensitive_json);
+    // 3b. 敏感词出现位置 [[start,end],...]
+    size_t sh_size = (size_t)ctx->sensitive_hit_count * 24 + 16;
+    char* hits_json = (char*)malloc(sh_size);
+    if (!hits_json) { free(sections_json); free(top_words_json); Analyzer_Free(ctx); return NULL; }
+    size_t sh_off = snprintf(hits_json, sh_size, "[");
+    for (int i = 0; i < ctx->sensitive_hit_count; ++i) {
+        sh_off += snprintf(hits_json + sh_off, sh_size - sh_off, "%s[%d,%d]",
+            (i > 0) ? "," : "", ctx->sensitive_hits[i].start, ctx->sensitive_hits[i].end);
+    }
+    strcat(hits_json, "]");
+
+    // 4. Redundant Spans JSON（最多 REDUNDANT_SPANS_JSON_SIZE 字节，超出时截断并标记）
+    size_t rs_size = REDUNDANT_SPANS_JSON_SIZE;
+    char* spans_json = (char*)malloc(rs_size);
+    if (!spans_json) { free(hits_json); free(sections_json); free(top_words_json); Analyzer_Free(ctx); return NULL; }
+    size_t rs_off = snprintf(spans_json, rs_size, "[");
+    int spans_truncated = 0;
+    for (int i = 0; i < ctx->redundancy.span_count; ++i) {
+        if (rs_off + 32 >= rs_size) { spans_truncated = 1; break; }
+        rs_off += snprintf(spans_json + rs_off, rs_size - rs_off, "%s[%d,%d]",
+            (i > 0) ? "," : "", ctx->redundancy.spans[i].start, ctx->redundancy.spans[i].end);
+    }
+    strcat(spans_json, "]");
+
+    const char* truncated_reason = ctx->truncated == TRUNC_MEMORY ? "\"memory\""
+                                 : ctx->truncated == TRUNC_UNIQUE_TOKENS ? "\"unique_tokens\"" : "null";
+
+    // 阶段耗时（生成 JSON 的耗时不含最后的拼装）
+    char profile_json[256] = "";
+    if (ctx->profile) {
+        ProfileTimings* pt = &ctx->prof;
+        pt->serialize_ns = now_ns() - t_output - pt->topk_ns;
+        snprintf(profile_json, sizeof(profile_json),
+            ",\"profile\":{\"setup_us\":%.1f,\"segment_us\":%.1f,\"probe_us\":%.1f,\"probes\":%lld,\"topk_us\":%.1f,\"serialize_us\":%.1f}",
+            pt->setup_ns / 1e3, pt->segment_ns / 1e3, pt->probe_ns / 1e3, pt->probes, pt->topk_ns / 1e3, pt->serialize_ns / 1e3);
+    }
 
+    // Final Assemble：先计算长度再按实际大小分配
+#define RESULT_FORMAT "{\"total_chars\":%d,\"en_words\":%d,\"cn_chars\":%d,\"words\":%d,\"sensitive_count\":%d,\"redundancy_count\":%d,\"punct_count\":%d,\"section_count\":%d,\"richness\":%.2f,\"sections\":%s,\"top_words\":%s,\"sensitive_words\":%s,\"sensitive_hits\":%s,\"sensitive_hits_truncated\":%s,\"redundant_bytes\":%d,\"redundant_spans\":%s,\"redundant_spans_truncated\":%s,\"truncated\":%s,\"truncated_reason\":%s%s}"
+#define RESULT_ARGS \
+        stats.total_chars, stats.en_words, stats.cn_chars, stats.en_words + stats.cn_chars, \
+        stats.sensitive_count, stats.redundancy_count, stats.punct_count, stats.section_count, \
+        stats.richness, sections_json, top_words_json, sensitive_json, \
+        hits_json, ctx->sensitive_hits_truncated ? "true" : "false", \
+        ctx->redundancy.redundant_bytes, spans_json, spans_truncated ? "true" : "false", \
+        ctx->truncated ? "true" : "false", truncated_reason, profile_json
+    int n = snprintf(NULL, 0, RESULT_FORMAT, RESULT_ARGS);
+    char* result_json = (n >= 0) ? (char*)malloc((size_t)n + 1) : NULL;
+    if (result_json) snprintf(result_json, (size_t)n + 1, RESULT_FORMAT, RESULT_ARGS);
+#undef RESULT_FORMAT
+#undef RESULT_ARGS
+
+    free(spans_json);
+    free(hits_json);
     free(sections_json);
+    free(top_words_json);
     Analyzer_Free(ctx);
-    return (n > 0 && n < buf_size) ? 0 : -1;
+    return result_json;
 }
 
 EXPORT AnalyzerContext* Analyzer_Create() {
     AnalyzerContext* ctx = (AnalyzerContext*)calloc(1, sizeof(AnalyzerContext));
     if(!ctx) return NULL;
+    mem_charge(&ctx->mem, sizeof(AnalyzerContext));
+    mem_context_opened();
     
-    ctx->dict_freq = dict_create();
-    ctx->dict_sensitive_hit = dict_create();
-    ctx->set_stop = dict_create();
-    ctx->set_sensitive = dict_create();
-    ctx->set_redundant = dict_create();
+    ctx->dict_freq = dict_create_in(&ctx->mem);
+    ctx->dict_sensitive_hit = dict_create_in(&ctx->mem);
+    ctx->set_stop = dict_create_in(&ctx->mem);
+    ctx->set_sensitive = dict_create_in(&ctx->mem);
+    ctx->set_redundant = dict_create_in(&ctx->mem);
     
     // 默认章节
+    ctx->section_cap = 8;
+    ctx->sections = (SectionInfo*)mem_calloc(&ctx->mem, ctx->section_cap, sizeof(SectionInfo));
+    if (!ctx->dict_freq || !ctx->dict_sensitive_hit || !ctx->set_stop || !ctx->set_sensitive
+        || !ctx->set_redundant || !ctx->sections) { Analyzer_Free(ctx); return NULL; }
     strcpy(ctx->sections[0].title, "Introduction");
     ctx->sections[0].level = 0;
+    ctx->section_top_n = SECTION_TOP_N;
+    ctx->rank_mode = RANK_FREQ;
+
+    ctx->detect_redundancy = g_detect_redundancy;
+    ctx->profile = g_profile;
+    ctx->norm = g_normalize ? norm_table() : NULL;
+    ctx->normalize = ctx->norm ? g_normalize : 0;
+    redundancy_init(&ctx->redundancy, &ctx->mem);
     
     // 关联全局Trie
     pthread_mutex_lock(&g_cn_dict_mutex);
     if (g_cn_dict) ctx->cn_dict = g_cn_dict;
+    ctx->idf_unknown = g_idf_unknown;
     pthread_mutex_unlock(&g_cn_dict_mutex);
 
-    // 注入停用词/敏感词
+    // 注入停用词
     for (int i = 0; i < STOP_WORDS_CN_COUNT; i++) if (STOP_WORDS_CN[i]) Analyzer_AddStopWord(ctx, STOP_WORDS_CN[i]);
-    for (int i = 0; i < SENSITIVE_WORDS_CN_COUNT; i++) if (SENSITIVE_WORDS_CN[i]) Analyzer_AddSensitiveWord(ctx, SENSITIVE_WORDS_CN[i]);
-    
     for (int i = 0; i < STOP_WORDS_EN_COUNT; i++) {
         if (STOP_WORDS_EN[i]) {
             char lower[256];
@@ -223,18 +426,35 @@ EXPORT AnalyzerContext* Analyzer_Create() {
             Analyzer_AddStopWord(ctx, lower);
         }
     }
-    for (int i = 0; i < SENSITIVE_WORDS_EN_COUNT; i++) if (SENSITIVE_WORDS_EN[i]) Analyzer_AddSensitiveWord(ctx, SENSITIVE_WORDS_EN[i]);
+    // 敏感词表由全局自动机识别；自动机不可用时才逐词注入
+    ctx->sensitive_ac = g_sensitive_scan ? sensitive_automaton_acquire() : NULL;
+    if (!ctx->sensitive_ac) {
+        for (int i = 0; i < SENSITIVE_WORDS_CN_COUNT; i++) if (SENSITIVE_WORDS_CN[i]) Analyzer_AddSensitiveWord(ctx, SENSITIVE_WORDS_CN[i]);
+        for (int i = 0; i < SENSITIVE_WORDS_EN_COUNT; i++) if (SENSITIVE_WORDS_EN[i]) Analyzer_AddSensitiveWord(ctx, SENSITIVE_WORDS_EN[i]);
+    }
 
+    // 预算从这里开始生效（包含上面注入词表占用的内存），避免词表不完整
+    ctx->mem.limit = g_limit_bytes;
+    ctx->max_unique_tokens = g_limit_unique_tokens;
     return ctx;
 }
 
 EXPORT void Analyzer_Free(AnalyzerContext* ctx) {
     if (!ctx) return;
+    mem_context_closed(&ctx->mem, ctx->truncated != TRUNC_NONE);
     dict_free(ctx->dict_freq);
     dict_free(ctx->dict_sensitive_hit);
     dict_free(ctx->set_stop);
     dict_free(ctx->set_sensitive);
     dict_free(ctx->set_redundant);
+    redundancy_free(&ctx->redundancy);
+    mem_free(&ctx->mem, ctx->sections, sizeof(SectionInfo) * ctx->section_cap);
+    mem_free(&ctx->mem, ctx->cur_words.items, sizeof(Node*) * ctx->cur_words.cap);
+    mem_free(&ctx->mem, ctx->cur_sensitive.items, sizeof(Node*) * ctx->cur_sensitive.cap);
+    mem_free(&ctx->mem, ctx->section_words, sizeof(SectionWord) * ctx->section_words_cap);
+    mem_free(&ctx->mem, ctx->sensitive_hits, sizeof(Span) * ctx->sensitive_hit_cap);
+    sensitive_automaton_put(ctx->sensitive_ac);
+    put_overlays(ctx);
     // ctx->cn_dict is shared, do not free
     free(ctx);
 }
@@ -242,156 +462,766 @@ EXPORT void Analyzer_Free(AnalyzerContext* ctx) {
 EXPORT void Analyzer_AddStopWord(AnalyzerContext* ctx, const char* word) { dict_add(ctx->set_stop, word); }
 EXPORT void Analyzer_AddSensitiveWord(AnalyzerContext* ctx, const char* word) { dict_add(ctx->set_sensitive, word); }
 EXPORT void Analyzer_AddRedundantWord(AnalyzerContext* ctx, const char* word) { dict_add(ctx->set_redundant, word); }
+EXPORT void Analyzer_SetRedundancyDetection(int enabled) { g_detect_redundancy = enabled; }
+EXPORT void Analyzer_SetSensitiveScan(int enabled) { g_sensitive_scan = enabled; }
+EXPORT void Analyzer_SetNormalization(int flags) {
+    flags &= NORM_ALL;
+    // 第一次开启时构建查表（含载入 t2s.txt），之后的分析只读
+    if (flags && !norm_table()) flags = 0;
+    g_normalize = flags;
+}
+EXPORT void Analyzer_SetProfiling(int enabled) {
+    if (enabled && !g_clock_overhead_ns) {
+        long long best = -1;
+        for (int i = 0; i < 1000; i++) {
+            long long t = now_ns();
+            long long d = now_ns() - t;
+            if (best < 0 || d < best) best = d;
+        }
+        g_clock_overhead_ns = best > 0 ? best : 1;
+    }
+    g_profile = enabled;
+}
 
-EXPORT void Analyzer_Process(AnalyzerContext* ctx, const char* text) {
-    if (!ctx || !text) return;
-    const unsigned char* p = (const unsigned char*)text;
-    char buffer[MAX_WORD_LEN];  
-    int buf_idx = 0;
-    bool is_line_start = true;
+EXPORT void Analyzer_SetLimits(long long max_bytes, int max_unique_tokens) {
+    g_limit_bytes = (max_bytes > 0) ? (size_t)max_bytes : 0;
+    g_limit_unique_tokens = (max_unique_tokens > 0) ? max_unique_tokens : 0;
+}
+
+EXPORT void Analyzer_GetMemoryStats(AnalyzerMemoryStats* out) {
+    if (!out) return;
+    mem_get_stats(out);
+    out->limit_bytes = (long long)g_limit_bytes;
+    out->limit_unique_tokens = g_limit_unique_tokens;
+}
+
+// 把识别出的词交给重复检测（[start, end) 为原文字节偏移）
+static inline void track_token(AnalyzerContext* ctx, const char* tok, int len, int start, int end) {
+    if (ctx->detect_redundancy) redundancy_token(&ctx->redundancy, tok, len, start, end);
+}
+
+static inline void track_sentence_end(AnalyzerContext* ctx, int end) {
+    if (ctx->detect_redundancy) redundancy_sentence_end(&ctx->redundancy, end);
+}
+
+// 中英文句末标点
+static inline int is_sentence_end(const unsigned char* p, int len) {
+    if (len == 1) return *p == '.' || *p == '!' || *p == '?' || *p == '\n';
+    if (len == 3) {
+        return (p[0] == 0xE3 && p[1] == 0x80 && p[2] == 0x82)     // 。
+            || (p[0] == 0xEF && p[1] == 0xBC && p[2] == 0x81)     // ！
+            || (p[0] == 0xEF && p[1] == 0xBC && p[2] == 0x9F);    // ？
+    }
+    return 0;
+}
 
-    while (*p) {
-        int len = utf8_len(*p);
+// --- 字节分类表：一次查表代替逐字节的 utf8_len / isalpha / ispunct / tolower ---
+#define BC_ALPHA 0x01  // ASCII 字母
+#define BC_PUNCT 0x02  // ASCII 标点（C locale 下的 ispunct）
+#define BC_SENT  0x04  // 句末：. ! ? \n
+#define BC_NL    0x08  // 换行
+#define BC_MB    0x10  // 多字节 UTF-8 首字节
 
-        if (buf_idx == 0 && ctx->cn_dict && len > 1) {
-            // ...existing code...
+static unsigned char g_byte_class[256];
+static unsigned char g_byte_len[256];
+static unsigned char g_byte_lower[256];
+static pthread_once_t g_tables_once = PTHREAD_ONCE_INIT;
+
+static void init_byte_tables(void) {
+    for (int c = 0; c < 256; c++) {
+        unsigned char cls = 0;
+        if ((c >= 'A' && c <= 'Z') || (c >= 'a' && c <= 'z')) cls |= BC_ALPHA;
+        else if (c > ' ' && c < 0x7F && !(c >= '0' && c <= '9')) cls |= BC_PUNCT;
+        if (c == '.' || c == '!' || c == '?' || c == '\n') cls |= BC_SENT;
+        if (c == '\n') cls |= BC_NL;
+        g_byte_len[c] = (unsigned char)utf8_len((unsigned char)c);
+        if (g_byte_len[c] > 1) cls |= BC_MB;
+        g_byte_class[c] = cls;
+        g_byte_lower[c] = (c >= 'A' && c <= 'Z') ? (unsigned char)(c + 32) : (unsigned char)c;
+    }
+}
+
+// --- SWAR：一次判断 8 个字节 ---
+#define SWAR_ONES  0x0101010101010101ULL
+#define SWAR_HIGHS 0x8080808080808080ULL
+
+static inline uint64_t load8(const unsigned char* p) {
+    uint64_t x;
+    memcpy(&x, p, sizeof(x));
+    return x;
+}
+
+// 8 个字节是否都是 ASCII 字母：|0x20 折叠大小写后检查每个字节都落在 'a'..'z'
+static inline int all_alpha8(uint64_t x) {
+    uint64_t y = x | (SWAR_ONES * 0x20);
+    uint64_t below = (y - SWAR_ONES * 'a') & ~y & SWAR_HIGHS;        // 有字节 < 'a'
+    uint64_t above = ((y + SWAR_ONES * (127 - 'z')) | y) & SWAR_HIGHS; // 有字节 > 'z'
+    return !((x & SWAR_HIGHS) | below | above);
+}
+
+// 返回字母段之后的第一个字节
+static inline const unsigned char* scan_alpha(const unsigned char* p, const unsigned char* end) {
+    while (p + 8 <= end && all_alpha8(load8(p))) p += 8;
+    while (p < end && (g_byte_class[*p] & BC_ALPHA)) p++;
+    return p;
+}
+
+// 记录本节出现的词：每个节点在每节第一次出现时加入列表，之后只累加节内次数
+static inline void note_section_word(AnalyzerContext* ctx, NodeList* list, Node* node) {
+    if (!node) return;
+    int mark = ctx->section_idx + 1;
+    if (node->section_mark != mark) {
+        if (list->len == list->cap) {
+            int new_cap = list->cap ? list->cap * 2 : 64;
+            Node** items = (Node**)mem_realloc(&ctx->mem, list->items, sizeof(Node*) * list->cap, sizeof(Node*) * new_cap);
+            if (!items) return;
+            list->items = items;
+            list->cap = new_cap;
         }
+        list->items[list->len++] = node;
+        node->section_mark = mark;
+        node->section_count = 0;
+    }
+    node->section_count++;
+}
 
-        // --- 1. Markdown Header Check ---
-        if (is_line_start && *p == '#') {
-            int level = 0;
-            const unsigned char* temp = p;
-            while (*temp == '#' && level < 6) { level++; temp++; }
-            if (*temp == ' ') { 
-                // 结算上一章
-                ctx->sections[ctx->section_idx].length = ctx->current_section_char_count;
-                // 新章
-                if (ctx->section_idx < MAX_SECTIONS - 1) ctx->section_idx++;
-                ctx->sections[ctx->section_idx].level = level;
-                ctx->current_section_char_count = 0;
-                
-                temp++; // Skip space
-                int t_idx = 0;
-                while (*temp && *temp != '\n' && *temp != '\r' && t_idx < 127) {
-                    ctx->sections[ctx->section_idx].title[t_idx++] = *temp++;
-                }
-                ctx->sections[ctx->section_idx].title[t_idx] = '\0';
-                
-                p = temp; 
-                while(*p == '\r' || *p == '\n') p++; // Skip newline
-                is_line_start = true;
-                continue; 
+// 把本节的词追加到 section_words，返回写入的个数：
+// rank 时按 节内次数 × 权重 降序（权重只在 TF-IDF 时设置，否则为 1，即按次数）（同次数保持首次出现顺序）取前 limit 个；否则按首次出现顺序取前 limit 个；limit <= 0 表示全部
+static int flush_section_words(AnalyzerContext* ctx, NodeList* list, int limit, int rank, int* offset) {
+    int n = (limit > 0 && limit < list->len) ? limit : list->len;
+    *offset = ctx->section_words_len;
+    if (ctx->section_words_len + n > ctx->section_words_cap) {
+        int new_cap = ctx->section_words_cap ? ctx->section_words_cap : 256;
+        while (new_cap < ctx->section_words_len + n) new_cap *= 2;
+        SectionWord* arr = (SectionWord*)mem_realloc(&ctx->mem, ctx->section_words,
+            sizeof(SectionWord) * ctx->section_words_cap, sizeof(SectionWord) * new_cap);
+        if (!arr) { list->len = 0; return 0; }
+        ctx->section_words = arr;
+        ctx->section_words_cap = new_cap;
+    }
+    SectionWord* out = ctx->section_words + ctx->section_words_len;
+    if (rank && n < list->len) {
+        // 与 dict_get_top 相同的插入式选择：严格大于才前移，保证稳定
+        int filled = 0;
+        for (int i = 0; i < list->len; i++) {
+            Node* node = list->items[i];
+            int k = filled;
+            double key = (double)node->section_count * node->weight;
+            while (k > 0 && key > (double)out[k - 1].count * out[k - 1].node->weight) k--;
+            if (k >= n) continue;
+            int last = (filled < n) ? filled : n - 1;
+            for (int j = last; j > k; j--) out[j] = out[j - 1];
+            out[k].node = node;
+            out[k].count = node->section_count;
+            if (filled < n) filled++;
+        }
+    } else {
+        for (int i = 0; i < n; i++) {
+            out[i].node = list->items[i];
+            out[i].count = list->items[i]->section_count;
+        }
+        if (rank) {
+            // 全部保留时只需稳定排序
+            for (int i = 1; i < n; i++) {
+                SectionWord w = out[i];
+                int j = i;
+                double key = (double)w.count * w.node->weight;
+                while (j > 0 && key > (double)out[j - 1].count * out[j - 1].node->weight) { out[j] = out[j - 1]; j--; }
+                out[j] = w;
             }
         }
+    }
+    ctx->section_words_len += n;
+    list->len = 0;
+    return n;
+}
+
+// 结算当前章节：长度、词数、敏感词次数、节内高频词
+static void close_section(AnalyzerContext* ctx) {
+    SectionInfo* sec = &ctx->sections[ctx->section_idx];
+    sec->length = ctx->current_section_char_count;
+    sec->word_count = ctx->stats.en_words + ctx->stats.cn_chars - ctx->section_words_start;
+    sec->sensitive_count = ctx->stats.sensitive_count - ctx->section_sensitive_start;
+    // top_n <= 0 时不排序：增量分析按首次出现顺序合并各段落后再排序
+    int rank = ctx->section_top_n > 0;
+    sec->words_count = flush_section_words(ctx, &ctx->cur_words, ctx->section_top_n, rank, &sec->words_offset);
+    sec->sensitive_words_count = flush_section_words(ctx, &ctx->cur_sensitive, ctx->section_top_n, 0, &sec->sensitive_offset);
+}
+
+// 开启新章节（容量不足时翻倍），失败时继续写入当前章节
+static void open_section(AnalyzerContext* ctx) {
+    if (ctx->section_idx + 1 >= ctx->section_cap) {
+        int new_cap = ctx->section_cap * 2;
+        SectionInfo* arr = (SectionInfo*)mem_realloc(&ctx->mem, ctx->sections,
+            sizeof(SectionInfo) * ctx->section_cap, sizeof(SectionInfo) * new_cap);
+        if (!arr) return;
+        ctx->sections = arr;
+        ctx->section_cap = new_cap;
+    }
+    ctx->section_idx++;
+    memset(&ctx->sections[ctx->section_idx], 0, sizeof(SectionInfo));
+    ctx->sections[ctx->section_idx].section_id = ctx->section_idx;
+    ctx->current_section_char_count = 0;
+    ctx->section_words_start = ctx->stats.en_words + ctx->stats.cn_chars;
+    ctx->section_sensitive_start = ctx->stats.sensitive_count;
+}
+
+// 超出预算时记录原因并返回 1；之后解除内存上限，让收尾（结算章节、输出结果）能够完成
+static inline int over_budget(AnalyzerContext* ctx) {
+    if (ctx->mem.exceeded) ctx->truncated = TRUNC_MEMORY;
+    else if (ctx->max_unique_tokens > 0 && ctx->dict_freq->unique_count >= ctx->max_unique_tokens) ctx->truncated = TRUNC_UNIQUE_TOKENS;
+    else return 0;
+    ctx->mem.limit = 0;
+    return 1;
+}
+
+static inline void count_chars(AnalyzerContext* ctx, int n) {
+    ctx->stats.total_chars += n;
+    ctx->current_section_char_count += n;
+}
 
-        ctx->stats.total_chars++;
-        ctx->current_section_char_count++;
+// 计入词频；TF-IDF 排序时新词入表即查出 IDF 权重（每个不同的词只查一次）
+static inline void count_freq(AnalyzerContext* ctx, const char* word, unsigned long h) {
+    Node* node = dict_add_node_h(ctx->dict_freq, word, h);
+    if (node && node->count == 1 && ctx->rank_mode == RANK_TFIDF)
+        node->weight = trie_weight(ctx->cn_dict, word, ctx->idf_unknown);
+    note_section_word(ctx, &ctx->cur_words, node);
+}
+
+// 记录一次敏感词出现（超出 SENSITIVE_HITS_MAX 或内存不足时只标记截断）
+static void note_sensitive_hit(AnalyzerContext* ctx, int start, int end) {
+    if (ctx->sensitive_hit_count == ctx->sensitive_hit_cap) {
+        int new_cap = ctx->sensitive_hit_cap ? ctx->sensitive_hit_cap * 2 : 64;
+        Span* arr = (new_cap <= SENSITIVE_HITS_MAX) ? (Span*)mem_realloc(&ctx->mem, ctx->sensitive_hits,
+            sizeof(Span) * ctx->sensitive_hit_cap, sizeof(Span) * new_cap) : NULL;
+        if (!arr) { ctx->sensitive_hits_truncated = 1; return; }
+        ctx->sensitive_hits = arr;
+        ctx->sensitive_hit_cap = new_cap;
+    }
+    ctx->sensitive_hits[ctx->sensitive_hit_count].start = start;
+    ctx->sensitive_hits[ctx->sensitive_hit_count].end = end;
+    ctx->sensitive_hit_count++;
+}
 
-        // --- 2. Chinese FMM (Trie) ---
-        if (buf_idx == 0 && ctx->cn_dict && len > 1) { // 仅尝试多字节字符开头
-            int matched_len = 0;
-            int matched_freq = 0;
-            if (trie_search_longest(ctx->cn_dict, (const char*)p, &matched_len, &matched_freq)) {
-                // ...existing code...
-                // 提取
+// 报告在 end 处结束的所有敏感词（由长到短）；词首/词尾是字母的词必须在词边界上，避免 "class" 中的 "ass"
+static void report_sensitive(AnalyzerContext* ctx, const AhoAutomaton* ac, uint32_t v, const unsigned char* base, int end) {
+    for (int t = ac->out[aho_state(ac, v)]; t >= 0; t = ac->out_next[t]) {
+        int start = end - ac->out_len[t];
+        unsigned char f = ac->out_flags[t];
+        if ((f & AHO_BOUND_START) && start > 0 && (g_byte_class[base[start - 1]] & BC_ALPHA)) continue;
+        if ((f & AHO_BOUND_END) && (g_byte_class[base[end]] & BC_ALPHA)) continue;
+        note_sensitive_hit(ctx, start, end);
+    }
+}
+
+// 读取 q 处的一个字符在规范化后的字节（见 norm_char）
+static inline int norm_at(const AnalyzerContext* ctx, const unsigned char* q, const unsigned char* end,
+                          const unsigned char** out, int* src_len) {
+    return norm_char(ctx->norm, ctx->normalize, q, end, out, src_len);
+}
+
+// 从 q 起跳过被删除的字符，返回下一个保留字符的位置（没有时为 end 且 *n 为 0）
+static inline const unsigned char* norm_next(const AnalyzerContext* ctx, const unsigned char* q, const unsigned char* end,
+                                             const unsigned char** out, int* n, int* src_len) {
+    while (q < end) {
+        *n = norm_at(ctx, q, end, out, src_len);
+        if (*n) return q;
+        q += *src_len;
+    }
+    *n = 0;
+    return end;
+}
+
+// 同 report_sensitive，位置按规范化后的字节计：词首及其前一个字节从环形缓冲中取（词不超过 255 字节），
+// next 为词尾之后的字节，-1 表示在下一个保留字符中；q 为词尾所在字符在原文中的结束位置
+static void report_sensitive_norm(AnalyzerContext* ctx, const AhoAutomaton* ac, uint32_t v, const unsigned char* base,
+                                  const unsigned char* q, int next) {
+    for (int t = ac->out[aho_state(ac, v)]; t >= 0; t = ac->out_next[t]) {
+        int start = ctx->ac_norm_pos - ac->out_len[t];
+        unsigned char f = ac->out_flags[t];
+        if ((f & AHO_BOUND_START) && start > 0
+            && (g_byte_class[ctx->ac_ring_byte[(start - 1) & (AC_RING_SIZE - 1)]] & BC_ALPHA)) continue;
+        if (f & AHO_BOUND_END) {
+            if (next < 0) {
+                const unsigned char* out;
+                int n, src_len;
+                next = (norm_next(ctx, q, ctx->text_end, &out, &n, &src_len) < ctx->text_end) ? *out : 0;
+            }
+            if (g_byte_class[next] & BC_ALPHA) continue;
+        }
+        note_sensitive_hit(ctx, ctx->ac_ring_start[start & (AC_RING_SIZE - 1)], (int)(q - base));
+    }
+}
+
+// 规范化模式的 scan_sensitive：自动机读规范化后的字节，命中位置换回原文（词首字符的起点、词尾字符的终点）
+static void scan_sensitive_norm(AnalyzerContext* ctx, const unsigned char* base, const unsigned char* upto) {
+    const AhoAutomaton* ac = ctx->sensitive_ac;
+    const unsigned char* q = base + ctx->ac_pos;
+    if (q >= upto) return;
+    uint32_t v = ctx->ac_state;
+    while (q < upto) {
+        const unsigned char* out;
+        int src_len;
+        int start = (int)(q - base);
+        int n = norm_at(ctx, q, ctx->text_end, &out, &src_len);
+        q += src_len;
+        for (int i = 0; i < n; i++) {
+            int k = ctx->ac_norm_pos++ & (AC_RING_SIZE - 1);
+            ctx->ac_ring_start[k] = start;
+            ctx->ac_ring_byte[k] = out[i];
+            v = aho_step(ac, v, out[i]);
+            if (aho_has_output(v)) report_sensitive_norm(ctx, ac, v, base, q, (i + 1 < n) ? out[i + 1] : -1);
+        }
+    }
+    ctx->ac_state = v;
+    ctx->ac_pos = (int)(q - base);
+}
+
+// 自动机读到原文 upto 处：分词每结束一个词就推进到词尾，原文的每个字节只读一次
+static inline void scan_sensitive(AnalyzerContext* ctx, const unsigned char* base, const unsigned char* upto) {
+    if (ctx->normalize) {
+        scan_sensitive_norm(ctx, base, upto);
+        return;
+    }
+    const AhoAutomaton* ac = ctx->sensitive_ac;
+    const unsigned char* q = base + ctx->ac_pos;
+    if (q >= upto) return;
+    uint32_t v = ctx->ac_state;
+    while (q < upto) {
+        v = aho_step(ac, v, *q++);
+        if (aho_has_output(v)) report_sensitive(ctx, ac, v, base, (int)(q - base));
+    }
+    ctx->ac_state = v;
+    ctx->ac_pos = (int)(upto - base);
+}
+
+// 在原文 end 处结束、长 len 字节（规范化后）的词 word 是否为敏感词：全局词表看自动机是否恰好在词尾结束一个等长的词
+// （不再逐词查哈希表），Analyzer_AddSensitiveWord 追加的词仍查 set_sensitive（h 为桶序号）
+static inline int is_sensitive(AnalyzerContext* ctx, const unsigned char* base, int end, int len,
+                               const char* word, unsigned long h) {
+    if (ctx->sensitive_ac) {
+        scan_sensitive(ctx, base, base + end);
+        if (aho_ends_with(ctx->sensitive_ac, ctx->ac_state, len)) return 1;
+        if (!ctx->set_sensitive->unique_count) return 0;
+    }
+    return dict_get_h(ctx->set_sensitive, word, h) != 0;
+}
+
+// 敏感词 / 停用词 / 词频（h 为桶序号，三张表共用）
+static inline void count_word(AnalyzerContext* ctx, const char* word, unsigned long h, int sensitive) {
+    if (sensitive) {
+        ctx->stats.sensitive_count++;
+        note_section_word(ctx, &ctx->cur_sensitive, dict_add_node_h(ctx->dict_sensitive_hit, word, h));
+    } else if (!dict_get_h(ctx->set_stop, word, h)) {
+        count_freq(ctx, word, h);
+    }
+}
+
+// 行首 Markdown 标题（1~6 个 # 加空格）：开启新章节，返回 1 并把 *pp 移到标题行之后
+static int parse_header(AnalyzerContext* ctx, const unsigned char* base, const unsigned char** pp) {
+    const unsigned char* temp = *pp;
+    int level = 0;
+    while (*temp == '#' && level < 6) { level++; temp++; }
+    if (*temp != ' ') return 0;
+    // 结算上一章，开启新章
+    close_section(ctx);
+    open_section(ctx);
+    ctx->sections[ctx->section_idx].level = level;
+
+    temp++; // Skip space
+    // 按整字截断到 127 字节：截在多字节字符中间会输出非法 UTF-8（JSON 无法解析），剩余部分按正文处理
+    char* title = ctx->sections[ctx->section_idx].title;
+    int t_idx = 0;
+    while (*temp && *temp != '\n' && *temp != '\r') {
+        int n = g_byte_len[*temp], k = 1;
+        while (k < n && temp[k]) k++;
+        if (t_idx + k > 127) break;
+        memcpy(title + t_idx, temp, k);
+        t_idx += k;
+        temp += k;
+    }
+    title[t_idx] = '\0';
+
+    while (*temp == '\r' || *temp == '\n') temp++; // Skip newline
+    track_sentence_end(ctx, (int)(temp - base));
+    *pp = temp;
+    return 1;
+}
+
+// 复制匹配到的词：超过 MAX_WORD_LEN - 1 字节时按整字截断（截在多字节字符中间会输出非法 UTF-8，JSON 无法解析）
+static void copy_word(char* dst, const unsigned char* src, int len) {
+    int n = len;
+    if (n > MAX_WORD_LEN - 1) {
+        n = MAX_WORD_LEN - 1;
+        while (n > 0 && (src[n] & 0xC0) == 0x80) n--;
+    }
+    memcpy(dst, src, n);
+    dst[n] = '\0';
+}
+
+// 不参与词典匹配的单个多字节字符 c（len 字节，原文区间 [start, end)；调用方已计入 total_chars）
+static void process_mb_bytes(AnalyzerContext* ctx, const unsigned char* base, const unsigned char* c, int len,
+                             int start, int end) {
+    if (is_chinese(c) && len == 3) {
+        char mb_char[5] = {0};
+        memcpy(mb_char, c, len);
+        ctx->stats.cn_chars++;
+        unsigned long h = hash(mb_char);
+        count_word(ctx, mb_char, h, is_sensitive(ctx, base, end, len, mb_char, h));
+        track_token(ctx, mb_char, len, start, end);
+    } else {
+        ctx->stats.punct_count++;
+        if (is_sentence_end(c, len)) track_sentence_end(ctx, end);
+    }
+}
+
+static const unsigned char* process_mb_char(AnalyzerContext* ctx, const unsigned char* base,
+                                            const unsigned char* p, const unsigned char* end) {
+    int len = g_byte_len[*p];
+    if (len > end - p) len = (int)(end - p); // 截断的 UTF-8 序列不越过文本结尾
+    process_mb_bytes(ctx, base, p, len, (int)(p - base), (int)(p - base) + len);
+    return p + len;
+}
+
+// 全局分词词典与叠加词表中的最长匹配（字节数），没有匹配返回 0
+static inline int match_longest(const AnalyzerContext* ctx, const char* p) {
+    int best = 0, len, freq;
+    if (ctx->cn_dict && trie_search_longest(ctx->cn_dict, p, &len, &freq)) best = len;
+    for (int i = 0; i < ctx->overlay_count; i++) {
+        const Overlay* ov = ctx->overlays[i];
+        if (overlay_may_match(ov, p) && trie_search_longest(ov->trie, p, &len, &freq) && len > best) best = len;
+    }
+    return best;
+}
+
+// 规范化模式的 match_longest：词典与叠加词表都读同一个前瞻缓冲，返回规范化后的字节数
+static inline int match_longest_norm(const AnalyzerContext* ctx, NormLookahead* la) {
+    int best = 0, len, freq;
+    if (ctx->cn_dict && trie_search_longest_norm(ctx->cn_dict, la, &len, &freq)) best = len;
+    if (ctx->overlay_count) norm_la_byte(la, 7); // 过滤位图看前两个字符（最多 8 字节）
+    for (int i = 0; i < ctx->overlay_count; i++) {
+        const Overlay* ov = ctx->overlays[i];
+        if (overlay_may_match(ov, (const char*)la->buf) && trie_search_longest_norm(ov->trie, la, &len, &freq)
+            && len > best) best = len;
+    }
+    return best;
+}
+
+// 抽样计时的 match_longest（只在 ctx->profile 时调用）；la 不为 NULL 时为规范化模式
+static int match_longest_timed(AnalyzerContext* ctx, const char* p, NormLookahead* la) {
+    if (ctx->prof.probes++ % PROFILE_PROBE_SAMPLE != 0) return la ? match_longest_norm(ctx, la) : match_longest(ctx, p);
+    long long t = now_ns();
+    int len = la ? match_longest_norm(ctx, la) : match_longest(ctx, p);
+    long long d = now_ns() - t - g_clock_overhead_ns;
+    if (d > 0) ctx->prof.probe_ns += d * PROFILE_PROBE_SAMPLE;
+    return len;
+}
+
+// 逐字节分词（默认路径），返回实际分析到的位置（提前截断时在文本中间）
+static const unsigned char* segment(AnalyzerContext* ctx, const unsigned char* base, const unsigned char* end) {
+    const unsigned char* p = base;
+    bool is_line_start = true;
+
+    while (p < end) {
+        // 每个词/标题/空白段之前检查预算，超出时在此处截断
+        if (over_budget(ctx)) break;
+        unsigned char cls = g_byte_class[*p];
+
+        // --- 1. Markdown Header Check ---
+        if (is_line_start && *p == '#' && parse_header(ctx, base, &p)) {
+            is_line_start = true;
+            continue;
+        }
+
+        // --- 2. English word: 整段字母一次扫描，转小写的同时计算两个哈希 ---
+        if (cls & BC_ALPHA) {
+            const unsigned char* w = p;
+            p = scan_alpha(p, end);
+            int run = (int)(p - w);
+            int n = (run < MAX_WORD_LEN - 1) ? run : (MAX_WORD_LEN - 1);
+            char word[MAX_WORD_LEN];
+            unsigned long h = 5381;
+            uint64_t th = REDUNDANT_FNV_OFFSET;
+            for (int i = 0; i < n; i++) {
+                unsigned char c = g_byte_lower[w[i]];
+                word[i] = (char)c;
+                h = ((h << 5) + h) + c;
+                th = (th ^ c) * REDUNDANT_FNV_PRIME;
+            }
+            word[n] = '\0';
+            count_chars(ctx, run);
+            ctx->stats.en_words++;
+            // 后接多字节字符或文本结束时不检查敏感词（与逐字节版本的结算时机一致）
+            int next_mb = (p < end) && (g_byte_class[*p] & BC_MB);
+            unsigned long bucket = h % HASH_TABLE_SIZE;
+            count_word(ctx, word, bucket,
+                p < end && !next_mb && is_sensitive(ctx, base, (int)(p - base), run, word, bucket));
+            if (ctx->detect_redundancy) redundancy_token_hash(&ctx->redundancy, th, (int)(w - base), (int)(p - base));
+            is_line_start = false;
+            if (next_mb) {
+                // 紧跟英文词的多字节字符不做词典匹配
+                count_chars(ctx, 1);
+                p = process_mb_char(ctx, base, p, end);
+            }
+            continue;
+        }
+
+        // --- 3. Chinese FMM (Trie) ---
+        if (cls & BC_MB) {
+            count_chars(ctx, 1);
+            int matched_len = ctx->profile ? match_longest_timed(ctx, (const char*)p, NULL)
+                                           : match_longest(ctx, (const char*)p);
+            if (matched_len > 0) {
                 char matched_word[MAX_WORD_LEN];
-                int copy_len = (matched_len < MAX_WORD_LEN) ? matched_len : (MAX_WORD_LEN - 1);
-                strncpy(matched_word, (const char*)p, copy_len);
-                matched_word[copy_len] = '\0';
+                copy_word(matched_word, p, matched_len);
 
                 // 统计字数
-                for (int i = 0; i < matched_len; ) {
-                    const unsigned char* sub_p = p + i;
-                    int sub_len = utf8_len(*sub_p);
-                    if (is_chinese(sub_p)) ctx->stats.cn_chars++;
-                    i += sub_len;
+                for (int i = 0; i < matched_len; i += g_byte_len[p[i]]) {
+                    if (is_chinese(p + i)) ctx->stats.cn_chars++;
                 }
 
-                if (dict_get(ctx->set_sensitive, matched_word)) {
-                    // ...existing code...
+                unsigned long h = hash(matched_word);
+                int start = (int)(p - base);
+                if (is_sensitive(ctx, base, start + matched_len, matched_len, matched_word, h)) {
                     ctx->stats.sensitive_count++;
-                    dict_add(ctx->dict_sensitive_hit, matched_word);
-                } else if (dict_get(ctx->set_redundant, matched_word)) {
-                    // ...existing code...
+                    note_section_word(ctx, &ctx->cur_sensitive, dict_add_node_h(ctx->dict_sensitive_hit, matched_word, h));
+                } else if (dict_get_h(ctx->set_redundant, matched_word, h)) {
                     ctx->stats.redundancy_count++;
-                } else if (!dict_get(ctx->set_stop, matched_word)) {
-                    // ...existing code...
-                    dict_add(ctx->dict_freq, matched_word);
+                } else if (!dict_get_h(ctx->set_stop, matched_word, h)) {
+                    count_freq(ctx, matched_word, h);
                 }
-
+                track_token(ctx, (const char*)p, matched_len, (int)(p - base), (int)(p - base) + matched_len);
                 p += matched_len;
-                is_line_start = false;
-                continue;
+            } else {
+                p = process_mb_char(ctx, base, p, end);
             }
+            is_line_start = false;
+            continue;
         }
 
-        // --- 3. Default Processing ---
-        if (len == 1) {
-            // ASCII
-            if (isalpha(*p)) {
-                // ...existing code...
-                if (buf_idx < MAX_WORD_LEN - 1) buffer[buf_idx++] = tolower(*p);
-            } else {
-                // Not alpha (number, punct, space) -> Flush Buffer
-                if (buf_idx > 0) {
-                    // ...existing code...
-                     buffer[buf_idx] = '\0';
-                     ctx->stats.en_words++;
-                     if (dict_get(ctx->set_sensitive, buffer)) {
-                         // ...existing code...
-                         ctx->stats.sensitive_count++;
-                         dict_add(ctx->dict_sensitive_hit, buffer);
-                     } else if (!dict_get(ctx->set_stop, buffer)) {
-                         // ...existing code...
-                         dict_add(ctx->dict_freq, buffer);
-                     }
-                     buf_idx = 0;
-                }
-                if (ispunct(*p)) ctx->stats.punct_count++;
+        // --- 4. 空白/数字/标点：按分类表成段处理，连续空格 8 字节一跳 ---
+        const unsigned char* r = p;
+        while (p < end) {
+            unsigned char c = *p;
+            cls = g_byte_class[c];
+            if (cls & (BC_ALPHA | BC_MB)) break;
+            if (c == ' ' && p + 8 <= end && load8(p) == SWAR_ONES * ' ') {
+                p += 8;
+                continue;
             }
-            if (*p == '\n') is_line_start = true; else is_line_start = false;
+            if (cls & BC_PUNCT) ctx->stats.punct_count++;
+            if (cls & BC_SENT) track_sentence_end(ctx, (int)(p - base) + 1);
             p++;
-        } else {
-            // Multibyte fallback
-            if (buf_idx > 0) { // Flush pending EN word
-                // ...existing code...
-                 buffer[buf_idx] = '\0';
-                 ctx->stats.en_words++;
-                 if (!dict_get(ctx->set_stop, buffer)) dict_add(ctx->dict_freq, buffer);
-                 buf_idx = 0;
-            }
+            if (cls & BC_NL) break; // 下一行行首可能是标题
+        }
+        count_chars(ctx, (int)(p - r));
+        is_line_start = (p[-1] == '\n');
+    }
+    return p;
+}
+
+// --- 规范化模式（Analyzer_SetNormalization）：读取每个字符时查表替换，与分词在同一遍扫描中完成，不复制原文 ---
+// 结果等同于分析规范化后的文本；输出的字节区间（sensitive_hits、redundant_spans）仍是原文中的位置：
+// 起点为首个字符在原文中的起点，终点为最后一个字符在原文中的终点（被删除的字符不属于任何词）
+
+// 规范化模式的 parse_header：# 与空格可以是全角，标题为规范化后的字节（按整字截断），被删除的字符不计
+static int parse_header_norm(AnalyzerContext* ctx, const unsigned char* base, const unsigned char** pp,
+                             const unsigned char* end) {
+    const unsigned char* q = *pp; // 已读取的最后一个保留字符之后
+    const unsigned char *s, *out;
+    int n, src_len, level = 0;
+    s = norm_next(ctx, q, end, &out, &n, &src_len);
+    while (n == 1 && *out == '#' && level < 6) {
+        level++;
+        q = s + src_len;
+        s = norm_next(ctx, q, end, &out, &n, &src_len);
+    }
+    if (n != 1 || *out != ' ') return 0;
+    close_section(ctx);
+    open_section(ctx);
+    SectionInfo* sec = &ctx->sections[ctx->section_idx];
+    sec->level = level;
+
+    q = s + src_len; // Skip space
+    int t_idx = 0;
+    for (;;) {
+        s = norm_next(ctx, q, end, &out, &n, &src_len);
+        if (!n || (n == 1 && (*out == '\n' || *out == '\r')) || t_idx + n > 127) break;
+        memcpy(sec->title + t_idx, out, n);
+        t_idx += n;
+        q = s + src_len;
+    }
+    sec->title[t_idx] = '\0';
+
+    for (;;) { // Skip newline
+        s = norm_next(ctx, q, end, &out, &n, &src_len);
+        if (n != 1 || (*out != '\n' && *out != '\r')) break;
+        q = s + src_len;
+    }
+    track_sentence_end(ctx, (int)(q - base));
+    *pp = q;
+    return 1;
+}
+
+static inline void append_letter(char* word, int run, unsigned char c, unsigned long* h, uint64_t* th) {
+    if (run >= MAX_WORD_LEN - 1) return;
+    c = g_byte_lower[c];
+    word[run] = (char)c;
+    *h = ((*h << 5) + *h) + c;
+    *th = (*th ^ c) * REDUNDANT_FNV_PRIME;
+}
 
-            char mb_char[5] = {0};
-            for(int i=0; i<len; i++) mb_char[i] = p[i];
-            
-            if (is_chinese(p)) {
-                // ...existing code...
-                ctx->stats.cn_chars++;
-                if (dict_get(ctx->set_sensitive, mb_char)) {
-                    // ...existing code...
+// 规范化模式的英文词：字母可以是全角，被删除的字符不断开单词；返回最后一个字母（或紧跟的多字节字符）之后的位置
+static const unsigned char* english_word_norm(AnalyzerContext* ctx, const unsigned char* base,
+                                              const unsigned char* p, const unsigned char* end) {
+    const unsigned char* q = p; // 最后一个字母之后
+    const unsigned char *s, *out;
+    int n, src_len, run = 0;
+    char word[MAX_WORD_LEN];
+    unsigned long h = 5381;
+    uint64_t th = REDUNDANT_FNV_OFFSET;
+    for (;;) {
+        const unsigned char* r = scan_alpha(q, end);
+        for (; q < r; q++) append_letter(word, run++, *q, &h, &th);
+        s = norm_next(ctx, q, end, &out, &n, &src_len);
+        if (n != 1 || !(g_byte_class[*out] & BC_ALPHA)) break;
+        append_letter(word, run++, *out, &h, &th);
+        q = s + src_len;
+    }
+    word[(run < MAX_WORD_LEN - 1) ? run : (MAX_WORD_LEN - 1)] = '\0';
+    count_chars(ctx, run);
+    ctx->stats.en_words++;
+    int next_mb = n && (g_byte_class[*out] & BC_MB);
+    unsigned long bucket = h % HASH_TABLE_SIZE;
+    count_word(ctx, word, bucket, n && !next_mb && is_sensitive(ctx, base, (int)(q - base), run, word, bucket));
+    if (ctx->detect_redundancy) redundancy_token_hash(&ctx->redundancy, th, (int)(p - base), (int)(q - base));
+    if (!next_mb) return q;
+    count_chars(ctx, 1);
+    process_mb_bytes(ctx, base, out, n, (int)(s - base), (int)(s - base) + src_len);
+    return s + src_len;
+}
+
+// 规范化模式的空白/数字/标点段：按字符计数（全角标点、特殊空白规范化后也在这里），*line_start 为是否停在换行之后
+static const unsigned char* other_run_norm(AnalyzerContext* ctx, const unsigned char* base,
+                                           const unsigned char* p, const unsigned char* end, bool* line_start) {
+    const unsigned char* kept = p; // 最后一个保留字符之后
+    int chars = 0;
+    *line_start = false;
+    while (p < end) {
+        const unsigned char* out = p;
+        int src_len = 1;
+        unsigned char c = *p;
+        if (c >= 0x80) {
+            if (!norm_at(ctx, p, end, &out, &src_len)) { p += src_len; continue; }
+            c = *out;
+        }
+        unsigned char cls = g_byte_class[c];
+        if (cls & (BC_ALPHA | BC_MB)) break;
+        if (c == ' ' && out == p && p + 8 <= end && load8(p) == SWAR_ONES * ' ') {
+            p += 8;
+            chars += 8;
+            kept = p;
+            continue;
+        }
+        if (cls & BC_PUNCT) ctx->stats.punct_count++;
+        p += src_len;
+        chars++;
+        kept = p;
+        if (cls & BC_SENT) track_sentence_end(ctx, (int)(p - base));
+        if (cls & BC_NL) { *line_start = true; break; }
+    }
+    count_chars(ctx, chars);
+    return kept;
+}
+
+// 规范化模式的分词，*last 为最后一个保留字符在原文中的结束位置（末尾被删除的字符不属于最后一句）
+static const unsigned char* segment_normalized(AnalyzerContext* ctx, const unsigned char* base,
+                                               const unsigned char* end, const unsigned char** last) {
+    const unsigned char* p = base;
+    const unsigned char* kept = base;
+    bool is_line_start = true;
+    NormLookahead la;
+
+    while (p < end) {
+        if (over_budget(ctx)) break;
+        const unsigned char* out;
+        int src_len;
+        int n = norm_at(ctx, p, end, &out, &src_len);
+        if (!n) { // 被删除的字符
+            p += src_len;
+            continue;
+        }
+        unsigned char cls = g_byte_class[*out];
+
+        if (is_line_start && *out == '#' && parse_header_norm(ctx, base, &p, end)) {
+            is_line_start = true;
+        } else if (cls & BC_ALPHA) {
+            p = english_word_norm(ctx, base, p, end);
+            is_line_start = false;
+        } else if (cls & BC_MB) {
+            count_chars(ctx, 1);
+            norm_la_init(&la, ctx->norm, ctx->normalize, p, end);
+            int matched_len = ctx->profile ? match_longest_timed(ctx, (const char*)p, &la)
+                                           : match_longest_norm(ctx, &la);
+            int start = (int)(p - base);
+            if (matched_len > 0) {
+                const unsigned char* w = la.buf;
+                char matched_word[MAX_WORD_LEN];
+                copy_word(matched_word, w, matched_len);
+                for (int i = 0; i < matched_len; i += g_byte_len[w[i]]) {
+                    if (is_chinese(w + i)) ctx->stats.cn_chars++;
+                }
+                unsigned long h = hash(matched_word);
+                int stop = start + la.src_end[matched_len - 1];
+                if (is_sensitive(ctx, base, stop, matched_len, matched_word, h)) {
                     ctx->stats.sensitive_count++;
-                    dict_add(ctx->dict_sensitive_hit, mb_char);
-                } else if (!dict_get(ctx->set_stop, mb_char)) {
-                    // ...existing code...
-                    dict_add(ctx->dict_freq, mb_char);
+                    note_section_word(ctx, &ctx->cur_sensitive, dict_add_node_h(ctx->dict_sensitive_hit, matched_word, h));
+                } else if (dict_get_h(ctx->set_redundant, matched_word, h)) {
+                    ctx->stats.redundancy_count++;
+                } else if (!dict_get_h(ctx->set_stop, matched_word, h)) {
+                    count_freq(ctx, matched_word, h);
                 }
+                track_token(ctx, (const char*)w, matched_len, start, stop);
+                p = base + stop;
             } else {
-                ctx->stats.punct_count++;
+                process_mb_bytes(ctx, base, out, n, start, start + src_len);
+                p += src_len;
             }
-            p += len;
             is_line_start = false;
+        } else {
+            p = other_run_norm(ctx, base, p, end, &is_line_start);
         }
+        kept = p;
     }
-    
-    // Flush final buffer
-    if (buf_idx > 0) {
-        buffer[buf_idx] = '\0';
-        ctx->stats.en_words++;
-        if (!dict_get(ctx->set_stop, buffer)) dict_add(ctx->dict_freq, buffer);
+    *last = kept;
+    return p;
+}
+
+EXPORT void Analyzer_Process(AnalyzerContext* ctx, const char* text) {
+    if (!ctx || !text) return;
+    pthread_once(&g_tables_once, init_byte_tables);
+    const unsigned char* base = (const unsigned char*)text;
+    const unsigned char* end = base + strlen(text);
+    const unsigned char* p;
+    const unsigned char* last; // 最后一句的结束位置
+    ctx->ac_state = 0;
+    ctx->ac_pos = 0;
+    if (ctx->normalize) {
+        ctx->ac_norm_pos = 0;
+        ctx->text_end = end;
+        p = segment_normalized(ctx, base, end, &last);
+    } else {
+        p = last = segment(ctx, base, end);
     }
+    // 截断处不是句末；此时预算已解除，也不应再扩容重复检测的哈希表
+    if (!ctx->truncated) track_sentence_end(ctx, (int)(last - base));
+    // 最后一个词之后的标点/空白中也可能有敏感词（只扫描到实际分析到的位置）
+    if (ctx->sensitive_ac) scan_sensitive(ctx, base, p);
+    // 重复的句子/片段计入冗余统计（合并后的区间数）
+    ctx->stats.redundancy_count += ctx->redundancy.span_count;
     
     // Finish stats
-    ctx->sections[ctx->section_idx].length = ctx->current_section_char_count;
+    close_section(ctx);
     ctx->stats.section_count = ctx->section_idx + 1;
     
     int valid_len_total = 0;
@@ -405,8 +1235,15 @@ EXPORT void Analyzer_Process(AnalyzerContext* ctx, const char* text) {
 }
 
 EXPORT Stats Analyzer_GetStats(AnalyzerContext* ctx) { return ctx->stats; }
-EXPORT void Analyzer_GetTopWords(AnalyzerContext* ctx, WordFreq* out_arr, int n) { dict_get_top(ctx->dict_freq, out_arr, n); }
+EXPORT void Analyzer_GetTopWords(AnalyzerContext* ctx, WordFreq* out_arr, int n) {
+    dict_get_top_by(ctx->dict_freq, out_arr, n, ctx->rank_mode == RANK_TFIDF);
+}
 EXPORT void Analyzer_GetSensitiveWords(AnalyzerContext* ctx, WordFreq* out_arr, int n) { dict_get_top(ctx->dict_sensitive_hit, out_arr, n); }
+EXPORT int Analyzer_GetRedundantSpans(AnalyzerContext* ctx, Span* out_arr, int n) {
+    int count = (ctx->redundancy.span_count > n) ? n : ctx->redundancy.span_count;
+    for (int i=0; i<count; i++) out_arr[i] = ctx->redundancy.spans[i];
+    return ctx->redundancy.span_count;
+}
 EXPORT void Analyzer_GetSections(AnalyzerContext* ctx, SectionInfo* out_arr, int n) {
     int count = (ctx->section_idx + 1 > n) ? n : ctx->section_idx + 1;
     for (int i=0; i<count; i++) out_arr[i] = ctx->sections[i];
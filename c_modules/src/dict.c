@@ -74,7 +74,12 @@ unsigned long hash(const char *str) {
 }
 
 Dict* dict_create() {
-    Dict* d = (Dict*)calloc(1, sizeof(Dict));
+    return dict_create_in(NULL);
+}
+
+Dict* dict_create_in(MemAccount* mem) {
+    Dict* d = (Dict*)mem_calloc(mem, 1, sizeof(Dict));
+    if (d) d->mem = mem;
     return d;
 }
 
@@ -85,39 +90,55 @@ void dict_free(Dict* d) {
         while (curr) {
             Node* temp = curr;
             curr = curr->next;
-            free(temp);
+            mem_free(d->mem, temp, sizeof(Node));
         }
     }
-    free(d);
+    mem_free(d->mem, d, sizeof(Dict));
 }
 
 int dict_add(Dict* d, const char* word) {
-    unsigned long h = hash(word);
+    return dict_add_h(d, word, hash(word));
+}
+
+int dict_add_h(Dict* d, const char* word, unsigned long h) {
+    Node* node = dict_add_node_h(d, word, h);
+    return node ? node->count : 0;
+}
+
+Node* dict_add_node_h(Dict* d, const char* word, unsigned long h) {
     Node* curr = d->buckets[h];
     
     while (curr) {
         if (strncmp(curr->word, word, MAX_WORD_LEN) == 0) {
             d->total_count++;
-            return ++(curr->count);
+            curr->count++;
+            return curr;
         }
         curr = curr->next;
     }
     
     // New node
-    Node* new_node = (Node*)malloc(sizeof(Node));
+    Node* new_node = (Node*)mem_alloc(d->mem, sizeof(Node));
+    if (!new_node) return NULL;
     strncpy(new_node->word, word, MAX_WORD_LEN - 1);
     new_node->word[MAX_WORD_LEN - 1] = '\0';
     new_node->count = 1;
+    new_node->section_mark = 0;
+    new_node->section_count = 0;
+    new_node->weight = 1.0f;
     new_node->next = d->buckets[h];
     d->buckets[h] = new_node;
     
     d->unique_count++;
     d->total_count++;
-    return 1;
+    return new_node;
 }
 
 int dict_get(Dict* d, const char* word) {
-    unsigned long h = hash(word);
+    return dict_get_h(d, word, hash(word));
+}
+
+int dict_get_h(Dict* d, const char* word, unsigned long h) {
     Node* curr = d->buckets[h];
     while (curr) {
         if (strncmp(curr->word, word, MAX_WORD_LEN) == 0) return curr->count;
@@ -128,6 +149,10 @@ int dict_get(Dict* d, const char* word) {
 
 // 简单的冒泡排序取出前N（因为N很小，通常为10，效率足够）
 void dict_get_top(Dict* d, WordFreq* out_arr, int n) {
+    dict_get_top_by(d, out_arr, n, 0);
+}
+
+void dict_get_top_by(Dict* d, WordFreq* out_arr, int n, int by_weight) {
     // 1. Collect all nodes (temporary inefficient but safe)
     int count = 0;
     // Assume worst case for stack alloc or use heap if unique_count is large
@@ -135,6 +160,7 @@ void dict_get_top(Dict* d, WordFreq* out_arr, int n) {
     
     for (int i = 0; i < n; i++) {
         out_arr[i].count = -1;
+        out_arr[i].score = -1.0;
         out_arr[i].word[0] = '\0';
     }
 
@@ -142,16 +168,17 @@ void dict_get_top(Dict* d, WordFreq* out_arr, int n) {
         Node* curr = d->buckets[i];
         while (curr) {
             // Insert into top N
-            int val = curr->count;
+            double val = by_weight ? (double)curr->count * curr->weight : (double)curr->count;
             char* key = curr->word;
             
             for (int k = 0; k < n; k++) {
-                if (val > out_arr[k].count) {
+                if (val > out_arr[k].score) {
                     // Shift
                     for (int j = n - 1; j > k; j--) {
                         out_arr[j] = out_arr[j-1];
                     }
-                    out_arr[k].count = val;
+                    out_arr[k].count = curr->count;
+                    out_arr[k].score = val;
                     strcpy(out_arr[k].word, key);
                     break;
                 }
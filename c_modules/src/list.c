@@ -16,6 +16,11 @@ int STOP_WORDS_EN_COUNT = 0;
 
 static pthread_mutex_t sensitive_mutex = PTHREAD_MUTEX_INITIALIZER;
 static pthread_mutex_t stop_mutex = PTHREAD_MUTEX_INITIALIZER;
+// 各词表占用的字节数（指针数组 + 字符串），记入全局词典内存统计
+static size_t g_list_bytes[4];
+// 中英文敏感词表编译成的自动机（sensitive_mutex 保护），随词表重新加载而重建；
+// 被替换时仍有分析在使用的，由最后一个使用者释放
+static AhoAutomaton* g_sensitive_ac = NULL;
 
 static void free_str_array(char** arr, int count) {
     if (!arr) return;
@@ -23,7 +28,7 @@ static void free_str_array(char** arr, int count) {
     free(arr);
 }
 
-static int load_word_file(const char* path, char*** out_arr) {
+static int load_word_file(const char* path, char*** out_arr, size_t* out_bytes) {
     FILE* fp = fopen(path, "r");
     if (!fp) {
         // printf("Skipping missing file: %s\n", path);
@@ -44,55 +49,95 @@ static int load_word_file(const char* path, char*** out_arr) {
         if (*p == 0) continue;
         
         if (cnt >= cap) {
-            cap *= 2;
-            char** temp = (char**)realloc(arr, sizeof(char*) * cap);
+            int new_cap = cap * 2;
+            char** temp = (char**)realloc(arr, sizeof(char*) * new_cap);
             if (!temp) break; // 内存不足
             arr = temp;
+            cap = new_cap;
         }
-        arr[cnt++] = strdup(p);
+        arr[cnt] = strdup(p);
+        if (arr[cnt]) *out_bytes += len + 1;
+        cnt++;
     }
     fclose(fp);
+    *out_bytes += sizeof(char*) * cap;
     *out_arr = arr;
     return cnt;
 }
 
+// 替换全局词表（调用方持有对应的锁），更新内存统计
+static void replace_word_list(char*** list, int* list_count, size_t* list_bytes, char** arr, int cnt, size_t bytes) {
+    if (*list) free_str_array(*list, *list_count);
+    mem_charge(mem_dict_account(), (ptrdiff_t)bytes - (ptrdiff_t)*list_bytes);
+    *list = arr;
+    *list_count = cnt;
+    *list_bytes = bytes;
+}
+
+// 调用方持有 sensitive_mutex
+static void rebuild_sensitive_automaton(void) {
+    char** lists[2] = { SENSITIVE_WORDS_CN, SENSITIVE_WORDS_EN };
+    int counts[2] = { SENSITIVE_WORDS_CN_COUNT, SENSITIVE_WORDS_EN_COUNT };
+    AhoAutomaton* old = g_sensitive_ac;
+    g_sensitive_ac = aho_build(lists, counts, 2);
+    if (old && old->refs == 0) aho_free(old);
+}
+
+AhoAutomaton* sensitive_automaton_acquire(void) {
+    pthread_mutex_lock(&sensitive_mutex);
+    AhoAutomaton* ac = g_sensitive_ac;
+    if (ac) ac->refs++;
+    pthread_mutex_unlock(&sensitive_mutex);
+    return ac;
+}
+
+void sensitive_automaton_put(AhoAutomaton* ac) {
+    if (!ac) return;
+    pthread_mutex_lock(&sensitive_mutex);
+    int last = (--ac->refs == 0) && ac != g_sensitive_ac;
+    pthread_mutex_unlock(&sensitive_mutex);
+    if (last) aho_free(ac);
+}
+
 EXPORT int load_all_sensitive_and_stop_words() {
     int total = 0;
     char** arr = NULL;
     int cnt;
+    size_t bytes;
 
     // 假设运行目录在 build/bin 或类似位置，词典在 ../text_analyzer/dict/
     // 请根据实际部署调整路径
     
 
-    cnt = load_word_file("./dict/Chinese/sensitive_words_cn.txt", &arr);
+    bytes = 0;
+    cnt = load_word_file("./dict/Chinese/sensitive_words_cn.txt", &arr, &bytes);
     pthread_mutex_lock(&sensitive_mutex);
-    if(SENSITIVE_WORDS_CN) free_str_array(SENSITIVE_WORDS_CN, SENSITIVE_WORDS_CN_COUNT);
-    SENSITIVE_WORDS_CN = arr; SENSITIVE_WORDS_CN_COUNT = cnt;
+    replace_word_list(&SENSITIVE_WORDS_CN, &SENSITIVE_WORDS_CN_COUNT, &g_list_bytes[0], arr, cnt, bytes);
     pthread_mutex_unlock(&sensitive_mutex);
     total += cnt;
 
     arr = NULL;
-    cnt = load_word_file("./dict/English/sensitive_words_en.txt", &arr);
+    bytes = 0;
+    cnt = load_word_file("./dict/English/sensitive_words_en.txt", &arr, &bytes);
     pthread_mutex_lock(&sensitive_mutex);
-    if(SENSITIVE_WORDS_EN) free_str_array(SENSITIVE_WORDS_EN, SENSITIVE_WORDS_EN_COUNT);
-    SENSITIVE_WORDS_EN = arr; SENSITIVE_WORDS_EN_COUNT = cnt;
+    replace_word_list(&SENSITIVE_WORDS_EN, &SENSITIVE_WORDS_EN_COUNT, &g_list_bytes[1], arr, cnt, bytes);
+    rebuild_sensitive_automaton();
     pthread_mutex_unlock(&sensitive_mutex);
     total += cnt;
 
     arr = NULL;
-    cnt = load_word_file("./dict/Chinese/stop_words_cn.txt", &arr);
+    bytes = 0;
+    cnt = load_word_file("./dict/Chinese/stop_words_cn.txt", &arr, &bytes);
     pthread_mutex_lock(&stop_mutex);
-    if(STOP_WORDS_CN) free_str_array(STOP_WORDS_CN, STOP_WORDS_CN_COUNT);
-    STOP_WORDS_CN = arr; STOP_WORDS_CN_COUNT = cnt;
+    replace_word_list(&STOP_WORDS_CN, &STOP_WORDS_CN_COUNT, &g_list_bytes[2], arr, cnt, bytes);
     pthread_mutex_unlock(&stop_mutex);
     total += cnt;
 
     arr = NULL;
-    cnt = load_word_file("./dict/English/stop_words_en.txt", &arr);
+    bytes = 0;
+    cnt = load_word_file("./dict/English/stop_words_en.txt", &arr, &bytes);
     pthread_mutex_lock(&stop_mutex);
-    if(STOP_WORDS_EN) free_str_array(STOP_WORDS_EN, STOP_WORDS_EN_COUNT);
-    STOP_WORDS_EN = arr; STOP_WORDS_EN_COUNT = cnt;
+    replace_word_list(&STOP_WORDS_EN, &STOP_WORDS_EN_COUNT, &g_list_bytes[3], arr, cnt, bytes);
     pthread_mutex_unlock(&stop_mutex);
     total += cnt;
 
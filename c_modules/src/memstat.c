@@ -0,0 +1,102 @@
+#include "memstat.h"
+#include <stdlib.h>
+#include <string.h>
+#include <pthread.h>
+
+static MemAccount g_dict_account = {0, 0, 0, 0, 1};
+static pthread_mutex_t g_mem_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+// 上下文登记（只在创建/释放时更新，分析过程中不加锁）
+static long long g_live_contexts = 0;
+static long long g_total_contexts = 0;
+static long long g_context_peak = 0;
+static long long g_last_context_peak = 0;
+static long long g_truncated_contexts = 0;
+
+// 记账；enforce 时检查上限，超出则返回 0（不记账）
+static int charge(MemAccount* a, ptrdiff_t delta, int enforce) {
+    int ok = 1;
+    if (a->shared) pthread_mutex_lock(&g_mem_mutex);
+    if (delta >= 0) {
+        if (enforce && a->limit && a->bytes + (size_t)delta > a->limit) {
+            a->exceeded = 1;
+            ok = 0;
+        } else {
+            a->bytes += (size_t)delta;
+            if (a->bytes > a->peak) a->peak = a->bytes;
+        }
+    } else {
+        size_t d = (size_t)(-delta);
+        a->bytes = (a->bytes > d) ? a->bytes - d : 0;
+    }
+    if (a->shared) pthread_mutex_unlock(&g_mem_mutex);
+    return ok;
+}
+
+void* mem_alloc(MemAccount* a, size_t n) {
+    if (a && !charge(a, (ptrdiff_t)n, 1)) return NULL;
+    void* p = malloc(n);
+    if (!p && a) charge(a, -(ptrdiff_t)n, 0);
+    return p;
+}
+
+void* mem_calloc(MemAccount* a, size_t count, size_t size) {
+    size_t n = count * size;
+    if (a && !charge(a, (ptrdiff_t)n, 1)) return NULL;
+    void* p = calloc(count, size);
+    if (!p && a) charge(a, -(ptrdiff_t)n, 0);
+    return p;
+}
+
+void* mem_realloc(MemAccount* a, void* p, size_t old_n, size_t new_n) {
+    ptrdiff_t delta = (ptrdiff_t)new_n - (ptrdiff_t)old_n;
+    if (a && !charge(a, delta, 1)) return NULL;
+    void* q = realloc(p, new_n);
+    if (!q && a) charge(a, -delta, 0);
+    return q;
+}
+
+void mem_free(MemAccount* a, void* p, size_t n) {
+    if (!p) return;
+    free(p);
+    if (a) charge(a, -(ptrdiff_t)n, 0);
+}
+
+void mem_charge(MemAccount* a, ptrdiff_t delta) {
+    // 已经分配好的内存只记账，不受上限约束
+    if (a) charge(a, delta, 0);
+}
+
+MemAccount* mem_dict_account(void) {
+    return &g_dict_account;
+}
+
+void mem_context_opened(void) {
+    pthread_mutex_lock(&g_mem_mutex);
+    g_live_contexts++;
+    g_total_contexts++;
+    pthread_mutex_unlock(&g_mem_mutex);
+}
+
+void mem_context_closed(const MemAccount* a, int truncated) {
+    pthread_mutex_lock(&g_mem_mutex);
+    g_live_contexts--;
+    g_last_context_peak = (long long)a->peak;
+    if (g_last_context_peak > g_context_peak) g_context_peak = g_last_context_peak;
+    if (truncated) g_truncated_contexts++;
+    pthread_mutex_unlock(&g_mem_mutex);
+}
+
+void mem_get_stats(AnalyzerMemoryStats* out) {
+    if (!out) return;
+    memset(out, 0, sizeof(*out));
+    pthread_mutex_lock(&g_mem_mutex);
+    out->dict_bytes = (long long)g_dict_account.bytes;
+    out->dict_peak_bytes = (long long)g_dict_account.peak;
+    out->live_contexts = g_live_contexts;
+    out->total_contexts = g_total_contexts;
+    out->context_peak_bytes = g_context_peak;
+    out->last_context_peak_bytes = g_last_context_peak;
+    out->truncated_contexts = g_truncated_contexts;
+    pthread_mutex_unlock(&g_mem_mutex);
+}
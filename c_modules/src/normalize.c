@@ -0,0 +1,148 @@
+#include "normalize.h"
+#include <stdio.h>
+#include <pthread.h>
+#include "memstat.h"
+#include "utils.h"
+
+#define T2S_PATH "./dict/Chinese/t2s.txt"
+
+static NormTable g_norm;
+static int g_norm_ok = 0;
+static pthread_once_t g_norm_once = PTHREAD_ONCE_INIT;
+
+// 码位区间 [first, last]
+typedef struct CodeRange {
+    unsigned first;
+    unsigned last;
+} CodeRange;
+
+// NORM_INVISIBLE：删除的字符（零宽空格/连接符、方向控制符、软连字符、变体选择符、BOM、各种填充符）
+static const CodeRange INVISIBLE_DELETE[] = {
+    {0x00AD, 0x00AD}, {0x034F, 0x034F}, {0x061C, 0x061C}, {0x115F, 0x1160}, {0x17B4, 0x17B5},
+    {0x180E, 0x180E}, {0x200B, 0x200F}, {0x202A, 0x202E}, {0x2060, 0x2064}, {0x2066, 0x2069},
+    {0x3164, 0x3164}, {0xFE00, 0xFE0F}, {0xFEFF, 0xFEFF}, {0xFFA0, 0xFFA0},
+};
+// NORM_INVISIBLE：转成 ASCII 空格的特殊空白
+static const CodeRange INVISIBLE_SPACE[] = {
+    {0x00A0, 0x00A0}, {0x1680, 0x1680}, {0x2000, 0x200A}, {0x2028, 0x2029}, {0x202F, 0x202F}, {0x205F, 0x205F},
+};
+
+// 设置 cp 的替换（to < 0 表示删除）；同一码位只取第一次设置。返回 0 表示内存不足
+static int set_entry(unsigned cp, int flag, long to) {
+    NormEntry** page = &g_norm.pages[cp >> 8];
+    if (!*page) {
+        *page = (NormEntry*)mem_calloc(mem_dict_account(), 256, sizeof(NormEntry));
+        if (!*page) return 0;
+        g_norm.bytes += 256 * sizeof(NormEntry);
+    }
+    NormEntry* e = &(*page)[cp & 0xFF];
+    if (e->info) return 1;
+    int n = 0;
+    if (to >= 0 && to < 0x80) {
+        e->bytes[n++] = (unsigned char)to;
+    } else if (to >= 0x80 && to < 0x800) {
+        e->bytes[n++] = (unsigned char)(0xC0 | (to >> 6));
+        e->bytes[n++] = (unsigned char)(0x80 | (to & 0x3F));
+    } else if (to >= 0x800) {
+        e->bytes[n++] = (unsigned char)(0xE0 | (to >> 12));
+        e->bytes[n++] = (unsigned char)(0x80 | ((to >> 6) & 0x3F));
+        e->bytes[n++] = (unsigned char)(0x80 | (to & 0x3F));
+    }
+    e->info = (unsigned char)(flag << 4 | n);
+    return 1;
+}
+
+// 解码一个 3 字节的 BMP 字符（t2s.txt 中只接受这种字符），失败返回 -1
+static long decode3(const unsigned char* s) {
+    if ((s[0] & 0xF0) != 0xE0 || (s[1] & 0xC0) != 0x80 || (s[2] & 0xC0) != 0x80) return -1;
+    long cp = (long)(s[0] & 0x0F) << 12 | (long)(s[1] & 0x3F) << 6 | (s[2] & 0x3F);
+    return (cp < 0x800 || (cp >= 0xD800 && cp <= 0xDFFF)) ? -1 : cp;
+}
+
+// 每行 "繁 简"（各一个字）；格式不符的行跳过。返回载入的字对数，-1 表示内存不足
+static int load_t2s(const char* path) {
+    FILE* fp = fopen(path, "r");
+    if (!fp) {
+        printf("[Warning] Cannot open dictionary: %s (Check path relative to executable)\n", path);
+        return 0;
+    }
+    char line[64];
+    int count = 0;
+    while (fgets(line, sizeof(line), fp)) {
+        const unsigned char* s = (const unsigned char*)line;
+        long from = decode3(s);
+        if (from < 0) continue;
+        s += 3;
+        if (*s != ' ' && *s != '\t') continue;
+        while (*s == ' ' || *s == '\t') s++;
+        long to = decode3(s);
+        if (to < 0 || to == from) continue;
+        s += 3;
+        while (*s == ' ' || *s == '\t' || *s == '\r' || *s == '\n') s++;
+        if (*s) continue;
+        if (!set_entry((unsigned)from, NORM_T2S, to)) { count = -1; break; }
+        count++;
+    }
+    fclose(fp);
+    return count;
+}
+
+static int build_ranges(const CodeRange* ranges, size_t n, int flag, long to) {
+    for (size_t i = 0; i < n; i++) {
+        for (unsigned cp = ranges[i].first; cp <= ranges[i].last; cp++) {
+            if (!set_entry(cp, flag, to)) return 0;
+        }
+    }
+    return 1;
+}
+
+static int build_case(void) {
+    for (unsigned cp = 0x00C0; cp <= 0x00DE; cp++) if (cp != 0x00D7 && !set_entry(cp, NORM_CASE, cp + 0x20)) return 0;
+    for (unsigned cp = 0x0391; cp <= 0x03A9; cp++) if (cp != 0x03A2 && !set_entry(cp, NORM_CASE, cp + 0x20)) return 0;
+    for (unsigned cp = 0x0400; cp <= 0x040F; cp++) if (!set_entry(cp, NORM_CASE, cp + 0x50)) return 0;
+    for (unsigned cp = 0x0410; cp <= 0x042F; cp++) if (!set_entry(cp, NORM_CASE, cp + 0x20)) return 0;
+    return 1;
+}
+
+static void build_norm_table(void) {
+    for (int c = 0; c < 256; c++) g_norm.byte_len[c] = (unsigned char)utf8_len((unsigned char)c);
+    int ok = 1;
+    for (unsigned cp = 0xFF01; ok && cp <= 0xFF5E; cp++) ok = set_entry(cp, NORM_WIDTH, cp - 0xFEE0);
+    ok = ok && set_entry(0x3000, NORM_WIDTH, ' ');
+    ok = ok && build_ranges(INVISIBLE_DELETE, sizeof(INVISIBLE_DELETE) / sizeof(INVISIBLE_DELETE[0]), NORM_INVISIBLE, -1);
+    ok = ok && build_ranges(INVISIBLE_SPACE, sizeof(INVISIBLE_SPACE) / sizeof(INVISIBLE_SPACE[0]), NORM_INVISIBLE, ' ');
+    ok = ok && build_case();
+    if (ok) {
+        g_norm.t2s_count = load_t2s(T2S_PATH);
+        ok = g_norm.t2s_count >= 0;
+    }
+    if (!ok) {
+        for (int i = 0; i < 256; i++) {
+            if (g_norm.pages[i]) mem_free(mem_dict_account(), g_norm.pages[i], 256 * sizeof(NormEntry));
+            g_norm.pages[i] = NULL;
+        }
+        g_norm.bytes = 0;
+        return;
+    }
+    g_norm_ok = 1;
+}
+
+const NormTable* norm_table(void) {
+    pthread_once(&g_norm_once, build_norm_table);
+    return g_norm_ok ? &g_norm : NULL;
+}
+
+void norm_la_fill(NormLookahead* la, int i) {
+    while (la->len <= i && la->len < NORM_LOOKAHEAD && la->src < la->end) {
+        const unsigned char* out;
+        int src_len;
+        int n = norm_char(la->nt, la->flags, la->src, la->end, &out, &src_len);
+        la->src += src_len;
+        int src_end = (int)(la->src - la->start);
+        for (int k = 0; k < n; k++) {
+            la->buf[la->len] = out[k];
+            la->src_end[la->len++] = src_end;
+        }
+    }
+    la->buf[la->len] = 0;
+}
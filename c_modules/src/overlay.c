@@ -0,0 +1,105 @@
+#include "overlay.h"
+#include <stdlib.h>
+#include <string.h>
+#include <stdio.h>
+#include <pthread.h>
+#include "memstat.h"
+
+static Overlay* g_overlays = NULL;
+static int g_next_id = 1;
+static pthread_mutex_t g_overlay_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+// 一个字的词记第一个字符，更长的词记前两个字符
+static void add_to_filter(Overlay* ov, const char* line) {
+    char word[256];
+    if (sscanf(line, "%255s", word) != 1) return;
+    uint32_t h1 = 0, h2 = 0;
+    int chars = overlay_prefix_hash((const unsigned char*)word, &h1, &h2);
+    if (chars == 0) { ov->unfiltered = 1; return; }
+    const unsigned char* p = (const unsigned char*)word;
+    size_t first = (*p < 0x80) ? 1 : (*p < 0xE0) ? 2 : (*p < 0xF0) ? 3 : 4;
+    uint32_t h;
+    if (strlen(word) == first) h = h1;        // 单字词
+    else if (chars == 2) h = h2;
+    else { ov->unfiltered = 1; return; }     // 第二个字符不完整
+    ov->filter[h >> 6] |= 1ull << (h & 63);
+}
+
+int overlay_compile(const char* words, int* out_count) {
+    if (!words) return -1;
+    Overlay* ov = (Overlay*)mem_calloc(mem_dict_account(), 1, sizeof(Overlay));
+    if (!ov) return -1;
+    ov->trie = trie_create();
+    if (!ov->trie) { mem_free(mem_dict_account(), ov, sizeof(Overlay)); return -1; }
+
+    // 逐行插入（编译在锁外进行，不影响正在进行的分析）
+    char line[512];
+    const char* p = words;
+    while (*p) {
+        const char* nl = strchr(p, '\n');
+        size_t len = nl ? (size_t)(nl - p) : strlen(p);
+        size_t n = (len < sizeof(line) - 1) ? len : sizeof(line) - 1;
+        memcpy(line, p, n);
+        line[n] = '\0';
+        if (trie_insert_line(ov->trie, line)) {
+            ov->word_count++;
+            add_to_filter(ov, line);
+        }
+        p += len;
+        if (*p == '\n') p++;
+    }
+
+    pthread_mutex_lock(&g_overlay_mutex);
+    ov->id = g_next_id++;
+    ov->next = g_overlays;
+    g_overlays = ov;
+    pthread_mutex_unlock(&g_overlay_mutex);
+    if (out_count) *out_count = ov->word_count;
+    return ov->id;
+}
+
+static void overlay_destroy(Overlay* ov) {
+    trie_free(ov->trie);
+    mem_free(mem_dict_account(), ov, sizeof(Overlay));
+}
+
+int overlay_release(int id) {
+    Overlay* found = NULL;
+    int ok = -1;
+    pthread_mutex_lock(&g_overlay_mutex);
+    for (Overlay** pp = &g_overlays; *pp; pp = &(*pp)->next) {
+        if ((*pp)->id == id) {
+            found = *pp;
+            *pp = found->next;
+            found->released = 1;
+            ok = 0;
+            if (found->refs > 0) found = NULL; // 由最后一个使用者释放
+            break;
+        }
+    }
+    pthread_mutex_unlock(&g_overlay_mutex);
+    if (found) overlay_destroy(found);
+    return ok;
+}
+
+Overlay* overlay_acquire(int id) {
+    Overlay* found = NULL;
+    pthread_mutex_lock(&g_overlay_mutex);
+    for (Overlay* ov = g_overlays; ov; ov = ov->next) {
+        if (ov->id == id) {
+            ov->refs++;
+            found = ov;
+            break;
+        }
+    }
+    pthread_mutex_unlock(&g_overlay_mutex);
+    return found;
+}
+
+void overlay_put(Overlay* ov) {
+    if (!ov) return;
+    pthread_mutex_lock(&g_overlay_mutex);
+    int last = (--ov->refs == 0) && ov->released;
+    pthread_mutex_unlock(&g_overlay_mutex);
+    if (last) overlay_destroy(ov);
+}
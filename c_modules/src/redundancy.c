@@ -0,0 +1,135 @@
+#include "redundancy.h"
+#include <stdlib.h>
+#include <string.h>
+
+#define ROLL_BASE 1099511628211ULL       // 多项式滚动哈希的基数（FNV prime）
+#define SENTENCE_SEED 0x9E3779B97F4A7C15ULL // 区分句子哈希与 N-gram 哈希
+
+static uint64_t fnv1a(const char* s, int len) {
+    uint64_t h = REDUNDANT_FNV_OFFSET;
+    for (int i = 0; i < len; i++) {
+        h ^= (unsigned char)s[i];
+        h *= REDUNDANT_FNV_PRIME;
+    }
+    return h;
+}
+
+static uint64_t mix(uint64_t h) {
+    // 打散低位，避免开放寻址聚集；保证非 0（0 表示空槽）
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33;
+    return h ? h : 1;
+}
+
+static uint64_t pow_base(int n) {
+    uint64_t r = 1;
+    for (int i = 0; i < n; i++) r *= ROLL_BASE;
+    return r;
+}
+
+static int seen_grow(RedundancyTracker* rt) {
+    size_t new_cap = rt->seen_cap ? rt->seen_cap * 2 : 1024;
+    uint64_t* table = (uint64_t*)mem_calloc(rt->mem, new_cap, sizeof(uint64_t));
+    if (!table) return 0;
+    for (size_t i = 0; i < rt->seen_cap; i++) {
+        uint64_t h = rt->seen[i];
+        if (!h) continue;
+        size_t j = h & (new_cap - 1);
+        while (table[j]) j = (j + 1) & (new_cap - 1);
+        table[j] = h;
+    }
+    mem_free(rt->mem, rt->seen, rt->seen_cap * sizeof(uint64_t));
+    rt->seen = table;
+    rt->seen_cap = new_cap;
+    return 1;
+}
+
+// 查找并插入：已存在返回 1，新插入返回 0
+static int seen_check_insert(RedundancyTracker* rt, uint64_t h) {
+    h = mix(h);
+    if ((rt->seen_count + 1) * 2 > rt->seen_cap && !seen_grow(rt)) return 0;
+    size_t j = h & (rt->seen_cap - 1);
+    while (rt->seen[j]) {
+        if (rt->seen[j] == h) return 1;
+        j = (j + 1) & (rt->seen_cap - 1);
+    }
+    rt->seen[j] = h;
+    rt->seen_count++;
+    return 0;
+}
+
+static void add_span(RedundancyTracker* rt, int start, int end) {
+    // 新区间的结束位置单调不减，只需与尾部区间合并
+    while (rt->span_count > 0 && start <= rt->spans[rt->span_count - 1].end) {
+        Span* last = &rt->spans[rt->span_count - 1];
+        if (last->start < start) start = last->start;
+        if (last->end > end) end = last->end;
+        rt->redundant_bytes -= last->end - last->start;
+        rt->span_count--;
+    }
+    if (rt->span_count >= rt->span_cap) {
+        int new_cap = rt->span_cap ? rt->span_cap * 2 : 64;
+        Span* arr = (Span*)mem_realloc(rt->mem, rt->spans, sizeof(Span) * rt->span_cap, sizeof(Span) * new_cap);
+        if (!arr) return;
+        rt->spans = arr;
+        rt->span_cap = new_cap;
+    }
+    rt->spans[rt->span_count].start = start;
+    rt->spans[rt->span_count].end = end;
+    rt->span_count++;
+    rt->redundant_bytes += end - start;
+}
+
+void redundancy_init(RedundancyTracker* rt, MemAccount* mem) {
+    memset(rt, 0, sizeof(*rt));
+    rt->sent_start = -1;
+    rt->mem = mem;
+}
+
+void redundancy_free(RedundancyTracker* rt) {
+    mem_free(rt->mem, rt->seen, rt->seen_cap * sizeof(uint64_t));
+    mem_free(rt->mem, rt->spans, sizeof(Span) * rt->span_cap);
+    memset(rt, 0, sizeof(*rt));
+}
+
+void redundancy_token(RedundancyTracker* rt, const char* tok, int len, int start, int end) {
+    redundancy_token_hash(rt, fnv1a(tok, len), start, end);
+}
+
+void redundancy_token_hash(RedundancyTracker* rt, uint64_t th, int start, int end) {
+    // 1. 句子哈希：按顺序累积
+    if (rt->sent_tokens == 0) rt->sent_start = start;
+    rt->sent_hash = rt->sent_hash * ROLL_BASE + th;
+    rt->sent_tokens++;
+
+    // 2. N-gram 滚动哈希：H = H * B + new - old * B^N
+    static uint64_t base_pow_n = 0;
+    if (!base_pow_n) base_pow_n = pow_base(REDUNDANT_NGRAM);
+    if (rt->ring_count == REDUNDANT_NGRAM) {
+        uint64_t old = rt->ring_hash[rt->ring_pos];
+        rt->window_hash = rt->window_hash * ROLL_BASE + th - old * base_pow_n;
+    } else {
+        rt->window_hash = rt->window_hash * ROLL_BASE + th;
+        rt->ring_count++;
+    }
+    rt->ring_hash[rt->ring_pos] = th;
+    rt->ring_start[rt->ring_pos] = start;
+    rt->ring_pos = (rt->ring_pos + 1) % REDUNDANT_NGRAM;
+
+    if (rt->ring_count == REDUNDANT_NGRAM && seen_check_insert(rt, rt->window_hash)) {
+        // ring_pos 此时指向窗口中最早的词
+        add_span(rt, rt->ring_start[rt->ring_pos], end);
+    }
+}
+
+void redundancy_sentence_end(RedundancyTracker* rt, int end) {
+    if (rt->sent_tokens >= REDUNDANT_MIN_TOKENS && end - rt->sent_start >= REDUNDANT_MIN_BYTES) {
+        if (seen_check_insert(rt, rt->sent_hash ^ SENTENCE_SEED)) {
+            add_span(rt, rt->sent_start, end);
+        }
+    }
+    rt->sent_hash = 0;
+    rt->sent_tokens = 0;
+    rt->sent_start = -1;
+}
@@ -2,107 +2,227 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
+#include <math.h>
+#include "memstat.h"
 
 struct TrieNode {
-    unsigned char key;      // 当前节点的字节值
-    int freq;               // > 0 表示以此节点结尾是一个词，存储词频
-    struct TrieNode* child; // 第一个子节点
-    struct TrieNode* sibling;// 下一个兄弟节点
+    int freq;                  // > 0 表示以此节点结尾是一个词，存储词频
+    int child_count;
+    int child_cap;
+    float weight;              // 词尾的 IDF 权重（trie_compute_weights 计算）
+    unsigned char* keys;       // 子节点的字节值，连续存放，用 memchr 查找
+    struct TrieNode** children;// 与 keys 一一对应
 };
 
+// Trie 只用于全局分词词典，内存记入全局词典账户
 TrieNode* trie_create(void) {
-    TrieNode* node = (TrieNode*)calloc(1, sizeof(TrieNode));
+    TrieNode* node = (TrieNode*)mem_calloc(mem_dict_account(), 1, sizeof(TrieNode));
     return node;
 }
 
 static void trie_free_node(TrieNode* node) {
     if (!node) return;
-    trie_free_node(node->child);
-    trie_free_node(node->sibling);
-    free(node);
+    MemAccount* mem = mem_dict_account();
+    for (int i = 0; i < node->child_count; i++) trie_free_node(node->children[i]);
+    mem_free(mem, node->keys, (size_t)node->child_cap);
+    mem_free(mem, node->children, sizeof(TrieNode*) * node->child_cap);
+    mem_free(mem, node, sizeof(TrieNode));
 }
 
 void trie_free(TrieNode* root) {
     trie_free_node(root);
 }
 
+static inline TrieNode* trie_child(const TrieNode* node, unsigned char key) {
+    if (!node->child_count) return NULL;
+    const unsigned char* k = (const unsigned char*)memchr(node->keys, key, node->child_count);
+    return k ? node->children[k - node->keys] : NULL;
+}
+
+static TrieNode* trie_add_child(TrieNode* node, unsigned char key) {
+    if (node->child_count == node->child_cap) {
+        MemAccount* mem = mem_dict_account();
+        int new_cap = node->child_cap ? node->child_cap * 2 : 2;
+        unsigned char* keys = (unsigned char*)mem_realloc(mem, node->keys, (size_t)node->child_cap, (size_t)new_cap);
+        if (!keys) return NULL;
+        node->keys = keys;
+        TrieNode** children = (TrieNode**)mem_realloc(mem, node->children,
+            sizeof(TrieNode*) * node->child_cap, sizeof(TrieNode*) * new_cap);
+        if (!children) {
+            // keys 已扩容但 child_cap 不变：记账退回到 child_cap，与释放时一致
+            mem_charge(mem, -(ptrdiff_t)(new_cap - node->child_cap));
+            return NULL;
+        }
+        node->children = children;
+        node->child_cap = new_cap;
+    }
+    TrieNode* child = trie_create();
+    if (!child) return NULL;
+    node->keys[node->child_count] = key;
+    node->children[node->child_count] = child;
+    node->child_count++;
+    return child;
+}
+
 void trie_insert(TrieNode* root, const char* word, int freq) {
     if (!root || !word) return;
-    
+
     TrieNode* current = root;
     const unsigned char* p = (const unsigned char*)word;
-    
+
     while (*p) {
-        unsigned char key = *p;
-        TrieNode* found = NULL;
-        
-        // 在子节点链表中查找当前字节
-        TrieNode* child = current->child;
-        while (child) {
-            if (child->key == key) {
-                found = child;
-                break;
-            }
-            child = child->sibling;
-        }
-        
+        TrieNode* found = trie_child(current, *p);
         if (!found) {
-            // 没找到，创建新节点并插入头部（头插法效率高）
-            TrieNode* new_node = (TrieNode*)calloc(1, sizeof(TrieNode));
-            new_node->key = key;
-            new_node->sibling = current->child;
-            current->child = new_node;
-            current = new_node;
-        } else {
-            current = found;
+            found = trie_add_child(current, *p);
+            if (!found) return; // 内存不足
         }
+        current = found;
         p++;
     }
     // 标记词尾
     current->freq = freq;
 }
 
+int trie_insert_line(TrieNode* root, const char* line) {
+    char word[256];
+    int freq;
+    const char* p = line;
+    while (*p == ' ' || *p == '\t') p++;
+    if (*p == 0 || *p == '\n' || *p == '\r') return 0;
+
+    // "词 频" 格式
+    if (sscanf(p, "%255s %d", word, &freq) >= 2) {
+        trie_insert(root, word, freq);
+        return 1;
+    }
+    // 仅 "词"，词频默认为 1
+    if (sscanf(p, "%255s", word) == 1) {
+        trie_insert(root, word, 1);
+        return 1;
+    }
+    return 0;
+}
+
 int trie_search_longest(TrieNode* root, const char* text, int* matched_len, int* matched_freq) {
     if (!root || !text) return 0;
-    
+
     TrieNode* current = root;
     const unsigned char* p = (const unsigned char*)text;
     int len = 0;
     int max_len = 0;
     int max_freq = 0;
-    
+
     // 遍历 Trie
     while (*p) {
-        unsigned char key = *p;
-        TrieNode* found = NULL;
-        
-        TrieNode* child = current->child;
-        while (child) {
-            if (child->key == key) {
-                found = child;
-                break;
-            }
-            child = child->sibling;
-        }
-        
+        TrieNode* found = trie_child(current, *p);
         if (!found) break; // 路径断了
-        
+
         current = found;
         len++;
         p++;
-        
+
         // 如果当前节点是词尾，记录下来（贪婪匹配：继续往下找更长的）
         if (current->freq > 0) {
             max_len = len;
             max_freq = current->freq;
         }
     }
-    
+
+    if (max_len > 0) {
+        if (matched_len) *matched_len = max_len;
+        if (matched_freq) *matched_freq = max_freq;
+        return 1;
+    }
+
+    return 0;
+}
+
+int trie_search_longest_norm(TrieNode* root, NormLookahead* la, int* matched_len, int* matched_freq) {
+    if (!root || !la) return 0;
+
+    TrieNode* current = root;
+    int len = 0;
+    int max_len = 0;
+    int max_freq = 0;
+    unsigned char c;
+
+    while ((c = norm_la_byte(la, len)) != 0) {
+        TrieNode* found = trie_child(current, c);
+        if (!found) break;
+
+        current = found;
+        len++;
+        if (current->freq > 0) {
+            max_len = len;
+            max_freq = current->freq;
+        }
+    }
+
     if (max_len > 0) {
         if (matched_len) *matched_len = max_len;
         if (matched_freq) *matched_freq = max_freq;
         return 1;
     }
-    
+
     return 0;
-}
\ No newline at end of file
+}
+
+// 收集所有词尾的词频
+typedef struct {
+    int* freqs;
+    size_t count;
+    size_t cap;
+    long long total;
+} FreqCollector;
+
+static void collect_freqs(const TrieNode* node, FreqCollector* fc) {
+    if (node->freq > 0) {
+        if (fc->count == fc->cap) {
+            size_t new_cap = fc->cap ? fc->cap * 2 : 1024;
+            int* arr = (int*)realloc(fc->freqs, sizeof(int) * new_cap);
+            if (!arr) return;
+            fc->freqs = arr;
+            fc->cap = new_cap;
+        }
+        fc->freqs[fc->count++] = node->freq;
+        fc->total += node->freq;
+    }
+    for (int i = 0; i < node->child_count; i++) collect_freqs(node->children[i], fc);
+}
+
+static void assign_weights(TrieNode* node, double total) {
+    if (node->freq > 0) node->weight = (float)log(total / node->freq);
+    for (int i = 0; i < node->child_count; i++) assign_weights(node->children[i], total);
+}
+
+static int cmp_int(const void* a, const void* b) {
+    int x = *(const int*)a, y = *(const int*)b;
+    return (x > y) - (x < y);
+}
+
+float trie_compute_weights(TrieNode* root) {
+    if (!root) return 1.0f;
+    FreqCollector fc = {NULL, 0, 0, 0};
+    collect_freqs(root, &fc);
+    if (fc.count == 0) {
+        free(fc.freqs);
+        return 1.0f;
+    }
+    double total = (double)fc.total;
+    assign_weights(root, total);
+    // 中位数与遍历顺序无关（纯 Python 实现按同样规则计算）
+    qsort(fc.freqs, fc.count, sizeof(int), cmp_int);
+    float unknown = (float)log(total / fc.freqs[fc.count / 2]);
+    free(fc.freqs);
+    return unknown;
+}
+
+float trie_weight(TrieNode* root, const char* word, float unknown) {
+    if (!root || !word) return unknown;
+    TrieNode* current = root;
+    for (const unsigned char* p = (const unsigned char*)word; *p; p++) {
+        current = trie_child(current, *p);
+        if (!current) return unknown;
+    }
+    return (current->freq > 0) ? current->weight : unknown;
+}
@@ -0,0 +1,64 @@
+# 离线批量生成提示词
+# 用法：
+#   python scripts/batch_generate.py manuscripts/ -o prompts.jsonl --workers 4
+#   cat docs.jsonl | python scripts/batch_generate.py - -o prompts.jsonl --mode llm --llm-concurrency 8
+#   python scripts/batch_generate.py manuscripts/ -o prompts.jsonl --resume   # 中断后续跑，跳过已成功的 id
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from app.core.batch import BatchRunner, Progress, iter_jobs  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量分析文本并生成提示词，结果按完成顺序写入 JSONL")
+    parser.add_argument("inputs", nargs="+", help="目录、单个文件、.jsonl 文件，或 - 表示从标准输入读取 JSONL")
+    parser.add_argument("-o", "--output", required=True, help="输出 JSONL 路径（同时作为续跑检查点）")
+    parser.add_argument("--resume", action="store_true", help="跳过输出中已成功的 id，追加写入")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="分析进程数，0 为单进程")
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.getenv("BATCH_LLM_CONCURRENCY", "8")))
+    parser.add_argument("--mode", default="algorithm", choices=["auto", "algorithm", "llm", "hybrid"])
+    parser.add_argument("--panels", type=int, default=2)
+    parser.add_argument("--style", default="清新简洁")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--no-sensitive-filter", action="store_true")
+    parser.add_argument("--strip-redundant", action="store_true")
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--with-analysis", action="store_true", help="输出中包含完整分析结果")
+    parser.add_argument(
+        "--analysis-fields", default=None, help="输出哪些分析字段（如 ui 或 total_chars,top_words:10），隐含 --with-analysis"
+    )
+    parser.add_argument("--progress-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    try:
+        runner = BatchRunner(
+            workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            options={
+                "mode": args.mode,
+                "panels": args.panels,
+                "style": args.style,
+                "language": args.language,
+                "sensitive_filter": not args.no_sensitive_filter,
+                "strip_redundant": args.strip_redundant,
+                "token_budget": args.token_budget,
+            },
+            with_analysis=args.with_analysis or args.analysis_fields is not None,
+            analysis_fields=args.analysis_fields,
+            progress=Progress(args.progress_interval),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    cwd = os.getcwd()
+    output = os.path.abspath(args.output)
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    progress = runner.run(iter_jobs(args.inputs, cwd=cwd), output, resume=args.resume)
+    sys.exit(1 if progress.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# 压测：LLM 请求打满时算法模式的延迟（准入控制 关 / 开），使用本地模拟 LLM，服务端运行在独立进程
+import asyncio
+import multiprocessing
+import time
+
+import httpx
+
+from bench_utils import make_llm_handler, percentile, start_app, start_server
+
+LLM_DELAY = 2.0  # 模拟 LLM 单次耗时
+LLM_CAPACITY = 8  # 模拟 LLM 后端的并行槽位（与慢通道并发上限一致）
+LLM_CLIENTS = 120  # 持续发送 LLM 请求的并发客户端
+FAST_RPS = 50  # 算法模式请求速率
+DURATION = 6.0
+
+
+async def llm_pressure(client: httpx.AsyncClient, url: str, stop: asyncio.Event, stats: dict, idx: int):
+    n = 0
+    while not stop.is_set():
+        n += 1
+        body = {"text": f"客户端{idx}的第{n}个请求：雨夜车站，撑伞等车。", "mode": "llm", "panels": 1}
+        t0 = time.perf_counter()
+        try:
+            r = await client.post(url, json=body)
+        except httpx.HTTPError:
+            stats.setdefault("error", []).append(time.perf_counter() - t0)
+            continue
+        stats.setdefault(r.status_code, []).append(time.perf_counter() - t0)
+        if r.status_code in (429, 503):
+            # 按 Retry-After 退避，与真实客户端一致
+            await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+
+
+async def fast_probe(client: httpx.AsyncClient, url: str, latencies: list, statuses: dict):
+    async def one(i: int):
+        t0 = time.perf_counter()
+        r = await client.post(url, json={"text": f"第{i}段：放学后的教室，夕阳洒在课桌上。", "mode": "algorithm"})
+        latencies.append(time.perf_counter() - t0)
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    tasks = []
+    for i in range(int(FAST_RPS * DURATION)):
+        tasks.append(asyncio.create_task(one(i)))
+        await asyncio.sleep(1.0 / FAST_RPS)
+    await asyncio.gather(*tasks)
+
+
+async def pressure_main(base: str, duration: float) -> dict:
+    url = f"{base}/api/generate"
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        stop = asyncio.Event()
+        stats: dict = {}
+        tasks = [asyncio.create_task(llm_pressure(client, url, stop, stats, i)) for i in range(LLM_CLIENTS)]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return stats
+
+
+def pressure_process(base: str, duration: float, out: multiprocessing.Queue):
+    """LLM 压力在独立进程中产生，避免与测量算法延迟的事件循环互相干扰"""
+    out.put(asyncio.run(pressure_main(base, duration)))
+
+
+async def probe_main(base: str):
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        latencies: list = []
+        statuses: dict = {}
+        await fast_probe(client, f"{base}/api/generate", latencies, statuses)
+        lanes = (await client.get(f"{base}/api/stats")).json()["admission"]["lanes"]
+    return latencies, statuses, lanes
+
+
+def run(base: str, with_llm: bool):
+    llm_stats: dict = {}
+    proc = None
+    out: multiprocessing.Queue = multiprocessing.Queue()
+    if with_llm:
+        proc = multiprocessing.Process(target=pressure_process, args=(base, DURATION + 1.0, out))
+        proc.start()
+        time.sleep(1.0)  # 先让 LLM 请求占满
+    latencies, statuses, lanes = asyncio.run(probe_main(base))
+    if proc is not None:
+        llm_stats = out.get()
+        proc.join()
+    return latencies, statuses, llm_stats, lanes
+
+
+def main():
+    llm = start_server(make_llm_handler(delay=LLM_DELAY, capacity=LLM_CAPACITY))
+    env = {
+        "LLM_API_BASE": f"http://127.0.0.1:{llm.server_port}/v1",
+        "LLM_TIMEOUT": "30",
+        "LLM_WARMUP": "0",
+    }
+    for label, with_llm, enabled in (
+        ("algorithm only", False, "1"),
+        ("LLM saturated, admission off", True, "0"),
+        ("LLM saturated, admission on", True, "1"),
+    ):
+        proc, base = start_app({**env, "ADMIT_ENABLED": enabled})
+        try:
+            latencies, statuses, llm_stats, lanes = run(base, with_llm)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{label:<30}: algorithm p50 {percentile(latencies, 50) * 1000:7.1f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:7.1f} ms, status {statuses}"
+        )
+        for status, values in sorted(llm_stats.items(), key=str):
+            print(
+                f"{'':<30}  llm {status}: {len(values):4d} responses, "
+                f"p50 {percentile(values, 50) * 1000:8.1f} ms, p99 {percentile(values, 99) * 1000:8.1f} ms"
+            )
+        if with_llm:
+            print(f"{'':<30}  slow lane: wait p99 {lanes['slow']['wait_p99_ms']} ms, rejected {lanes['slow']['rejected']}")
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
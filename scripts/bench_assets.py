@@ -0,0 +1,68 @@
+# 基准：冷启动页面加载（主页 + 其引用的静态资源 + 映射表 JSON）的传输字节数与耗时，以及带缓存的二次加载
+import re
+import time
+
+import httpx
+
+from bench_utils import start_app
+
+ROUNDS = 20
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+EXTRA = ("/static/mappings/mappings_main.json",)
+
+
+def page_urls(client: httpx.Client, base: str) -> list:
+    html = client.get(f"{base}/").text
+    return ["/"] + ASSET_RE.findall(html) + list(EXTRA)
+
+
+def load(client: httpx.Client, base: str, urls: list, cache: dict) -> tuple:
+    """依次请求所有资源，返回 (传输字节数, 304 个数)；cache 保存 ETag 用于条件请求"""
+    wire = not_modified = 0
+    for url in urls:
+        headers = {"If-None-Match": cache[url]} if url in cache else {}
+        if url in cache and "immutable" in cache.get(url + "#cc", ""):
+            continue  # 浏览器不会重新请求 immutable 资源
+        with client.stream("GET", f"{base}{url}", headers=headers) as resp:
+            resp.read()
+            wire += resp.num_bytes_downloaded
+        assert resp.status_code in (200, 304), (url, resp.status_code)
+        not_modified += resp.status_code == 304
+        if "etag" in resp.headers:
+            cache[url] = resp.headers["etag"]
+        cache[url + "#cc"] = resp.headers.get("cache-control", "")
+    return wire, not_modified
+
+
+def run(client: httpx.Client, base: str, label: str):
+    urls = page_urls(client, base)
+    cold_ms, warm_ms = [], []
+    for _ in range(ROUNDS):
+        cache: dict = {}
+        t0 = time.perf_counter()
+        cold_bytes, _ = load(client, base, urls, cache)
+        cold_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        warm_bytes, revalidated = load(client, base, urls, cache)
+        warm_ms.append((time.perf_counter() - t0) * 1000)
+    cold_ms.sort()
+    warm_ms.sort()
+    print(
+        f"{label:<24} {len(urls)} urls  cold {cold_bytes / 1024:8.1f} KB {cold_ms[len(cold_ms) // 2]:7.1f} ms   "
+        f"reload {warm_bytes / 1024:7.1f} KB {warm_ms[len(warm_ms) // 2]:6.1f} ms ({revalidated} x 304)"
+    )
+
+
+def main():
+    proc, base = start_app({"LLM_WARMUP": "0"})
+    try:
+        for label, encoding in (("identity", "identity"), ("gzip", "gzip"), ("br, gzip", "br, gzip")):
+            with httpx.Client(headers={"Accept-Encoding": encoding}, timeout=30) as client:
+                run(client, base, label)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# 基准：离线批量生成的吞吐随分析进程数 / LLM 并发上限的变化（合成语料 + 本地模拟 LLM）
+import io
+import os
+import tempfile
+
+from bench_redundancy import forum_thread
+from bench_utils import PROJECT_ROOT, make_llm_handler, start_server, timed
+
+from app.core.batch import BatchRunner, Progress, iter_jobs
+
+N_DOCS = 200
+N_LLM_DOCS = 48
+LLM_DELAY = 0.2
+
+
+def write_corpus(root: str, n: int):
+    for i in range(n):
+        sub = os.path.join(root, f"vol{i % 5}")
+        os.makedirs(sub, exist_ok=True)
+        with open(os.path.join(sub, f"ch{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(forum_thread(posts=40, seed=i))
+
+
+def run(corpus: str, out: str, **kwargs) -> float:
+    runner = BatchRunner(progress=Progress(interval=3600, stream=io.StringIO()), **kwargs)
+    progress, seconds = timed(runner.run, iter_jobs([corpus]), out)
+    assert progress.failed == 0, progress.failed
+    return progress.done / seconds
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus")
+        write_corpus(corpus, N_DOCS)
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(corpus) for f in fs)
+        print(f"corpus: {N_DOCS} docs, {size / 1e6:.1f} MB, cpu_count={os.cpu_count()}")
+        out = os.path.join(tmp, "out.jsonl")
+
+        for workers in (0, 1, 2, 4):
+            print(f"algorithm, workers={workers:<2}         : {run(corpus, out, workers=workers):7.1f} docs/s")
+
+        llm_corpus = os.path.join(tmp, "llm")
+        write_corpus(llm_corpus, N_LLM_DOCS)
+        llm = start_server(make_llm_handler(delay=LLM_DELAY))
+        os.environ["LLM_API_BASE"] = f"http://127.0.0.1:{llm.server_port}/v1"
+        for concurrency in (1, 4, 16):
+            rate = run(llm_corpus, out, workers=1, llm_concurrency=concurrency, options={"mode": "llm"})
+            print(f"llm, workers=1, llm_concurrency={concurrency:<2}: {rate:7.1f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# 基准：映射构建工具（旧：逐批串行 + 每批固定 sleep 3s  vs  新：自适应并发 + 重试 + 检查点续跑）
+# 模拟后端有 16 个并行槽位，占满时返回 429，并有 5% 的随机 500
+import os
+import tempfile
+
+from bench_utils import PROJECT_ROOT, make_llm_handler, start_server, timed
+
+from build_mappings import build_prompt, is_chinese, main as build_main
+
+N_WORDS = 8000
+BATCH_SIZE = 50
+LEGACY_SLEEP = 3.0  # 旧脚本每批 time.sleep(2) + time.sleep(1)
+
+
+def reply(payload: dict) -> str:
+    content = payload["messages"][-1]["content"]
+    words = content.rsplit("词汇：", 1)[-1].split("、")
+    return "\n".join(f"{w}: tag of {w}" for w in words)
+
+
+def main():
+    counter: dict = {}
+    llm = start_server(
+        make_llm_handler(delay=0.3, capacity=16, reject_when_busy=True, fail_rate=0.05, reply=reply, counter=counter)
+    )
+    assert build_prompt(["测试"]).endswith("词汇：测试")
+    with tempfile.TemporaryDirectory() as tmp:
+        words = os.path.join(tmp, "words.txt")
+        with open(os.path.join(PROJECT_ROOT, "dict", "Chinese", "IT.txt"), encoding="utf-8") as src:
+            lines = [line for line in src if line.split() and is_chinese(line.split()[0])]
+        with open(words, "w", encoding="utf-8") as f:
+            f.writelines(lines[:N_WORDS])
+        batches = (min(N_WORDS, len(lines)) + BATCH_SIZE - 1) // BATCH_SIZE
+
+        def run(name: str, *extra: str):
+            counter.clear()
+            out = os.path.join(tmp, f"{name}.json")
+            argv = ["--dict", words, "--existing", os.path.join(tmp, "none.json"), "-o", out,
+                    "--api-base", f"http://127.0.0.1:{llm.server_port}/v1", "--batch-size", str(BATCH_SIZE), *extra]
+            code, seconds = timed(build_main, argv)
+            return code, seconds, dict(counter)
+
+        code, t_seq, c = run("legacy", "--concurrency", "1", "--max-concurrency", "1", "--retries", "0")
+        print(f"sequential (no sleep) : {t_seq:6.2f}s, requests={c.get('requests', 0)}, exit={code}")
+        print(f"legacy estimate       : {t_seq + batches * LEGACY_SLEEP:6.2f}s (+{LEGACY_SLEEP}s sleep x {batches} batches)")
+
+        code, t_new, c = run("adaptive", "--concurrency", "4", "--max-concurrency", "64")
+        print(
+            f"adaptive concurrency  : {t_new:6.2f}s, requests={c.get('requests', 0)}, "
+            f"429={c.get('rejected', 0)}, exit={code}"
+        )
+        # 模拟中途崩溃：检查点只保留前一半批次（最后一行写了一半），输出文件丢失
+        ckpt = os.path.join(tmp, "adaptive.json.ckpt.jsonl")
+        with open(ckpt, encoding="utf-8") as f:
+            kept = f.readlines()[: batches // 2]
+        with open(ckpt, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+            f.write('{"mappings": {"半')
+        os.remove(os.path.join(tmp, "adaptive.json"))
+        code, t_resume, c = run("adaptive", "--concurrency", "4", "--max-concurrency", "64")
+        print(f"resume after crash    : {t_resume:6.2f}s, requests={c.get('requests', 0)}, exit={code}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# 基准：长文本抽取式压缩（token 预算）对 LLM 输入规模与生成耗时的影响，使用本地模拟 LLM
+import random
+
+from bench_redundancy import WORDS, sentence
+from bench_utils import make_llm_handler, start_server, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.condense import condense, estimate_tokens
+from app.core.generators import PromptGenerator
+
+BUDGETS = (0, 3000, 1500, 800)
+PER_CHAR = 0.0002  # 模拟 prefill：耗时与输入长度成正比
+
+
+def long_page(chars: int = 20000, seed: int = 3) -> str:
+    """模拟 fetch_url 抓到的长页面：若干章节，每节若干段"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    chapter = 0
+    while size < chars:
+        chapter += 1
+        parts.append(f"# 第{chapter}章 {rng.choice(WORDS)}\n")
+        for _ in range(rng.randint(3, 8)):
+            para = "".join(sentence(rng) for _ in range(rng.randint(2, 6))) + "\n\n"
+            parts.append(para)
+            size += len(para)
+    return "".join(parts)
+
+
+def main():
+    analyzer = TextAnalyzer()
+    text = long_page()
+    analysis = analyzer.analyze(text)
+    print(f"document: {len(text)} chars, ~{estimate_tokens(text)} tokens, {analysis['section_count']} sections")
+
+    _, t = timed(condense, text, analysis, 1500)
+    print(f"condense to 1500 tokens    : {t * 1000:8.2f} ms")
+
+    counter = {}
+    server = start_server(make_llm_handler(delay=0.1, per_char=PER_CHAR, counter=counter))
+    gen = PromptGenerator()
+    config = {"api_base": f"http://127.0.0.1:{server.server_port}/v1"}
+    baseline = None
+    for budget in BUDGETS:
+        counter.clear()
+        _, t = timed(gen.generate, text, analysis, mode="hybrid", panels=2, llm_config=config, token_budget=budget)
+        baseline = baseline or t
+        label = "no budget" if budget == 0 else f"budget={budget}"
+        print(
+            f"hybrid {label:<14}: {t * 1000:8.1f} ms ({counter['prompt_chars']} prompt chars, "
+            f"{(1 - t / baseline) * 100:4.1f}% saved)"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
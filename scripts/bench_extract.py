@@ -0,0 +1,68 @@
+# 基准：正文抽取（旧版 readability + BeautifulSoup 多次解析 vs lxml 单次解析）
+import glob
+import os
+
+from bench_utils import timed
+
+from app.core.extractor import MAX_TEXT_CHARS, extract_text
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_pages")
+ROUNDS = 9
+
+
+def extract_text_legacy(html: str) -> str:
+    """改造前 fetch_url 中的抽取逻辑（需要 beautifulsoup4）；输出同样截断到 MAX_TEXT_CHARS，两边比较等长结果"""
+    from bs4 import BeautifulSoup
+    from readability import Document
+
+    try:
+        doc = Document(html)
+        title = doc.short_title() or ""
+        soup = BeautifulSoup(doc.summary(html_partial=True), "html.parser")
+        paragraphs = [p.get_text(strip=True) for p in soup.find_all(["p", "li"]) if p.get_text(strip=True)]
+        text = title + "\n" + "\n".join(paragraphs)
+        if not text.strip():
+            raise ValueError("empty")
+        return text[:MAX_TEXT_CHARS]
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(["script", "style", "nav", "footer", "header", "form"]):
+            tag.decompose()
+        return soup.get_text(separator="\n", strip=True)[:MAX_TEXT_CHARS]
+
+
+def bench(fns, html):
+    """各实现交替运行 ROUNDS 轮，返回 [(输出, 最短耗时), ...]（交替测量避免机器负载波动偏向某一方）"""
+    results = [(None, float("inf"))] * len(fns)
+    for _ in range(ROUNDS):
+        for i, fn in enumerate(fns):
+            out, t = timed(fn, html)
+            results[i] = (out, min(results[i][1], t))
+    return results
+
+
+def main():
+    try:
+        import bs4  # noqa: F401
+
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+        print("beautifulsoup4 未安装，仅测试新实现")
+
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        fns = [extract_text, extract_text_legacy] if has_bs4 else [extract_text]
+        results = bench(fns, html)
+        new_text, t_new = results[0]
+        line = f"{os.path.basename(path):<20} {len(html) / 1024:7.1f} KB  lxml={t_new * 1000:7.1f}ms ({len(new_text)} chars)"
+        if has_bs4:
+            old_text, t_old = results[1]
+            same = "same" if old_text == new_text else "differs"
+            line += f"  legacy={t_old * 1000:7.1f}ms ({len(old_text)} chars, {same})  x{t_old / t_new:4.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
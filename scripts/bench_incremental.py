@@ -0,0 +1,68 @@
+# 基准：1MB 文档中编辑单个段落后的重新分析耗时（整篇分析 vs 按段落增量分析）
+import os
+import random
+
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.incremental import NON_MERGEABLE_FIELDS, IncrementalAnalyzer, split_paragraphs
+
+TARGET_BYTES = 1024 * 1024
+SENTENCES = [
+    "男方是巨婴，不做家务不带孩子。",
+    "但他给了40万补偿金，女方犹豫要不要离婚。",
+    "The kids walked to school in the rain. ",
+    "晚上回家发现厨房一片狼藉。",
+]
+
+
+def build_document() -> str:
+    random.seed(0)
+    parts, size, chapter = [], 0, 0
+    while size < TARGET_BYTES:
+        if random.random() < 0.05:
+            chapter += 1
+            para = f"## 第{chapter}章\n\n"
+        else:
+            para = "".join(random.choice(SENTENCES) for _ in range(8)) + "\n\n"
+        parts.append(para)
+        size += len(para.encode("utf-8"))
+    return "".join(parts)
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    analyzer = TextAnalyzer()
+    if not analyzer.is_loaded():
+        print("C 动态库未加载，请先构建 c_modules")
+        return
+    doc = build_document()
+    paragraphs = split_paragraphs(doc)
+    print(f"document: {len(doc.encode('utf-8')) / 1024:.0f} KB, {len(paragraphs)} paragraphs")
+
+    _, t_full = timed(analyzer.analyze, doc)
+    print(f"full analyze               : {t_full * 1000:8.1f} ms")
+
+    inc = IncrementalAnalyzer(analyzer)
+    (_, meta), t_first = timed(inc.update_text, None, doc)
+    sid = meta["session_id"]
+    print(f"incremental, first request : {t_first * 1000:8.1f} ms ({meta['analyzed']} analyzed)")
+
+    # 修改中间某一段，客户端只发送该段原文，其余发送哈希引用
+    idx = len(paragraphs) // 2
+    edited = list(paragraphs)
+    edited[idx] = edited[idx].replace("。", "！", 1)
+    payload = [
+        {"text": p} if i == idx else {"ref": h} for i, (p, h) in enumerate(zip(edited, meta["hashes"]))
+    ]
+    (result, meta2), t_edit = timed(inc.update, sid, payload)
+    print(f"incremental, 1-para edit   : {t_edit * 1000:8.1f} ms ({meta2['analyzed']} analyzed, {meta2['reused']} reused)")
+
+    full_after = analyzer.analyze("".join(edited))
+    # 重复检测是段落内的，跨段落重复只有整篇分析能发现，不参与一致性比较
+    comparable = lambda r: {k: v for k, v in r.items() if k not in NON_MERGEABLE_FIELDS}
+    print(f"parity with full analysis  : {comparable(full_after) == comparable(result)}")
+
+
+if __name__ == "__main__":
+    main()
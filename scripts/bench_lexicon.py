@@ -0,0 +1,79 @@
+# 基准：叠加 0 / 1 / 5 个自定义词表时的分析耗时，校验与纯 Python 实现一致，并确认删除词表后全局词典的结果不变。
+# typical：词表中 5% 的词取自语料，其余是语料中没有的随机词（常见的领域词表）；
+# dense：全部取自语料的中文片段（语料是重复的小段文本，几乎每个位置都要查词表，最坏情况）
+import os
+import random
+import re
+
+from bench_scan import ROUNDS, corpora, head
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer, compile_overlay
+
+PARITY_BYTES = 200_000
+LEXICON_WORDS = 2_000
+TYPICAL_HIT_RATIO = 0.05
+_CJK_RUN_RE = re.compile("[一-鿿]{2,}")
+
+
+def make_lexicon(rng: random.Random, text: str, hit_ratio: float) -> str:
+    runs = _CJK_RUN_RE.findall(text[:200_000])
+    words = set()
+    while len(words) < LEXICON_WORDS:
+        if rng.random() < hit_ratio:
+            run = rng.choice(runs)
+            k = rng.randint(2, min(6, len(run)))
+            i = rng.randint(0, len(run) - k)
+            words.add(run[i : i + k])
+        else:
+            words.add("".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 6))))
+    return "".join(f"{w} {rng.randint(1, 1000)}\n" for w in sorted(words))
+
+
+def best(c: TextAnalyzer, data: bytes, names) -> float:
+    return min(timed(c.analyze_bytes, data, 10, "freq", names)[1] for _ in range(ROUNDS))
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    if not c.lib:
+        print("C library not loaded, benchmark skipped")
+        return
+    py = PyAnalyzer()
+    c.analyze("预热")
+    samples = [(name, text) for name, text in corpora() if name in ("chinese", "mixed")]
+
+    rng = random.Random(46)
+    for kind, ratio in (("typical", TYPICAL_HIT_RATIO), ("dense", 1.0)):
+        texts = {f"{kind}{i}": make_lexicon(rng, samples[0][1], ratio) for i in range(5)}
+        for name, words in texts.items():
+            c.add_lexicon(name, words)
+        compiled = {name: compile_overlay(words)[0] for name, words in texts.items()}
+        names = list(texts)
+
+        for name, text in samples:
+            data = text.encode("utf-8")
+            sample = head(text, PARITY_BYTES)
+            base_s = best(c, data, [])
+            line = f"{kind:<7} {name:<8} {len(data) / 1e6:4.1f} MB  0: {base_s * 1000:6.1f} ms"
+            for k in (1, 5):
+                sel = names[:k]
+                s = best(c, data, sel)
+                same = c.analyze(sample, 0, lexicons=sel) == py.analyze(
+                    sample, 0, overlays=[compiled[n] for n in sel]
+                )
+                line += f"  {k}: {s * 1000:6.1f} ms ({(s / base_s - 1) * 100:+6.1f}%) parity={same}"
+            print(line)
+
+    before = c.analyze(samples[0][1][:50_000], 0)
+    for name in list(c.lexicons()):
+        c.remove_lexicon(name)
+    after = c.analyze(samples[0][1][:50_000], 0)
+    mem = c.memory_stats()
+    print(f"base unchanged={before == after}  lexicons={c.lexicons()}  dict_bytes={mem['dict_bytes'] / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# 基准：多后端路由 + 对冲 + 熔断 对尾延迟的影响（本地模拟后端注入长尾与故障）
+import random
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import make_llm_handler, start_server, summarize, timed
+
+from app.core.generators import PromptGenerator
+from app.core.llm_router import Backend, CircuitBreaker, LLMRouter
+
+N_REQUESTS = 300
+CONCURRENCY = 8
+TEXT = "支持离婚！男方是巨婴，不做家务不带孩子。但他给了40万补偿金..."
+
+
+def dead_port() -> int:
+    """取一个当前无人监听的端口，模拟宕机后端"""
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def make_router(ports, hedge=True):
+    backends = [
+        Backend(f"http://127.0.0.1:{p}/v1", "ollama", "llama3", CircuitBreaker(3, 5)) for p in ports
+    ]
+    return LLMRouter(backends, hedge_percentile=95, hedge_min_delay=0.05 if hedge else 1e9)
+
+
+def run(gen: PromptGenerator, label: str):
+    def one(_):
+        _, t = timed(gen.generate, TEXT, {}, mode="llm", panels=1)
+        return t
+
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        latencies = list(pool.map(one, range(N_REQUESTS)))
+    summarize(label, latencies)
+
+
+def main():
+    random.seed(1)
+    # 两个正常但有 5% 长尾（+1.5s）的后端，一个 2% 失败率的后端，一个宕机后端
+    spiky = [start_server(make_llm_handler(delay=0.05, slow_rate=0.05, slow_delay=1.5)) for _ in range(2)]
+    flaky = start_server(make_llm_handler(delay=0.05, fail_rate=0.02))
+    ports = [s.server_port for s in spiky] + [flaky.server_port, dead_port()]
+
+    gen = PromptGenerator()
+    gen.default_config["timeout"] = 5
+
+    gen.router = make_router(ports[:1], hedge=False)
+    run(gen, "single backend")
+    gen.router = make_router(ports, hedge=False)
+    run(gen, "pool, no hedging")
+    gen.router = make_router(ports, hedge=True)
+    run(gen, "pool + hedging + breaker")
+    print(f"hedged requests: {gen.router.hedged}")
+    for b in gen.router.snapshot():
+        print("  ", b)
+
+    # 全部后端宕机：熔断打开后应立即降级到算法模式
+    gen.router = make_router([dead_port(), dead_port()])
+    for _ in range(6):
+        gen.generate(TEXT, {}, mode="llm", panels=1)
+    out, t = timed(gen.generate, TEXT, {}, mode="llm", panels=1)
+    print(f"all backends down -> fallback in {t * 1000:.1f} ms: {out['prompt'].splitlines()[0][:60]}")
+
+
+if __name__ == "__main__":
+    main()
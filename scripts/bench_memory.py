@@ -0,0 +1,111 @@
+# 压力测试：构造性的恶意输入（海量不同词、超长词、海量标题、随机汉字、随机字节）下 C 分析器的内存峰值、
+# 耗时与预算截断；并校验不同词数上限截断与纯 Python 实现一致、请求结束后没有遗留上下文
+import os
+import random
+
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS, TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+TARGET_BYTES = 12_000_000
+TIGHT_BYTES = 32 * 1024 * 1024
+TIGHT_UNIQUE = 50_000
+PARITY_UNIQUE = 300
+
+
+def base26(i: int) -> str:
+    s = []
+    while True:
+        i, r = divmod(i, 26)
+        s.append(chr(97 + r))
+        if not i:
+            return "".join(s)
+
+
+def unique_words(size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        w = base26(i) + " "
+        parts.append(w)
+        total += len(w)
+        i += 1
+    return "".join(parts)
+
+
+def long_words(size: int) -> str:
+    # 每个词都超过 MAX_WORD_LEN，截断后仍互不相同
+    n = size // 81
+    return "".join(f"{base26(i):z<12}{'q' * 68} " for i in range(n))
+
+
+def many_headers(size: int) -> str:
+    n = size // 16
+    return "".join(f"{'#' * (1 + i % 6)} h{base26(i)}\n" for i in range(n))
+
+
+def random_cjk(rng: random.Random, size: int) -> str:
+    n = size // 3
+    return "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(n))
+
+
+def random_bytes(rng: random.Random, size: int) -> bytes:
+    return bytes(rng.randint(1, 255) for _ in range(size))
+
+
+def inputs():
+    rng = random.Random(44)
+    yield "unique_words", unique_words(TARGET_BYTES).encode("utf-8")
+    yield "long_words", long_words(TARGET_BYTES).encode("utf-8")
+    yield "many_headers", many_headers(TARGET_BYTES).encode("utf-8")
+    yield "random_cjk", random_cjk(rng, TARGET_BYTES).encode("utf-8")
+    yield "random_bytes", random_bytes(rng, TARGET_BYTES // 4)
+
+
+def run(c: TextAnalyzer, name: str, data: bytes, label: str):
+    result, seconds = timed(c.analyze_bytes, data)
+    mem = c.memory_stats()
+    reason = result.get("truncated_reason") or "-"
+    print(
+        f"{name:<13} {label:<7} {len(data) / 1e6:5.1f} MB  {seconds * 1000:8.1f} ms  "
+        f"peak={mem['last_context_peak_bytes'] / 2**20:7.1f} MB  words={result.get('words', 0):<8} "
+        f"sections={result.get('section_count', 0):<7} truncated={reason}"
+    )
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    if not c.lib:
+        print("C library not loaded, benchmark skipped")
+        return
+    c.analyze("预热")
+    print(f"dict_bytes={c.memory_stats()['dict_bytes'] / 2**20:.1f} MB")
+
+    for name, data in inputs():
+        c.lib.Analyzer_SetLimits(0, 0)
+        run(c, name, data, "nolimit")
+        c.lib.Analyzer_SetLimits(MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS)
+        run(c, name, data, "default")
+        c.lib.Analyzer_SetLimits(TIGHT_BYTES, TIGHT_UNIQUE)
+        run(c, name, data, "tight")
+    c.lib.Analyzer_SetLimits(MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS)
+
+    # 不同词数上限：截断位置与纯 Python 实现一致
+    text = unique_words(20_000) + "# 标题\n中文内容。" + unique_words(5_000)
+    c.lib.Analyzer_SetLimits(0, PARITY_UNIQUE)
+    py = PyAnalyzer(max_unique_tokens=PARITY_UNIQUE)
+    same = all(c.analyze(text, n) == py.analyze(text, n) for n in (10, 0))
+    c.lib.Analyzer_SetLimits(MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS)
+    unique = len(c.analyze(text, 0)["top_words"])
+
+    mem = c.memory_stats()
+    print(
+        f"unique-token parity={same}  live_contexts={mem['live_contexts']}  "
+        f"truncated_contexts={mem['truncated_contexts']}/{mem['total_contexts']}  "
+        f"max_peak={mem['context_peak_bytes'] / 2**20:.1f} MB  unique_after_reset={unique}"
+    )
+
+
+if __name__ == "__main__":
+    main()
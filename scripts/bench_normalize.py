@@ -0,0 +1,149 @@
+# 基准：分词前的文本规范化（ANALYZER_NORMALIZE）。
+# 抓取样本：论坛帖子中混入视觉映射关键词与 IT 词典词，再模拟抓取/转载带来的“脏”文本——
+# 部分汉字变成繁体、词中插入零宽字符与 BOM、英文字母变成全角、空格变成不换行空格/全角空格。
+# 对比规范化关闭/开启时：词典最长匹配命中的汉字比例、关键词在 VisualMapper 中的精确命中与模糊扫描次数、
+# 吞吐（干净语料上的额外开销与脏语料），并以纯 Python 实现校验输出一致（位置均为原文字节偏移）
+import os
+import random
+
+from bench_redundancy import forum_thread
+from bench_scan import EN_WORDS, ROUNDS, corpora, head
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import NORM_ALL, T2S_DICT, PyAnalyzer
+from app.core.visual_mapper import VisualMapper
+
+DOCS = 300
+KEYWORDS = 15  # 与 PromptGenerator 取的关键词数一致
+PARITY_BYTES = 200_000
+ZERO_WIDTH = "​‌‍﻿­"
+
+
+def load_s2t() -> dict:
+    """t2s.txt 反过来用：简体 -> 繁体（多个繁体字对应同一简体时取第一个）"""
+    s2t = {}
+    with open(os.path.join(PROJECT_ROOT, "dict", *T2S_DICT.split("/")), encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                s2t.setdefault(parts[1], parts[0])
+    return s2t
+
+
+def scraped(rng: random.Random, keys, it_words) -> str:
+    """一篇干净的抓取文档：帖子正文 + 关键词 + 夹杂英文的 IT 术语"""
+    lines = forum_thread(posts=rng.randint(3, 8), seed=rng.randrange(1 << 30)).split("\n")
+    out = []
+    for line in lines:
+        extra = "".join(rng.choice(keys) + rng.choice("，、的和") for _ in range(rng.randint(0, 3)))
+        tech = rng.choice(it_words) + " " + " ".join(rng.choice(EN_WORDS) for _ in range(rng.randint(0, 4)))
+        out.append(line + extra + tech + "。")
+    return "\n".join(out)
+
+
+def damage(rng: random.Random, text: str, s2t: dict) -> str:
+    out = []
+    for ch in text:
+        if ch in s2t and rng.random() < 0.5:
+            ch = s2t[ch]
+        elif ch.isascii() and ch.isalnum() and rng.random() < 0.3:
+            ch = chr(ord(ch) + 0xFEE0)
+        elif ch == " " and rng.random() < 0.5:
+            ch = rng.choice(" 　")
+        out.append(ch)
+        if rng.random() < 0.03:
+            out.append(rng.choice(ZERO_WIDTH))
+    return "".join(out)
+
+
+def coverage(analysis: dict) -> float:
+    """落在多字词典词中的汉字比例（停用词、敏感词不计入词频，两种模式下同样不计）"""
+    covered = sum(
+        w["freq"] * len(w["word"]) for w in analysis["top_words"] if len(w["word"]) > 1 and not w["word"].isascii()
+    )
+    return covered / analysis["cn_chars"] if analysis["cn_chars"] else 0.0
+
+
+def mapper_stats(mapper: VisualMapper, analysis: dict) -> tuple:
+    """(精确命中, 走模糊扫描的关键词, 模糊命中, 映射出的标签数)"""
+    keywords = [w["word"] for w in analysis["top_words"][:KEYWORDS]]
+    exact = sum(kw in mapper.mappings for kw in keywords)
+    fuzzy = [kw for kw in keywords if kw not in mapper.mappings]
+    fuzzy_hits = sum(any(key in kw for key in mapper.mappings) for kw in fuzzy)
+    return exact, len(fuzzy), fuzzy_hits, len(mapper.map_keywords(keywords))
+
+
+def report_hits(c: TextAnalyzer, mapper: VisualMapper, docs):
+    print(f"{'':<22} {'dict coverage':>13} {'exact':>7} {'fuzzy scans':>12} {'fuzzy hits':>11} {'tags':>7}")
+    for label, flags, pick in (
+        ("clean", 0, 0),
+        ("scraped, raw", 0, 1),
+        ("scraped, normalized", NORM_ALL, 1),
+    ):
+        c.lib.Analyzer_SetNormalization(flags)
+        cov = exact = scans = fuzzy_hits = tags = 0
+        for doc in docs:
+            a = c.analyze(doc[pick], 0, rank="tfidf", lexicons=["visual"])
+            cov += coverage(a)
+            ranked = c.analyze(doc[pick], KEYWORDS, rank="tfidf", lexicons=["visual"])
+            e, s, f, t = mapper_stats(mapper, ranked)
+            exact, scans, fuzzy_hits, tags = exact + e, scans + s, fuzzy_hits + f, tags + t
+        n = len(docs)
+        print(
+            f"{label:<22} {cov / n:13.1%} {exact / n:7.2f} {scans / n:12.2f} {fuzzy_hits / n:11.2f} {tags / n:7.1f}"
+        )
+    c.lib.Analyzer_SetNormalization(0)
+
+
+def best_of(c: TextAnalyzer, data: bytes) -> tuple:
+    """(关闭, 开启) 的最短耗时；两种模式交替测量"""
+    best = [float("inf"), float("inf")]
+    for _ in range(ROUNDS):
+        for i, flags in enumerate((0, NORM_ALL)):
+            c.lib.Analyzer_SetNormalization(flags)
+            best[i] = min(best[i], timed(c.analyze_bytes, data, 10)[1])
+    c.lib.Analyzer_SetNormalization(0)
+    return tuple(best)
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    mapper = VisualMapper()
+    c.add_lexicon("visual", "\n".join(mapper.mappings))
+    with open(os.path.join(PROJECT_ROOT, "dict", "Chinese", "IT.txt"), encoding="utf-8") as f:
+        it_words = [line.split()[0] for line in f if line.strip()][:2000]
+    s2t = load_s2t()
+    rng = random.Random(50)
+    keys = [k for k in mapper.mappings if not k.isascii()]
+    docs = []
+    for _ in range(DOCS):
+        clean = scraped(rng, keys, it_words)
+        docs.append((clean, damage(rng, clean, s2t)))
+    print(f"{DOCS} scraped documents, t2s pairs {len(s2t)}")
+    report_hits(c, mapper, docs)
+
+    dirty = "\n".join(d for _, d in docs)
+    while len(dirty.encode("utf-8")) < 4_000_000:
+        dirty += "\n" + dirty
+    samples = [(name, text) for name, text in corpora() if name in ("chinese", "mixed")] + [("scraped", dirty)]
+    for name, text in samples:
+        data = text.encode("utf-8")
+        raw_s, norm_s = best_of(c, data)
+        mb = len(data) / 1e6
+        print(
+            f"{name:<8} {mb:4.1f} MB  raw {mb / raw_s:6.1f} MB/s  normalized {mb / norm_s:6.1f} MB/s"
+            f" ({(norm_s / raw_s - 1) * 100:+5.1f}%)"
+        )
+
+    py = PyAnalyzer(normalize=NORM_ALL)
+    c.lib.Analyzer_SetNormalization(NORM_ALL)
+    sample = head(dirty, PARITY_BYTES)
+    same = all(c.analyze(sample, n) == py.analyze(sample, n) for n in (10, 0))
+    c.lib.Analyzer_SetNormalization(0)
+    print(f"parity (normalized, {PARITY_BYTES} B scraped sample): {same}")
+
+
+if __name__ == "__main__":
+    main()
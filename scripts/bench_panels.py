@@ -0,0 +1,42 @@
+# 基准：多分镜生成（单次整体请求 vs 分镜串行 vs 分镜并发扇出），使用本地模拟 LLM
+import asyncio
+
+from bench_utils import atimed, make_llm_handler, start_server, timed
+
+from app.core.generators import PromptGenerator
+
+PANELS = 4
+DELAY = 0.3  # 模拟单次生成的固定耗时
+PER_CHAR = 0.0005  # 模拟与 prompt 长度成正比的 prefill 耗时
+
+TEXT = "\n".join(
+    f"# 第{i + 1}幕\n" + "男方是巨婴，不做家务不带孩子。但他给了40万补偿金。" * 20 for i in range(PANELS)
+)
+ANALYSIS = {
+    "sections": [{"length": 0}] + [{"length": 500} for _ in range(PANELS)],
+    "top_words": [{"word": w, "freq": 1} for w in ["巨婴", "家务", "孩子", "补偿金"]],
+}
+
+
+def main():
+    counter = {}
+    server = start_server(make_llm_handler(delay=DELAY, per_char=PER_CHAR, counter=counter))
+    gen = PromptGenerator()
+    config = {"api_base": f"http://127.0.0.1:{server.server_port}/v1"}
+
+    _, t_mono = timed(gen.generate, TEXT, ANALYSIS, mode="llm", panels=PANELS, llm_config=config)
+    print(f"monolithic request        : {t_mono * 1000:8.1f} ms")
+
+    for conc in (1, PANELS):
+        gen.default_config["panel_concurrency"] = conc
+        counter.clear()
+        out, t = asyncio.run(
+            atimed(gen.agenerate(TEXT, ANALYSIS, mode="llm", panels=PANELS, llm_config=config, per_panel=True))
+        )
+        print(f"per-panel concurrency={conc:<2}: {t * 1000:8.1f} ms ({counter['requests']} upstream calls)")
+    print(out["prompt"])
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
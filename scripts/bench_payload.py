@@ -0,0 +1,147 @@
+# 基准：响应体大小与序列化 CPU。
+# 旧路径：/api/generate 经 response_model（Pydantic 校验 + jsonable_encoder）再由标准库 json 编码；
+# 新路径：直接编码（orjson，未安装时为标准库），可按字段裁剪，超过阈值时按 Accept-Encoding 压缩。
+# 大文档（重复片段多、敏感词命中多的长文）与批量输出（每条记录带分析结果）各测一遍，最后经 HTTP 测实际传输字节
+import json
+import os
+import random
+import statistics
+import time
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from bench_redundancy import forum_thread, sentence
+from bench_scan import head, mixed
+from bench_sensitive import load_words
+from bench_utils import PROJECT_ROOT, start_app, timed
+
+from app.core import payload
+from app.core.analyzer import TextAnalyzer
+from app.core.payload import compress, dumps, select_fields
+
+ROUNDS = 5
+BATCH_DOCS = 300
+HTTP_ROUNDS = 20
+
+
+def flagged(rng: random.Random, words, size: int) -> str:
+    """审核场景：敏感词密集、段落大量重复引用的长帖"""
+    parts, total = [], 0
+    while total < size:
+        s = sentence(rng) + rng.choice(words) + sentence(rng) + "\n"
+        parts.append(s)
+        total += len(s.encode("utf-8"))
+    return "".join(parts)
+
+
+def old_path(prompt: str, analysis: dict) -> bytes:
+    """等价于 FastAPI 对 response_model=GenerateResponse 的处理：模型校验 + jsonable_encoder + JSONResponse"""
+    from app.main import GenerateResponse
+
+    model = GenerateResponse(success=True, prompt=prompt, analysis=analysis)
+    return JSONResponse(content=jsonable_encoder(model)).body
+
+
+def stdlib(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def best(fn, repeat: int = 1) -> float:
+    return min(timed(lambda: [fn() for _ in range(repeat)])[1] for _ in range(ROUNDS)) / repeat
+
+
+def documents(analyzer: TextAnalyzer):
+    rng = random.Random(49)
+    words = load_words("Chinese/sensitive_words_cn.txt")
+    docs = (
+        ("forum 0.2MB", forum_thread(posts=400)),
+        ("mixed 1MB", head(mixed(rng, 1_000_000), 1_000_000)),
+        ("flagged 1MB", flagged(rng, words, 1_000_000)),
+    )
+    for name, text in docs:
+        yield name, analyzer.analyze(text, rank="tfidf")
+
+
+def report_document(name: str, analysis: dict):
+    prompt = "x" * 600
+    content = {"success": True, "prompt": prompt, "analysis": analysis}
+    ui = {"success": True, "prompt": prompt, "analysis": select_fields(analysis, "ui")}
+    body = dumps(content)
+    timings = [
+        ("response_model", best(lambda: old_path(prompt, analysis))),
+        ("stdlib json", best(lambda: stdlib(content))),
+    ]
+    if payload.orjson is not None:
+        timings.append(("orjson", best(lambda: dumps(content))))
+    timings.append(("fields=ui", best(lambda: dumps({**ui, "analysis": select_fields(analysis, "ui")}))))
+    sizes = [("full", len(body)), ("gzip", len(compress(body, "gzip"))), ("fields=ui", len(dumps(ui)))]
+    if payload.brotli is not None:
+        sizes.insert(2, ("br", len(compress(body, "br"))))
+    gzip_ms = best(lambda: compress(body, "gzip")) * 1000
+    print(f"{name:<12} " + "  ".join(f"{k} {v * 1000:7.3f} ms" for k, v in timings) + f"  gzip {gzip_ms:6.2f} ms")
+    print(f"{'':<12} " + "  ".join(f"{k} {v / 1024:8.1f} KB" for k, v in sizes))
+
+
+def report_batch(analyzer: TextAnalyzer):
+    records = []
+    for i in range(BATCH_DOCS):
+        text = forum_thread(posts=40, seed=i)
+        records.append(
+            {"id": f"doc-{i}", "success": True, "prompt": "x" * 600, "analysis": analyzer.analyze(text, rank="tfidf")}
+        )
+
+    def lines(encode, fields=None):
+        return b"".join(encode({**r, "analysis": select_fields(r["analysis"], fields)}) + b"\n" for r in records)
+
+    variants = [("stdlib json", stdlib, None)]
+    if payload.orjson is not None:
+        variants.append(("orjson", dumps, None))
+    variants.append(("fields=ui", dumps, "ui"))
+    cells = []
+    for label, encode, fields in variants:
+        t = best(lambda: lines(encode, fields))
+        cells.append(f"{label} {t * 1000:7.2f} ms {len(lines(encode, fields)) / 1024:8.1f} KB")
+    print(f"batch {BATCH_DOCS} records  " + "  ".join(cells))
+
+
+def report_http():
+    text = forum_thread(posts=400)
+    proc, base = start_app({"LLM_WARMUP": "0"})
+    try:
+        with httpx.Client(timeout=60) as client:
+            for fields in (None, "ui", "none"):
+                for accept in ("identity", "gzip, br"):
+                    body = {"text": text, "mode": "algorithm", "panels": 4}
+                    if fields:
+                        body["analysis_fields"] = fields
+                    wire, latency = 0, []
+                    for _ in range(HTTP_ROUNDS):
+                        t0 = time.perf_counter()
+                        r = client.post(f"{base}/api/generate", json=body, headers={"Accept-Encoding": accept})
+                        latency.append(time.perf_counter() - t0)
+                        assert r.json()["success"], r.text
+                        wire = r.num_bytes_downloaded
+                    encoding = r.headers.get("content-encoding", "identity")
+                    print(
+                        f"http generate fields={fields or 'all':<5} accept={accept:<9} -> {encoding:<8}"
+                        f" {wire / 1024:7.1f} KB  p50 {statistics.median(latency) * 1000:6.2f} ms"
+                    )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    analyzer = TextAnalyzer()
+    print(f"orjson={'yes' if payload.orjson else 'no'} brotli={'yes' if payload.brotli else 'no'}")
+    for name, analysis in documents(analyzer):
+        report_document(name, analysis)
+    report_batch(analyzer)
+    report_http()
+
+
+if __name__ == "__main__":
+    main()
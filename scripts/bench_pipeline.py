@@ -0,0 +1,97 @@
+# 基准：导入 URL 并生成（客户端三次往返 fetch_url -> analyze -> generate  vs  服务端流水线 /api/pipeline）
+# 使用本地页面夹具 + 模拟 LLM，服务端运行在独立进程
+import json
+import time
+
+import httpx
+
+from bench_utils import make_html_handler, make_llm_handler, percentile, start_app, start_server
+
+N_PAGES = 20
+LLM_DELAY = 0.5
+RTT = 0.08  # 估算移动网络下每次往返的额外延迟（秒）
+OPTIONS = {"mode": "llm", "panels": 2, "style": "清新简洁"}
+
+
+def client_flow(client: httpx.Client, base: str, url: str) -> dict:
+    """旧流程：浏览器拿回正文，再把正文原样上传两次"""
+    t0 = time.perf_counter()
+    up = down = 0
+
+    def post(path, **kwargs):
+        nonlocal up, down
+        resp = client.post(f"{base}{path}", **kwargs)
+        up += len(resp.request.content)
+        down += len(resp.content)
+        return resp.json()
+
+    text = post("/api/fetch_url", json={"url": url})["text"]
+    post("/api/analyze", data={"text": text})
+    t_analysis = time.perf_counter() - t0
+    result = post("/api/generate", json={"text": text, **OPTIONS})
+    assert result["success"], result
+    return {"total": time.perf_counter() - t0, "analysis": t_analysis, "up": up, "down": down, "trips": 3}
+
+
+def pipeline_flow(client: httpx.Client, base: str, url: str, include_text: bool = True) -> dict:
+    """新流程：一次请求，逐行读取进度事件"""
+    t0 = time.perf_counter()
+    first = t_analysis = None
+    down = 0
+    body = json.dumps({"url": url, "include_text": include_text, **OPTIONS}).encode("utf-8")
+    with client.stream("POST", f"{base}/api/pipeline", content=body,
+                       headers={"Content-Type": "application/json"}) as resp:
+        for line in resp.iter_lines():
+            down += len(line.encode("utf-8")) + 1
+            if first is None:
+                first = time.perf_counter() - t0
+            event = json.loads(line)
+            if event["stage"] == "analyze":
+                t_analysis = time.perf_counter() - t0
+            assert event["stage"] != "error", event
+    return {"total": time.perf_counter() - t0, "first": first, "analysis": t_analysis,
+            "up": len(body), "down": down, "trips": 1}
+
+
+def report(label: str, runs: list):
+    total = [r["total"] * 1000 for r in runs]
+    analysis = [r["analysis"] * 1000 for r in runs]
+    trips = runs[0]["trips"]
+    line = (
+        f"{label:<24} total p50 {percentile(total, 50):7.1f} ms p99 {percentile(total, 99):7.1f} ms | "
+        f"analysis p50 {percentile(analysis, 50):7.1f} ms | "
+        f"up {sum(r['up'] for r in runs) // len(runs):6d} B down {sum(r['down'] for r in runs) // len(runs):6d} B | "
+        f"+{trips}xRTT ≈ {percentile(total, 50) + trips * RTT * 1000:7.1f} ms"
+    )
+    if "first" in runs[0]:
+        line += f" | first event {percentile([r['first'] * 1000 for r in runs], 50):5.1f} ms"
+    print(line)
+
+
+def main():
+    pages = start_server(make_html_handler(delay=0.05))
+    llm = start_server(make_llm_handler(delay=LLM_DELAY))
+    env = {
+        "LLM_API_BASE": f"http://127.0.0.1:{llm.server_port}/v1",
+        "LLM_WARMUP": "0",
+        "LLM_INPUT_TOKEN_BUDGET": "0",
+    }
+    page = f"http://127.0.0.1:{pages.server_port}/page/"
+    proc, base = start_app(env)
+    try:
+        with httpx.Client(timeout=60) as client:
+            # 冷：每个 URL 第一次出现（两种流程用不同页面，互不命中缓存）
+            report("client 3 round trips", [client_flow(client, base, f"{page}{i}") for i in range(N_PAGES)])
+            report("pipeline (cold)", [pipeline_flow(client, base, f"{page}{1000 + i}") for i in range(N_PAGES)])
+            # 热：抓取缓存 + 分析缓存命中，只剩 LLM 调用
+            report("client 3 trips (warm)", [client_flow(client, base, f"{page}{i}") for i in range(N_PAGES)])
+            report("pipeline (warm)", [pipeline_flow(client, base, f"{page}{1000 + i}") for i in range(N_PAGES)])
+            report("pipeline (no text)", [pipeline_flow(client, base, f"{page}{1000 + i}", False)
+                                          for i in range(N_PAGES)])
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# 基准：按需性能剖析的开销（关闭 / 开启但未抽中 / 带令牌头强制剖析）与导出结果。
+# 关闭时调试接口应返回 404；开启后 pstats 可被 pstats.Stats 读取，折叠栈为 flamegraph.pl 格式
+import os
+import pstats
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from bench_redundancy import forum_thread
+from bench_utils import percentile, start_app
+
+TOKEN = "bench-token"
+ROUNDS = 40
+TEXT = forum_thread(posts=40)
+
+
+def latencies(client: httpx.Client, base: str, headers: dict):
+    analyze, generate = [], []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        r = client.post(f"{base}/api/analyze", data={"text": TEXT, "rank": "tfidf"}, headers=headers)
+        analyze.append(time.perf_counter() - t0)
+        assert r.status_code == 200, r.text
+        t0 = time.perf_counter()
+        # 每次改动文本，避免分析缓存与请求合并
+        body = {"text": TEXT + str(time.perf_counter()), "mode": "algorithm", "panels": 4}
+        r = client.post(f"{base}/api/generate", json=body, headers=headers)
+        generate.append(time.perf_counter() - t0)
+        assert r.json()["success"], r.text
+    return analyze, generate
+
+
+def run(label: str, env: dict, headers: dict):
+    proc, base = start_app({"LLM_WARMUP": "0", "PROFILE_TOKEN": "", **env})
+    try:
+        with httpx.Client(timeout=60) as client:
+            latencies(client, base, headers)  # 预热
+            analyze, generate = latencies(client, base, headers)
+            print(
+                f"{label:<22} analyze p50 {statistics.median(analyze) * 1000:6.2f} ms p95 {percentile(analyze, 95) * 1000:6.2f}"
+                f"   generate p50 {statistics.median(generate) * 1000:6.2f} ms p95 {percentile(generate, 95) * 1000:6.2f}"
+            )
+            if env.get("PROFILE_TOKEN"):
+                inspect(client, base)
+            else:
+                status = client.get(f"{base}/api/debug/profiles", headers={"X-Profile-Token": TOKEN}).status_code
+                print(f"{'':<22} debug endpoint when disabled: {status}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def inspect(client: httpx.Client, base: str):
+    auth = {"X-Profile-Token": TOKEN}
+    bad = client.get(f"{base}/api/debug/profiles", headers={"X-Profile-Token": "wrong"}).status_code
+    profiles = client.get(f"{base}/api/debug/profiles", headers=auth).json()["profiles"]
+    if not profiles:
+        print(f"{'':<22} no profiles recorded (wrong token: {bad})")
+        return
+    by_endpoint = {}
+    for p in profiles:
+        by_endpoint.setdefault(p["endpoint"], p)
+    print(f"{'':<22} {len(profiles)} profiles kept, wrong token: {bad}")
+    for endpoint, p in by_endpoint.items():
+        raw = client.get(f"{base}/api/debug/profiles/{p['id']}.pstats", headers=auth).content
+        with tempfile.NamedTemporaryFile(suffix=".pstats", delete=False) as f:
+            f.write(raw)
+        try:
+            n_funcs = len(pstats.Stats(f.name).stats)
+        finally:
+            os.unlink(f.name)
+        folded = client.get(f"{base}/api/debug/profiles/{p['id']}.folded", headers=auth).text.splitlines()
+        heaviest = max(folded, key=lambda line: int(line.rsplit(" ", 1)[1])) if folded else "-"
+        hot = p["hot_functions"][0]["function"] if p["hot_functions"] else "-"
+        print(f"{'':<22} {endpoint:<8} wall {p['wall_ms']:7.2f} ms  pstats funcs={n_funcs:<4} folded lines={len(folded):<4} hottest={hot}")
+        print(f"{'':<22}          native={p['native'][:1]}")
+        print(f"{'':<22}          heaviest stack: {heaviest[-120:]}")
+
+
+def main():
+    run("disabled", {}, {})
+    run("enabled, not sampled", {"PROFILE_TOKEN": TOKEN}, {})
+    run("enabled, flagged", {"PROFILE_TOKEN": TOKEN}, {"X-Profile-Token": TOKEN})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# 基准：纯 Python 分析器与 C 模块的输出一致性，以及两者的吞吐（MB/s）
+import os
+import random
+
+from bench_redundancy import forum_thread, sentence
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+THROUGHPUT_BYTES = 2_000_000
+
+
+def parity_cases():
+    rng = random.Random(40)
+    long_word = "a" * 80
+    yield "empty", ""
+    yield "plain", "离婚以后孩子跟着男方，家务补偿金的问题一直没有解决。"
+    yield "english", "Hello World! This is a TEST, isn't it? Yes... fucking shit happens.\nbitch"
+    yield "mixed", "男方bitch孩子，Python是好语言。shit离婚 fuck 你好world中文"
+    yield "headers", "前言内容\n# 第一章\n\n孩子和家务\n## Section Two\r\ntext here.\n####### 不是标题\n#不是标题\n### \n"
+    yield "long_title", "# " + "长" * 42 + "\n正文内容。"
+    # 127 字节落在多字节字符中间：按整字截断，剩余部分按正文处理
+    yield "long_mb_title", "# ab" + "长" * 50 + "\n正文内容。"
+    yield "long_emoji_title", "## x" + "😀" * 40 + "孩子\n正文内容。"
+    yield "many_sections", "".join(f"# 标题{i}\n内容{i}。\n" for i in range(130))
+    yield "long_word", f"{long_word} {long_word.upper()}。"
+    yield "symbols", "价格：￥100，折扣 50%！😀 emoji 和 «引号» ——测试？\t\x01控制\x7f字符"
+    yield "nul", "前半段文字\0后半段不会被分析"
+    yield "sentences", "".join(sentence(rng) for _ in range(300))
+    yield "forum", forum_thread(posts=60)
+    yield "many_sensitive", " ".join(["fucking", "shit", "bitch", "asshole", "bastard"] * 20) + "."
+
+
+def compare(name: str, c_result, py_result) -> bool:
+    if c_result == py_result:
+        return True
+    print(f"  MISMATCH {name}:")
+    for key in c_result.keys() | py_result.keys():
+        if c_result.get(key) != py_result.get(key):
+            print(f"    {key}: c={str(c_result.get(key))[:200]} py={str(py_result.get(key))[:200]}")
+    return False
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    py = PyAnalyzer()
+    if not c.lib:
+        print("C library not loaded, parity check skipped")
+        return
+
+    ok = total = 0
+    for name, text in parity_cases():
+        for top_n in (10, 3, 0):
+            total += 1
+            ok += compare(f"{name} top_n={top_n}", c.analyze(text, top_n), py.analyze(text, top_n))
+    print(f"parity: {ok}/{total} identical")
+
+    corpus = forum_thread(posts=60)
+    corpus = corpus * (THROUGHPUT_BYTES // len(corpus.encode("utf-8")) + 1)
+    mb = len(corpus.encode("utf-8")) / 1e6
+    py.analyze("预热")
+    for label, engine in (("c", c), ("python", py)):
+        result, seconds = timed(engine.analyze, corpus)
+        print(f"{label:<7} {mb:.1f} MB in {seconds * 1000:8.1f} ms  ->  {mb / seconds:7.2f} MB/s")
+    compare("throughput corpus", c.analyze(corpus), py.analyze(corpus))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# 基准：TF-IDF 排序相对词频排序的额外开销（整篇分析耗时；unique 为约 17 万个不同词的极端情况），校验与纯 Python 实现一致，并对比两种排序的前 10 个词
+import os
+
+from bench_memory import unique_words
+from bench_scan import ROUNDS, corpora, head
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+PARITY_BYTES = 200_000
+DEMO_TEXT = (
+    "初始化字符串数组之后重新启动。" * 6
+    + "进程调度采用页面替换策略，" * 4
+    + "超流水线结构需要读写控制电路。" * 3
+)
+
+
+def best(c: TextAnalyzer, data: bytes, rank: str) -> float:
+    return min(timed(c.analyze_bytes, data, 10, rank)[1] for _ in range(ROUNDS))
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    py = PyAnalyzer()
+    c.analyze("预热")
+    samples = list(corpora()) + [("unique", unique_words(1_000_000))]
+    for name, text in samples:
+        data = text.encode("utf-8")
+        sample = head(text, PARITY_BYTES)
+        same = all(c.analyze(sample, n, "tfidf") == py.analyze(sample, n, "tfidf") for n in (10, 0))
+        freq_s = best(c, data, "freq")
+        tfidf_s = best(c, data, "tfidf")
+        print(
+            f"{name:<8} {len(data) / 1e6:5.1f} MB  freq {freq_s * 1000:7.1f} ms  tfidf {tfidf_s * 1000:7.1f} ms  "
+            f"overhead {(tfidf_s / freq_s - 1) * 100:+5.1f}%   parity={same}"
+        )
+
+    # 常见术语（词典词频高）出现次数多，有区分度的术语出现次数少
+    for rank in ("freq", "tfidf"):
+        words = [w["word"] for w in c.analyze(DEMO_TEXT, 5, rank)["top_words"]]
+        print(f"{rank:<6} top5: {' '.join(words)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# 基准：重复检测的分析开销，以及去除冗余后 LLM 输入 token 数与生成耗时的变化
+import random
+
+from bench_utils import make_llm_handler, start_server, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.condense import estimate_tokens
+from app.core.generators import PromptGenerator
+from app.core.text_split import strip_spans
+
+REPEAT = 50
+
+WORDS = (
+    "男方 女方 孩子 家务 补偿金 父母 邻居 律师 协议 法院 房子 工作 工资 学校 老师 医院 周末 晚饭 "
+    "电话 短信 朋友 同事 公司 老家 春节 婚礼 存款 贷款 装修 保姆 争吵 道歉 沉默 眼泪 承诺 将来"
+).split()
+GLUE = ["，", "的", "了", "和", "却", "又", "都", "也"]
+SIGNATURE = "—— 发自我的手机客户端，欢迎关注我的主页，转载请注明出处。"
+
+
+def sentence(rng: random.Random) -> str:
+    return "".join(rng.choice(WORDS) + rng.choice(GLUE) for _ in range(rng.randint(6, 12))) + "。"
+
+
+def forum_thread(posts: int = 60, seed: int = 7) -> str:
+    """模拟论坛帖子：每楼是新内容，但常引用前面某楼全文，并带有固定签名"""
+    rng = random.Random(seed)
+    bodies = []
+    floors = []
+    for _ in range(posts):
+        body = "".join(sentence(rng) for _ in range(rng.randint(2, 5)))
+        quote = f"> {rng.choice(bodies)}\n" if bodies and rng.random() < 0.6 else ""
+        bodies.append(body)
+        floors.append(f"{quote}{body}\n{SIGNATURE}\n")
+    return "\n".join(floors)
+
+
+def main():
+    analyzer = TextAnalyzer()
+    text = forum_thread()
+
+    def analyze_many():
+        for _ in range(REPEAT):
+            analyzer.analyze(text)
+
+    analyze_many()  # 预热（加载词典）
+    analyzer.lib.Analyzer_SetRedundancyDetection(0)
+    _, t_off = timed(analyze_many)
+    analyzer.lib.Analyzer_SetRedundancyDetection(1)
+    _, t_on = timed(analyze_many)
+    print(f"document: {len(text)} chars")
+    print(f"analyze without detection : {t_off / REPEAT * 1000:8.2f} ms")
+    print(f"analyze with detection    : {t_on / REPEAT * 1000:8.2f} ms ({(t_on / t_off - 1) * 100:+.1f}%)")
+
+    analysis = analyzer.analyze(text)
+    stripped = strip_spans(text, analysis["redundant_spans"])
+    before, after = estimate_tokens(text), estimate_tokens(stripped)
+    print(f"redundant spans           : {len(analysis['redundant_spans'])} ({analysis['redundant_bytes']} bytes)")
+    print(f"estimated input tokens    : {before} -> {after} ({(1 - after / before) * 100:.1f}% fewer)")
+
+    # 模拟 LLM：prefill 耗时与输入长度成正比
+    counter = {}
+    server = start_server(make_llm_handler(delay=0.1, per_char=0.0005, counter=counter))
+    gen = PromptGenerator()
+    config = {"api_base": f"http://127.0.0.1:{server.server_port}/v1"}
+    for strip in (False, True):
+        counter.clear()
+        _, t = timed(gen.generate, text, analysis, mode="llm", panels=2, llm_config=config, strip_redundant=strip, token_budget=0)
+        print(f"llm strip_redundant={strip!s:<5} : {t * 1000:8.1f} ms ({counter['prompt_chars']} prompt chars)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
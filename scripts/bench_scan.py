@@ -0,0 +1,96 @@
+# 基准：C 分析器在英文 / 代码 / 中文 / 中英混合语料上的吞吐（MB/s），并以纯 Python 实现为参照校验输出一致
+import os
+import random
+
+from bench_redundancy import forum_thread
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+TARGET_BYTES = 4_000_000
+ROUNDS = 5
+PARITY_BYTES = 200_000
+
+EN_WORDS = (
+    "the of and to in is was he for it with as his on be at by had are but from or have an they which one you "
+    "were her all she there would their we him been has when who will more no if out so said what up its about "
+    "into than them can only other new some could time these two may then do first any my now such like our over "
+    "man me even most made after also did many before must through back years where much your way well down should "
+    "because each just those people Mr how too little state good very make world still own see men work long get "
+    "here between both life being under never day same another know while last might us great old year off come "
+    "since against go came right used take three divorce husband family children compensation Python JSON HTTP"
+).split()
+CODE_LINES = (
+    "def analyze(self, text: str, top_n: int = 10) -> Dict[str, Any]:",
+    "    result = self.lib.analyze_text_ex(content, buffer, size, top_n)",
+    "        if ret != 0: return {'error': 'Analysis failed'}",
+    "    for (int i = 0; i < n; ++i) { out[i] = table[(unsigned char)p[i]]; }",
+    "        // update the rolling hash: H = H * B + new - old * B^N",
+    "    x = [a * 2 + 1 for a in range(100) if a % 3 == 0]  # comprehension",
+)
+
+
+def english(rng: random.Random, size: int) -> str:
+    parts, total = [], 0
+    while total < size:
+        words = [rng.choice(EN_WORDS) for _ in range(rng.randint(6, 18))]
+        words[0] = words[0].capitalize()
+        s = " ".join(words) + rng.choice((". ", "! ", "? ", ", and ", ".\n", ".\n\n"))
+        parts.append(s)
+        total += len(s)
+    return "".join(parts)
+
+
+def code(rng: random.Random, size: int) -> str:
+    parts, total = [], 0
+    while total < size:
+        s = rng.choice(CODE_LINES) + "\n"
+        parts.append(s)
+        total += len(s)
+    return "".join(parts)
+
+
+def chinese(size: int) -> str:
+    block = forum_thread(posts=60)
+    return block * (size // len(block.encode("utf-8")) + 1)
+
+
+def mixed(rng: random.Random, size: int) -> str:
+    cn = forum_thread(posts=60).split("\n")
+    parts, total = [], 0
+    while total < size:
+        s = rng.choice(cn) + english(rng, 120) + "\n"
+        parts.append(s)
+        total += len(s.encode("utf-8"))
+    return "".join(parts)
+
+
+def corpora():
+    rng = random.Random(42)
+    yield "english", english(rng, TARGET_BYTES)
+    yield "code", code(rng, TARGET_BYTES)
+    yield "chinese", chinese(TARGET_BYTES)
+    yield "mixed", mixed(rng, TARGET_BYTES)
+
+
+def head(text: str, size: int) -> str:
+    return text.encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    py = PyAnalyzer()
+    c.analyze("预热")
+    for name, text in corpora():
+        data = text.encode("utf-8")
+        sample = head(text, PARITY_BYTES)
+        same = all(c.analyze(sample, n) == py.analyze(sample, n) for n in (10, 0))
+        best = min(timed(c.analyze_bytes, data)[1] for _ in range(ROUNDS))
+        mb = len(data) / 1e6
+        print(f"{name:<8} {mb:5.1f} MB  best {best * 1000:8.1f} ms  {mb / best:7.2f} MB/s   parity={same}")
+
+
+if __name__ == "__main__":
+    main()
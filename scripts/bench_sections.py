@@ -0,0 +1,52 @@
+# 基准：包含大量 Markdown 标题的长文档——分析耗时、章节数、结果 JSON 大小，并与纯 Python 实现对比节内统计
+import json
+import os
+import random
+
+from bench_redundancy import sentence
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+HEADERS = (100, 1000, 5000, 20000)
+PARAGRAPHS_PER_SECTION = 3
+PARITY_LIMIT = 1000
+
+
+def document(n_headers: int, seed: int = 43) -> str:
+    rng = random.Random(seed)
+    parts = ["前言：" + sentence(rng) + "\n\n"]
+    for i in range(n_headers):
+        parts.append(f"{'#' * (1 + i % 3)} 第{i}节 Section {i}\n\n")
+        for _ in range(PARAGRAPHS_PER_SECTION):
+            parts.append("".join(sentence(rng) for _ in range(3)) + " shit happens.\n\n")
+    return "".join(parts)
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    py = PyAnalyzer()
+    c.analyze("预热")
+    for n in HEADERS:
+        text = document(n)
+        data = text.encode("utf-8")
+        result, seconds = min((timed(c.analyze_bytes, data) for _ in range(3)), key=lambda r: r[1])
+        if "error" in result:
+            print(f"headers={n:<6} {len(data) / 1e6:5.1f} MB  error: {result['error']}")
+            continue
+        sections = result["sections"]
+        with_words = sum(1 for s in sections if s.get("top_words"))
+        line = (
+            f"headers={n:<6} {len(data) / 1e6:5.1f} MB  {seconds * 1000:8.1f} ms  "
+            f"sections={result['section_count']:<6} with_top_words={with_words:<6} "
+            f"json={len(json.dumps(result, ensure_ascii=False)) / 1024:7.0f} KB"
+        )
+        if n <= PARITY_LIMIT:
+            line += f"  parity={result == py.analyze(text)}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
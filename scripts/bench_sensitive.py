@@ -0,0 +1,119 @@
+# 基准：敏感词自动机（与分词同一遍扫描原文）对比逐词查表的吞吐，以及在带标注样本上的召回率。
+# 标注样本：干净的中英文文本中随机插入一个敏感词（中文词常与前后文字组成更长的词典词，
+# 英文词大小写随机、紧邻汉字或标点），记录插入位置；逐词查表只能看分词结果，自动机按位置判断
+import os
+import random
+
+from bench_redundancy import sentence
+from bench_scan import EN_WORDS, ROUNDS, corpora, head
+from bench_utils import PROJECT_ROOT, timed
+
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+SAMPLES = 2_000
+PARITY_BYTES = 200_000
+SMALL_REQUESTS = 2_000  # 典型的小请求（约 2KB）：逐词查表时每个请求都要把整张敏感词表注入上下文
+
+
+def load_words(rel: str):
+    with open(os.path.join(PROJECT_ROOT, "dict", rel), encoding="utf-8") as f:
+        return [w for w in (line.strip() for line in f) if w]
+
+
+def clean_context(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return sentence(rng)
+    return " ".join(rng.choice(EN_WORDS) for _ in range(rng.randint(6, 14))) + rng.choice(".,;! ")
+
+
+def is_letter(ch: str) -> bool:
+    return ch.isascii() and ch.isalpha()
+
+
+def labelled_samples(rng: random.Random, cn, en):
+    """(文本, 插入的敏感词字节区间)"""
+    samples = []
+    for _ in range(SAMPLES):
+        before, after = clean_context(rng), clean_context(rng)
+        cut = rng.randint(0, len(before))
+        left, right = before[:cut], before[cut:] + after
+        if rng.random() < 0.6:
+            word = rng.choice(cn)
+        else:
+            word = "".join(ch.upper() if rng.random() < 0.3 else ch for ch in rng.choice(en))
+            left += rng.choice(("", " ", "，"))
+            right = rng.choice(("", " ", "。", ", ")) + right
+        # 词首/词尾的字母与相邻字母之间必须隔开（否则本来就不是这个词），其余情况随机紧贴汉字/标点
+        if is_letter(word[0]) and is_letter(left[-1:]):
+            left += " "
+        if is_letter(word[-1]) and is_letter(right[:1]):
+            right = " " + right
+        start = len(left.encode("utf-8"))
+        samples.append((left + word + right, (start, start + len(word.encode("utf-8")))))
+    return samples
+
+
+def recall(c: TextAnalyzer, samples) -> tuple:
+    """(按分词结果检出的比例, 按位置检出的比例)"""
+    by_token = by_span = 0
+    for text, span in samples:
+        r = c.analyze(text, 10)
+        by_token += r["sensitive_count"] > 0
+        by_span += list(span) in r["sensitive_hits"]
+    return by_token / len(samples), by_span / len(samples)
+
+
+def best_of(c: TextAnalyzer, data: bytes, repeat: int) -> tuple:
+    """(逐词查表, 自动机) 每次分析的最短耗时；两种方式交替测量，避免先后顺序带来的偏差"""
+    best = [float("inf"), float("inf")]
+    for _ in range(ROUNDS):
+        for enabled in (0, 1):
+            c.lib.Analyzer_SetSensitiveScan(enabled)
+            _, t = timed(lambda: [c.analyze_bytes(data, 10) for _ in range(repeat)])
+            best[enabled] = min(best[enabled], t / repeat)
+    c.lib.Analyzer_SetSensitiveScan(1)
+    return tuple(best)
+
+
+def main():
+    os.chdir(PROJECT_ROOT)  # C 模块按相对路径加载 dict/
+    c = TextAnalyzer()
+    py = PyAnalyzer()
+    c.analyze("预热")
+    cn = load_words("Chinese/sensitive_words_cn.txt")
+    en = load_words("English/sensitive_words_en.txt")
+
+    small = b""
+    for name, text in corpora():
+        data = text.encode("utf-8")
+        if name == "mixed":
+            small = head(text, 2_000).encode("utf-8")
+        probe_s, scan_s = best_of(c, data, 1)
+        sample = head(text, PARITY_BYTES)
+        same = c.analyze(sample, 0) == py.analyze(sample, 0)
+        mb = len(data) / 1e6
+        print(
+            f"{name:<8} {mb:4.1f} MB  per-token probe {mb / probe_s:6.1f} MB/s  automaton {mb / scan_s:6.1f} MB/s"
+            f" ({(probe_s / scan_s - 1) * 100:+5.1f}%)  parity={same}"
+        )
+
+    probe_s, scan_s = best_of(c, small, SMALL_REQUESTS)
+    print(f"small requests ({len(small)} B): per-token probe {probe_s * 1e6:6.1f} us  automaton {scan_s * 1e6:6.1f} us")
+
+    rng = random.Random(48)
+    samples = labelled_samples(rng, cn, en)
+    clean = [clean_context(rng) for _ in range(SAMPLES)]
+    c.lib.Analyzer_SetSensitiveScan(0)
+    old_token, _ = recall(c, samples)
+    old_fp = sum(c.analyze(t, 10)["sensitive_count"] for t in clean)
+    c.lib.Analyzer_SetSensitiveScan(1)
+    new_token, new_span = recall(c, samples)
+    new_fp = sum(len(c.analyze(t, 10)["sensitive_hits"]) for t in clean)
+    print(f"recall on {SAMPLES} labelled samples: per-token probe {old_token:.1%}  automaton tokens {new_token:.1%}"
+          f"  automaton offsets {new_span:.1%}")
+    print(f"false positives on {SAMPLES} clean samples: per-token probe {old_fp}  automaton {new_fp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# 验证 /api/generate 请求合并：N 个并发重复请求只触发一次上游 LLM 调用
+import asyncio
+import os
+
+import httpx
+from bench_utils import PROJECT_ROOT, atimed, make_llm_handler, start_server
+
+N = 50
+DELAY = 0.5
+
+
+async def run(app, payload, counter):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        # 1. 成功路径：N 个相同请求
+        counter.clear()
+        resps, t = await atimed(
+            asyncio.gather(*(client.post("/api/generate", json=payload) for _ in range(N)))
+        )
+        bodies = [r.json() for r in resps]
+        prompts = {b.get("prompt") for b in bodies}
+        print(f"{N} duplicates -> upstream calls={counter.get('requests', 0)}, "
+              f"distinct prompts={len(prompts)}, all success={all(b['success'] for b in bodies)}, "
+              f"wall={t * 1000:.0f}ms")
+        assert counter.get("requests", 0) == 1
+
+        # 2. 错误路径：上游不可达时每个等待者都收到同一个错误
+        bad = dict(payload, llm_api_base="http://127.0.0.1:9/v1", mode="hybrid")
+        resps = await asyncio.gather(*(client.post("/api/generate", json=bad) for _ in range(N)))
+        prompts = {r.json().get("prompt") for r in resps}
+        print(f"{N} duplicates against dead upstream -> distinct results={len(prompts)}")
+        assert len(prompts) == 1
+
+        stats = (await client.get("/api/stats")).json()
+        print(f"stats: inflight={stats['generate_inflight']} coalesced={stats['generate_coalesced']}")
+
+
+def main():
+    counter = {}
+    server = start_server(make_llm_handler(delay=DELAY, counter=counter))
+    os.chdir(PROJECT_ROOT)  # app.main 以相对路径挂载 static/
+    from app.main import app
+
+    payload = {
+        "text": "支持离婚！男方是巨婴，不做家务不带孩子。",
+        "mode": "llm",
+        "panels": 1,
+        "llm_api_base": f"http://127.0.0.1:{server.server_port}/v1",
+    }
+    asyncio.run(run(app, payload, counter))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# 基准：大文件上传分析的内存峰值与延迟
+# 旧流程：/api/upload 解码后把全文以 JSON 回传，浏览器再把全文 POST 到 /api/generate
+# 新流程：/api/upload/analyze 按需转码后 mmap 交给 C 分析器，正文不出服务端
+# 每个场景启动独立的服务进程，以 /proc/<pid>/status 的 VmHWM - 启动后 VmRSS 作为内存增量峰值
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from bench_redundancy import sentence
+from bench_utils import start_app
+
+SIZES_MB = (10, 100)
+OPTIONS = {"mode": "algorithm"}
+
+
+def write_corpus(path: str, size_mb: int, encoding: str):
+    rng = random.Random(size_mb)
+    block = "".join(f"# 第{i}章\n" + "".join(sentence(rng) for _ in range(20)) + "\n" for i in range(50))
+    # 按 UTF-8 大小决定重复次数，两种编码的文件内容相同
+    repeat = size_mb * 1_000_000 // len(block.encode("utf-8")) + 1
+    data = block.encode(encoding)
+    with open(path, "wb") as f:
+        for _ in range(repeat):
+            f.write(data)
+
+
+def proc_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def old_flow(client: httpx.Client, base: str, path: str) -> dict:
+    with open(path, "rb") as f:
+        content = client.post(f"{base}/api/upload", files={"file": ("doc.txt", f)}).json()["content"]
+    result = client.post(f"{base}/api/generate", json={"text": content, **OPTIONS}).json()
+    return result["analysis"]
+
+
+def new_flow(client: httpx.Client, base: str, path: str) -> dict:
+    with open(path, "rb") as f:
+        result = client.post(
+            f"{base}/api/upload/analyze", files={"file": ("doc.txt", f)}, data={"options": json.dumps(OPTIONS)}
+        ).json()
+    assert result["success"], result.get("error")
+    return result["analysis"]
+
+
+def measure(label: str, flow, path: str):
+    proc, base = start_app({"LLM_WARMUP": "0"})
+    try:
+        baseline = proc_kb(proc.pid, "VmRSS")
+        with httpx.Client(timeout=600) as client:
+            t0 = time.perf_counter()
+            analysis = flow(client, base, path)
+            seconds = time.perf_counter() - t0
+        peak = proc_kb(proc.pid, "VmHWM")
+    finally:
+        proc.terminate()
+        proc.wait()
+    print(
+        f"{label:<38} {seconds * 1000:9.0f} ms   server peak +{(peak - baseline) / 1024:7.1f} MB   "
+        f"chars={analysis['total_chars']}"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES_MB:
+            utf8 = os.path.join(tmp, f"{size}mb.utf8.txt")
+            gbk = os.path.join(tmp, f"{size}mb.gbk.txt")
+            write_corpus(utf8, size, "utf-8")
+            write_corpus(gbk, size, "gbk")
+            print(f"--- {size} MB ---")
+            measure("old: upload -> JSON -> generate", old_flow, utf8)
+            measure("new: upload/analyze (UTF-8, mmap)", new_flow, utf8)
+            measure("new: upload/analyze (GBK, transcode)", new_flow, gbk)
+
+
+if __name__ == "__main__":
+    main()
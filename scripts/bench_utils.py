@@ -0,0 +1,297 @@
+# 基准测试公共工具：本地夹具服务器 + 计时/统计
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+# 让 scripts/ 下的脚本可以直接 import app.*
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def start_server(handler_cls) -> ThreadingHTTPServer:
+    """在随机端口后台启动 HTTP 服务器，返回 server（server.server_port 为端口）"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(env: dict):
+    """在独立进程中启动 uvicorn app.main:app（env 覆盖环境变量），返回 (进程, 基础地址)"""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "error"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(f"{base}/api/stats", timeout=1).close()
+            return proc, base
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def sample_html(idx: int, paragraphs: int = 200) -> bytes:
+    """生成一个带导航/脚本噪声的论坛风格页面"""
+    body = "".join(
+        f"<p>第{idx}页第{i}段：男方是巨婴，不做家务不带孩子。但他给了40万补偿金。</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        "<html><head><meta charset='utf-8'><title>测试页面 %d</title>"
+        "<script>var x = 1;</script></head><body><nav>首页 | 论坛</nav>"
+        "<div class='topic-content'><article>%s</article></div>"
+        "<footer>版权所有</footer></body></html>" % (idx, body)
+    ).encode("utf-8")
+
+
+def make_html_handler(delay: float = 0.05, counter: Dict[str, int] = None):
+    """静态页面夹具：/page/<n> 返回页面，支持 ETag 再验证，可注入固定延迟"""
+    counter = counter if counter is not None else {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            counter["requests"] = counter.get("requests", 0) + 1
+            time.sleep(delay)
+            try:
+                idx = int(self.path.rsplit("/", 1)[-1])
+            except ValueError:
+                idx = 0
+            etag = f'"page-{idx}"'
+            if self.headers.get("If-None-Match") == etag:
+                counter["not_modified"] = counter.get("not_modified", 0) + 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            body = sample_html(idx)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def make_llm_handler(
+    delay: float = 0.2,
+    per_char: float = 0.0,
+    counter: Dict[str, int] = None,
+    slow_rate: float = 0.0,
+    slow_delay: float = 0.0,
+    fail_rate: float = 0.0,
+    capacity: int = 0,
+    reject_when_busy: bool = False,
+    reply: Callable[[dict], str] = None,
+):
+    """
+    OpenAI 兼容的 /chat/completions 模拟服务
+    :param delay: 每次请求的固定耗时（秒）
+    :param per_char: 按 prompt 字符数计的额外耗时（模拟 prefill 成本）
+    :param slow_rate/slow_delay: 以 slow_rate 的概率额外卡顿 slow_delay 秒（长尾）
+    :param fail_rate: 以 fail_rate 的概率返回 500
+    :param capacity: 后端同时处理的请求数上限（模拟 GPU 并行槽位），0 表示不限
+    :param reject_when_busy: 槽位占满时直接返回 429（Retry-After: 1），而不是排队
+    :param reply: 根据请求体生成回复内容，默认返回固定标签
+    """
+    counter = counter if counter is not None else {}
+    slots = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+            counter["requests"] = counter.get("requests", 0) + 1
+            counter["prompt_chars"] = counter.get("prompt_chars", 0) + prompt_chars
+            extra = slow_delay if random.random() < slow_rate else 0.0
+            if slots and reject_when_busy and not slots.acquire(blocking=False):
+                counter["rejected"] = counter.get("rejected", 0) + 1
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if slots:
+                try:
+                    if not reject_when_busy:
+                        slots.acquire()
+                    time.sleep(delay + per_char * prompt_chars + extra)
+                finally:
+                    slots.release()
+            else:
+                time.sleep(delay + per_char * prompt_chars + extra)
+            if random.random() < fail_rate:
+                self.send_response(500)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content = "1girl, solo, classroom, sunlight, crying, tears, masterpiece, best quality"
+            if reply:
+                content = reply(payload)
+            body = json.dumps(
+                {"choices": [{"message": {"role": "assistant", "content": content}}]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _parse_keep_alive(value, default: float) -> float:
+    """Ollama keep_alive："30m" / "5s" / "1h" / 秒数"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def make_ollama_handler(
+    load_time: float = 1.5,
+    per_char: float = 0.0003,
+    keep_alive: float = 2.0,
+    token_delay: float = 0.01,
+    counter: Dict[str, int] = None,
+):
+    """
+    Ollama 模拟服务（/api/tags、/api/chat、/v1/chat/completions，支持 stream）：
+    - 模型空闲超过 keep_alive 秒后卸载，下次请求需要 load_time 秒重新加载
+    - 单槽 KV 缓存：与上一个 prompt 的公共前缀不计 prefill 成本
+    """
+    counter = counter if counter is not None else {}
+    state = {"loaded_until": 0.0, "last_prompt": ""}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, obj):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._json({"models": [{"name": "llama3"}]})
+
+        def _prefill(self, payload) -> None:
+            prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+            with lock:
+                now = time.monotonic()
+                cost = 0.0
+                if now >= state["loaded_until"]:
+                    cost += load_time
+                    state["last_prompt"] = ""  # 卸载后 KV 缓存失效
+                    counter["loads"] = counter.get("loads", 0) + 1
+                common = len(os.path.commonprefix([prompt, state["last_prompt"]]))
+                cost += per_char * (len(prompt) - common)
+                counter["cached_chars"] = counter.get("cached_chars", 0) + common
+                state["last_prompt"] = prompt
+                hold = _parse_keep_alive(payload.get("keep_alive"), keep_alive)
+                # 单模型串行执行：加载 + prefill 期间持锁
+                time.sleep(cost)
+                state["loaded_until"] = time.monotonic() + hold
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            counter["requests"] = counter.get("requests", 0) + 1
+            self._prefill(payload)
+            content = "1girl, solo, classroom, sunlight"
+            if self.path.startswith("/api/"):
+                self._json({"message": {"role": "assistant", "content": content}, "done": True})
+                return
+            if not payload.get("stream"):
+                time.sleep(token_delay * 4)
+                self._json({"choices": [{"message": {"role": "assistant", "content": content}}]})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for tok in content.split(" "):
+                    chunk = {"choices": [{"delta": {"content": tok + " "}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 测 TTFT 的客户端收到首个数据块即断开
+
+    return Handler
+
+
+def timed(fn: Callable, *args, **kwargs):
+    """返回 (结果, 耗时秒)"""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize(name: str, latencies: List[float]):
+    """打印延迟分布（毫秒）"""
+    ms = [x * 1000 for x in latencies]
+    print(
+        f"{name:<28} n={len(ms):<5} mean={statistics.mean(ms):8.1f}ms "
+        f"p50={percentile(ms, 50):8.1f}ms p99={percentile(ms, 99):8.1f}ms"
+    )
+
+
+async def atimed(coro):
+    """协程版 timed：返回 (结果, 耗时秒)"""
+    t0 = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - t0
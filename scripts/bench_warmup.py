@@ -0,0 +1,99 @@
+# 基准：首 token 延迟（TTFT）—— 冷启动 vs 预热 vs 空闲卸载 vs 保活，以及固定前缀对 KV 缓存命中的影响
+import time
+
+import httpx
+
+from bench_utils import make_ollama_handler, start_server
+
+from app.core.generators import LLM_SYSTEM_PROMPT, build_user_prompt
+from app.core.llm_router import Backend, CircuitBreaker
+from app.core.warmup import ModelWarmer
+
+KEEP_ALIVE = "2s"  # 缩短的 Ollama 空闲卸载时间
+IDLE = 2.5  # 用户两次请求之间的空闲时间
+
+# 改造前的提示词布局：原文在前，混合模式使用另一套 system prompt
+LEGACY_HYBRID_SYSTEM = "You are a helper optimizing AI art prompts. Keep the key entities provided."
+
+TEXTS = [
+    "放学后的教室里，她一个人坐在窗边，夕阳把桌面染成橙色，眼泪落在摊开的日记本上。" * 8,
+    "雨夜的车站，他撑着一把破旧的黑伞，望着最后一班列车的灯光消失在远处的隧道里。" * 8,
+    "清晨的菜市场人声鼎沸，老奶奶推着小车穿过人群，给孙子挑选最新鲜的草莓。" * 8,
+    "深夜的办公室只剩一盏台灯，程序员盯着满屏的报错信息，咖啡早已凉透。" * 8,
+]
+
+
+def legacy_messages(text: str, hybrid: bool):
+    if hybrid:
+        user = (
+            f'Source Text: "{text}"\nKey Entities Detected: [教室, 夕阳]\n'
+            f"Target Style: anime style\nLayout: 2koma\n\nTask: Create a high-quality, comma-separated prompt string."
+        )
+        return [{"role": "system", "content": LEGACY_HYBRID_SYSTEM}, {"role": "user", "content": user}]
+    user = (
+        f'Input Text: "{text}"\n\nRequirements:\n- Art Style: 清新简洁 (Tags: anime style)\n'
+        f"- Layout: 2 Panels Comic (Tags: 2koma)\n- Task: Extract characters, emotions, objects, and scenes.\n\nOutput Tags:"
+    )
+    return [{"role": "system", "content": LLM_SYSTEM_PROMPT}, {"role": "user", "content": user}]
+
+
+def current_messages(text: str, hybrid: bool):
+    user = build_user_prompt(
+        text, "清新简洁", "anime style", "2 Panels Comic (Tags: 2koma)", keywords=["教室", "夕阳"] if hybrid else None
+    )
+    return [{"role": "system", "content": LLM_SYSTEM_PROMPT}, {"role": "user", "content": user}]
+
+
+def ttft(base: str, messages) -> float:
+    """流式请求，返回收到第一个数据块的耗时（秒）"""
+    t0 = time.perf_counter()
+    payload = {"model": "llama3", "messages": messages, "stream": True}
+    with httpx.stream("POST", f"{base}/v1/chat/completions", json=payload, timeout=30) as response:
+        for line in response.iter_lines():
+            if line.startswith("data:"):
+                return time.perf_counter() - t0
+    raise RuntimeError("no data")
+
+
+def scenario(name: str, warm: bool, keepalive_interval: float = 0.0, idle: float = 0.0):
+    server = start_server(make_ollama_handler())
+    base = f"http://127.0.0.1:{server.server_port}"
+    backend = Backend(f"{base}/v1", "ollama", "llama3", CircuitBreaker())
+    warmer = ModelWarmer([backend], LLM_SYSTEM_PROMPT, keep_alive=KEEP_ALIVE, interval=keepalive_interval)
+    if warm:
+        warmer.warm(backend)
+        if keepalive_interval > 0:
+            warmer.start()
+    time.sleep(idle)
+    t = ttft(base, current_messages(TEXTS[0], hybrid=False))
+    warmer.stop()
+    server.shutdown()
+    print(f"{name:<36}: TTFT {t * 1000:8.1f} ms")
+
+
+def prefix_cache(name: str, build):
+    """llm / hybrid 交替、原文各不相同的 8 个请求，统计平均 TTFT 与命中缓存的前缀长度"""
+    counter = {}
+    server = start_server(make_ollama_handler(keep_alive=60, counter=counter))
+    base = f"http://127.0.0.1:{server.server_port}"
+    ttft(base, build(TEXTS[0], False))  # 加载模型
+    counter.clear()
+    times = [ttft(base, build(TEXTS[i % len(TEXTS)], i % 2 == 1)) for i in range(8)]
+    server.shutdown()
+    print(
+        f"{name:<36}: avg TTFT {sum(times) / len(times) * 1000:8.1f} ms, "
+        f"{counter['cached_chars'] // len(times)} prompt chars reused per request"
+    )
+
+
+def main():
+    scenario("cold start (no warm-up)", warm=False)
+    scenario("after startup warm-up", warm=True)
+    scenario(f"idle {IDLE}s, no keep-alive", warm=True, idle=IDLE)
+    scenario(f"idle {IDLE}s, keep-alive every 0.5s", warm=True, keepalive_interval=0.5, idle=IDLE)
+    prefix_cache("legacy prompt layout", legacy_messages)
+    prefix_cache("fixed prefix layout", current_messages)
+
+
+if __name__ == "__main__":
+    main()
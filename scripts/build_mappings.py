@@ -0,0 +1,348 @@
+# 词表 -> 英文视觉标签映射构建工具（取代 generator.py / generate_highfreq_mapping.py）
+# - 批次并发发送，按 429/503/超时自适应调整并发（AIMD）
+# - 每完成一批追加写入检查点（JSONL），中断后续跑；已在 mappings_main.json 中的词直接跳过
+# - 失败批次指数退避重试
+# - 结果定期合并写出（原子替换），不会因为中途崩溃丢失全部结果
+# 用法：
+#   python scripts/build_mappings.py                                  # 默认三个词表，全部词
+#   python scripts/build_mappings.py --highfreq                       # 只取高频词（原 generate_highfreq_mapping.py）
+#   python scripts/build_mappings.py --dict dict/Chinese/IT.txt:10000 -o static/mappings/mappings_it.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DICTS = [
+    os.path.join(PROJECT_ROOT, "dict", "Chinese", name) for name in ("dict.txt", "IT.txt", "idiom.txt")
+]
+# 视为后端过载的状态码：遇到时并发减半
+OVERLOAD_STATUS = (429, 502, 503, 504)
+# 高频词界限（词表第二列为词频）
+HIGHFREQ_LIMITS = {"dict.txt": 100, "IT.txt": 10000, "idiom.txt": 10}
+DEFAULT_EXISTING = os.path.join(PROJECT_ROOT, "static", "mappings", "mappings_main.json")
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "static", "mappings", "mappings_ollama.json")
+
+
+def is_chinese(word: str) -> bool:
+    return bool(word) and all("\u4e00" <= ch <= "\u9fff" for ch in word)
+
+
+def load_words(specs: Iterable[Tuple[str, int]]) -> List[str]:
+    """读取词表（每行“词 [词频]”），只保留全中文且词频 >= 界限的词，去重排序"""
+    words: Set[str] = set()
+    for path, min_freq in specs:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.strip().split()
+                if not parts or not is_chinese(parts[0]):
+                    continue
+                if min_freq > 0:
+                    try:
+                        if int(parts[1]) < min_freq:
+                            continue
+                    except (IndexError, ValueError):
+                        continue
+                words.add(parts[0])
+    return sorted(words)
+
+
+def load_mappings(path: str) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("mappings", {})
+
+
+def build_prompt(words: List[str]) -> str:
+    return (
+        "请将以下中文词汇翻译为适合插画/摄影/现实场景的英文视觉标签，逗号分隔，"
+        "每个词一行，格式为“原词: 英文标签”。\n"
+        "词汇：" + "、".join(words)
+    )
+
+
+def parse_response(text: str, words: List[str]) -> Dict[str, str]:
+    """解析“原词: 标签”行（兼容全角冒号、列表符号），只接受本批次请求的词"""
+    wanted = set(words)
+    mapping: Dict[str, str] = {}
+    for line in text.splitlines():
+        line = line.replace("：", ":")
+        if ":" not in line:
+            continue
+        zh, en = line.split(":", 1)
+        zh = zh.strip().lstrip("-*0123456789.、 ").strip()
+        en = en.strip()
+        if zh in wanted and en:
+            mapping[zh] = en
+    return mapping
+
+
+class Checkpoint:
+    """
+    追加写入的检查点：每完成一批写一行 {"mappings": {...}, "missing": [...]}
+    missing 是模型没有给出结果的词，续跑时同样跳过（--retry-missing 可重新请求）
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mappings: Dict[str, str] = {}
+        self.missing: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 中断时写了一半的行
+                    self.mappings.update(record.get("mappings", {}))
+                    self.missing.update(record.get("missing", []))
+            self.missing -= self.mappings.keys()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, mappings: Dict[str, str], missing: List[str]):
+        self.mappings.update(mappings)
+        self.missing.update(missing)
+        self._file.write(json.dumps({"mappings": mappings, "missing": missing}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 并发控制：每次成功 +1/当前并发（约每轮 +1），遇到限流/过载减半，
+    并在 Retry-After 期间暂停发送新请求
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.minimum = minimum
+        self.inflight = 0
+        self.paused_until = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.inflight < int(self.limit):
+                    self.inflight += 1
+                    return
+                await self._cond.wait()
+
+    async def release(self, ok: bool, retry_after: float = 0.0):
+        async with self._cond:
+            self.inflight -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + 1.0 / max(1.0, self.limit))
+            else:
+                self.limit = max(self.minimum, self.limit / 2)
+                if retry_after > 0:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MappingBuilder:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_base: str,
+        api_key: str,
+        model: str,
+        limiter: AdaptiveLimiter,
+        checkpoint: Checkpoint,
+        output_path: str,
+        retries: int = 4,
+        flush_interval: float = 10.0,
+    ):
+        self.client = client
+        self.url = f"{api_base.rstrip('/')}/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.model = model
+        self.limiter = limiter
+        self.checkpoint = checkpoint
+        self.output_path = output_path
+        self.retries = retries
+        self.flush_interval = flush_interval
+        self.base_mappings: Dict[str, str] = load_mappings(output_path)
+        self.done = self.failed = self.retried = 0
+        self._last_flush = time.monotonic()
+
+    async def _translate(self, words: List[str]) -> str:
+        payload = {"model": self.model, "messages": [{"role": "user", "content": build_prompt(words)}]}
+        resp = await self.client.post(self.url, json=payload, headers=self.headers)
+        if resp.status_code in OVERLOAD_STATUS:
+            raise Overloaded(f"HTTP {resp.status_code}", float(resp.headers.get("Retry-After", "0") or 0))
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}")
+        return resp.json()["choices"][0]["message"]["content"]
+
+    async def run_batch(self, words: List[str]) -> bool:
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire()
+            try:
+                text = await self._translate(words)
+            except (Overloaded, httpx.TransportError) as e:
+                await self.limiter.release(False, getattr(e, "retry_after", 0.0))
+                error = e
+            except Exception as e:  # 其他 HTTP 错误 / 响应格式错误：重试，但不降并发
+                await self.limiter.release(True)
+                error = e
+            else:
+                await self.limiter.release(True)
+                mapping = parse_response(text, words)
+                self.checkpoint.append(mapping, [w for w in words if w not in mapping])
+                self.done += 1
+                self.maybe_flush()
+                return True
+            if attempt < self.retries:
+                self.retried += 1
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+        print(f"[Mappings] 批次失败（{words[0]}…，{len(words)} 个词）: {error}")
+        self.failed += 1
+        return False
+
+    def maybe_flush(self, force: bool = False):
+        """把检查点中的结果合并到输出文件（写临时文件后原子替换）"""
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        merged = {**self.base_mappings, **self.checkpoint.mappings}
+        tmp = self.output_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"mappings": dict(sorted(merged.items()))}, f, ensure_ascii=False, indent=4)
+        os.replace(tmp, self.output_path)
+
+    async def run(self, batches: List[List[str]]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for b in batches:
+            queue.put_nowait(b)
+        start = time.perf_counter()
+
+        async def worker():
+            while not queue.empty():
+                await self.run_batch(queue.get_nowait())
+
+        async def report():
+            while True:
+                await asyncio.sleep(5)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"[Mappings] {self.done + self.failed}/{len(batches)} 批 "
+                    f"{self.done / elapsed:.2f} 批/s 并发上限 {int(self.limiter.limit)} 重试 {self.retried}"
+                )
+
+        reporter = asyncio.create_task(report())
+        try:
+            # 工作协程数取并发上限，实际同时在途的请求数由 limiter 控制
+            await asyncio.gather(*(worker() for _ in range(self.limiter.maximum)))
+        finally:
+            reporter.cancel()
+            self.maybe_flush(force=True)
+
+
+def parse_dict_spec(spec: str, highfreq: bool) -> Tuple[str, int]:
+    """“路径[:最低词频]”；未指定界限且 --highfreq 时使用内置界限"""
+    path, sep, limit = spec.rpartition(":")
+    if sep and limit.isdigit():
+        return path, int(limit)
+    return spec, HIGHFREQ_LIMITS.get(os.path.basename(spec), 0) if highfreq else 0
+
+
+async def build(args) -> int:
+    specs = [parse_dict_spec(s, args.highfreq) for s in (args.dict or DEFAULT_DICTS)]
+    words = load_words(specs)
+    existing: Dict[str, str] = {}
+    for path in args.existing:
+        existing.update(load_mappings(path))
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".ckpt.jsonl")
+    skip = existing.keys() | checkpoint.mappings.keys()
+    if not args.retry_missing:
+        skip |= checkpoint.missing
+    todo = [w for w in words if w not in skip]
+    batches = [todo[i : i + args.batch_size] for i in range(0, len(todo), args.batch_size)]
+    print(
+        f"[Mappings] 词表 {len(words)} 个词，已有映射 {len(words) - len(todo)} 个，"
+        f"待处理 {len(todo)} 个（{len(batches)} 批）"
+    )
+
+    limiter = AdaptiveLimiter(args.concurrency, args.max_concurrency)
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    limits = httpx.Limits(max_connections=args.max_concurrency, max_keepalive_connections=args.max_concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        builder = MappingBuilder(
+            client,
+            args.api_base,
+            args.api_key,
+            args.model,
+            limiter,
+            checkpoint,
+            args.output,
+            retries=args.retries,
+            flush_interval=args.flush_interval,
+        )
+        t0 = time.perf_counter()
+        try:
+            await builder.run(batches)
+        finally:
+            checkpoint.close()
+    elapsed = time.perf_counter() - t0
+    print(
+        f"[Mappings] 完成 {builder.done} 批，失败 {builder.failed} 批，耗时 {elapsed:.1f}s，"
+        f"共 {len(checkpoint.mappings)} 个新映射 -> {args.output}"
+    )
+    return 1 if builder.failed else 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="并发、可续跑的词表视觉标签映射构建工具")
+    parser.add_argument("--dict", action="append", help="词表路径[:最低词频]，可重复；默认 dict/Chinese 下三个词表")
+    parser.add_argument("--highfreq", action="store_true", help="未指定界限的词表使用内置高频界限")
+    parser.add_argument("--existing", action="append", default=None, help="已有映射文件，其中的词跳过（可重复）")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--checkpoint", default=None, help="检查点路径，默认 <output>.ckpt.jsonl")
+    parser.add_argument("--retry-missing", action="store_true", help="重新请求之前模型没有给出结果的词")
+    parser.add_argument("--api-base", default=os.getenv("LLM_API_BASE", "http://localhost:11434/v1"))
+    parser.add_argument("--api-key", default=os.getenv("LLM_API_KEY", "ollama"))
+    parser.add_argument("--model", default=os.getenv("MAPPING_MODEL", "llama3:8b-instruct-q4_K_M"))
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="初始并发")
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--flush-interval", type=float, default=10.0, help="合并写出输出文件的间隔（秒）")
+    args = parser.parse_args(argv)
+    if args.existing is None:
+        args.existing = [DEFAULT_EXISTING]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return asyncio.run(build(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
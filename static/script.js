@@ -122,21 +122,65 @@ inputText.addEventListener('input', () => {
     window.analyzeTimer = setTimeout(() => analyzeText(text), 500);
 });
 
+// 增量分析会话：服务端按段落缓存结果，未改动的段落只发送哈希引用
+let analysisSessionId = null;
+let knownParagraphs = new Map(); // 段落原文 -> 服务端返回的哈希
+
+// 按空行切分段落，必须与 app/core/incremental.py 的 split_paragraphs 保持一致
+function splitParagraphs(text) {
+    const chunks = [];
+    let current = [];
+    let prevBlank = false;
+    for (const line of text.split('\n')) {
+        const isBlank = line.trim() === '';
+        if (current.length && prevBlank && !isBlank) {
+            chunks.push(current.join('\n') + '\n');
+            current = [];
+        }
+        current.push(line);
+        prevBlank = isBlank;
+    }
+    if (current.length) {
+        const tail = current.join('\n');
+        if (tail) chunks.push(tail);
+    }
+    return chunks;
+}
+
+async function postIncremental(paragraphs, useRefs) {
+    const body = {
+        session_id: analysisSessionId,
+        analysis_fields: 'ui', // 只取分析面板展示的字段
+        paragraphs: paragraphs.map(p =>
+            useRefs && knownParagraphs.has(p) ? { ref: knownParagraphs.get(p) } : { text: p })
+    };
+    return fetch('/api/analyze/incremental', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+}
+
 // 分析文本
 async function analyzeText(text) {
     if (text.length < 10) return;
 
-    const formData = new FormData();
-    formData.append('text', text);
+    const paragraphs = splitParagraphs(text);
 
     try {
-        const response = await fetch('/api/analyze', {
-            method: 'POST',
-            body: formData
-        });
+        let response = await postIncremental(paragraphs, true);
+        if (response.status === 409) {
+            // 会话过期：清空本地引用，全量重发
+            analysisSessionId = null;
+            knownParagraphs = new Map();
+            response = await postIncremental(paragraphs, false);
+        }
 
         if (response.ok) {
-            currentAnalysis = await response.json();
+            const result = await response.json();
+            analysisSessionId = result.session_id;
+            knownParagraphs = new Map(paragraphs.map((p, i) => [p, result.hashes[i]]));
+            currentAnalysis = result.analysis;
             displayAnalysis(currentAnalysis);
         }
     } catch (error) {
@@ -174,6 +218,86 @@ function displayAnalysis(analysis) {
 }
 
 // 生成提示词
+// 生成选项（/api/generate 与 /api/pipeline 共用）
+function buildGenerateOptions() {
+    return {
+        mode: document.getElementById('modeSelect').value,
+        panels: parseInt(document.getElementById('panelsInput').value),
+        style: document.getElementById('styleSelect').value,
+        sensitive_filter: document.getElementById('sensitiveFilter').checked,
+        llm_api_base: document.getElementById('llmApiBase').value,
+        llm_api_key: document.getElementById('llmApiKey').value,
+        llm_model: document.getElementById('llmModel').value,
+        language: document.getElementById('langSelect').value, // 新增语言字段
+        per_panel: document.getElementById('perPanel').checked,
+        strip_redundant: document.getElementById('stripRedundant').checked
+    };
+}
+
+function showPrompt(prompt) {
+    promptOutput.textContent = prompt;
+    outputSection.style.display = 'block';
+    outputSection.scrollIntoView({ behavior: 'smooth' });
+}
+
+// 一键流水线：服务端完成抓取、分析、生成，逐行推送进度（NDJSON）
+async function runPipeline() {
+    const url = document.getElementById('urlInput').value.trim();
+    if (!url) { alert('请输入有效URL'); return; }
+    const btn = document.getElementById('pipelineBtn');
+    const stageText = { fetch: '抓取中...', analyze: '分析中...', generate: '生成中...' };
+    btn.disabled = true;
+    btn.textContent = '抓取中...';
+    try {
+        const resp = await fetch('/api/pipeline', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ url, ...buildGenerateOptions(), analysis_fields: 'ui' })
+        });
+        if (!resp.ok) {
+            const data = await resp.json();
+            alert('请求失败: ' + (data.error || resp.status));
+            return;
+        }
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let nl;
+            while ((nl = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, nl).trim();
+                buffer = buffer.slice(nl + 1);
+                if (!line) continue;
+                const ev = JSON.parse(line);
+                if (stageText[ev.stage]) btn.textContent = stageText[ev.stage];
+                if (ev.stage === 'fetch' && ev.text) {
+                    inputText.value = ev.text;
+                    charCount.textContent = ev.text.length;
+                } else if (ev.stage === 'analyze') {
+                    displayAnalysis(ev.analysis);
+                } else if (ev.stage === 'done') {
+                    showPrompt(ev.prompt);
+                } else if (ev.stage === 'error') {
+                    alert('生成失败: ' + ev.error);
+                }
+            }
+        }
+    } catch (e) {
+        alert('请求失败: ' + e);
+    } finally {
+        btn.disabled = false;
+        btn.textContent = '🚀 导入并生成';
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const pipelineBtn = document.getElementById('pipelineBtn');
+    if (pipelineBtn) pipelineBtn.addEventListener('click', runPipeline);
+});
+
 async function generatePrompt() {
     const text = inputText.value.trim();
     if (!text) {
@@ -186,19 +310,8 @@ async function generatePrompt() {
     generateBtn.textContent = '生成中...';
 
     try {
-        // --- 修改开始：构造包含 LLM 配置的请求体 ---
-        const requestBody = {
-            text: text,
-            mode: document.getElementById('modeSelect').value,
-            panels: parseInt(document.getElementById('panelsInput').value),
-            style: document.getElementById('styleSelect').value,
-            sensitive_filter: document.getElementById('sensitiveFilter').checked,
-            llm_api_base: document.getElementById('llmApiBase').value,
-            llm_api_key: document.getElementById('llmApiKey').value,
-            llm_model: document.getElementById('llmModel').value,
-            language: document.getElementById('langSelect').value // 新增语言字段
-        };
-        // --- 修改结束 ---
+        // 生成结果页不展示分析结果，不需要服务端回传
+        const requestBody = { text: text, ...buildGenerateOptions(), analysis_fields: 'none' };
 
         const response = await fetch('/api/generate', {
             method: 'POST',
@@ -211,11 +324,7 @@ async function generatePrompt() {
         const result = await response.json();
 
         if (result.success) {
-            promptOutput.textContent = result.prompt;
-            outputSection.style.display = 'block';
-
-            // 滚动到结果
-            outputSection.scrollIntoView({ behavior: 'smooth' });
+            showPrompt(result.prompt);
 
             // 可选优化：生成成功后自动保存一下配置（防止用户忘记点保存）
             if (typeof saveLLMConfig === 'function') {
@@ -233,6 +342,8 @@ async function generatePrompt() {
 }
 
 // 加载文件
+const LARGE_UPLOAD_BYTES = 2 * 1024 * 1024;
+
 loadFileBtn.addEventListener('click', () => {
     fileInput.click();
 });
@@ -244,6 +355,21 @@ fileInput.addEventListener('change', async (e) => {
     const formData = new FormData();
     formData.append('file', file);
 
+    // 大文件不回填编辑器：服务端直接分析，只返回统计结果
+    if (file.size > LARGE_UPLOAD_BYTES) {
+        formData.append('analysis_fields', 'ui');
+        try {
+            const response = await fetch('/api/upload/analyze', { method: 'POST', body: formData });
+            const result = await response.json();
+            if (!result.success) throw new Error(result.error);
+            charCount.textContent = `${result.analysis.total_chars}（${file.name}，${result.encoding}，未载入编辑器）`;
+            displayAnalysis(result.analysis);
+        } catch (error) {
+            alert('文件分析失败: ' + error.message);
+        }
+        return;
+    }
+
     try {
         const response = await fetch('/api/upload', {
             method: 'POST',
@@ -0,0 +1,40 @@
+# 测试公共设置：与 scripts/ 下的基准脚本共用夹具服务器（bench_utils），工作目录固定为项目根目录
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# C 模块与纯 Python 分析器都按相对路径加载 dict/
+os.chdir(PROJECT_ROOT)
+
+import pytest  # noqa: E402
+
+
+# 主分词词典不随仓库分发；缺失时 C 模块初始化会直接退出进程，依赖分析器的测试跳过
+MAIN_DICT = os.path.join(PROJECT_ROOT, "dict", "Chinese", "dict.txt")
+requires_dict = pytest.mark.skipif(not os.path.exists(MAIN_DICT), reason="dict/Chinese/dict.txt 未安装")
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """进程内共享的分析器（C 动态库未构建时为纯 Python 实现）"""
+    if not os.path.exists(MAIN_DICT):
+        pytest.skip("dict/Chinese/dict.txt 未安装")
+    from app.core.analyzer import TextAnalyzer
+
+    return TextAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """应用的 TestClient（不触发启动事件，不做 LLM 预热）"""
+    if not os.path.exists(MAIN_DICT):
+        pytest.skip("dict/Chinese/dict.txt 未安装")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, Lane, Rejected
+
+
+def controller(**lane_kwargs) -> AdmissionController:
+    fast = Lane("fast", concurrency=64, max_queue=64, queue_timeout=1)
+    slow = Lane("slow", **{"concurrency": 2, "max_queue": 2, "queue_timeout": 1, **lane_kwargs})
+    return AdmissionController({"fast": fast, "slow": slow})
+
+
+def test_modes_map_to_lanes():
+    ctl = controller()
+    assert ctl.lane_for("LLM ").name == "slow" and ctl.lane_for("hybrid").name == "slow"
+    assert ctl.lane_for("algorithm").name == "fast" and ctl.lane_for("unknown").name == "fast"
+
+
+def test_concurrency_bounded_and_queue_overflow_rejected():
+    ctl = controller()
+    lane = ctl.lanes["slow"]
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with ctl.slot(lane):
+            peak = max(peak, lane.active)
+            await asyncio.sleep(0.05)
+
+    async def main():
+        return await asyncio.gather(*(job() for _ in range(6)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    rejected = [r for r in results if isinstance(r, Rejected)]
+    # 2 个执行 + 2 个排队，其余立即 503
+    assert peak == 2
+    assert len(rejected) == 2 and all(r.status == 503 and r.retry_after >= 1 for r in rejected)
+    assert (lane.admitted, lane.rejected, lane.active, lane.waiting) == (4, 2, 0, 0)
+
+
+def test_queue_timeout_rejected():
+    ctl = controller(concurrency=1, queue_timeout=0.02)
+    lane = ctl.lanes["slow"]
+
+    async def job(hold):
+        async with ctl.slot(lane):
+            await asyncio.sleep(hold)
+
+    async def main():
+        return await asyncio.gather(job(0.2), job(0), return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert first is None
+    assert isinstance(second, Rejected) and second.status == 503
+
+
+def test_fast_lane_unaffected_by_busy_slow_lane():
+    ctl = controller(concurrency=1)
+
+    async def main():
+        async def slow():
+            async with ctl.slot(ctl.lanes["slow"]):
+                await asyncio.sleep(0.3)
+
+        task = asyncio.ensure_future(slow())
+        await asyncio.sleep(0.01)
+        async with ctl.slot(ctl.lanes["fast"]):
+            waited = ctl.lanes["fast"].waits[-1]
+        await task
+        return waited
+
+    assert asyncio.run(main()) < 0.05
+
+
+def test_client_rate_limit():
+    ctl = controller()
+    ctl.client_rate, ctl.client_burst = 1, 2
+    lane = ctl.lanes["slow"]
+    ctl.check_rate(lane, "1.2.3.4")
+    ctl.check_rate(lane, "1.2.3.4")
+    with pytest.raises(Rejected) as e:
+        ctl.check_rate(lane, "1.2.3.4")
+    assert e.value.status == 429 and e.value.retry_after >= 1
+    # 其他客户端、其他通道各自计数
+    ctl.check_rate(lane, "5.6.7.8")
+    ctl.check_rate(ctl.lanes["fast"], "1.2.3.4")
+    assert ctl.rate_limited == 1
+
+
+def test_disabled_controller_admits_everything():
+    ctl = controller(concurrency=1, max_queue=0)
+    ctl.enabled = False
+    ctl.client_rate = 0.001
+
+    async def main():
+        async def job():
+            async with ctl.slot(ctl.lanes["slow"]):
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job() for _ in range(5)))
+
+    for _ in range(3):
+        ctl.check_rate(ctl.lanes["slow"], "1.2.3.4")
+    asyncio.run(main())
+    assert ctl.lanes["slow"].admitted == 0
+
+
+def test_generate_analysis_runs_off_event_loop(client, monkeypatch):
+    """分析在线程池中执行：占着慢通道名额的长文本分析不会卡住事件循环上的快通道请求"""
+    from app import main
+
+    on_loop = []
+    real = main.analyzer.analyze
+
+    def probe(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(main.analyzer, "analyze", probe)
+    resp = client.post("/api/generate", json={"text": "线程池分析 孩子 家务", "mode": "algorithm"})
+    assert resp.json()["success"]
+    assert on_loop == [False]
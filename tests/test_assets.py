@@ -0,0 +1,119 @@
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.api.assets import asset_response
+from app.core.assets import IMMUTABLE, REVALIDATE, AssetStore, choose_encoding, etag_matches, parse_accept_encoding
+
+SCRIPT = "function hello() { return '你好'; }\n" * 100
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text(SCRIPT, encoding="utf-8")
+    (tmp_path / "tiny.css").write_text("body{}", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + os.urandom(2048))
+    (tmp_path / "index.html").write_text(
+        '<script src="/static/js/app.js"></script><link href="/static/missing.css">', encoding="utf-8"
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def store(root):
+    return AssetStore(str(root), check_interval=0)
+
+
+@pytest.fixture
+def http(store):
+    app = FastAPI()
+
+    @app.get("/")
+    async def index(request: Request):
+        return asset_response(request, store.index(), REVALIDATE)
+
+    @app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+    async def static_file(request: Request, path: str):
+        found = store.lookup(path)
+        if found is None:
+            return Response(status_code=404)
+        asset, fingerprinted = found
+        return asset_response(request, asset, IMMUTABLE if fingerprinted else REVALIDATE)
+
+    return TestClient(app)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=bad") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+    assert parse_accept_encoding(None) == {}
+
+
+def test_variants_and_negotiation(store):
+    js, _ = store.lookup("js/app.js")
+    assert gzip.decompress(js.variants["gzip"]).decode("utf-8") == SCRIPT
+    assert js.media_type == "application/javascript; charset=utf-8"
+    assert choose_encoding(js, "gzip, deflate") == "gzip"
+    assert choose_encoding(js, "gzip;q=0, deflate") == "identity"
+    assert choose_encoding(js, "*") == ("br" if "br" in js.variants else "gzip")
+    # 太小或不可压缩的文件只有原文
+    assert list(store.lookup("tiny.css")[0].variants) == ["identity"]
+    assert list(store.lookup("logo.png")[0].variants) == ["identity"]
+
+
+def test_etag_matches():
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abc-gzip"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_index_references_fingerprinted_urls(store):
+    js, _ = store.lookup("js/app.js")
+    html = store.index().variants["identity"].decode("utf-8")
+    assert f'src="/static/{js.fingerprinted}"' in html
+    assert 'href="/static/missing.css"' in html
+    assert store.lookup(js.fingerprinted) == (js, True)
+
+
+def test_responses(http, store):
+    js, _ = store.lookup("js/app.js")
+    resp = http.get(f"/static/{js.fingerprinted}", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["cache-control"] == IMMUTABLE
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.text == SCRIPT
+
+    resp = http.get("/static/js/app.js", headers={"Accept-Encoding": "identity"})
+    assert resp.headers["cache-control"] == REVALIDATE
+    assert "content-encoding" not in resp.headers
+    etag = resp.headers["etag"]
+    assert http.get("/static/js/app.js", headers={"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 304
+    # 不同编码的 ETag 不同，不能互相命中
+    assert http.get("/static/js/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 200
+
+    head = http.head("/static/js/app.js", headers={"Accept-Encoding": "identity"})
+    assert head.content == b"" and head.headers["content-length"] == str(len(SCRIPT.encode("utf-8")))
+    assert http.get("/static/nope.js").status_code == 404
+    assert "/static/js/app." in http.get("/").text
+
+
+def test_reload_picks_up_changes(root, store):
+    old = store.lookup("js/app.js")[0]
+    path = root / "js" / "app.js"
+    path.write_text("console.log(1);", encoding="utf-8")
+    os.utime(path, (old.mtime + 10, old.mtime + 10))
+    (root / "tiny.css").unlink()
+    changed = store.reload()
+    assert sorted(changed) == ["js/app.js", "tiny.css"]
+    new = store.lookup("js/app.js")[0]
+    assert new.digest != old.digest
+    assert store.lookup(old.fingerprinted) is None
+    assert store.lookup("tiny.css") is None
+    assert new.fingerprinted in store.index().variants["identity"].decode("utf-8")
+    assert store.reload() == []
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench_utils import make_llm_handler, start_server
+from conftest import PROJECT_ROOT, requires_dict
+
+pytestmark = requires_dict
+
+SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "batch_generate.py")
+
+
+@pytest.fixture
+def manuscripts(tmp_path):
+    src = tmp_path / "docs"
+    src.mkdir()
+    for i in range(3):
+        (src / f"doc{i}.txt").write_text(f"第{i}篇：男方是巨婴，不做家务不带孩子。但他给了40万补偿金。", encoding="utf-8")
+    return src
+
+
+def run_batch(args, llm_base: str):
+    env = {k: v for k, v in os.environ.items() if k != "LLM_BACKENDS"}
+    env.update(LLM_API_BASE=llm_base, LLM_TIMEOUT="2", LLM_BREAKER_FAILURES="100")
+    proc = subprocess.run([sys.executable, SCRIPT, *args, "--workers", "0", "--progress-interval", "60"],
+                          env=env, capture_output=True, text=True, timeout=120)
+    return proc.returncode
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("extra", [[], ["--language", "en"], ["--panels", "3", "--language", "en"]])
+def test_failing_llm_records_failures(manuscripts, tmp_path, extra):
+    out = tmp_path / "out.jsonl"
+    code = run_batch([str(manuscripts), "-o", str(out), "--mode", "llm", *extra], "http://127.0.0.1:9/v1")
+    records = read(out)
+    assert code == 1
+    assert len(records) == 3
+    assert all(r["success"] is False and r["error"].startswith("LLM Error:") for r in records)
+    # 降级结果仍然保留
+    assert all("(Switched to Algorithm)" in r["prompt"] for r in records)
+    if extra:
+        assert all(r["prompt"].startswith("Target language: en\n") for r in records)
+
+
+def test_resume_retries_degraded_records(manuscripts, tmp_path):
+    out = tmp_path / "out.jsonl"
+    args = [str(manuscripts), "-o", str(out), "--mode", "llm", "--language", "en"]
+    assert run_batch(args, "http://127.0.0.1:9/v1") == 1
+
+    server = start_server(make_llm_handler(delay=0))
+    try:
+        code = run_batch([*args, "--resume"], f"http://127.0.0.1:{server.server_port}/v1")
+    finally:
+        server.shutdown()
+    records = read(out)
+    assert code == 0
+    assert len(records) == 6
+    assert all(r["success"] for r in records[3:])
+    assert {r["id"] for r in records[3:]} == {r["id"] for r in records[:3]}
+
+
+def test_algorithm_mode_succeeds(manuscripts, tmp_path):
+    out = tmp_path / "out.jsonl"
+    assert run_batch([str(manuscripts), "-o", str(out), "--analysis-fields", "cn_chars"], "http://127.0.0.1:9/v1") == 0
+    records = read(out)
+    assert sorted(r["id"] for r in records) == ["doc0.txt", "doc1.txt", "doc2.txt"]
+    assert all(r["success"] and r["panels"] == 2 and r["analysis"]["cn_chars"] > 0 for r in records)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from bench_utils import make_llm_handler, start_server
+
+from build_mappings import AdaptiveLimiter, Checkpoint, load_words, main as build_main, parse_dict_spec, parse_response
+
+WORDS = ["家务", "孩子", "离婚", "巨婴", "补偿金", "男方", "女方", "婚姻", "争吵", "眼泪", "雨夜", "街灯"]
+
+
+def reply(payload: dict) -> str:
+    words = payload["messages"][-1]["content"].rsplit("词汇：", 1)[-1].split("、")
+    # 故意不给最后一个词结果，并夹带一个未请求的词
+    return "\n".join(f"{i + 1}. {w}：tag of {w}" for i, w in enumerate(words[:-1])) + "\n路人: stranger"
+
+
+@pytest.fixture
+def llm():
+    counter: dict = {}
+    server = start_server(make_llm_handler(delay=0.05, capacity=2, reject_when_busy=True, reply=reply, counter=counter))
+    yield f"http://127.0.0.1:{server.server_port}/v1", counter
+    server.shutdown()
+
+
+@pytest.fixture
+def words_file(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("".join(f"{w} {i * 100}\n" for i, w in enumerate(WORDS)) + "abc 9999\n", encoding="utf-8")
+    return str(path)
+
+
+def run(llm_base, words_file, out, *extra):
+    return build_main(
+        ["--dict", words_file, "--existing", os.path.join(os.path.dirname(out), "none.json"), "-o", out,
+         "--api-base", llm_base, "--batch-size", "3", "--concurrency", "4", "--flush-interval", "0", *extra]
+    )
+
+
+def test_parse_response_only_accepts_requested_words():
+    text = "- 家务：housework, chores\n2. 孩子: child\n路人: stranger\n无冒号的行\n离婚:"
+    assert parse_response(text, ["家务", "孩子", "离婚"]) == {"家务": "housework, chores", "孩子": "child"}
+
+
+def test_load_words_filters_by_frequency(words_file):
+    assert load_words([(words_file, 0)]) == sorted(WORDS)
+    assert load_words([parse_dict_spec(words_file + ":1000", False)]) == sorted(WORDS[10:])
+    assert parse_dict_spec("/x/IT.txt", True) == ("/x/IT.txt", 10000)
+
+
+def test_checkpoint_ignores_torn_line(tmp_path):
+    path = str(tmp_path / "ckpt.jsonl")
+    ckpt = Checkpoint(path)
+    ckpt.append({"家务": "chores"}, ["孩子"])
+    ckpt.append({"孩子": "child"}, [])
+    ckpt.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"mappings": {"半')
+    ckpt = Checkpoint(path)
+    ckpt.close()
+    assert ckpt.mappings == {"家务": "chores", "孩子": "child"}
+    assert ckpt.missing == set()
+
+
+def test_limiter_halves_on_overload_and_grows_back():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=8, maximum=8)
+        await limiter.acquire()
+        await limiter.release(False)
+        assert int(limiter.limit) == 4
+        for _ in range(20):
+            await limiter.acquire()
+            await limiter.release(True)
+        return limiter.limit
+
+    assert 5 <= asyncio.run(scenario()) <= 8
+
+
+def test_build_survives_overload_and_resumes(llm, words_file, tmp_path):
+    base, counter = llm
+    out = str(tmp_path / "out.json")
+    assert run(base, words_file, out) == 0
+    # 容量 2、初始并发 4：一定出现过 429，失败批次被重试
+    assert counter.get("rejected", 0) > 0
+    with open(out, encoding="utf-8") as f:
+        mappings = json.load(f)["mappings"]
+    assert len(mappings) == len(WORDS) - 4  # 每批 3 个词，最后一个词没有结果
+    assert mappings["家务"] == "tag of 家务"
+    assert "路人" not in mappings
+
+    # 续跑：已有结果和模型未给出结果的词都跳过，不再发请求
+    counter.clear()
+    os.remove(out)
+    assert run(base, words_file, out) == 0
+    assert counter.get("requests", 0) == 0
+    with open(out, encoding="utf-8") as f:
+        assert json.load(f)["mappings"] == mappings
+
+    # --retry-missing 只重新请求缺失的 4 个词（2 批）
+    assert run(base, words_file, out, "--retry-missing", "--concurrency", "1") == 0
+    assert counter.get("requests", 0) == 2
+
+
+def test_existing_mappings_are_skipped(llm, words_file, tmp_path):
+    base, counter = llm
+    existing = tmp_path / "main.json"
+    existing.write_text(json.dumps({"mappings": {w: "known" for w in WORDS[:9]}}, ensure_ascii=False), encoding="utf-8")
+    out = str(tmp_path / "out.json")
+    assert build_main(
+        ["--dict", words_file, "--existing", str(existing), "-o", out, "--api-base", base,
+         "--batch-size", "3", "--concurrency", "1"]
+    ) == 0
+    assert counter["requests"] == 1
+    with open(out, encoding="utf-8") as f:
+        assert sorted(json.load(f)["mappings"]) == sorted(WORDS[9:])[:2]  # 按词排序成批，最后一个词无结果
@@ -0,0 +1,68 @@
+from bench_redundancy import forum_thread
+
+from app.core.condense import condense, estimate_tokens
+from app.core.text_split import split_sentences
+
+
+def chapters(n: int = 4) -> str:
+    body = forum_thread(posts=15).replace(">", "")
+    return "".join(f"## 第{i}章\n{body}\n" for i in range(1, n + 1))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("你好世界") == 4
+    assert estimate_tokens("hello world") == 2
+    assert estimate_tokens("") == 0
+
+
+def test_within_budget_or_disabled_is_unchanged():
+    text = chapters(1)
+    assert condense(text, {}, 0) == text
+    assert condense(text, {}, estimate_tokens(text)) == text
+
+
+def test_condensed_text_fits_budget_and_keeps_order(analyzer):
+    text = chapters()
+    analysis = analyzer.analyze(text)
+    budget = estimate_tokens(text) // 5
+    out = condense(text, analysis, budget)
+    assert estimate_tokens(out) <= budget
+    # 只抽取原句：每句都出现在原文中，且顺序不变
+    pos = 0
+    for s in split_sentences(out):
+        found = text.find(s.strip("\n"), pos)
+        assert found >= 0
+        pos = found
+
+
+def test_headers_kept_and_every_section_represented(analyzer):
+    text = chapters()
+    out = condense(text, analyzer.analyze(text), estimate_tokens(text) // 8)
+    lines = out.split("\n")
+    headers = [i for i, line in enumerate(lines) if line.startswith("## ")]
+    assert [lines[i] for i in headers] == [f"## 第{i}章" for i in range(1, 5)]
+    # 每个章节都至少有一句代表句
+    for a, b in zip(headers, headers[1:] + [len(lines)]):
+        assert any(line.strip() for line in lines[a + 1 : b])
+
+
+def test_many_headers_stay_within_budget(analyzer):
+    text = "".join(f"## 第{i}章 标题\n这是第{i}章的正文内容。还有一句话在这里。\n" for i in range(200))
+    analysis = analyzer.analyze(text)
+    for budget in (5, 50, 300, 1000):
+        out = condense(text, analysis, budget)
+        assert estimate_tokens(out) <= budget
+    # 放不下的标题只舍弃，保留下来的仍在行首
+    out = condense(text, analysis, 300)
+    assert 0 < out.count("## ") < 200
+    assert all(line.startswith("## ") for line in out.split("\n") if "##" in line)
+
+
+def test_low_ratio_headers_dropped_first(analyzer):
+    long_body = "这一章的正文很长，反复讨论孩子和家务。" * 40
+    text = "## 短章\n一句话。\n## 长章\n" + long_body + "\n## 另一短章\n一句话。\n"
+    analysis = analyzer.analyze(text)
+    budget = 5  # 只够放下一个标题
+    out = condense(text, analysis, budget)
+    assert estimate_tokens(out) <= budget
+    assert "## 长章" in out and "## 短章" not in out
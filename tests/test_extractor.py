@@ -0,0 +1,41 @@
+from bench_utils import sample_html
+
+from app.core.extractor import MAX_TEXT_CHARS, extract_text
+
+
+def test_readability_path_keeps_article_drops_noise():
+    text = extract_text(sample_html(7, paragraphs=20).decode("utf-8"))
+    assert text.startswith("测试页面 7\n")
+    assert "第7页第19段" in text
+    assert "var x" not in text and "版权所有" not in text
+
+
+def test_output_capped():
+    text = extract_text(sample_html(1, paragraphs=2000).decode("utf-8"))
+    assert len(text) == MAX_TEXT_CHARS
+
+
+def test_hidden_elements_excluded():
+    html = (
+        "<html><head><title>标题</title></head><body><article>"
+        + "<p>看得见的正文段落，内容足够长以便被选为正文。</p>" * 5
+        + "<p hidden>隐藏段落</p><p style='display: none'>不显示的段落</p>"
+        + "</article></body></html>"
+    )
+    text = extract_text(html)
+    assert "看得见的正文段落" in text
+    assert "隐藏段落" not in text and "不显示的段落" not in text
+
+
+def test_fallback_selectors_without_paragraphs():
+    html = (
+        "<html><body><nav>导航</nav><div class='topic-content'>楼主说：这是一段没有 p 标签的论坛正文内容。"
+        "<span hidden>隐藏签名</span><script>var y = 2;</script></div></body></html>"
+    )
+    text = extract_text(html)
+    assert "没有 p 标签的论坛正文" in text
+    assert "隐藏签名" not in text and "var y" not in text and "导航" not in text
+
+
+def test_empty_input():
+    assert extract_text("   ") == ""
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from bench_utils import make_html_handler, start_server
+
+from app.core.fetcher import FetchError, TextCache, UrlFetcher
+
+
+@pytest.fixture
+def site():
+    counter = {}
+    server = start_server(make_html_handler(delay=0, counter=counter))
+    yield f"http://127.0.0.1:{server.server_port}", counter
+    server.shutdown()
+
+
+def run(fetcher: UrlFetcher, coro_fn):
+    async def main():
+        try:
+            return await coro_fn()
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(main())
+
+
+def test_cache_hit_skips_network(site):
+    base, counter = site
+    fetcher = UrlFetcher(cache=TextCache(ttl=600))
+
+    async def twice():
+        return await fetcher.fetch(f"{base}/page/1"), await fetcher.fetch(f"{base}/page/1")
+
+    first, second = run(fetcher, twice)
+    assert "第1页第0段" in first
+    assert second == first
+    assert counter["requests"] == 1
+
+
+def test_expired_entry_revalidates_with_etag(site):
+    base, counter = site
+    fetcher = UrlFetcher(cache=TextCache(ttl=0))
+
+    async def twice():
+        return await fetcher.fetch(f"{base}/page/2"), await fetcher.fetch(f"{base}/page/2")
+
+    first, second = run(fetcher, twice)
+    assert second == first
+    assert counter["requests"] == 2
+    assert counter["not_modified"] == 1
+
+
+def test_rejects_non_http_and_error_status(site):
+    base, _ = site
+    fetcher = UrlFetcher()
+    with pytest.raises(FetchError):
+        run(fetcher, lambda: fetcher.fetch("ftp://example.com/"))
+    results = run(fetcher, lambda: fetcher.fetch_many([f"{base}/page/3", "file:///etc/passwd"]))
+    assert [r["success"] for r in results] == [True, False]
+
+
+def test_host_slots_released_after_fetch(site):
+    base, _ = site
+    fetcher = UrlFetcher(per_host_limit=2, cache=TextCache(max_entries=0))
+    urls = [f"{base}/page/{i}" for i in range(8)] + [f"http://localhost:{base.rsplit(':', 1)[1]}/page/9"]
+    results = run(fetcher, lambda: fetcher.fetch_many(urls))
+    assert all(r["success"] for r in results)
+    assert fetcher._host_slots == {}
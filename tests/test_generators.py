@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from bench_utils import make_llm_handler, start_server
+
+from app.core.generators import PromptGenerator
+
+STORY = "她走进教室。阳光照在黑板上。同学们都看着她。她忍不住哭了。老师递给她一张纸巾。"
+ANALYSIS = {"top_words": [{"word": "教室", "freq": 1}, {"word": "阳光", "freq": 1}]}
+
+
+@pytest.fixture(scope="module")
+def llm():
+    counter = {}
+    server = start_server(make_llm_handler(delay=0, counter=counter))
+    yield {"api_base": f"http://127.0.0.1:{server.server_port}/v1"}, counter
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def gen():
+    return PromptGenerator()
+
+
+def test_algorithm_mode_reports_requested_panels(gen):
+    result = gen.generate(STORY, ANALYSIS, mode="algorithm", panels=4)
+    assert result["panels"] == 4
+    assert result["prompt"].startswith(gen.mapper.get_style_tags("清新简洁"))
+    assert "4koma" in result["prompt"]
+
+
+def test_per_panel_sync_fans_out(gen, llm):
+    config, counter = llm
+    counter.clear()
+    result = gen.generate(STORY, ANALYSIS, mode="llm", panels=3, llm_config=config, per_panel=True)
+    assert result["panels"] == 3
+    assert counter["requests"] == 3
+    lines = result["prompt"].split("\n")
+    assert lines[0].startswith("3koma")
+    assert [line.split(":", 1)[0] for line in lines[1:]] == ["Panel 1", "Panel 2", "Panel 3"]
+
+
+def test_per_panel_sync_inside_running_loop(gen, llm):
+    config, _ = llm
+
+    async def main():
+        # 同步接口在事件循环线程中调用不能依赖 asyncio.run
+        return gen.generate(STORY, ANALYSIS, mode="llm", panels=2, llm_config=config, per_panel=True)
+
+    assert asyncio.run(main())["panels"] == 2
+
+
+def test_short_text_reports_actual_panel_count(gen, llm):
+    config, _ = llm
+    for result in (
+        gen.generate("一句话。", {}, mode="llm", panels=3, llm_config=config, per_panel=True),
+        asyncio.run(gen.agenerate("一句话。", {}, mode="llm", panels=3, llm_config=config, per_panel=True)),
+    ):
+        assert result["panels"] == 1
+        assert result["prompt"].startswith("solo")
+
+
+def test_async_per_panel_matches_sync(gen, llm):
+    config, _ = llm
+    kwargs = dict(mode="hybrid", panels=2, llm_config=config, per_panel=True, language="en")
+    sync = gen.generate(STORY, ANALYSIS, **kwargs)
+    async_ = asyncio.run(gen.agenerate(STORY, ANALYSIS, **kwargs))
+    assert sync == async_
+    assert sync["prompt"].startswith("Target language: en\n")
+
+
+def test_failed_panel_falls_back_to_algorithm():
+    gen = PromptGenerator()
+    gen.default_config["timeout"] = 2
+    config = {"api_base": "http://127.0.0.1:9/v1"}
+    result = gen.generate(STORY, ANALYSIS, mode="llm", panels=2, llm_config=config, per_panel=True)
+    assert result["panels"] == 2
+    assert result["prompt"].startswith("LLM Error: panel 1:")
@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.incremental import NON_MERGEABLE_FIELDS, IncrementalAnalyzer, split_paragraphs
+
+DOC = (
+    "开头没有标题的一段。男方是巨婴，不做家务不带孩子。\n\n"
+    "## 第一章\n\n但他给了40万补偿金，女方犹豫要不要离婚。\n"
+    "The kids walked to school in the rain.\n\n"
+    "## 第二章\n\n晚上回家发现厨房一片狼藉。男方是巨婴。\n\n\n"
+    "最后一段没有换行"
+)
+
+
+def comparable(result):
+    return {k: v for k, v in result.items() if k not in NON_MERGEABLE_FIELDS}
+
+
+def test_split_paragraphs_round_trips():
+    parts = split_paragraphs(DOC)
+    assert "".join(parts) == DOC
+    assert len(parts) == 6
+    assert all(p.endswith("\n") for p in parts[:-1])
+
+
+def test_merged_result_matches_full_analysis(analyzer):
+    inc = IncrementalAnalyzer(analyzer)
+    result, meta = inc.update_text(None, DOC)
+    assert comparable(result) == comparable(analyzer.analyze(DOC))
+    assert meta["analyzed"] == len(meta["hashes"]) and meta["reused"] == 0
+
+
+def test_edit_reanalyzes_only_changed_paragraph(analyzer):
+    inc = IncrementalAnalyzer(analyzer)
+    _, meta = inc.update_text(None, DOC)
+    paragraphs = split_paragraphs(DOC)
+    paragraphs[2] = paragraphs[2].replace("补偿金", "补偿金和房子")
+    payload = [{"text": p} if i == 2 else {"ref": h} for i, (p, h) in enumerate(zip(paragraphs, meta["hashes"]))]
+    result, meta2 = inc.update(meta["session_id"], payload)
+    assert (meta2["analyzed"], meta2["reused"]) == (1, len(paragraphs) - 1)
+    assert comparable(result) == comparable(analyzer.analyze("".join(paragraphs)))
+
+
+def test_unknown_ref_requires_resync(analyzer):
+    inc = IncrementalAnalyzer(analyzer)
+    _, meta = inc.update_text(None, DOC)
+    with pytest.raises(KeyError):
+        inc.update(meta["session_id"], [{"ref": "0" * 40}])
+    with pytest.raises(KeyError):
+        inc.update("expired-session", [{"ref": meta["hashes"][0]}])
+
+
+def test_sessions_are_bounded(analyzer):
+    inc = IncrementalAnalyzer(analyzer, max_sessions=2)
+    for _ in range(5):
+        inc.update_text(None, "一段。")
+    assert len(inc._sessions) <= 2
@@ -0,0 +1,142 @@
+import json
+import threading
+
+import pytest
+
+from conftest import requires_dict
+
+import app.main as main
+from app.core.analyzer import TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer, compile_overlay
+
+pytestmark = requires_dict
+
+TEXT = "男方是巨婴宝宝，不做家务。巨婴宝宝又来了。"
+
+
+def words(result):
+    return {w["word"] for w in result["top_words"]}
+
+
+def test_lexicon_is_matched(analyzer):
+    analyzer.add_lexicon("t_basic", "巨婴宝宝 10")
+    try:
+        assert "巨婴宝宝" in words(analyzer.analyze(TEXT, 0, lexicons=["t_basic"]))
+        assert "巨婴宝宝" not in words(analyzer.analyze(TEXT, 0))
+        assert analyzer.lexicons()["t_basic"] == 1
+    finally:
+        analyzer.remove_lexicon("t_basic")
+    with pytest.raises(ValueError):
+        analyzer.analyze(TEXT, lexicons=["t_basic"])
+
+
+def test_handle_outlives_removal_while_in_use(analyzer):
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    analyzer.add_lexicon("t_held", "巨婴宝宝")
+    [entry] = analyzer._acquire_lexicons(["t_held"])
+    assert analyzer.remove_lexicon("t_held")
+    # 已从注册表删除，但持有的引用仍可用于分析
+    raw = analyzer._call(TEXT.encode("utf-8"), 0, 0, [entry.handle])
+    assert raw is not None and "巨婴宝宝" in words(json.loads(raw))
+    analyzer._put_lexicons([entry])
+    # 最后一个使用者归还后已释放
+    assert analyzer.lib.Analyzer_ReleaseOverlay(entry.handle) == -1
+
+
+@pytest.mark.parametrize(
+    "word",
+    [
+        '测"试',
+        "测\\试",
+        "中\x01文",
+        "é" * 40,  # 80 字节：超过 63 字节时按整字截断
+        "长" * 30,
+    ],
+)
+def test_special_words_match_python_engine(analyzer, word):
+    """词表中的词含 JSON 特殊字符或超长时，C 端输出仍是合法 JSON，且与纯 Python 实现一致"""
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    analyzer.add_lexicon("t_special", word)
+    try:
+        text = f"# 标题{word}\n前文{word}后文。{word}\n"
+        py, overlay = PyAnalyzer(), compile_overlay(word)[0]
+        for top_n in (10, 0):
+            result = analyzer.analyze(text, top_n, lexicons=["t_special"])
+            assert "error" not in result, result
+            assert result == py.analyze(text, top_n, overlays=[overlay])
+        expected = word.encode("utf-8")[:63].decode("utf-8", errors="ignore")
+        assert expected in words(result)
+        assert result["sections"][1]["title"].startswith("标题" + word[:10])
+    finally:
+        analyzer.remove_lexicon("t_special")
+
+
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_concurrent_replace_and_delete(analyzer, monkeypatch, engine):
+    """分析与替换/删除并发：不会出现 KeyError 或 C 端分析失败，只可能是词表不存在（ValueError -> 400）"""
+    if engine == "python":
+        monkeypatch.setenv("ANALYZER_ENGINE", "python")
+        target = TextAnalyzer()
+    else:
+        if not analyzer.lib:
+            pytest.skip("libanalyzer 未编译")
+        target = analyzer
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            target.add_lexicon("t_churn", f"巨婴宝宝 {i}\n家务活 1")
+            target.remove_lexicon("t_churn")
+            i += 1
+
+    def reader():
+        for _ in range(300):
+            try:
+                result = target.analyze(TEXT, 0, lexicons=["t_churn"])
+            except ValueError:
+                continue
+            except Exception as e:  # noqa: BLE001
+                errors.append(repr(e))
+                continue
+            if "error" in result:
+                errors.append(result["error"])
+
+    threads = [threading.Thread(target=churn) for _ in range(2)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads[2:]:
+        t.join()
+    stop.set()
+    for t in threads[:2]:
+        t.join()
+    target.remove_lexicon("t_churn")
+    assert errors == []
+    assert "t_churn" not in target.lexicons()
+
+
+def test_write_endpoints_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "LEXICON_TOKEN", "")
+    assert client.put("/api/lexicons/t_http", data={"words": "巨婴宝宝"}).status_code == 404
+    assert client.delete("/api/lexicons/t_http").status_code == 404
+
+
+def test_write_endpoints_require_token(client, monkeypatch):
+    monkeypatch.setattr(main, "LEXICON_TOKEN", "s3cret")
+    assert client.put("/api/lexicons/t_http", data={"words": "巨婴宝宝"}).status_code == 401
+    resp = client.put("/api/lexicons/t_http", data={"words": "巨婴宝宝"}, headers={"X-Lexicon-Token": "wrong"})
+    assert resp.status_code == 401
+    auth = {"X-Lexicon-Token": "s3cret"}
+    resp = client.put("/api/lexicons/t_http", data={"words": "巨婴宝宝"}, headers=auth)
+    assert resp.json() == {"name": "t_http", "words": 1}
+    assert client.get("/api/lexicons").json()["lexicons"]["t_http"] == 1
+    body = client.post("/api/analyze", data={"text": TEXT, "lexicons": "t_http", "fields": "top_words"}).json()
+    assert "巨婴宝宝" in words(body)
+
+    assert client.delete("/api/lexicons/t_http").status_code == 401
+    assert client.delete("/api/lexicons/t_http", headers=auth).json() == {"name": "t_http", "deleted": True}
+    assert client.delete("/api/lexicons/t_http", headers=auth).status_code == 404
+    assert client.post("/api/analyze", data={"text": TEXT, "lexicons": "t_http"}).status_code == 400
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from app.core.llm_router import Backend, CircuitBreaker, LLMRouter, NoBackendAvailable
+
+
+def make_router(n: int, threshold: int = 2, cooldown: float = 30, **kwargs) -> LLMRouter:
+    backends = [Backend(f"http://b{i}", "key", "model", CircuitBreaker(threshold, cooldown)) for i in range(n)]
+    return LLMRouter(backends, **kwargs)
+
+
+def test_breaker_opens_then_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # 半开只放行一个探测请求
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_fast_failure_fails_over_to_other_backend():
+    router = make_router(2)
+
+    def send(backend):
+        if backend.api_base == "http://b0":
+            raise ConnectionError("down")
+        return backend.api_base
+
+    # 两个后端在途数相同，第一个总是先被选中
+    assert router.call(send, timeout=5) == "http://b1"
+    assert router.backends[0].breaker.failures == 1
+    assert all(b.outstanding == 0 for b in router.backends)
+
+
+def test_slow_primary_is_hedged():
+    router = make_router(2, hedge_min_delay=0.05, hedge_default_delay=0.05)
+    release = threading.Event()
+
+    def send(backend):
+        if backend.api_base == "http://b0":
+            release.wait(2)
+            return "slow"
+        return "fast"
+
+    try:
+        assert router.call(send, timeout=5) == "fast"
+        assert router.hedged == 1
+    finally:
+        release.set()
+
+
+def test_all_open_raises_immediately():
+    router = make_router(2, threshold=1)
+
+    def send(backend):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        router.call(send, timeout=5)
+    assert [b.breaker.state for b in router.backends] == ["open", "open"]
+    t0 = time.monotonic()
+    with pytest.raises(NoBackendAvailable):
+        router.call(send, timeout=5)
+    assert time.monotonic() - t0 < 0.1
+
+
+def test_backend_apply_respects_pinned_model():
+    backend = Backend("http://b", "k", "backend-model", CircuitBreaker())
+    assert backend.apply({"model": "x"})["model"] == "backend-model"
+    assert backend.apply({"model": "x", "model_pinned": True})["model"] == "x"
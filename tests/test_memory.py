@@ -0,0 +1,85 @@
+import random
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bench_memory import long_words, many_headers, random_bytes, random_cjk, unique_words
+from conftest import requires_dict
+
+from app.core.analyzer import ABI_VERSION, MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS, TextAnalyzer
+from app.core.py_analyzer import PyAnalyzer
+
+pytestmark = requires_dict
+
+BUDGET = 4 * 1024 * 1024
+INPUT_BYTES = 1_500_000
+
+
+@pytest.fixture
+def c(analyzer):
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    yield analyzer
+    analyzer.lib.Analyzer_SetLimits(MAX_REQUEST_BYTES, MAX_UNIQUE_TOKENS)
+
+
+def adversarial():
+    rng = random.Random(44)
+    return [
+        unique_words(INPUT_BYTES).encode("utf-8"),
+        long_words(INPUT_BYTES).encode("utf-8"),
+        many_headers(INPUT_BYTES).encode("utf-8"),
+        random_cjk(rng, INPUT_BYTES).encode("utf-8"),
+        random_bytes(rng, INPUT_BYTES // 4),
+    ]
+
+
+def test_concurrent_budgeted_analyses(c):
+    """多线程并发分析恶意输入：单请求峰值不超过预算，结束后没有遗留上下文，全局词典账户不变"""
+    c.lib.Analyzer_SetLimits(BUDGET, 0)
+    inputs = adversarial()
+    before = c.memory_stats()
+    peaks = []
+    lock = threading.Lock()
+
+    def work(i):
+        result = c.analyze_bytes(inputs[i % len(inputs)])
+        assert "error" not in result
+        with lock:
+            peaks.append(c.memory_stats()["context_peak_bytes"])
+        return result.get("truncated_reason")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        reasons = list(pool.map(work, range(40)))
+
+    after = c.memory_stats()
+    assert after["live_contexts"] == 0
+    assert after["total_contexts"] - before["total_contexts"] == 40
+    assert after["dict_bytes"] == before["dict_bytes"]
+    assert after["limit_bytes"] == BUDGET
+    assert after["context_peak_bytes"] <= max(BUDGET, before["context_peak_bytes"])
+    assert "memory" in reasons
+    assert after["truncated_contexts"] - before["truncated_contexts"] == sum(r is not None for r in reasons)
+
+
+def test_unique_token_budget_matches_python(c):
+    text = unique_words(20_000) + "# 标题\n中文内容。" + unique_words(5_000)
+    c.lib.Analyzer_SetLimits(0, 300)
+    py = PyAnalyzer(max_unique_tokens=300)
+    for top_n in (10, 0):
+        result = c.analyze(text, top_n)
+        assert result["truncated"] and result["truncated_reason"] == "unique_tokens"
+        assert result == py.analyze(text, top_n)
+    c.lib.Analyzer_SetLimits(0, 0)
+    assert not c.analyze(text, 0)["truncated"]
+
+
+def test_abi_version_is_checked(c):
+    assert c.lib.Analyzer_AbiVersion() == ABI_VERSION
+    stub = TextAnalyzer.__new__(TextAnalyzer)
+    stub.lib = types.SimpleNamespace(Analyzer_AbiVersion=lambda: ABI_VERSION + 1)
+    assert not stub._check_abi()
+    stub.lib = types.SimpleNamespace()  # 没有导出版本号的旧版本动态库
+    assert not stub._check_abi()
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from bench_normalize import EN_WORDS, damage, load_s2t, scraped
+from conftest import requires_dict
+
+from app.core.py_analyzer import NORM_ALL, NORM_CASE, NORM_INVISIBLE, NORM_T2S, NORM_WIDTH, PyAnalyzer, parse_normalization
+
+pytestmark = requires_dict
+
+LINE = "離婚以後孩子的補償金問題一直沒有解決，男方始終不願意承擔家務。"
+
+
+def test_parse_normalization():
+    assert parse_normalization(None) == 0 and parse_normalization("0") == 0
+    assert parse_normalization("all") == NORM_ALL and parse_normalization("1") == NORM_ALL
+    assert parse_normalization(" Width, t2s ") == NORM_WIDTH | NORM_T2S
+    assert parse_normalization("invisible,case") == NORM_INVISIBLE | NORM_CASE
+    with pytest.raises(ValueError):
+        parse_normalization("width,nfkc")
+
+
+@pytest.fixture(scope="module")
+def engines(analyzer):
+    """开启全部规范化的 C 模块与纯 Python 实现；结束后关闭 C 侧规范化，不影响其它测试"""
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    analyzer.lib.Analyzer_SetNormalization(NORM_ALL)
+    try:
+        yield analyzer, PyAnalyzer(normalize=NORM_ALL)
+    finally:
+        analyzer.lib.Analyzer_SetNormalization(0)
+
+
+def dirty_docs(count=40, seed=50):
+    rng = random.Random(seed)
+    s2t = load_s2t()
+    keys = ["离婚", "孩子", "家务", "补偿金", "男方"]
+    return [damage(rng, scraped(rng, keys, EN_WORDS), s2t) for _ in range(count)]
+
+
+def test_c_matches_python_on_dirty_text(engines):
+    c, py = engines
+    for doc in dirty_docs():
+        for top_n in (10, 0):
+            assert c.analyze(doc, top_n) == py.analyze(doc, top_n)
+
+
+@pytest.mark.parametrize("use_c", [True, False])
+def test_normalized_tokens_and_original_offsets(engines, use_c):
+    engine = engines[0] if use_c else engines[1]
+    text = "ｓｈｉｔ​! ＰｙＴｈｏｎ\n" + LINE + "\n" + LINE.replace("離", "离") + "\n"
+    data = text.encode("utf-8")
+    result = engine.analyze(text, 50)
+    words = {w["word"]: w["freq"] for w in result["top_words"]}
+    # 繁体、全角、大小写都折叠到同一个词
+    assert words["离婚"] == 2 and words["python"] == 1
+    assert "shit" in result["sensitive_words"]
+    # 位置是原文（规范化之前）的字节偏移
+    assert [data[s:e].decode() for s, e in result["sensitive_hits"]] == ["ｓｈｉｔ"]
+    assert [data[s:e].decode() for s, e in result["redundant_spans"]] == [LINE.replace("離", "离")]
+
+
+def test_disabled_by_default():
+    result = PyAnalyzer().analyze("離婚 ＰＹＴＨＯＮ", 10)
+    words = {w["word"] for w in result["top_words"]}
+    assert "离婚" not in words and "python" not in words
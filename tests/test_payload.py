@@ -0,0 +1,92 @@
+import gzip
+import json
+
+import pytest
+
+from conftest import requires_dict
+
+from app.core import payload
+from app.core.payload import ANALYSIS_FIELDS, FIELD_PRESETS, dumps, json_response, parse_fields, select_fields
+
+ANALYSIS = {
+    "total_chars": 10,
+    "cn_chars": 8,
+    "top_words": [{"word": w, "freq": 1} for w in "abcdefg"],
+    "sections": [{"title": "Introduction"}],
+    "truncated": False,
+    "truncated_reason": None,
+}
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None and parse_fields(" all ") is None
+    assert parse_fields("none") == ()
+    assert parse_fields("cn_chars, top_words:3") == (("cn_chars", None), ("top_words", 3))
+    assert ("top_words", 5) in parse_fields("ui,sections")
+
+
+@pytest.mark.parametrize("spec", ["top_word", "cn_chars,bogus", "top_words:x", "Top_Words"])
+def test_parse_fields_rejects_unknown_or_malformed(spec):
+    with pytest.raises(ValueError):
+        parse_fields(spec)
+
+
+def test_presets_only_use_known_fields():
+    for preset in FIELD_PRESETS.values():
+        assert {name for name, _ in parse_fields(preset)} <= ANALYSIS_FIELDS
+
+
+@requires_dict
+def test_known_fields_match_analyzer_output(analyzer):
+    assert set(analyzer.analyze("# t\nhello 孩子 shit.")) == ANALYSIS_FIELDS
+
+
+def test_select_fields():
+    picked = select_fields(ANALYSIS, "top_words:2,cn_chars")
+    assert picked == {
+        "top_words": ANALYSIS["top_words"][:2],
+        "cn_chars": 8,
+        "truncated": False,
+        "truncated_reason": None,
+    }
+    assert len(ANALYSIS["top_words"]) == 7  # 不修改传入的结果
+    assert select_fields(ANALYSIS, "none") is None
+    assert select_fields({"error": "x"}, "none") == {"error": "x"}
+    assert select_fields(ANALYSIS, None) is ANALYSIS
+
+
+def test_dumps_falls_back_for_unsupported_values(monkeypatch):
+    big = {"n": 2 ** 70, "s": "中文"}
+    assert json.loads(dumps(big)) == big
+    assert b"\\u" not in dumps(big)
+    monkeypatch.setattr(payload, "orjson", None)
+    assert dumps({"a": [1, "中"]}) == '{"a":[1,"中"]}'.encode("utf-8")
+
+
+def test_json_response_compression(monkeypatch):
+    small = json_response({"a": 1}, {"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    content = {"words": ["孩子"] * 2000}
+    resp = json_response(content, {"accept-encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip" and resp.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(resp.body)) == content
+    # 没有 brotli 时不会协商到 br
+    monkeypatch.setattr(payload, "brotli", None)
+    assert "content-encoding" not in json_response(content, {"accept-encoding": "br"}).headers
+
+
+@requires_dict
+@pytest.mark.parametrize(
+    "method, url, kwargs",
+    [
+        ("post", "/api/generate", {"json": {"text": "孩子", "mode": "algorithm", "analysis_fields": "bogus"}}),
+        ("post", "/api/pipeline", {"json": {"url": "http://127.0.0.1:9/", "analysis_fields": "bogus"}}),
+        ("post", "/api/analyze/incremental", {"json": {"text": "孩子", "analysis_fields": "bogus"}}),
+        ("post", "/api/analyze", {"data": {"text": "孩子", "fields": "bogus"}}),
+        ("post", "/api/upload/analyze", {"files": {"file": ("a.txt", b"x")}, "data": {"analysis_fields": "bogus"}}),
+    ],
+)
+def test_endpoints_reject_unknown_fields_with_422(client, method, url, kwargs):
+    resp = getattr(client, method)(url, **kwargs)
+    assert resp.status_code == 422
+    assert "bogus" in resp.json()["detail"]
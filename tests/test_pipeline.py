@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from bench_utils import make_html_handler, start_server
+
+
+@pytest.fixture(scope="module")
+def site():
+    counter = {}
+    server = start_server(make_html_handler(delay=0, counter=counter))
+    yield f"http://127.0.0.1:{server.server_port}", counter
+    server.shutdown()
+
+
+def events(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.filterwarnings("error::pydantic.PydanticDeprecatedSince20")
+def test_pipeline_streams_stages(client, site):
+    base, _ = site
+    evs = events(client.post("/api/pipeline", json={"url": f"{base}/page/11", "mode": "algorithm", "panels": 3}))
+    assert [(e["stage"], e.get("status")) for e in evs] == [
+        ("fetch", "start"),
+        ("fetch", "done"),
+        ("analyze", "done"),
+        ("generate", "start"),
+        ("done", None),
+    ]
+    assert "第11页第0段" in evs[1]["text"]
+    assert evs[2]["analysis"]["cn_chars"] > 0
+    assert "3koma" in evs[-1]["prompt"] and evs[-1]["panels"] == 3
+    assert all(a["elapsed_ms"] <= b["elapsed_ms"] for a, b in zip(evs, evs[1:]))
+
+
+def test_pipeline_reuses_fetch_cache_and_trims_payload(client, site):
+    base, counter = site
+    url = f"{base}/page/12"
+    body = {"url": url, "mode": "algorithm", "include_text": False, "analysis_fields": "cn_chars"}
+    first = events(client.post("/api/pipeline", json=body))
+    requests = counter["requests"]
+    second = events(client.post("/api/pipeline", json=body))
+    assert counter["requests"] == requests
+    assert first[1]["text"] is None
+    assert set(second[2]["analysis"]) == {"cn_chars", "truncated", "truncated_reason"}
+    assert second[-1]["prompt"] == first[-1]["prompt"]
+
+
+def test_pipeline_reports_fetch_error(client):
+    evs = events(client.post("/api/pipeline", json={"url": "http://127.0.0.1:9/", "mode": "algorithm"}))
+    assert evs[-1]["stage"] == "error" and "网页内容获取失败" in evs[-1]["error"]
+
+
+def test_pipeline_analysis_runs_off_event_loop(client, site, monkeypatch):
+    from app import main
+
+    base, _ = site
+    on_loop = []
+    real = main.analyzer.analyze
+
+    def probe(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(main.analyzer, "analyze", probe)
+    evs = events(client.post("/api/pipeline", json={"url": f"{base}/page/13", "mode": "algorithm"}))
+    assert evs[-1]["stage"] == "done"
+    assert on_loop == [False]
@@ -0,0 +1,99 @@
+import marshal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import requires_dict
+
+from app.core.profiler import PROFILE_HEADER, RequestProfiler, note_native, profiler as global_profiler
+
+
+def busy(n: int = 20000) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_disabled_profiler_does_nothing():
+    prof = RequestProfiler()
+    with prof.request("x", {PROFILE_HEADER: "anything"}) as record:
+        assert record is None
+        assert prof.call(busy, 10) == busy(10)
+    assert prof.records() == []
+    assert not prof.authorized("")
+
+
+def test_flagged_request_is_recorded():
+    prof = RequestProfiler(token="t", capacity=2)
+    with prof.request("analyze", {}) as record:
+        assert record is None  # 未带令牌、未抽中
+    with prof.request("analyze", {PROFILE_HEADER: "t"}) as record:
+        prof.call(busy)
+        note_native({"total_ms": 1.5})
+    [summary] = prof.records()
+    assert summary["flagged"] and summary["endpoint"] == "analyze"
+    assert summary["python_calls"] == 1 and summary["native"] == [{"total_ms": 1.5}]
+    assert any(h["function"].startswith("busy") or "genexpr" in h["function"] for h in summary["hot_functions"])
+    stats = marshal.loads(prof.pstats_bytes(record))
+    assert any(func[2] == "busy" for func in stats)
+    folded = prof.collapsed(record)
+    assert folded.startswith(f"analyze#{record.id};")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+    # 环形缓冲区只保留最近 capacity 条
+    for _ in range(3):
+        with prof.request("analyze", {PROFILE_HEADER: "t"}):
+            pass
+    assert len(prof.records()) == 2 and prof.get(record.id) is None
+
+
+def test_sampling():
+    prof = RequestProfiler(token="t", sample_rate=1.0)
+    with prof.request("generate", {}) as record:
+        assert record is not None and not record.flagged
+
+
+def test_only_one_cprofile_at_a_time():
+    prof = RequestProfiler(token="t")
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.2)
+
+    with prof.request("a", {PROFILE_HEADER: "t"}) as record:
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(prof.bind(slow))
+            started.wait()
+            pool.submit(prof.bind(busy)).result()
+            first.result()
+    assert len(record.profiles) == 1 and record.skipped == 1
+
+
+def test_bind_without_record_is_identity():
+    prof = RequestProfiler(token="t")
+    assert prof.bind(busy) is busy
+
+
+@requires_dict
+def test_debug_endpoints(client, analyzer, monkeypatch):
+    assert client.get("/api/debug/profiles").status_code == 404  # 未配置令牌
+    monkeypatch.setattr(global_profiler, "token", "t")
+    if analyzer.lib:
+        analyzer.lib.Analyzer_SetProfiling(1)
+    try:
+        assert client.post("/api/analyze", data={"text": "男方是巨婴。"}, headers={"X-Profile-Token": "t"}).status_code == 200
+        assert client.get("/api/debug/profiles", headers={"X-Profile-Token": "bad"}).status_code == 401
+        records = client.get("/api/debug/profiles", headers={"X-Profile-Token": "t"}).json()["profiles"]
+        latest = records[0]
+        assert latest["endpoint"] == "analyze" and latest["python_calls"] == 1
+        if analyzer.lib:
+            assert "segment_us" in latest["native"][0]
+        rid = latest["id"]
+        pst = client.get(f"/api/debug/profiles/{rid}.pstats", headers={"X-Profile-Token": "t"})
+        assert pst.status_code == 200 and marshal.loads(pst.content)
+        folded = client.get(f"/api/debug/profiles/{rid}.folded", headers={"X-Profile-Token": "t"})
+        assert folded.text.startswith(f"analyze#{rid};")
+        assert client.get("/api/debug/profiles/999999.folded", headers={"X-Profile-Token": "t"}).status_code == 404
+    finally:
+        if analyzer.lib:
+            analyzer.lib.Analyzer_SetProfiling(0)
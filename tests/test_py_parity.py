@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from bench_py_analyzer import parity_cases
+from conftest import requires_dict
+
+from app.core.py_analyzer import PyAnalyzer
+
+pytestmark = requires_dict
+
+FUZZ_CASES = 400
+FUZZ_PIECES = [
+    "# ", "## ", "###### ", "#", "\n", "\r\n", " ", "。", "！", "?", ".", "\t", "\0",
+    "离婚", "孩子", "家务", "补偿金", "男方", "巨婴", "长", "😀", "é", "«»", "％", "ｆｕｃｋ",
+    "fuck", "shit", "Bitch", "hello", "World", "isn't", "123", "a" * 70, "的",
+]
+
+
+def fuzz_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(1, 40)):
+        piece = rng.choice(FUZZ_PIECES)
+        parts.append(piece * (rng.randint(20, 60) if rng.random() < 0.1 else 1))
+    return "".join(parts)
+
+
+@pytest.fixture(scope="module")
+def engines(analyzer):
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    return analyzer, PyAnalyzer()
+
+
+def assert_same(c_result, py_result):
+    assert "error" not in c_result, c_result
+    assert c_result.keys() == py_result.keys()
+    for key in c_result:
+        assert c_result[key] == py_result[key], key
+
+
+@pytest.mark.parametrize("top_n", [10, 3, 0])
+@pytest.mark.parametrize("name, text", list(parity_cases()), ids=[name for name, _ in parity_cases()])
+def test_corpus_parity(engines, name, text, top_n):
+    c, py = engines
+    assert_same(c.analyze(text, top_n), py.analyze(text, top_n))
+
+
+def test_fuzz_parity(engines):
+    c, py = engines
+    rng = random.Random(1256)
+    for _ in range(FUZZ_CASES):
+        text = fuzz_text(rng)
+        assert_same(c.analyze(text, 10), py.analyze(text, 10))
+
+
+@pytest.mark.parametrize("prefix", ["", "a", "ab"])
+def test_long_multibyte_title_is_cut_at_character(engines, prefix):
+    c, py = engines
+    text = f"# {prefix}" + "长" * 50 + "\n正文内容。"
+    result = c.analyze(text, 0)
+    title = result["sections"][1]["title"]
+    assert len(title.encode("utf-8")) <= 127
+    assert title == (prefix + "长" * 50)[: len(title)]
+    assert_same(result, py.analyze(text, 0))
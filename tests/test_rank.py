@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from bench_rank import DEMO_TEXT
+from bench_scan import corpora, head
+from conftest import requires_dict
+
+from app.core.py_analyzer import PyAnalyzer
+
+pytestmark = requires_dict
+
+
+def test_tfidf_scores_and_order(analyzer):
+    words = analyzer.analyze(DEMO_TEXT, 0, "tfidf")["top_words"]
+    ranked = analyzer.analyze(DEMO_TEXT, 10, "tfidf")["top_words"]
+    assert all(w["score"] > 0 for w in ranked)
+    assert [w["score"] for w in ranked] == sorted((w["score"] for w in ranked), reverse=True)
+    # 前 10 个就是得分最高的 10 个
+    assert {w["word"] for w in ranked} == {w["word"] for w in sorted(words, key=lambda w: -w["score"])[:10]}
+
+
+def test_rare_terms_outrank_common_ones(analyzer):
+    freq = [w["word"] for w in analyzer.analyze(DEMO_TEXT, 3, "freq")["top_words"]]
+    tfidf = [w["word"] for w in analyzer.analyze(DEMO_TEXT, 3, "tfidf")["top_words"]]
+    assert freq[0] == "重新启动"
+    assert tfidf[0] == "页面替换策略"
+    assert "重新启动" not in tfidf
+
+
+def test_freq_mode_is_unchanged(analyzer):
+    result = analyzer.analyze(DEMO_TEXT, 10, "freq")
+    assert all("score" not in w for w in result["top_words"])
+    assert result == analyzer.analyze(DEMO_TEXT, 10)
+
+
+def test_unknown_words_share_median_weight(analyzer):
+    words = {w["word"]: w for w in analyzer.analyze("python python json zzzq kafka.", 0, "tfidf")["top_words"]}
+    weight = words["json"]["score"]
+    assert weight > 0
+    assert math.isclose(words["python"]["score"], 2 * weight)
+    assert math.isclose(words["zzzq"]["score"], weight) and math.isclose(words["kafka"]["score"], weight)
+
+
+@pytest.mark.parametrize("name, text", [(n, head(t, 60_000)) for n, t in corpora()], ids=lambda v: v[:8])
+def test_tfidf_parity(analyzer, name, text):
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    py = PyAnalyzer()
+    for top_n in (10, 0):
+        assert analyzer.analyze(text, top_n, "tfidf") == py.analyze(text, top_n, "tfidf")
+
+
+def test_unknown_rank_mode(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.analyze("文本", rank="bm25")
+
+
+def test_analyze_endpoint_rank(client):
+    body = client.post("/api/analyze", data={"text": DEMO_TEXT, "rank": "tfidf", "fields": "top_words"}).json()
+    assert body["top_words"][0]["word"] == "页面替换策略" and "score" in body["top_words"][0]
+    assert client.post("/api/analyze", data={"text": DEMO_TEXT, "rank": "bm25"}).status_code == 400
@@ -0,0 +1,68 @@
+import pytest
+
+from bench_redundancy import SIGNATURE, forum_thread
+from bench_utils import make_llm_handler, start_server
+
+from app.core.condense import estimate_tokens
+from app.core.generators import PromptGenerator
+from app.core.text_split import strip_spans
+
+
+@pytest.fixture(scope="module")
+def llm_inputs():
+    """记录 LLM 收到的 user 消息"""
+    inputs = []
+
+    def reply(payload):
+        inputs.append(payload["messages"][-1]["content"])
+        return "1girl, solo, classroom"
+
+    server = start_server(make_llm_handler(delay=0, reply=reply))
+    yield {"api_base": f"http://127.0.0.1:{server.server_port}/v1"}, inputs
+    server.shutdown()
+
+
+def test_repeated_sentences_are_reported(analyzer):
+    text = forum_thread(posts=20)
+    result = analyzer.analyze(text)
+    assert result["redundancy_count"] > 0
+    spans = result["redundant_spans"]
+    assert spans == sorted(spans) and all(s < e for s, e in spans)
+    data = text.encode("utf-8")
+    assert sum(e - s for s, e in spans) == result["redundant_bytes"]
+    # 签名第一次出现保留，之后的重复都在冗余区间内
+    stripped = strip_spans(text, spans)
+    assert stripped.count(SIGNATURE) == 1
+    assert len(stripped.encode("utf-8")) == len(data) - result["redundant_bytes"]
+
+
+def test_strip_spans_keeps_unmarked_text():
+    assert strip_spans("abcdef", [[1, 2], [4, 6]]) == "acd"
+    assert strip_spans("你好世界", [[3, 6]]) == "你世界"
+    assert strip_spans("abc", None) == "abc"
+
+
+def test_llm_input_untouched_by_default(analyzer, llm_inputs, monkeypatch):
+    monkeypatch.delenv("LLM_INPUT_TOKEN_BUDGET", raising=False)
+    config, inputs = llm_inputs
+    gen = PromptGenerator()
+    assert gen.default_config["token_budget"] == 0
+    text = forum_thread(posts=60)
+    assert estimate_tokens(text) > 3000
+    inputs.clear()
+    gen.generate(text, analyzer.analyze(text), mode="llm", llm_config=config)
+    assert text in inputs[0]
+
+
+def test_strip_redundant_and_budget_shrink_llm_input(analyzer, llm_inputs):
+    config, inputs = llm_inputs
+    gen = PromptGenerator()
+    text = forum_thread(posts=60)
+    analysis = analyzer.analyze(text)
+    inputs.clear()
+    gen.generate(text, analysis, mode="llm", llm_config=config, strip_redundant=True)
+    gen.generate(text, analysis, mode="llm", llm_config=config, token_budget=500)
+    stripped, condensed = inputs
+    assert strip_spans(text, analysis["redundant_spans"]) in stripped
+    assert stripped.count(SIGNATURE) == 1
+    assert len(condensed) < len(stripped) < len(text)
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from bench_scan import chinese, code, english, mixed
+from conftest import requires_dict
+
+from app.core.py_analyzer import PyAnalyzer
+
+pytestmark = requires_dict
+
+SAMPLE_BYTES = 60_000
+
+
+@pytest.fixture(scope="module")
+def engines(analyzer):
+    if not analyzer.lib:
+        pytest.skip("libanalyzer 未编译")
+    return analyzer, PyAnalyzer()
+
+
+def samples():
+    rng = random.Random(42)
+    yield "english", english(rng, SAMPLE_BYTES)
+    yield "code", code(rng, SAMPLE_BYTES)
+    yield "chinese", chinese(SAMPLE_BYTES)
+    yield "mixed", mixed(rng, SAMPLE_BYTES)
+
+
+@pytest.mark.parametrize("name, text", list(samples()), ids=[name for name, _ in samples()])
+def test_corpus_parity(engines, name, text):
+    c, py = engines
+    for top_n in (10, 0):
+        assert c.analyze(text, top_n) == py.analyze(text, top_n)
+
+
+def test_word_runs_across_swar_blocks(engines):
+    """字母串长度 1~20、起始偏移 0~7：覆盖 8 字节块内、跨块、恰好整块结束的情况"""
+    c, py = engines
+    seps = [" ", "  ", "        ", "123", ",", "'", "孩子", "\n", "é", "_"]
+    rng = random.Random(7)
+    for offset in range(8):
+        parts = ["#" * offset]
+        for length in range(1, 21):
+            word = "".join(rng.choice("aZmqxAFuck") for _ in range(length))
+            parts.append(word + rng.choice(seps))
+        text = "".join(parts)
+        assert c.analyze(text, 0) == py.analyze(text, 0), text
+
+
+def test_ascii_boundaries(engines):
+    # 字母表两端及相邻字节：@ [ ` { 不是字母
+    c, py = engines
+    text = "@A Z[ `a z{ AZ az @Az{ ~\x7f\x01 FUCK Fuck fuck"
+    result = c.analyze(text, 0)
+    assert result == py.analyze(text, 0)
+    assert result["en_words"] == 10
+
+
+def test_truncated_multibyte_tail(engines):
+    c, _ = engines
+    for tail in (b"\xe5", b"\xe5\xad", b"\xf0\x9f\x98"):
+        result = c.analyze_bytes(b"hello world " + tail)
+        assert "error" not in result
+        assert result["en_words"] == 2
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import requires_dict
+
+from app.core.py_analyzer import PyAnalyzer
+from app.core.text_split import section_keywords, split_panels, split_sections
+
+pytestmark = requires_dict
+
+DOC = "前言：男方是巨婴。\n# 家务\n孩子孩子，家务家务家务。fuck\n## 补偿\n补偿金补偿金，shit.\n# 空\n"
+
+
+def test_per_section_stats(analyzer):
+    result = analyzer.analyze(DOC, 10)
+    sections = result["sections"]
+    assert [s["title"] for s in sections] == ["Introduction", "家务", "补偿", "空"]
+    assert [s["level"] for s in sections] == [0, 1, 2, 1]
+    home = sections[1]
+    assert {w["word"]: w["freq"] for w in home["top_words"]} == {"家务": 3, "孩子": 2}
+    assert home["top_words"][0]["word"] == "家务"
+    assert home["sensitive_count"] == 1 and home["sensitive_words"] == ["fuck"]
+    assert sections[2]["sensitive_words"] == ["shit"]
+    assert sum(s["sensitive_count"] for s in sections) == result["sensitive_count"]
+    assert sections[3]["word_count"] == 0 and sections[3]["top_words"] == []
+
+
+def test_sections_are_not_capped(analyzer):
+    text = "".join(f"# 标题{i}\n孩子{'家务' * (i % 3)}。\n" for i in range(5000))
+    result = analyzer.analyze(text, 0)
+    assert len(result["sections"]) == 5001
+    assert result["sections"][-1]["title"] == "标题4999"
+    # 结果超过 1 MB 的初始缓冲区仍完整返回
+    if analyzer.lib:
+        assert result == PyAnalyzer().analyze(text, 0)
+
+
+def test_split_panels_carries_section_stats(analyzer):
+    text = "".join(f"# 第{i}章\n孩子{'家务' * i}，补偿金。\n" for i in range(1, 5))
+    analysis = analyzer.analyze(text, 10)
+    parts = split_panels(text, analysis, 2)
+    assert len(parts) == 2
+    assert "".join(chunk for chunk, _ in parts) == text
+    assert sum(len(secs) for _, secs in parts) == 4
+    assert section_keywords(parts[1][1], 2)[0] == "家务"
+
+
+def test_split_panels_falls_back_to_sentences():
+    text = "男方是巨婴。不做家务！不带孩子？但他给了补偿金。"
+    parts = split_panels(text, {"sections": [{"length": len(text)}]}, 3)
+    assert len(parts) == 3
+    assert "".join(chunk for chunk, _ in parts) == text
+    assert all(secs == [] for _, secs in parts)
+    # 句子数少于分镜数时返回的段数更少
+    assert len(split_panels("只有一句", {}, 4)) == 1
+
+
+def test_split_sections_keeps_preamble():
+    assert split_sections("前言\n# A\n正文\n#不是标题\n## B\n") == ["前言\n", "# A\n正文\n#不是标题\n", "## B\n"]
+
+
+def test_section_keywords_prefers_scores():
+    sections = [
+        {"top_words": [{"word": "a", "freq": 5, "score": 1.0}, {"word": "b", "freq": 1, "score": 4.0}]},
+        {"top_words": [{"word": "a", "freq": 1, "score": 2.0}]},
+    ]
+    assert section_keywords(sections) == ["b", "a"]
+    assert section_keywords([{"top_words": [{"word": "x", "freq": 2}, {"word": "y", "freq": 3}]}]) == ["y", "x"]
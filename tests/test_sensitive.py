@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from bench_sensitive import labelled_samples, load_words
+from conftest import requires_dict
+
+from app.core.generators import PromptGenerator
+from app.core.py_analyzer import SENSITIVE_HITS_MAX, PyAnalyzer
+
+pytestmark = requires_dict
+
+
+@pytest.fixture(scope="module")
+def word_lists():
+    cn = [w for w in load_words("Chinese/sensitive_words_cn.txt") if not w.isascii()]
+    en = load_words("English/sensitive_words_en.txt")
+    return cn, en
+
+
+def byte_span(text: str, word: str, start: int = 0) -> list:
+    i = text.index(word, start)
+    begin = len(text[:i].encode("utf-8"))
+    return [begin, begin + len(word.encode("utf-8"))]
+
+
+def test_hits_are_byte_offsets_on_word_boundaries(analyzer):
+    text = "a shit. Shithead x, class assumes, 孩子ASSHOLE！"
+    result = analyzer.analyze(text)
+    assert result["sensitive_hits"] == [byte_span(text, "shit"), byte_span(text, "ASSHOLE")]
+    assert result["sensitive_hits_truncated"] is False
+
+
+def test_embedded_and_overlapping_chinese_words(analyzer, word_lists):
+    cn, _ = word_lists
+    short, long_ = next((a, b) for a in cn for b in cn if a != b and b.endswith(a))
+    text = "前面的文字" + long_ + "后面的文字"
+    hits = analyzer.analyze(text)["sensitive_hits"]
+    end = byte_span(text, long_)[1]
+    # 同一位置结束的词：长的在前
+    assert [end - len(long_.encode("utf-8")), end] in hits
+    assert hits.index([end - len(long_.encode("utf-8")), end]) < hits.index([end - len(short.encode("utf-8")), end])
+    assert [h[1] for h in hits] == sorted(h[1] for h in hits)
+
+
+def test_hits_are_capped(analyzer):
+    result = analyzer.analyze("shit. " * (SENSITIVE_HITS_MAX + 100))
+    assert len(result["sensitive_hits"]) == SENSITIVE_HITS_MAX
+    assert result["sensitive_hits_truncated"] is True
+    assert result["sensitive_count"] == SENSITIVE_HITS_MAX + 100
+
+
+def test_labelled_recall_and_parity(analyzer, word_lists):
+    cn, en = word_lists
+    samples = labelled_samples(random.Random(48), cn, en)[:500]
+    py = PyAnalyzer()
+    for text, span in samples:
+        result = analyzer.analyze(text)
+        assert list(span) in result["sensitive_hits"], text
+        if analyzer.lib:
+            assert result == py.analyze(text), text
+
+
+def test_clean_text_has_no_hits(analyzer):
+    text = "Classic assumptions: the class passes. 孩子和家务。Scunthorpe"
+    assert analyzer.analyze(text)["sensitive_hits"] == []
+
+
+def test_algorithm_filter_uses_hits(analyzer):
+    # 只有位置命中（sensitive_words 为空，如敏感词被分词合并进更长的词）时同样追加安全标签
+    gen = PromptGenerator(analyzer)
+    analysis = analyzer.analyze("男方是巨婴。")
+    assert "safe for work" not in gen.generate(text="男方是巨婴。", analysis=analysis, mode="algorithm")["prompt"]
+    analysis = dict(analysis, sensitive_hits=[[0, 4]])
+    assert "safe for work" in gen.generate(text="男方是巨婴。", analysis=analysis, mode="algorithm")["prompt"]
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)), flight.do("other", work))
+
+    assert asyncio.run(main()) == ["result"] * 6
+    assert len(runs) == 2
+    assert (flight.calls, flight.coalesced, flight.inflight()) == (2, 4, 0)
+
+
+def test_exception_reaches_every_waiter_and_key_is_released():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+        again = await flight.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert again == "ok"
+    assert flight.calls == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_task():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 42
+
+
+def test_timeout_applies_to_shared_task():
+    flight = SingleFlight(timeout=0.02)
+
+    async def main():
+        await flight.do("k", lambda: asyncio.sleep(1))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
@@ -0,0 +1,103 @@
+import io
+import json
+import tempfile
+
+import pytest
+
+from conftest import requires_dict
+
+from app.core.upload import CHUNK_SIZE, UploadedText, decode_bytes, detect_encoding
+
+TEXT = "男方是巨婴，不做家务不带孩子。但他给了40万补偿金。\n"
+
+
+def spooled(data: bytes):
+    f = tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE)
+    f.write(data)
+    f.seek(0)
+    return f
+
+
+def big_text() -> str:
+    # 前缀 1 字节，保证多字节字符跨过读取块边界
+    return "x" + TEXT * (CHUNK_SIZE * 2 // len(TEXT.encode("utf-8")))
+
+
+@pytest.mark.parametrize("encoding, expected", [
+    ("utf-8", "utf-8"), ("gbk", "gb18030"), ("utf-8-sig", "utf-8-sig"), ("utf-16", "utf-16"),
+])
+def test_detect_and_decode(encoding, expected):
+    data = TEXT.encode(encoding)
+    assert detect_encoding(io.BytesIO(data)) == expected
+    assert decode_bytes(data) == TEXT
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk", "utf-16"])
+@pytest.mark.parametrize("make", [lambda: TEXT * 3, big_text], ids=["small", "large"])
+def test_uploaded_text_is_nul_terminated_utf8(encoding, make):
+    text = make()
+    with UploadedText(spooled(text.encode(encoding))) as upload:
+        buf = upload.buffer
+        assert upload.size == len(text.encode("utf-8"))
+        assert upload.text() == text
+        if isinstance(buf, bytes):
+            assert buf == text.encode("utf-8")
+        else:
+            assert buf[upload.size] == 0
+            assert buf[:64] == text.encode("utf-8")[:64]
+
+
+def test_large_utf8_upload_is_not_copied():
+    text = big_text()
+    f = spooled(text.encode("utf-8"))
+    with UploadedText(f) as upload:
+        assert upload.encoding == "utf-8"
+        assert upload._tmp is None  # 直接映射上传的临时文件
+
+
+@requires_dict
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk"])
+def test_analyze_bytes_matches_analyze(analyzer, encoding):
+    text = big_text()
+    with UploadedText(spooled(text.encode(encoding))) as upload:
+        assert analyzer.analyze_bytes(upload.buffer, 10) == analyzer.analyze(text, 10)
+
+
+def test_upload_decodes_gbk(client):
+    resp = client.post("/api/upload", files={"file": ("a.txt", TEXT.encode("gbk"), "text/plain")})
+    assert resp.status_code == 200
+    assert resp.json()["content"] == TEXT
+
+
+@pytest.mark.filterwarnings("error::pydantic.PydanticDeprecatedSince20")
+def test_upload_and_analyze(client, analyzer):
+    text = TEXT * 50
+    options = json.dumps({"mode": "algorithm", "panels": 2, "analysis_fields": "cn_chars,top_words"})
+    resp = client.post(
+        "/api/upload/analyze",
+        files={"file": ("a.txt", text.encode("gbk"), "text/plain")},
+        data={"options": options},
+    )
+    body = resp.json()
+    assert resp.status_code == 200 and body["success"]
+    assert body["encoding"] == "gb18030"
+    assert body["bytes"] == len(text.encode("utf-8"))
+    assert body["panels"] == 2 and body["prompt"]
+    assert set(body["analysis"]) >= {"cn_chars", "top_words"}
+    assert body["analysis"]["cn_chars"] == analyzer.analyze(text)["cn_chars"]
+
+
+def test_upload_and_analyze_without_options(client):
+    resp = client.post("/api/upload/analyze", files={"file": ("a.txt", TEXT.encode("utf-8"), "text/plain")})
+    body = resp.json()
+    assert body["success"] and body["prompt"] is None
+
+
+@pytest.mark.filterwarnings("error::pydantic.PydanticDeprecatedSince20")
+def test_upload_and_analyze_rejects_bad_options(client):
+    resp = client.post(
+        "/api/upload/analyze",
+        files={"file": ("a.txt", TEXT.encode("utf-8"), "text/plain")},
+        data={"options": "{not json"},
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,72 @@
+import os
+import threading
+
+from bench_utils import make_llm_handler, make_ollama_handler, start_server
+
+from app.core.generators import LLM_SYSTEM_PROMPT, LLM_TASK_PREAMBLE, build_user_prompt
+from app.core.llm_router import Backend, CircuitBreaker
+from app.core.warmup import ModelWarmer
+
+
+def backend(port: int, suffix: str = "/v1") -> Backend:
+    return Backend(f"http://127.0.0.1:{port}{suffix}", "key", "llama3", CircuitBreaker())
+
+
+def test_prompt_prefix_is_byte_identical_across_requests():
+    a = build_user_prompt("第一段原文", "清新简洁", "anime", "2 Panels", keywords=["教室"])
+    b = build_user_prompt("完全不同的另一段", "水墨", "ink", "4 Panels")
+    assert os.path.commonprefix([a, b]).startswith(LLM_TASK_PREAMBLE)
+    # 原文放在最后
+    assert a.endswith('Input Text: "第一段原文"\n\nOutput Tags:')
+
+
+def test_ollama_backend_warmed_with_keep_alive():
+    counter = {}
+    server = start_server(make_ollama_handler(load_time=0, per_char=0, counter=counter))
+    try:
+        warmer = ModelWarmer([backend(server.server_port)], LLM_SYSTEM_PROMPT, keep_alive="5m", interval=0)
+        assert warmer.is_ollama(warmer.backends[0])
+        assert warmer.warm(warmer.backends[0], verbose=False)
+        assert counter["loads"] == 1
+        assert warmer.backends[0].api_base in warmer.last_warm
+    finally:
+        server.shutdown()
+
+
+def test_openai_backend_warmed_with_one_token_request():
+    seen = []
+
+    def reply(payload):
+        seen.append(payload)
+        return "ok"
+
+    server = start_server(make_llm_handler(delay=0, reply=reply))
+    try:
+        warmer = ModelWarmer([backend(server.server_port)], LLM_SYSTEM_PROMPT, interval=0)
+        assert not warmer.is_ollama(warmer.backends[0])
+        assert warmer.warm(warmer.backends[0], verbose=False)
+        assert seen[0]["max_tokens"] == 1
+        assert seen[0]["messages"][0]["content"] == LLM_SYSTEM_PROMPT
+    finally:
+        server.shutdown()
+
+
+def test_unreachable_backend_does_not_raise():
+    warmer = ModelWarmer([backend(9)], LLM_SYSTEM_PROMPT, timeout=1, interval=0)
+    assert warmer.warm(warmer.backends[0], verbose=False) is False
+    assert warmer.last_warm == {}
+
+
+def test_keepalive_loop_refreshes_ollama_until_stopped():
+    counter = {}
+    server = start_server(make_ollama_handler(load_time=0, per_char=0, counter=counter))
+    try:
+        warmer = ModelWarmer([backend(server.server_port)], LLM_SYSTEM_PROMPT, interval=0.05)
+        warmer.start()
+        threading.Event().wait(0.3)
+        warmer.stop()
+        warmer._thread.join(1)
+        assert not warmer._thread.is_alive()
+        assert counter["requests"] >= 3
+    finally:
+        server.shutdown()